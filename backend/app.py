@@ -36,6 +36,9 @@ from supabase import create_client, Client
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 from supabase_client import get_supabase, supabase_admin
+from middleware.identity_cache import get_verified_user, identity_cache
+from utils.student_stats import student_stats
+from utils.id_allocator import next_register_number, next_admission_register_number
 import requests
 import logging
 import bcrypt
@@ -277,8 +280,8 @@ def supabase_auth_required(fn):
 
         token = auth_header.split(' ')[1]
         try:
-            # Verify the token with Supabase
-            user = supabase.auth.get_user(token)
+            # Verify the token with Supabase (cached until the token expires)
+            user = get_verified_user(token, supabase)
             if not user:
                 response = jsonify({"message": "Invalid or expired token"}), 401
                 return add_cors_headers(response)
@@ -476,7 +479,8 @@ def health():
         'cors': {
             'allowed_origins': ALLOWED_ORIGINS,
             'supports_credentials': True
-        }
+        },
+        'auth_cache': identity_cache.stats()
     }), 200
 
 # Basic API endpoints for testing
@@ -531,16 +535,8 @@ def submit_application():
         application_id = f"APP{datetime.now().year}{uuid.uuid4().hex[:6].upper()}"
         year = datetime.now().year
 
-        # Get the count of existing students to generate next register number
-        if supabase:
-            try:
-                count_response = supabase.table('students').select('id', count='exact').execute()
-                student_count = count_response.count if count_response.count else 0
-                register_number = f"REG{year}{(student_count + 1):03d}"
-            except:
-                register_number = f"REG{year}001"
-        else:
-            register_number = f"REG{year}001"
+        # Next register number from the shared sequence (utils/id_allocator.py)
+        register_number = next_admission_register_number()
 
         # Prepare student data for database
         student_data = {
@@ -1014,132 +1010,43 @@ def list_students():
         }), 500
 
 # Student statistics endpoint
-# In case of upstream DB timeouts or errors, return cached or partial data instead of a hard 500 where possible
-_last_student_stats_cache = {
-    'stats': None,
-    'timestamp': None
-}
-
+# Served from the shared stats snapshot (utils/student_stats.py); on upstream DB
+# timeouts or errors the last good snapshot is returned with partial=True
 @app.route('/api/students/stats', methods=['GET', 'OPTIONS'])
 @supabase_auth_required
 def get_student_stats():
     try:
-        # Log the request
         app.logger.info('Received request for student stats')
-        app.logger.debug(f'Request headers: {request.headers}')
-
-        # Get the current user's identity
-        current_user = request.user
-        app.logger.info(f'Authenticated user: {current_user}')
-
-        # Get Supabase client
-        supabase = get_supabase()
-        if not supabase:
-            app.logger.error('Failed to initialize Supabase client')
-            # If we have cached stats, return them instead of failing
-            if _last_student_stats_cache['stats']:
-                app.logger.warning('Returning cached stats due to DB init failure')
-                cached = _last_student_stats_cache['stats']
-                cached['partial'] = True
-                return jsonify(cached)
-            return jsonify({'error': 'Database connection error'}), 500
-
-        try:
-            # Get total number of students (efficient count)
-            response = supabase.table('students').select('id', count='exact').execute()
-            total_students = response.count if hasattr(response, 'count') else (len(response.data) if response.data else 0)
-            app.logger.debug(f'Total students: {total_students}')
-
-            # Efficient gender aggregation: fetch genders in a paginated manner to avoid long-running reads
-            gender_counts = {'male': 0, 'female': 0, 'other': 0}
-            try:
-                # Fetch in pages of 1000 to limit read time
-                limit = 1000
-                offset = 0
-                while True:
-                    gender_resp = supabase.table('students').select('gender').limit(limit).offset(offset).execute()
-                    data = gender_resp.data if hasattr(gender_resp, 'data') else None
-                    if not data:
-                        break
-                    for student in data:
-                        gender = str(student.get('gender', '')).lower()
-                        if 'male' in gender:
-                            gender_counts['male'] += 1
-                        elif 'female' in gender:
-                            gender_counts['female'] += 1
-                        else:
-                            gender_counts['other'] += 1
-                    if len(data) < limit:
-                        break
-                    offset += limit
-            except Exception as gender_err:
-                app.logger.warning(f'Gender aggregation failed: {str(gender_err)}')
-
-            # Get department count
-            dept_count = 0
-            try:
-                dept_response = supabase.table('departments').select('id', count='exact').execute()
-                dept_count = dept_response.count if hasattr(dept_response, 'count') else (len(dept_response.data) if dept_response.data else 0)
-            except Exception as dept_error:
-                app.logger.warning(f'Could not fetch department count: {str(dept_error)}')
-
-            # Get faculty count
-            faculty_count = 0
-            try:
-                faculty_response = supabase.table('faculty').select('id', count='exact').execute()
-                faculty_count = faculty_response.count if hasattr(faculty_response, 'count') else (len(faculty_response.data) if faculty_response.data else 0)
-            except Exception as faculty_error:
-                app.logger.warning(f'Could not fetch faculty count: {str(faculty_error)}')
+        snapshot = student_stats.get()
 
-            app.logger.debug(f'Department count: {dept_count}, Faculty count: {faculty_count}')
-
-            # Prepare response in the format expected by the frontend
-            stats = {
-                'success': True,
-                'total_students': total_students,
-                'recent_students': 0,
-                'by_status': {
-                    'active': 0,
-                    'inactive': 0,
-                    'graduated': 0,
-                    'suspended': 0
-                },
-                'by_course': [],
-                'by_year': [],
-                'total': total_students,
-                'male': gender_counts['male'],
-                'female': gender_counts['female'],
-                'other': gender_counts['other'],
-                'departments': dept_count,
-                'faculty': faculty_count
-            }
-
-            # Update cache
-            try:
-                _last_student_stats_cache['stats'] = stats.copy()
-                _last_student_stats_cache['timestamp'] = datetime.utcnow()
-            except Exception:
-                app.logger.warning('Failed to update student stats cache')
-
-            app.logger.info('Successfully fetched student stats')
-            return jsonify(stats)
+        # Prepare response in the format expected by the frontend
+        stats = {
+            'success': True,
+            'total_students': snapshot['total'],
+            'recent_students': snapshot['recent'],
+            'by_status': {
+                'active': 0,
+                'inactive': 0,
+                'graduated': 0,
+                'suspended': 0,
+                **snapshot['by_status']
+            },
+            'by_course': [{'course_id': course_id, 'count': count}
+                          for course_id, count in snapshot['by_course'].items()],
+            'by_year': [{'year': year, 'count': count}
+                        for year, count in sorted(snapshot['by_year'].items())],
+            'total': snapshot['total'],
+            'male': snapshot['gender']['male'],
+            'female': snapshot['gender']['female'],
+            'other': snapshot['gender']['other'],
+            'departments': snapshot['departments'],
+            'faculty': snapshot['faculty']
+        }
+        if snapshot.get('partial'):
+            stats['partial'] = True
+            stats['error_details'] = snapshot.get('error_details')
 
-        except Exception as db_error:
-            app.logger.error(f'Database error in get_student_stats: {str(db_error)}')
-            app.logger.error(traceback.format_exc())
-            # If we have cached stats, return them as partial result
-            if _last_student_stats_cache['stats']:
-                app.logger.warning('Returning cached stats due to DB error')
-                cached = _last_student_stats_cache['stats']
-                cached['partial'] = True
-                cached['error_details'] = str(db_error)
-                return jsonify(cached)
-            # Otherwise return a clear error
-            return jsonify({
-                'success': False,
-                'error': 'Database error',
-                'details': str(db_error)
-            }), 500
+        return jsonify(stats)
 
     except Exception as e:
         app.logger.error(f'Error in get_student_stats: {str(e)}')
@@ -1465,22 +1372,8 @@ def add_student():
             
         # Generate register_number if not provided
         if not data.get('register_number'):
-            # Format: REG + current year (last 2 digits) + 5 random digits
-            current_year = datetime.now().year % 100  # Get last 2 digits of year
-            random_digits = ''.join(random.choices('0123456789', k=5))
-            data['register_number'] = f'REG{current_year}{random_digits}'
-            
-            # Ensure the generated register_number is unique
-            while True:
-                existing = supabase.table('students') \
-                    .select('id') \
-                    .eq('register_number', data['register_number']) \
-                    .execute()
-                if not existing.data:
-                    break
-                # If exists, generate a new one
-                random_digits = ''.join(random.choices('0123456789', k=5))
-                data['register_number'] = f'REG{current_year}{random_digits}'
+            # Format: REG + current year (last 2 digits) + 5-digit sequence
+            data['register_number'] = next_register_number()
 
         # Validate email format
         email = data['email'].strip().lower()
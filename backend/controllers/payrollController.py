@@ -6,8 +6,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from models.supabase_payroll import payroll_model
+from utils.payslips import payslip_store, payslip_jobs, start_payslip_run, normalize_pay_month
 from datetime import datetime, date
 import logging
 
@@ -274,6 +275,39 @@ def calculate_payroll():
             'error': str(e)
         }), 500
 
+@payroll_bp.route('/calculate/bulk', methods=['POST'])
+def calculate_bulk_payroll():
+    """Calculate and save payroll for every active faculty member for a month"""
+    try:
+        data = request.get_json() or {}
+        try:
+            pay_month = normalize_pay_month(data.get('pay_month'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        result = payroll_model.run_monthly_payroll(
+            pay_month=pay_month,
+            total_days=data.get('total_days'),
+            attendance=data.get('attendance'),
+            faculty_ids=data.get('faculty_ids')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': f'Payroll calculated for {result["calculated"]} faculty, {result["locked"]} already approved or paid, {result["error_count"]} errors.'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error calculating bulk payroll: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @payroll_bp.route('/bulk-approve', methods=['POST'])
 def bulk_approve_payroll():
     """Bulk approve multiple payroll records"""
@@ -302,6 +336,34 @@ def bulk_approve_payroll():
             'error': str(e)
         }), 500
 
+@payroll_bp.route('/bulk-pay', methods=['POST'])
+def bulk_mark_payroll_as_paid():
+    """Bulk mark multiple payroll records as paid"""
+    try:
+        data = request.get_json() or {}
+        payroll_ids = data.get('payroll_ids', [])
+        
+        if not payroll_ids:
+            return jsonify({
+                'success': False,
+                'error': 'No payroll IDs provided'
+            }), 400
+        
+        result = payroll_model.bulk_mark_as_paid(payroll_ids)
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': f'Bulk payment completed. {result["success_count"]} records marked as paid, {result["error_count"]} errors.'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in bulk mark payroll as paid: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @payroll_bp.route('/payslip/<int:payroll_id>', methods=['GET'])
 def generate_payslip(payroll_id):
     """Generate payslip for payroll record"""
@@ -335,6 +397,128 @@ def generate_payslip(payroll_id):
             'error': str(e)
         }), 500
 
+@payroll_bp.route('/payslips/bulk', methods=['POST'])
+def generate_bulk_payslips():
+    """Render PDF payslips for every payroll record of a month in the background"""
+    try:
+        data = request.get_json() or {}
+        try:
+            pay_month = normalize_pay_month(data.get('pay_month'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        job = start_payslip_run(pay_month)
+        
+        return jsonify({
+            'success': True,
+            'data': job,
+            'message': f'Payslip generation started for {pay_month}'
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting bulk payslip generation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@payroll_bp.route('/payslips/bulk/<pay_month>', methods=['GET'])
+def get_bulk_payslip_status(pay_month):
+    """Progress of the latest payslip run for a month and the manifest it produced"""
+    try:
+        try:
+            pay_month = normalize_pay_month(pay_month)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        job = payslip_jobs.get(pay_month)
+        manifest = payslip_store.load_manifest(pay_month)
+        if not job and not manifest:
+            return jsonify({
+                'success': False,
+                'error': 'No payslips generated for this month'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'job': job,
+                'manifest': manifest,
+                'archive_url': f'/api/payroll/payslips/bulk/{pay_month}/archive' if manifest and manifest.get('archive') else None
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching payslip run for {pay_month}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@payroll_bp.route('/payslips/bulk/<pay_month>/archive', methods=['GET'])
+def download_bulk_payslips(pay_month):
+    """Every payslip of the month's latest run as a ZIP"""
+    try:
+        try:
+            pay_month = normalize_pay_month(pay_month)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        path = payslip_store.archive_path(pay_month)
+        if not path:
+            return jsonify({
+                'success': False,
+                'error': 'No payslip archive for this month'
+            }), 404
+        
+        return send_file(path, mimetype='application/zip', as_attachment=True,
+                         download_name=f'payslips_{pay_month[:7]}.zip')
+        
+    except Exception as e:
+        logger.error(f"Error downloading payslips for {pay_month}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@payroll_bp.route('/payslips/bulk/<pay_month>/<int:payroll_id>.pdf', methods=['GET'])
+def download_payslip_pdf(pay_month, payroll_id):
+    """One rendered payslip from the month's latest run"""
+    try:
+        try:
+            pay_month = normalize_pay_month(pay_month)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        entry = ((payslip_store.load_manifest(pay_month) or {}).get('payslips') or {}).get(str(payroll_id))
+        path = payslip_store.object_path(pay_month, entry['digest']) if entry else None
+        if not path or not os.path.exists(path):
+            return jsonify({
+                'success': False,
+                'error': 'Payslip not found'
+            }), 404
+        
+        return send_file(path, mimetype='application/pdf', download_name=entry['file'])
+        
+    except Exception as e:
+        logger.error(f"Error downloading payslip {payroll_id} for {pay_month}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @payroll_bp.route('/months', methods=['GET'])
 def get_available_months():
     """Get available payroll months"""
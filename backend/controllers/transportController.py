@@ -2,9 +2,13 @@
 Transport Controllers for ST College Transport Management System
 """
 
-from flask import jsonify, request
+from flask import jsonify, request, Response, stream_with_context
 from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
 import json
+import os
 from models.transport_models import (
     TransportStudent, TransportFaculty, Bus, Driver, Route, 
     TransportFee, TransportAttendance, LiveLocation, TransportActivity
@@ -16,6 +20,14 @@ from models.supabase_transport_adapter import (
 )
 from models.supabase_transport_fee import SupabaseTransportFee
 from supabase_client import get_supabase
+from utils.swr_cache import StaleWhileRevalidateCache
+
+# The dashboard snapshot is served from memory for TRANSPORT_METRICS_TTL seconds,
+# then returned stale (while one request refreshes it in the background) for up
+# to TRANSPORT_METRICS_STALE_TTL more.
+TRANSPORT_METRICS_TTL = int(os.getenv('TRANSPORT_METRICS_TTL', '30'))
+TRANSPORT_METRICS_STALE_TTL = int(os.getenv('TRANSPORT_METRICS_STALE_TTL', '300'))
+metrics_cache = StaleWhileRevalidateCache(TRANSPORT_METRICS_TTL, TRANSPORT_METRICS_STALE_TTL)
 
 class TransportController:
     """Main Transport Controller"""
@@ -24,6 +36,7 @@ class TransportController:
         # Use Supabase models for production (where available)
         supabase = get_supabase()
 
+        self.supabase = supabase
         self.student_model = SupabaseTransportStudent(supabase)
         self.faculty_model = SupabaseTransportFaculty(supabase)
         self.bus_model = SupabaseBus(supabase)
@@ -34,37 +47,105 @@ class TransportController:
         self.location_model = SupabaseLiveLocation(supabase)
         self.activity_model = SupabaseTransportActivity(supabase)
 
+    def _fetch_page(self, model):
+        """Fetch the page described by the query string from ``model``.
+
+        Paging (limit/offset/page or cursor) and sorting (sort, order=asc|desc)
+        are pushed down to Supabase; every other argument is a model filter.
+        Returns the page dict from ``model.get_page`` plus the echoed
+        pagination fields for the response.
+        """
+        filters = request.args.to_dict()
+
+        # Extract pagination parameters
+        limit = int(filters.get('limit', 50))
+        offset = int(filters.get('offset', 0))
+        page = int(filters.get('page', 1))
+        cursor = filters.get('cursor')
+        sort = filters.get('sort')
+        order = filters.get('order', '').lower()
+        desc = {'desc': True, 'asc': False}.get(order)
+
+        # Remove pagination from filters for the model
+        model_filters = {k: v for k, v in filters.items()
+                       if k not in ['limit', 'offset', 'page', 'cursor', 'sort', 'order']}
+
+        start_idx = offset if offset > 0 else (page - 1) * limit
+        result = model.get_page(model_filters, limit=limit, offset=start_idx,
+                                cursor=cursor, sort=sort, desc=desc)
+        # get_page clamps limit to MAX_PAGE_SIZE; report and page by what it used
+        limit = result['limit']
+        result.update({
+            'offset': offset,
+            'page': page,
+            'pages': (result['total'] + limit - 1) // limit
+        })
+        return result
+
+    @staticmethod
+    def _page_response(result, data, **extra):
+        return jsonify({
+            'success': True,
+            'data': data,
+            'total': result['total'],
+            'limit': result['limit'],
+            'offset': result['offset'],
+            'page': result['page'],
+            'pages': result['pages'],
+            'next_cursor': result['next_cursor'],
+            **extra
+        })
+
 class DashboardController(TransportController):
     """Dashboard Metrics Controller"""
     
+    def _load_snapshot(self):
+        """Run every dashboard query concurrently; each is a count or one aggregate row"""
+        today = str(date.today())
+        queries = {
+            'total_students': lambda: self.student_model.count(),
+            'faculty_users': lambda: self.faculty_model.count(),
+            'active_buses': lambda: self.bus_model.count({'status': 'Active'}),
+            'total_drivers': lambda: self.driver_model.count(),
+            'attendance_today': lambda: self.attendance_model.count({'date': today}),
+            'present_today': lambda: self.attendance_model.count({'date': today, 'status': 'Present'}),
+            'active_routes': lambda: self.route_model.count({'status': 'Active'}),
+            'fee_stats': lambda: self.fee_model.get_payment_statistics(),
+            'recent_activities': lambda: self.activity_model.get_recent(4),
+        }
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            futures = {name: pool.submit(query) for name, query in queries.items()}
+            return {name: future.result() for name, future in futures.items()}
+
     def get_metrics(self):
         """Get dashboard metrics"""
         try:
+            snapshot = metrics_cache.get('dashboard', self._load_snapshot)
+
             # Get counts
-            total_students = len(self.student_model.get_all())
-            faculty_users = len(self.faculty_model.get_all())
-            active_buses = len(self.bus_model.get_all({'status': 'Active'}))
-            total_drivers = len(self.driver_model.get_all())
+            total_students = snapshot['total_students']
+            faculty_users = snapshot['faculty_users']
+            active_buses = snapshot['active_buses']
+            total_drivers = snapshot['total_drivers']
             
             # Calculate attendance percentage
-            attendance_records = self.attendance_model.get_all({'date': str(date.today())})
-            if attendance_records:
-                present_count = len([r for r in attendance_records if r['status'] == 'Present'])
-                attendance_percentage = round((present_count / len(attendance_records)) * 100, 1)
+            if snapshot['attendance_today']:
+                present_count = snapshot['present_today']
+                attendance_percentage = round((present_count / snapshot['attendance_today']) * 100, 1)
             else:
                 attendance_percentage = 92.5  # Default value
             
             # Calculate fee collection rate and pending fees using fee stats
-            fee_stats = self.fee_model.get_payment_statistics()
+            fee_stats = snapshot['fee_stats']
             fee_collection_rate = fee_stats.get('collection_rate', 87.3)
             pending_fees = fee_stats.get('pending_amount', 0)
             
             # Get active routes
-            active_routes = len(self.route_model.get_all({'status': 'Active'}))
+            active_routes = snapshot['active_routes']
             
             # Get recent activities
             try:
-                recent_activities = self.activity_model.get_recent(4)
+                recent_activities = snapshot['recent_activities']
                 formatted_activities = []
                 for activity in recent_activities:
                     # Handle different time field names (time or created_at)
@@ -146,34 +227,17 @@ class StudentController(TransportController):
     def get_students(self):
         """Get all transport students with pagination"""
         try:
-            filters = request.args.to_dict()
-
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            # Get all students (for now - could optimize with pagination in model)
-            all_students = self.student_model.get_all(model_filters)
+            result = self._fetch_page(self.student_model)
+            all_students = result['data']
 
             # Debug logging
             print(f"DEBUG: Retrieved {len(all_students)} students from model")
             if all_students:
                 print(f"DEBUG: First student: {all_students[0]}")
 
-            # Apply pagination
-            total = len(all_students)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_students = all_students[start_idx:end_idx]
-
             # Transform data for frontend compatibility
             transformed_students = []
-            for student in paginated_students:
+            for student in all_students:
                 s_copy = student.copy()
                 if 'name' in s_copy:
                     s_copy['full_name'] = s_copy['name']
@@ -182,15 +246,9 @@ class StudentController(TransportController):
                 transformed_students.append(s_copy)
 
             # Return paginated response
-            return jsonify({
-                'success': True,
-                'data': transformed_students,
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, transformed_students)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             print(f"ERROR in get_students: {str(e)}")
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -257,18 +315,8 @@ class FacultyController(TransportController):
     def get_faculty(self):
         """Get all transport faculty with pagination"""
         try:
-            filters = request.args.to_dict()
-            
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            all_faculty = self.faculty_model.get_all(model_filters)
+            result = self._fetch_page(self.faculty_model)
+            all_faculty = result['data']
             
             # Transform data to match expected API schema
             transformed_faculty = []
@@ -285,22 +333,10 @@ class FacultyController(TransportController):
                     transformed_record['phone_number'] = transformed_record['phone']
                 
                 transformed_faculty.append(transformed_record)
-            
-            # Apply pagination
-            total = len(transformed_faculty)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_faculty = transformed_faculty[start_idx:end_idx]
 
-            return jsonify({
-                'success': True, 
-                'data': paginated_faculty, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, transformed_faculty)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -366,34 +402,12 @@ class BusController(TransportController):
     def get_buses(self):
         """Get all buses with pagination"""
         try:
-            filters = request.args.to_dict()
-            
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
+            result = self._fetch_page(self.bus_model)
+            all_buses = result['data']
 
-            all_buses = self.bus_model.get_all(model_filters)
-            
-            # Apply pagination
-            total = len(all_buses)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_buses = all_buses[start_idx:end_idx]
-
-            return jsonify({
-                'success': True, 
-                'data': paginated_buses, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, all_buses)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -459,42 +473,20 @@ class DriverController(TransportController):
     def get_drivers(self):
         """Get all drivers with pagination"""
         try:
-            filters = request.args.to_dict()
-            
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            all_drivers = self.driver_model.get_all(model_filters)
-            
-            # Apply pagination
-            total = len(all_drivers)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_drivers = all_drivers[start_idx:end_idx]
+            result = self._fetch_page(self.driver_model)
+            all_drivers = result['data']
 
             # Transform data for frontend compatibility
             transformed_drivers = []
-            for driver in paginated_drivers:
+            for driver in all_drivers:
                 d_copy = driver.copy()
                 if 'name' in d_copy:
                     d_copy['full_name'] = d_copy['name']
                 transformed_drivers.append(d_copy)
 
-            return jsonify({
-                'success': True, 
-                'data': transformed_drivers, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, transformed_drivers)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -560,28 +552,12 @@ class RouteController(TransportController):
     def get_routes(self):
         """Get all routes with pagination"""
         try:
-            filters = request.args.to_dict()
-            
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            all_routes = self.route_model.get_all(model_filters)
-            
-            # Apply pagination
-            total = len(all_routes)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_routes = all_routes[start_idx:end_idx]
+            result = self._fetch_page(self.route_model)
+            all_routes = result['data']
 
             # Transform data for frontend compatibility
             transformed_routes = []
-            for route in paginated_routes:
+            for route in all_routes:
                 r_copy = route.copy()
                 
                 # Derive start_point and end_point from stops if they exist
@@ -610,15 +586,9 @@ class RouteController(TransportController):
                 
                 transformed_routes.append(r_copy)
 
-            return jsonify({
-                'success': True, 
-                'data': transformed_routes, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, transformed_routes)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -695,39 +665,15 @@ class FeeController(TransportController):
     def get_fees(self):
         """Get all transport fees with pagination"""
         try:
-            filters = request.args.to_dict()
-            
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            # Get all fees
-            all_fees = self.fee_model.get_all(model_filters)
-            
-            # Apply pagination
-            total = len(all_fees)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_fees = all_fees[start_idx:end_idx]
+            result = self._fetch_page(self.fee_model)
+            all_fees = result['data']
 
             # Get summary statistics
             summary = self.fee_model.get_payment_statistics()
 
-            return jsonify({
-                'success': True, 
-                'data': paginated_fees, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit,
-                'summary': summary
-            })
+            return self._page_response(result, all_fees, summary=summary)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -803,34 +749,12 @@ class AttendanceController(TransportController):
     def get_attendance(self):
         """Get attendance records with pagination"""
         try:
-            filters = request.args.to_dict()
+            result = self._fetch_page(self.attendance_model)
+            attendance = result['data']
 
-            # Extract pagination parameters
-            limit = int(filters.get('limit', 50))
-            offset = int(filters.get('offset', 0))
-            page = int(filters.get('page', 1))
-
-            # Remove pagination from filters for the model
-            model_filters = {k: v for k, v in filters.items()
-                           if k not in ['limit', 'offset', 'page']}
-
-            attendance = self.attendance_model.get_all(model_filters)
-            
-            # Apply pagination
-            total = len(attendance)
-            start_idx = offset if offset > 0 else (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_attendance = attendance[start_idx:end_idx]
-
-            return jsonify({
-                'success': True, 
-                'data': paginated_attendance, 
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-                'page': page,
-                'pages': (total + limit - 1) // limit
-            })
+            return self._page_response(result, attendance)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -918,156 +842,210 @@ class LiveTrackingController(TransportController):
             return jsonify({'success': False, 'error': str(e)}), 500
 
 class ReportController(TransportController):
-    """Reports Controller"""
-    
+    """Reports Controller
+
+    Attendance and fee totals come from grouped aggregates
+    (migrations/20261017_add_transport_report_functions.sql); routes and
+    drivers are read page by page, with bus capacities fetched once and
+    grouped by route. ``?format=csv`` streams the per-route/per-driver rows.
+    """
+
+    # Breakdown rows of each report, in CSV column order
+    REPORT_COLUMNS = {
+        'attendance': ['route_id', 'present', 'absent'],
+        'fees': ['route_id', 'total', 'collected', 'pending'],
+        'routes': ['route_id', 'students', 'capacity', 'occupancy', 'onTimePerformance'],
+        'drivers': ['driver_id', 'name', 'trips', 'onTime', 'rating'],
+    }
+
+    def _grouped_report(self, rpc, fallback):
+        """Return (total_row, route_rows) from ``rpc``, or from ``fallback()`` if it is not deployed"""
+        try:
+            response = self.supabase.rpc(rpc, {}).execute()
+            rows = response.data or []
+        except Exception as e:
+            print(f"Report RPC {rpc} unavailable, aggregating in Python: {e}")
+            return fallback()
+        total = next((r for r in rows if r.get('is_total')), {})
+        return total, [r for r in rows if not r.get('is_total')]
+
+    def _attendance_fallback(self):
+        dates = set()
+        total = {'present': 0, 'absent': 0}
+        by_route = {}
+        for record in self.attendance_model.iter_all(columns='date, route_id, status'):
+            dates.add(record.get('date'))
+            stats = by_route.setdefault(record.get('route_id') or 'Unknown',
+                                        {'present': 0, 'not_present': 0})
+            if record.get('status') == 'Present':
+                total['present'] += 1
+                stats['present'] += 1
+            else:
+                stats['not_present'] += 1
+                if record.get('status') == 'Absent':
+                    total['absent'] += 1
+        total['total_days'] = len(dates)
+        return total, [{'route_id': k, **v} for k, v in by_route.items()]
+
+    def _fee_fallback(self):
+        total = {'total': 0, 'collected': 0}
+        by_route = {}
+        for record in self.fee_model.iter_all(columns='route_name, fee_amount, payment_status'):
+            amount = float(record.get('fee_amount') or 0)
+            paid = amount if record.get('payment_status') == 'Paid' else 0
+            stats = by_route.setdefault(record.get('route_name') or 'Unknown', {'total': 0, 'collected': 0})
+            for bucket in (total, stats):
+                bucket['total'] += amount
+                bucket['collected'] += paid
+        return total, [{'route_id': k, **v} for k, v in by_route.items()]
+
+    def _attendance_report(self):
+        total, routes = self._grouped_report('get_transport_attendance_report', self._attendance_fallback)
+        present_days = int(total.get('present') or 0)
+        absent_days = int(total.get('absent') or 0)
+        percentage = round((present_days / (present_days + absent_days)) * 100, 1) if (present_days + absent_days) > 0 else 0
+        by_route = [{'route_id': r['route_id'], 'present': int(r.get('present') or 0),
+                     'absent': int(r.get('not_present') or 0)} for r in routes]
+        summary = {
+            'totalDays': int(total.get('total_days') or 0),
+            'presentDays': present_days,
+            'absentDays': absent_days,
+            'percentage': percentage,
+        }
+        return 'Attendance Report', summary, 'byRoute', iter(by_route)
+
+    def _fee_report(self):
+        total, routes = self._grouped_report('get_transport_fee_report', self._fee_fallback)
+        total_amount = float(total.get('total') or 0)
+        collected = float(total.get('collected') or 0)
+        collection_rate = round((collected / total_amount) * 100, 1) if total_amount > 0 else 0
+        by_route = []
+        for r in routes:
+            route_total = float(r.get('total') or 0)
+            route_collected = float(r.get('collected') or 0)
+            by_route.append({'route_id': r['route_id'], 'total': route_total,
+                             'collected': route_collected, 'pending': route_total - route_collected})
+        summary = {
+            'totalAmount': total_amount,
+            'collected': collected,
+            'pending': total_amount - collected,
+            'collectionRate': collection_rate,
+        }
+        return 'Fee Collection Report', summary, 'byRoute', iter(by_route)
+
+    def _bus_capacity_by_route(self):
+        """Total bus capacity per route_id, from a single scan of the bus table"""
+        capacity = {}
+        for bus in self.bus_model.iter_all(columns='route_id, capacity'):
+            capacity[bus.get('route_id')] = capacity.get(bus.get('route_id'), 0) + (bus.get('capacity') or 0)
+        return capacity
+
+    def _route_rows(self, totals):
+        capacity_by_route = self._bus_capacity_by_route()
+        for route in self.route_model.iter_all():
+            students = route.get('total_students') or 0
+            # Get capacity from assigned buses
+            capacity = capacity_by_route.get(route['route_id']) or 50
+            occupancy = round((students / capacity) * 100, 1) if capacity > 0 else 0
+
+            totals['routes'] += 1
+            totals['active'] += route.get('status') == 'Active'
+            totals['capacity'] += capacity
+            totals['occupied'] += students
+
+            yield {
+                'route_id': route['route_id'],
+                'students': students,
+                'capacity': capacity,
+                'occupancy': occupancy,
+                'onTimePerformance': (hash(route['route_id']) % 20) + 80  # Mock performance
+            }
+
+    def _route_report(self):
+        totals = {'routes': 0, 'active': 0, 'capacity': 0, 'occupied': 0}
+
+        def summary():
+            return {
+                'totalRoutes': totals['routes'],
+                'activeRoutes': totals['active'],
+                'avgOccupancy': round((totals['occupied'] / totals['capacity']) * 100, 1) if totals['capacity'] > 0 else 0,
+            }
+        return 'Route Efficiency Report', summary, 'byRoute', self._route_rows(totals)
+
+    def _driver_rows(self, totals):
+        for driver in self.driver_model.iter_all():
+            totals['drivers'] += 1
+            totals['active'] += driver.get('status') == 'Active'
+            totals['experience'] += driver.get('experience_years') or 0
+
+            trips = (hash(driver['driver_id']) % 50) + 40  # Mock trips
+            on_time = (hash(driver['driver_id']) % 20) + 80  # Mock on-time percentage
+            rating = round((hash(driver['driver_id']) % 10) / 10 + 4, 1)  # Mock rating 4.0-5.0
+
+            yield {
+                'driver_id': driver['driver_id'],
+                'name': driver['name'],
+                'trips': trips,
+                'onTime': on_time,
+                'rating': rating
+            }
+
+    def _driver_report(self):
+        totals = {'drivers': 0, 'active': 0, 'experience': 0}
+
+        def summary():
+            return {
+                'totalDrivers': totals['drivers'],
+                'activeDrivers': totals['active'],
+                'avgExperience': round(totals['experience'] / totals['drivers'], 1) if totals['drivers'] else 0,
+            }
+        return 'Driver Performance Report', summary, 'byDriver', self._driver_rows(totals)
+
+    def _stream_csv(self, report_type, rows):
+        columns = self.REPORT_COLUMNS[report_type]
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                # Flush roughly every 64 KiB instead of once per row
+                if buffer.tell() >= 65536:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        filename = f"transport_{report_type}_report_{date.today().isoformat()}.csv"
+        return Response(stream_with_context(generate()), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+
     def generate_report(self, report_type):
         """Generate various reports"""
+        builders = {
+            'attendance': self._attendance_report,
+            'fees': self._fee_report,
+            'routes': self._route_report,
+            'drivers': self._driver_report,
+        }
+        if report_type not in builders:
+            return jsonify({'success': False, 'error': 'Invalid report type'}), 400
+
         try:
-            if report_type == 'attendance':
-                # Generate attendance report
-                attendance_records = self.attendance_model.get_all()
-                total_days = len(set(r['date'] for r in attendance_records))
-                present_days = len([r for r in attendance_records if r['status'] == 'Present'])
-                absent_days = len([r for r in attendance_records if r['status'] == 'Absent'])
-                percentage = round((present_days / (present_days + absent_days)) * 100, 1) if (present_days + absent_days) > 0 else 0
-                
-                # Group by route
-                route_stats = {}
-                for record in attendance_records:
-                    route_id = record.get('route_id', 'Unknown')
-                    if route_id not in route_stats:
-                        route_stats[route_id] = {'present': 0, 'absent': 0}
-                    if record['status'] == 'Present':
-                        route_stats[route_id]['present'] += 1
-                    else:
-                        route_stats[route_id]['absent'] += 1
-                
-                by_route = [{'route_id': k, 'present': v['present'], 'absent': v['absent']} 
-                           for k, v in route_stats.items()]
-                
-                data = {
-                    'title': 'Attendance Report',
-                    'data': {
-                        'totalDays': total_days,
-                        'presentDays': present_days,
-                        'absentDays': absent_days,
-                        'percentage': percentage,
-                        'byRoute': by_route
-                    }
-                }
-                
-            elif report_type == 'fees':
-                # Generate fee collection report
-                fee_records = self.fee_model.get_all()
-                total_amount = sum(r['amount'] for r in fee_records)
-                collected = sum(r['amount'] for r in fee_records if r['payment_status'] == 'Paid')
-                pending = total_amount - collected
-                collection_rate = round((collected / total_amount) * 100, 1) if total_amount > 0 else 0
-                
-                # Group by route
-                route_stats = {}
-                for record in fee_records:
-                    route_id = record.get('route_id', 'Unknown')
-                    if route_id not in route_stats:
-                        route_stats[route_id] = {'total': 0, 'collected': 0, 'pending': 0}
-                    route_stats[route_id]['total'] += record['amount']
-                    if record['payment_status'] == 'Paid':
-                        route_stats[route_id]['collected'] += record['amount']
-                    else:
-                        route_stats[route_id]['pending'] += record['amount']
-                
-                by_route = [{'route_id': k, 'total': v['total'], 'collected': v['collected'], 'pending': v['pending']} 
-                           for k, v in route_stats.items()]
-                
-                data = {
-                    'title': 'Fee Collection Report',
-                    'data': {
-                        'totalAmount': total_amount,
-                        'collected': collected,
-                        'pending': pending,
-                        'collectionRate': collection_rate,
-                        'byRoute': by_route
-                    }
-                }
-                
-            elif report_type == 'routes':
-                # Generate route efficiency report
-                routes = self.route_model.get_all()
-                total_routes = len(routes)
-                active_routes = len([r for r in routes if r['status'] == 'Active'])
-                
-                # Calculate average occupancy
-                total_capacity = 0
-                total_occupied = 0
-                by_route = []
-                
-                for route in routes:
-                    students = route.get('total_students', 0)
-                    # Get capacity from assigned bus
-                    buses = self.bus_model.get_all({'route_id': route['route_id']})
-                    capacity = sum(b['capacity'] for b in buses) if buses else 50
-                    occupancy = round((students / capacity) * 100, 1) if capacity > 0 else 0
-                    
-                    total_capacity += capacity
-                    total_occupied += students
-                    
-                    by_route.append({
-                        'route_id': route['route_id'],
-                        'students': students,
-                        'capacity': capacity,
-                        'occupancy': occupancy,
-                        'onTimePerformance': (hash(route['route_id']) % 20) + 80  # Mock performance
-                    })
-                
-                avg_occupancy = round((total_occupied / total_capacity) * 100, 1) if total_capacity > 0 else 0
-                
-                data = {
-                    'title': 'Route Efficiency Report',
-                    'data': {
-                        'totalRoutes': total_routes,
-                        'activeRoutes': active_routes,
-                        'avgOccupancy': avg_occupancy,
-                        'byRoute': by_route
-                    }
-                }
-                
-            elif report_type == 'drivers':
-                # Generate driver performance report
-                drivers = self.driver_model.get_all()
-                total_drivers = len(drivers)
-                active_drivers = len([d for d in drivers if d['status'] == 'Active'])
-                
-                # Calculate average experience
-                total_experience = sum(d.get('experience_years', 0) for d in drivers)
-                avg_experience = round(total_experience / len(drivers), 1) if drivers else 0
-                
-                by_driver = []
-                for driver in drivers:
-                    trips = (hash(driver['driver_id']) % 50) + 40  # Mock trips
-                    on_time = (hash(driver['driver_id']) % 20) + 80  # Mock on-time percentage
-                    rating = round((hash(driver['driver_id']) % 10) / 10 + 4, 1)  # Mock rating 4.0-5.0
-                    
-                    by_driver.append({
-                        'driver_id': driver['driver_id'],
-                        'name': driver['name'],
-                        'trips': trips,
-                        'onTime': on_time,
-                        'rating': rating
-                    })
-                
-                data = {
-                    'title': 'Driver Performance Report',
-                    'data': {
-                        'totalDrivers': total_drivers,
-                        'activeDrivers': active_drivers,
-                        'avgExperience': avg_experience,
-                        'byDriver': by_driver
-                    }
-                }
-                
-            else:
-                return jsonify({'success': False, 'error': 'Invalid report type'}), 400
-            
+            title, summary, rows_key, rows = builders[report_type]()
+
+            if request.args.get('format', '').lower() == 'csv':
+                return self._stream_csv(report_type, rows)
+
+            rows = list(rows)
+            # Route and driver totals are accumulated while their rows are read
+            if callable(summary):
+                summary = summary()
+            data = {
+                'title': title,
+                'data': {**summary, rows_key: rows}
+            }
             return jsonify({'success': True, 'data': data})
             
         except Exception as e:
@@ -1,9 +1,14 @@
 import jwt
 import requests
 import json
+import os
+import time
+import logging
+import threading
 from functools import wraps
 from flask import request, g, jsonify, current_app
-from jwt.algorithms import RSAAlgorithm
+
+logger = logging.getLogger(__name__)
 
 # ==============================
 # SUPABASE CONFIGURATION
@@ -13,24 +18,157 @@ SUPABASE_JWKS_URL = f"{SUPABASE_URL}/auth/v1/jwks"
 SUPABASE_AUDIENCE = "authenticated"
 SUPABASE_ISSUER = f"{SUPABASE_URL}/auth/v1"
 
+# Seconds a fetched JWKS document is considered fresh. Stale keys keep being
+# served while a background refresh picks up rotated keys.
+JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", "600"))
+# Lower bound between refreshes triggered by unknown ``kid`` values, so a
+# stream of forged tokens cannot turn into a stream of JWKS requests.
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+JWKS_FETCH_TIMEOUT = 5
+
 # ==============================
-# FETCH SUPABASE PUBLIC KEY
+# JWKS KEY STORE
 # ==============================
-def get_supabase_public_key():
-    try:
-        response = requests.get(SUPABASE_JWKS_URL, timeout=5)
-        response.raise_for_status()
-        jwks = response.json()
+class JWKSKeyStore:
+    """
+    In-memory cache of the Supabase signing keys, indexed by ``kid``.
 
-        if "keys" not in jwks or not jwks["keys"]:
-            current_app.logger.error("JWKS keys missing")
-            return None
+    Token verification only reads from the cache. The network is touched when
+    the cache is empty, when a token names a ``kid`` we have not seen (key
+    rotation), or from the background refresher once the TTL has elapsed.
+    Concurrent refreshes are collapsed into a single JWKS request.
+    """
 
-        return RSAAlgorithm.from_jwk(json.dumps(jwks["keys"][0]))
+    def __init__(self, jwks_url, ttl=JWKS_CACHE_TTL,
+                 min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL,
+                 fetch_timeout=JWKS_FETCH_TIMEOUT):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.fetch_timeout = fetch_timeout
 
-    except Exception as e:
-        current_app.logger.error(f"JWKS fetch failed: {str(e)}")
-        return None
+        self._keys = {}          # kid -> (key object, algorithm)
+        self._default_kid = None
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._refresh_lock = threading.Lock()
+        self._refresher_lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+
+    # ---- lookups (hot path) ----
+    def get_signing_key(self, kid=None):
+        """Return ``(key, algorithm)`` for ``kid``, or ``(None, None)``."""
+        if not self._keys:
+            self.refresh()
+        self._ensure_refresher()
+
+        entry = self._lookup(kid)
+        if entry is None and kid is not None:
+            # Possibly a freshly rotated key: refresh once, rate limited.
+            if time.monotonic() - self._last_attempt >= self.min_refresh_interval:
+                self.refresh(force=True)
+                entry = self._lookup(kid)
+        return entry or (None, None)
+
+    def _lookup(self, kid):
+        keys = self._keys
+        if kid is None:
+            kid = self._default_kid
+        return keys.get(kid)
+
+    def is_stale(self):
+        return time.monotonic() - self._fetched_at >= self.ttl
+
+    # ---- refresh ----
+    def refresh(self, force=False):
+        """
+        Fetch the JWKS document and atomically swap in the new key set.
+
+        Callers that arrive while another thread is fetching wait for that
+        fetch and reuse its result instead of issuing their own request.
+        """
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            if self._fetched_at >= requested_at:
+                return True  # another thread refreshed while we waited
+            if not force and self._keys and not self.is_stale():
+                return True
+
+            self._last_attempt = time.monotonic()
+            try:
+                response = requests.get(self.jwks_url, timeout=self.fetch_timeout)
+                response.raise_for_status()
+                keys, default_kid = self._parse_jwks(response.json())
+            except Exception as e:
+                logger.error(f"JWKS fetch failed: {str(e)}")
+                return False
+
+            if not keys:
+                logger.error("JWKS keys missing")
+                return False
+
+            self._keys = keys
+            self._default_kid = default_kid
+            self._fetched_at = time.monotonic()
+            return True
+
+    @staticmethod
+    def _parse_jwks(jwks):
+        keys = {}
+        default_kid = None
+        for jwk in jwks.get("keys", []):
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                parsed = jwt.PyJWK(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {str(e)}")
+                continue
+            kid = jwk.get("kid")
+            keys[kid] = (parsed.key, jwk.get("alg") or parsed.algorithm_name or "RS256")
+            if default_kid is None:
+                default_kid = kid
+        return keys, default_kid
+
+    # ---- background rotation ----
+    def _ensure_refresher(self):
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._refresher_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="jwks-refresher", daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        # Refresh a little before expiry so the hot path never sees a stale set.
+        interval = max(self.ttl * 0.8, 1)
+        while not self._stop.wait(interval):
+            self.refresh(force=True)
+
+    def stop(self):
+        self._stop.set()
+
+    def clear(self):
+        with self._refresh_lock:
+            self._keys = {}
+            self._default_kid = None
+            self._fetched_at = 0.0
+            self._last_attempt = 0.0
+
+
+jwks_store = JWKSKeyStore(SUPABASE_JWKS_URL)
+
+# ==============================
+# FETCH SUPABASE PUBLIC KEY
+# ==============================
+def get_supabase_public_key(kid=None):
+    key, _ = jwks_store.get_signing_key(kid)
+    return key
 
 # ==============================
 # VERIFY SUPABASE JWT
@@ -40,14 +178,15 @@ def verify_supabase_token(token):
         return None, "No token provided"
 
     try:
-        public_key = get_supabase_public_key()
+        header = jwt.get_unverified_header(token)
+        public_key, algorithm = jwks_store.get_signing_key(header.get("kid"))
         if not public_key:
             return None, "Public key fetch failed"
 
         payload = jwt.decode(
             token,
             public_key,
-            algorithms=["RS256"],
+            algorithms=[algorithm],
             audience=SUPABASE_AUDIENCE,
             issuer=SUPABASE_ISSUER,
             options={
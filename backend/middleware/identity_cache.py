@@ -0,0 +1,131 @@
+"""
+Shared verified-identity cache for the Supabase auth decorators.
+
+``supabase.auth.get_user(token)`` is a round trip to the auth server. The
+decorators in app.py, routes/fees.py, routes/finance.py and
+routes/student_dashboard.py all go through ``get_verified_user`` instead, which
+keeps the verified user for each token (keyed by a SHA-256 of the token, never
+the token itself) until the token's ``exp`` claim.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_CACHE_MAX_SIZE = int(os.getenv("IDENTITY_CACHE_MAX_SIZE", "10000"))
+# Optional upper bound on how long an identity is trusted, in seconds. 0 means
+# "until the token expires".
+IDENTITY_CACHE_MAX_TTL = int(os.getenv("IDENTITY_CACHE_MAX_TTL", "0"))
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_expiry(token):
+    """Read ``exp`` from a JWT payload without verifying it (the auth server already did)."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except Exception:
+        return None
+
+
+class VerifiedIdentityCache:
+    """Thread-safe LRU of token hash -> (verified user, expiry timestamp)."""
+
+    def __init__(self, maxsize=IDENTITY_CACHE_MAX_SIZE, max_ttl=IDENTITY_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token):
+        key = _token_hash(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token, user):
+        expires_at = _token_expiry(token)
+        if expires_at is None:
+            return  # no exp claim: do not cache something we cannot expire
+        if self.max_ttl:
+            expires_at = min(expires_at, time.time() + self.max_ttl)
+        if expires_at <= time.time():
+            return
+
+        key = _token_hash(token)
+        with self._lock:
+            self._entries[key] = (user, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token):
+        with self._lock:
+            self._entries.pop(_token_hash(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+identity_cache = VerifiedIdentityCache()
+
+
+def get_verified_user(token, client=None):
+    """
+    Return the ``supabase.auth.get_user`` response for ``token``.
+
+    Cached responses are returned without contacting the auth server. Failed
+    verifications are not cached, so a bad token is re-checked every time.
+    """
+    user = identity_cache.get(token)
+    if user is not None:
+        return user
+
+    if client is None:
+        from supabase_client import get_supabase
+        client = get_supabase()
+
+    user = client.auth.get_user(token)
+    if user and getattr(user, "user", None):
+        identity_cache.put(token, user)
+    return user
@@ -0,0 +1,22 @@
+-- Progress snapshots of bulk admission approvals (routes/admissions.py).
+-- The worker running a job upserts its row after every step, so a poll that
+-- lands on another worker, or comes after a restart, still finds the job;
+-- a 'running' row whose updated_at stops moving lost its worker.
+
+CREATE TABLE IF NOT EXISTS public.admission_bulk_jobs (
+  job_id uuid PRIMARY KEY,
+  type text NOT NULL,
+  status text NOT NULL,
+  total integer NOT NULL DEFAULT 0,
+  processed integer NOT NULL DEFAULT 0,
+  success_count integer NOT NULL DEFAULT 0,
+  failure_count integer NOT NULL DEFAULT 0,
+  results jsonb NOT NULL DEFAULT '[]'::jsonb,
+  error text,
+  started_at timestamp,
+  finished_at timestamp,
+  updated_at timestamp
+);
+
+CREATE INDEX IF NOT EXISTS idx_admission_bulk_jobs_started_at
+  ON public.admission_bulk_jobs (started_at);
@@ -0,0 +1,46 @@
+-- Admission statistics (GET /api/admissions/stats in routes/admissions.py).
+-- One row per (dimension, value): applications by status, course name and
+-- quota, the overall total and the last-7-days count. This replaces six
+-- count queries and two full reads of admissions.
+
+CREATE OR REPLACE FUNCTION public.get_admission_stats()
+RETURNS TABLE(
+  dimension text,
+  value text,
+  applications bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH a AS (
+    SELECT
+      a.status::text AS status,
+      COALESCE(c.name, 'Unknown')::text AS course,
+      COALESCE(NULLIF(a.quota_type, ''), 'Not specified')::text AS quota,
+      a.created_at >= now() - interval '7 days' AS recent
+    FROM
+      admissions a
+      LEFT JOIN courses c ON c.id = a.course_id
+  )
+  SELECT
+    CASE
+      WHEN GROUPING(status) = 0 THEN 'status'
+      WHEN GROUPING(course) = 0 THEN 'course'
+      WHEN GROUPING(quota) = 0 THEN 'quota'
+      ELSE 'total'
+    END,
+    CASE
+      WHEN GROUPING(status, course, quota) = 7 THEN 'applications'
+      ELSE COALESCE(status, course, quota)
+    END,
+    COUNT(*)
+  FROM
+    a
+  GROUP BY
+    GROUPING SETS ((status), (course), (quota), ())
+  UNION ALL
+  SELECT 'total', 'recent', COUNT(*) FILTER (WHERE recent) FROM a;
+$$;
+
+-- Used by /applications/pending-count and the status filter of /applications
+CREATE INDEX IF NOT EXISTS idx_admissions_status ON admissions(status);
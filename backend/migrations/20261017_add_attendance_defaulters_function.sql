@@ -0,0 +1,51 @@
+-- Attendance defaulters computed in one grouped aggregate
+-- (routes/admin.get_attendance_defaulters).
+-- Results are ordered by student id (as text) for keyset pagination:
+-- pass the last student_id of a page as p_after_student_id to get the next one.
+CREATE OR REPLACE FUNCTION public.get_attendance_defaulters(
+  p_threshold numeric DEFAULT 75,
+  p_course_id text DEFAULT NULL,
+  p_semester integer DEFAULT NULL,
+  p_after_student_id text DEFAULT NULL,
+  p_limit integer DEFAULT 100
+)
+RETURNS TABLE(
+  student_id text,
+  total_classes bigint,
+  present_classes bigint,
+  attendance_percentage numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH totals AS (
+    SELECT
+      a.student_id,
+      COUNT(*) AS total_classes,
+      COUNT(*) FILTER (WHERE a.status = 'present') AS present_classes
+    FROM
+      attendance a
+    GROUP BY
+      a.student_id
+  )
+  SELECT
+    s.id::text AS student_id,
+    t.total_classes,
+    t.present_classes,
+    ROUND(t.present_classes * 100.0 / t.total_classes, 2) AS attendance_percentage
+  FROM
+    students s
+    JOIN totals t ON t.student_id = s.id
+  WHERE
+    t.present_classes * 100.0 / t.total_classes < p_threshold
+    AND (p_course_id IS NULL OR s.course_id::text = p_course_id)
+    AND (p_semester IS NULL OR s.current_semester = p_semester)
+    AND (p_after_student_id IS NULL OR s.id::text > p_after_student_id)
+  ORDER BY
+    s.id::text
+  LIMIT
+    p_limit;
+$$;
+
+CREATE INDEX IF NOT EXISTS attendance_student_id_status_idx
+  ON public.attendance (student_id, status);
@@ -0,0 +1,5 @@
+-- One attendance row per student, subject and day.
+-- routes/attendance.mark_attendance upserts bulk batches on this key.
+-- Remove any existing duplicates before applying.
+CREATE UNIQUE INDEX IF NOT EXISTS attendance_student_subject_date_key
+  ON public.attendance (student_id, subject_id, date);
@@ -0,0 +1,13 @@
+-- AI roadmap templates (utils/roadmap_templates.py).
+-- One row per normalised career interest and week count, e.g.
+-- 'data scientist|10'. POST /api/roadmap/generate reuses a row younger than
+-- ROADMAP_TEMPLATE_TTL instead of calling Gemini again, so templates survive
+-- restarts and are shared by every worker.
+
+CREATE TABLE IF NOT EXISTS public.career_roadmap_templates (
+  template_key text PRIMARY KEY,
+  career_interest text NOT NULL,
+  weeks integer NOT NULL,
+  steps jsonb NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
@@ -0,0 +1,108 @@
+-- Summary aggregates for the finance list endpoints (routes/finance.py).
+-- Each function returns a single row whose column names match the
+-- "summary" block of the corresponding endpoint, so the API no longer has to
+-- download every row and sum it in Python.
+
+CREATE OR REPLACE FUNCTION public.get_finance_studentfees_summary()
+RETURNS TABLE(
+  "totalFees" numeric,
+  "totalPaid" numeric,
+  "totalPending" numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(total_fee), 0),
+    COALESCE(SUM(paid_amount), 0),
+    COALESCE(SUM(pending_amount), 0)
+  FROM
+    finance_studentfees;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_finance_staffpayroll_summary()
+RETURNS TABLE(
+  "totalMonthlyPayroll" numeric,
+  "totalStaffCount" bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(net_salary), 0),
+    COUNT(*)
+  FROM
+    finance_staffpayroll;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_finance_expense_summary()
+RETURNS TABLE(
+  "totalExpenses" numeric,
+  "paidExpenses" numeric,
+  "pendingExpenses" numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(amount), 0),
+    COALESCE(SUM(amount) FILTER (WHERE payment_status = 'paid'), 0),
+    COALESCE(SUM(amount) FILTER (WHERE payment_status IS DISTINCT FROM 'paid'), 0)
+  FROM
+    finance_expense;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_finance_budgetallocation_summary()
+RETURNS TABLE(
+  "totalAllocatedBudget" numeric,
+  "totalUsedBudget" numeric,
+  "totalRemainingBudget" numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(allocated_amount), 0),
+    COALESCE(SUM(used_amount), 0),
+    COALESCE(SUM(remaining_amount), 0)
+  FROM
+    finance_budgetallocation;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_finance_operationmaintenance_summary()
+RETURNS TABLE(
+  "totalRequests" bigint,
+  "pendingRequests" bigint,
+  "inProgressRequests" bigint,
+  "resolvedRequests" bigint,
+  "totalCost" numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COUNT(*),
+    COUNT(*) FILTER (WHERE lower(status) = 'pending'),
+    COUNT(*) FILTER (WHERE lower(status) = 'in progress'),
+    COUNT(*) FILTER (WHERE lower(status) = 'resolved'),
+    COALESCE(SUM(cost), 0)
+  FROM
+    finance_operationmaintenance;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_finance_vendors_summary()
+RETURNS TABLE(
+  "totalAmountPaid" numeric,
+  "totalAmountDue" numeric,
+  "totalTransactions" bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(amount_paid), 0),
+    COALESCE(SUM(amount_due), 0),
+    COALESCE(SUM(total_transactions), 0)::bigint
+  FROM
+    finance_vendors;
+$$;
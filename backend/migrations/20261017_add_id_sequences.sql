@@ -0,0 +1,24 @@
+-- Sequence allocator for human-readable IDs (utils/id_allocator.py).
+-- One row per prefix (e.g. 'user_id:STU2026'). reserve_id_block() atomically
+-- hands out the next p_count values and returns the first one; the row lock
+-- taken by the upsert serialises concurrent workers, so blocks never overlap.
+-- p_floor seeds a new sequence above IDs minted before the allocator existed.
+
+CREATE TABLE IF NOT EXISTS public.id_sequences (
+  name text PRIMARY KEY,
+  value bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION public.reserve_id_block(p_name text, p_count integer, p_floor bigint DEFAULT 0)
+RETURNS bigint
+LANGUAGE sql
+VOLATILE
+AS $$
+  INSERT INTO id_sequences AS s (name, value)
+  VALUES (p_name, GREATEST(p_floor, 0) + p_count)
+  ON CONFLICT (name) DO UPDATE
+    SET value = GREATEST(s.value, EXCLUDED.value - p_count) + p_count,
+        updated_at = now()
+  RETURNING value - p_count + 1;
+$$;
@@ -0,0 +1,31 @@
+-- Incremental internship ingestion (utils/internship_ingest.py).
+-- Scraped listings are upserted on dedup_key, a hash of the source and apply
+-- URL, and only rewritten when content_hash changes. Listings a source stops
+-- returning are soft-expired (is_active = false, expired_at set) instead of
+-- the old delete-everything-and-reinsert refresh, so the table is never empty.
+
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS title text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS company text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS location text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS type text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS min_stipend numeric;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS max_stipend numeric;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS is_unpaid boolean;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS apply_url text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS posted_date timestamptz;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS source text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS is_remote boolean DEFAULT false;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS is_active boolean DEFAULT true;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS dedup_key text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS content_hash text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS expired_at timestamptz;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS updated_at timestamptz DEFAULT now();
+
+-- ON CONFLICT (dedup_key) needs a unique index; legacy rows have NULL keys
+CREATE UNIQUE INDEX IF NOT EXISTS internships_dedup_key_idx
+  ON public.internships (dedup_key);
+
+-- GET /api/internships reads the newest active listings
+CREATE INDEX IF NOT EXISTS internships_active_posted_idx
+  ON public.internships (posted_date DESC)
+  WHERE is_active;
@@ -0,0 +1,7 @@
+-- Skills and duration of scraped internship listings (routes/internships.py).
+-- Remotive tags and The Muse categories become skills, which GET
+-- /api/internships searches; the duration Internshala shows on each card
+-- feeds the duration facet. Both are part of the listing's content_hash.
+
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS duration text;
+ALTER TABLE public.internships ADD COLUMN IF NOT EXISTS skills text[] NOT NULL DEFAULT '{}';
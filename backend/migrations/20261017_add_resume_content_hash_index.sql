@@ -0,0 +1,7 @@
+-- Resume deduplication (routes/resume_analytics.py upload_resume).
+-- Uploads record the SHA-256 of the file in metadata->>'content_hash'; a
+-- re-upload of the same file is matched through this index and reuses the
+-- stored analysis instead of extracting and analysing the text again.
+
+CREATE INDEX IF NOT EXISTS idx_resumes_content_hash
+  ON resumes ((metadata->>'content_hash'));
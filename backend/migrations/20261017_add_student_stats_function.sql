@@ -0,0 +1,55 @@
+-- Student statistics for the dashboards (utils/student_stats.py).
+-- One row per (dimension, value): students by gender, status, course, year
+-- and semester, plus totals. Gender is normalised here, so 'female' is never
+-- counted as 'male'. The admin dashboard, /api/students/stats and the
+-- students blueprint all read this single call instead of paging through
+-- every student.
+
+CREATE OR REPLACE FUNCTION public.get_student_stats()
+RETURNS TABLE(
+  dimension text,
+  value text,
+  students bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH s AS (
+    SELECT
+      CASE
+        WHEN lower(trim(gender)) IN ('male', 'm') THEN 'male'
+        WHEN lower(trim(gender)) IN ('female', 'f') THEN 'female'
+        ELSE 'other'
+      END AS gender,
+      lower(trim(status)) AS status,
+      course_id::text AS course_id,
+      year::text AS year,
+      trim(current_semester::text) AS semester
+    FROM
+      students
+  )
+  SELECT
+    CASE
+      WHEN GROUPING(gender) = 0 THEN 'gender'
+      WHEN GROUPING(status) = 0 THEN 'status'
+      WHEN GROUPING(course_id) = 0 THEN 'course'
+      WHEN GROUPING(year) = 0 THEN 'year'
+      WHEN GROUPING(semester) = 0 THEN 'semester'
+      ELSE 'total'
+    END,
+    CASE
+      WHEN GROUPING(gender, status, course_id, year, semester) = 31 THEN 'students'
+      ELSE COALESCE(gender, status, course_id, year, semester)
+    END,
+    COUNT(*)
+  FROM
+    s
+  GROUP BY
+    GROUPING SETS ((gender), (status), (course_id), (year), (semester), ())
+  UNION ALL
+  SELECT 'total', 'recent', COUNT(*) FROM students WHERE created_at >= now() - interval '7 days'
+  UNION ALL
+  SELECT 'total', 'faculty', COUNT(*) FROM faculty
+  UNION ALL
+  SELECT 'total', 'departments', COUNT(*) FROM departments;
+$$;
@@ -0,0 +1,26 @@
+-- Payment statistics for transport fees (models/supabase_transport_fee.py).
+-- Returns one row with the same keys get_payment_statistics() reports, so the
+-- transport dashboard and fee list no longer download every fee row.
+
+CREATE OR REPLACE FUNCTION public.get_transport_fee_statistics()
+RETURNS TABLE(
+  total_records bigint,
+  paid_count bigint,
+  pending_count bigint,
+  overdue_count bigint,
+  total_amount numeric,
+  collected_amount numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COUNT(*),
+    COUNT(*) FILTER (WHERE payment_status = 'Paid'),
+    COUNT(*) FILTER (WHERE COALESCE(payment_status, 'Pending') = 'Pending'),
+    COUNT(*) FILTER (WHERE payment_status = 'Overdue'),
+    COALESCE(SUM(fee_amount), 0),
+    COALESCE(SUM(paid_amount), 0)
+  FROM
+    transport_fee;
+$$;
@@ -0,0 +1,53 @@
+-- Grouped aggregates for the transport reports (ReportController in
+-- controllers/transportController.py). Each function returns one row per
+-- route plus a grand-total row (is_total = true), so a report is a single
+-- round trip however many attendance or fee rows exist.
+
+CREATE OR REPLACE FUNCTION public.get_transport_attendance_report()
+RETURNS TABLE(
+  route_id text,
+  is_total boolean,
+  total_days bigint,
+  present bigint,
+  absent bigint,
+  not_present bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(route_id, 'Unknown')::text,
+    GROUPING(COALESCE(route_id, 'Unknown')) = 1,
+    COUNT(DISTINCT date),
+    COUNT(*) FILTER (WHERE status = 'Present'),
+    COUNT(*) FILTER (WHERE status = 'Absent'),
+    COUNT(*) FILTER (WHERE status IS DISTINCT FROM 'Present')
+  FROM
+    transport_attendance
+  GROUP BY
+    GROUPING SETS ((COALESCE(route_id, 'Unknown')), ());
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_transport_fee_report()
+RETURNS TABLE(
+  route_id text,
+  is_total boolean,
+  total numeric,
+  collected numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COALESCE(route_name, 'Unknown')::text,
+    GROUPING(COALESCE(route_name, 'Unknown')) = 1,
+    COALESCE(SUM(fee_amount), 0),
+    COALESCE(SUM(fee_amount) FILTER (WHERE payment_status = 'Paid'), 0)
+  FROM
+    transport_fee
+  GROUP BY
+    GROUPING SETS ((COALESCE(route_name, 'Unknown')), ());
+$$;
+
+-- Used by the route efficiency report to total bus capacity per route
+CREATE INDEX IF NOT EXISTS idx_transport_buses_route_id ON transport_buses(route_id);
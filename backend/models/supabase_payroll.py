@@ -7,12 +7,51 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import get_supabase
-from datetime import datetime, date
+from postgrest.types import ReturnMethod
+from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Statutory deduction rates applied to basic salary
+PF_RATE = 0.12  # 12% PF
+ESI_RATE = 0.0175  # 1.75% ESI
+TAX_RATE = 0.10  # 10% Tax (simplified)
+
+PAYROLL_PAGE_SIZE = 500
+# Rows per upsert / ids per ``in_`` filter, to keep request bodies and URLs bounded
+PAYROLL_WRITE_CHUNK = 500
+# Payroll that has been approved or paid is never recalculated by a bulk run
+LOCKED_STATUSES = ('Approved', 'Paid')
+
+
+def deduction_breakdown(basic_salary: float, total_days: int, absent_days: int) -> Dict[str, float]:
+    """Itemised deductions for one month: LOP (Loss of Pay), PF, ESI and tax"""
+    per_day_salary = basic_salary / total_days if total_days > 0 else 0
+    breakdown = {
+        'lop': per_day_salary * absent_days,
+        'pf': basic_salary * PF_RATE,
+        'esi': basic_salary * ESI_RATE,
+        'tax': basic_salary * TAX_RATE,
+    }
+    breakdown['total'] = sum(breakdown.values())
+    return breakdown
+
+
+def working_days(pay_month: str) -> int:
+    """Monday-to-Friday days in the month of ``pay_month`` (``YYYY-MM-01``)"""
+    first = datetime.strptime(str(pay_month)[:10], '%Y-%m-%d').date().replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return sum(1 for offset in range((following - first).days)
+               if (first + timedelta(days=offset)).weekday() < 5)
+
+
+def _chunks(items: List[Any], size: int = PAYROLL_WRITE_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 class SupabasePayroll:
     """Supabase model for payroll operations"""
     
@@ -94,6 +133,25 @@ class SupabasePayroll:
             logger.error(f"Error fetching payroll for faculty {faculty_id}, month {pay_month}: {str(e)}")
             raise
     
+    def iter_payroll_month(self, pay_month: str, page_size: int = PAYROLL_PAGE_SIZE):
+        """Yield every non-cancelled payroll record of ``pay_month``, ``page_size`` rows per request
+
+        Pages are keyed on ``id`` rather than offset, so rows stay stable while
+        the month is being written to.
+        """
+        last_id = None
+        while True:
+            query = self.supabase.table(self.table_name).select("*") \
+                .eq('pay_month', pay_month).neq('status', 'Cancelled')
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            result = query.order('id').limit(page_size).execute()
+            rows = result.data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+    
     def update_payroll_record(self, payroll_id: int, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update payroll record"""
         try:
@@ -189,18 +247,8 @@ class SupabasePayroll:
         try:
             absent_days = total_days - present_days
             
-            # Calculate per day salary
-            per_day_salary = basic_salary / total_days if total_days > 0 else 0
-            
-            # Calculate LOP (Loss of Pay)
-            lop_amount = per_day_salary * absent_days
-            
             # Calculate deductions (PF 12%, ESI 1.75%, Tax estimate 10%, plus LOP)
-            pf_deduction = basic_salary * 0.12  # 12% PF
-            esi_deduction = basic_salary * 0.0175  # 1.75% ESI
-            tax_deduction = basic_salary * 0.10  # 10% Tax (simplified)
-            
-            total_deductions = pf_deduction + esi_deduction + tax_deduction + lop_amount
+            total_deductions = deduction_breakdown(basic_salary, total_days, absent_days)['total']
             net_salary = basic_salary - total_deductions
             
             payroll_data = {
@@ -233,18 +281,8 @@ class SupabasePayroll:
             absent_days = total_days - present_days
             payroll_data['absent_days'] = absent_days
             
-            # Calculate per day salary
-            per_day_salary = basic_salary / total_days if total_days > 0 else 0
-            
-            # Calculate LOP
-            lop_amount = per_day_salary * absent_days
-            
-            # Calculate standard deductions
-            pf_deduction = basic_salary * 0.12  # 12% PF
-            esi_deduction = basic_salary * 0.0175  # 1.75% ESI
-            tax_deduction = basic_salary * 0.10  # 10% Tax (simplified)
-            
-            total_deductions = pf_deduction + esi_deduction + tax_deduction + lop_amount
+            # Calculate LOP and standard deductions
+            total_deductions = deduction_breakdown(basic_salary, total_days, absent_days)['total']
             net_salary = basic_salary - total_deductions
             
             payroll_data['deductions'] = total_deductions
@@ -256,29 +294,161 @@ class SupabasePayroll:
             logger.error(f"Error calculating payroll fields: {str(e)}")
             raise
     
-    def bulk_approve_payroll(self, payroll_ids: List[int]) -> Dict[str, Any]:
-        """Bulk approve multiple payroll records"""
+    def _scan(self, table: str, columns: str = '*', page_size: int = PAYROLL_PAGE_SIZE,
+              **filters) -> List[Dict[str, Any]]:
+        """Every row of ``table`` matching the ``eq`` filters, ``page_size`` rows per request"""
+        rows = []
+        offset = 0
+        while True:
+            query = self.supabase.table(table).select(columns)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            page = query.order('id').range(offset, offset + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+    
+    def run_monthly_payroll(self, pay_month: str, total_days: Optional[int] = None,
+                            attendance: Optional[Dict[str, int]] = None,
+                            faculty_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Calculate and store payroll for every active faculty member for ``pay_month``
+
+        Faculty, salary setups and the month's existing payroll are each read
+        once; rows are calculated in memory and upserted in chunks.
+        ``attendance`` maps faculty id to present days. Faculty missing from it
+        keep the present days of their existing row, or are paid in full.
+        Approved and paid rows are left untouched: they are re-checked right
+        before writing, existing rows are written without ``status`` and new
+        rows never overwrite a row created meanwhile.
+        """
         try:
-            updated_records = []
+            total_days = int(total_days) if total_days else working_days(pay_month)
+            attendance = {str(k): int(v) for k, v in (attendance or {}).items()}
+            wanted = {str(f) for f in faculty_ids} if faculty_ids else None
+            
+            faculty = [f for f in self._scan('faculty')
+                       if str(f.get('status') or 'active').lower() == 'active'
+                       and (wanted is None or str(f['id']) in wanted)]
+            
+            # Latest salary setup in effect by the end of the month, per employee
+            month_end = (datetime.strptime(pay_month[:10], '%Y-%m-%d').date().replace(day=1)
+                         + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            setups = {}
+            for setup in self._scan('salary_setups', 'id, employee_id, basic_salary, effective_from'):
+                effective_from = str(setup.get('effective_from') or '')[:10]
+                if effective_from and effective_from > month_end.isoformat():
+                    continue
+                current = setups.get(setup.get('employee_id'))
+                if current is None or effective_from >= str(current.get('effective_from') or '')[:10]:
+                    setups[setup.get('employee_id')] = setup
+            
+            existing = {str(row['faculty_id']): row
+                        for row in self._scan(self.table_name, pay_month=pay_month)}
+            
+            rows = []
+            locked = 0
             errors = []
-            
-            for payroll_id in payroll_ids:
-                try:
-                    result = self.approve_payroll(payroll_id)
-                    updated_records.append(result)
-                except Exception as e:
-                    errors.append(f"Failed to approve payroll {payroll_id}: {str(e)}")
-            
+            for member in faculty:
+                faculty_id = str(member['id'])
+                current = existing.get(faculty_id, {})
+                if current.get('status') in LOCKED_STATUSES:
+                    locked += 1
+                    continue
+                setup = setups.get(member.get('employee_id')) or {}
+                basic_salary = setup.get('basic_salary') or member.get('salary') or current.get('basic_salary')
+                if not basic_salary:
+                    errors.append(f"No salary configured for faculty {faculty_id}")
+                    continue
+                present_days = attendance.get(faculty_id)
+                if present_days is None:
+                    present_days = current.get('present_days') if current.get('total_days') == total_days else None
+                if present_days is None:
+                    present_days = total_days
+                rows.append({
+                    'faculty_id': faculty_id,
+                    'pay_month': pay_month,
+                    'total_days': total_days,
+                    'present_days': min(int(present_days), total_days),
+                    'basic_salary': float(basic_salary),
+                    'role': member.get('designation') or current.get('role')
+                })
+            
+            rows = [self._calculate_payroll_fields(row) for row in rows]
+            
+            # Rows approved or paid since the scan keep their amounts and status
+            if any(row['faculty_id'] in existing for row in rows):
+                now_locked = {str(row['faculty_id']) for row in
+                              self._scan(self.table_name, 'faculty_id, status', pay_month=pay_month)
+                              if row.get('status') in LOCKED_STATUSES}
+                locked += sum(1 for row in rows if row['faculty_id'] in now_locked)
+                rows = [row for row in rows if row['faculty_id'] not in now_locked]
+            
+            updates = [row for row in rows if row['faculty_id'] in existing]
+            inserts = [dict(row, status='Pending') for row in rows if row['faculty_id'] not in existing]
+            for chunk in _chunks(updates):
+                self.supabase_admin.table(self.table_name) \
+                    .upsert(chunk, on_conflict='faculty_id,pay_month', returning=ReturnMethod.minimal) \
+                    .execute()
+            for chunk in _chunks(inserts):
+                self.supabase_admin.table(self.table_name) \
+                    .upsert(chunk, on_conflict='faculty_id,pay_month', ignore_duplicates=True,
+                            returning=ReturnMethod.minimal) \
+                    .execute()
+            
+            logger.info(f"Calculated payroll for {len(rows)} faculty for {pay_month}")
             return {
-                'success_count': len(updated_records),
+                'pay_month': pay_month,
+                'total_days': total_days,
+                'calculated': len(rows),
+                'locked': locked,
                 'error_count': len(errors),
-                'updated_records': updated_records,
-                'errors': errors
+                'errors': errors,
+                'total_net_salary': sum(row['net_salary'] for row in rows)
             }
             
+        except Exception as e:
+            logger.error(f"Error running payroll for {pay_month}: {str(e)}")
+            raise
+    
+    def _bulk_set_status(self, payroll_ids: List[int], status: str) -> Dict[str, Any]:
+        """Set ``status`` on many payroll records, one ``in_`` update per chunk of ids"""
+        updated_records = []
+        errors = []
+        ids = list(dict.fromkeys(payroll_ids))
+        for chunk in _chunks(ids):
+            try:
+                result = self.supabase_admin.table(self.table_name).update({'status': status}).in_('id', chunk).execute()
+                updated_records.extend(result.data or [])
+            except Exception as e:
+                errors.extend(f"Failed to update payroll {payroll_id}: {str(e)}" for payroll_id in chunk)
+                ids = [payroll_id for payroll_id in ids if payroll_id not in chunk]
+        
+        updated_ids = {str(record.get('id')) for record in updated_records}
+        errors.extend(f"Payroll {payroll_id} not found" for payroll_id in ids if str(payroll_id) not in updated_ids)
+        
+        return {
+            'success_count': len(updated_records),
+            'error_count': len(errors),
+            'updated_records': updated_records,
+            'errors': errors
+        }
+    
+    def bulk_approve_payroll(self, payroll_ids: List[int]) -> Dict[str, Any]:
+        """Bulk approve multiple payroll records"""
+        try:
+            return self._bulk_set_status(payroll_ids, 'Approved')
         except Exception as e:
             logger.error(f"Error in bulk approve payroll: {str(e)}")
             raise
+    
+    def bulk_mark_as_paid(self, payroll_ids: List[int]) -> Dict[str, Any]:
+        """Bulk mark multiple payroll records as paid"""
+        try:
+            return self._bulk_set_status(payroll_ids, 'Paid')
+        except Exception as e:
+            logger.error(f"Error in bulk mark payroll as paid: {str(e)}")
+            raise
 
 # Singleton instance
 payroll_model = SupabasePayroll()
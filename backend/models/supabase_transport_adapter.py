@@ -5,11 +5,54 @@ This adapter will replace the SQLite models when Supabase credentials are provid
 
 from supabase import create_client
 import os
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterator
+import base64
 import json
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+SCAN_PAGE_SIZE = 1000  # PostgREST default row cap
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Opaque keyset cursor: the sort value and id of the last row on a page"""
+    raw = json.dumps([sort_value, row_id], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return sort_value, row_id
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=(...) filter"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
 class SupabaseTransportAdapter:
-    """Adapter for Supabase database operations"""
+    """Adapter for Supabase database operations
+
+    Subclasses describe their table declaratively; ``get_all`` and
+    ``get_page`` build the filtered query from these attributes so that
+    paging, sorting and counting happen in PostgREST rather than in Python.
+    """
+
+    table_name: str = None
+    entity_name: str = 'records'
+    # Query-string keys matched with eq()
+    filter_columns: Tuple[str, ...] = ()
+    # Columns matched with ilike by the ``search`` filter
+    search_columns: Tuple[str, ...] = ()
+    default_sort: str = 'id'
+    default_desc: bool = False
+    # Columns clients may sort by; anything else falls back to default_sort
+    sortable_columns: Tuple[str, ...] = ()
 
     def __init__(self, supabase_or_url, supabase_key=None):
         if supabase_key is None and hasattr(supabase_or_url, 'table'):
@@ -27,33 +70,139 @@ class SupabaseTransportAdapter:
         """Convert Supabase response to dictionary"""
         return row if isinstance(row, dict) else dict(row) if row else None
 
+    def _process_rows(self, rows: List[Dict]) -> List[Dict]:
+        """Hook for per-row post-processing of fetched records"""
+        return rows
+
+    def _apply_filters(self, query, filters: Dict = None):
+        if filters:
+            for column in self.filter_columns:
+                if filters.get(column):
+                    query = query.eq(column, filters[column])
+            if filters.get('search') and self.search_columns:
+                search = filters['search']
+                query = query.or_(','.join(f"{column}.ilike.%{search}%" for column in self.search_columns))
+        return query
+
+    def _resolve_sort(self, sort: str = None, desc: bool = None) -> Tuple[str, bool]:
+        if sort and sort in (self.sortable_columns or (self.default_sort,)):
+            return sort, bool(desc)
+        return self.default_sort, self.default_desc if desc is None else bool(desc)
+
+    def _after_cursor(self, query, sort: str, desc: bool, cursor: str):
+        """Keep only rows after the cursor in (sort, id) order.
+
+        Postgres sorts NULLs last ascending and first descending, which the
+        conditions below follow.
+        """
+        value, row_id = decode_cursor(cursor)
+        op = 'lt' if desc else 'gt'
+        if value is None:
+            conditions = [f"and({sort}.is.null,id.{op}.{_quote(row_id)})"]
+            if desc:
+                conditions.append(f"{sort}.not.is.null")
+        else:
+            conditions = [
+                f"{sort}.{op}.{_quote(value)}",
+                f"and({sort}.eq.{_quote(value)},id.{op}.{_quote(row_id)})",
+            ]
+            if not desc:
+                conditions.append(f"{sort}.is.null")
+        return query.or_(','.join(conditions))
+
+    def _query(self, filters: Dict = None, sort: str = None, desc: bool = None,
+               cursor: str = None, count: str = None, columns: str = '*'):
+        sort, desc = self._resolve_sort(sort, desc)
+        query = self.supabase.table(self.table_name).select(columns, count=count)
+        query = self._apply_filters(query, filters)
+        if cursor:
+            query = self._after_cursor(query, sort, desc, cursor)
+        # id breaks ties so offsets and cursors are stable across requests
+        suffix = '.desc' if desc else ''
+        return query.order(f"{sort}{suffix},id{suffix}"), sort
+
+    def get_page(self, filters: Dict = None, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                 cursor: str = None, sort: str = None, desc: bool = None) -> Dict:
+        """Fetch one page of rows and the exact number of matching rows.
+
+        With ``cursor`` (the ``next_cursor`` of a previous page) the page
+        continues from that row and ``offset`` is ignored; ``total`` still
+        counts every matching row, not just those after the cursor. The
+        returned ``limit`` and ``offset`` are the values actually used.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = 0 if cursor else max(0, int(offset))
+        try:
+            # The cursor filter would shrink the count, so cursor pages count separately
+            query, sort_column = self._query(filters, sort, desc, cursor, count=None if cursor else 'exact')
+            response = query.range(offset, offset + limit - 1).execute()
+            rows = response.data if response.data else []
+            if cursor:
+                total = self.count(filters)
+            else:
+                total = response.count if response.count is not None else len(rows)
+            next_cursor = None
+            if len(rows) == limit:
+                last = rows[-1]
+                next_cursor = encode_cursor(last.get(sort_column), last.get('id'))
+            return {'data': self._process_rows(rows), 'total': total, 'next_cursor': next_cursor,
+                    'limit': limit, 'offset': offset}
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Error fetching {self.entity_name}: {e}")
+            return {'data': [], 'total': 0, 'next_cursor': None, 'limit': limit, 'offset': offset}
+
+    def count(self, filters: Dict = None) -> int:
+        """Count matching rows without downloading them"""
+        try:
+            query = self.supabase.table(self.table_name).select('id', count='exact')
+            response = self._apply_filters(query, filters).limit(1).execute()
+            return response.count or 0
+        except Exception as e:
+            print(f"Error counting {self.entity_name}: {e}")
+            return 0
+
+    def iter_all(self, filters: Dict = None, columns: str = '*',
+                 page_size: int = SCAN_PAGE_SIZE) -> Iterator[Dict]:
+        """Yield every matching row, fetching one page at a time.
+
+        Unlike ``get_all`` this is not capped at one PostgREST response and
+        errors propagate to the caller.
+        """
+        start = 0
+        while True:
+            query, _ = self._query(filters, columns=columns)
+            response = query.range(start, start + page_size - 1).execute()
+            rows = response.data or []
+            yield from self._process_rows(rows)
+            if len(rows) < page_size:
+                return
+            start += page_size
+
+    def get_all(self, filters: Dict = None, limit: int = None, offset: int = 0,
+                cursor: str = None, sort: str = None, desc: bool = None) -> List[Dict]:
+        """Get matching rows; pass ``limit`` to fetch a single page"""
+        if limit is not None or cursor:
+            return self.get_page(filters, limit or DEFAULT_PAGE_SIZE, offset, cursor, sort, desc)['data']
+        try:
+            query, _ = self._query(filters, sort, desc)
+            response = query.execute()
+            return self._process_rows(response.data if response.data else [])
+        except Exception as e:
+            print(f"Error fetching {self.entity_name}: {e}")
+            return []
+
 class SupabaseTransportStudent(SupabaseTransportAdapter):
     """Transport Student Model for Supabase"""
 
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all transport students"""
-        try:
-            query = self.supabase.table('transport_students').select('*')
-
-            if filters:
-                if filters.get('student_id'):
-                    query = query.eq('student_id', filters['student_id'])
-                if filters.get('route_id'):
-                    query = query.eq('route_id', filters['route_id'])
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('fee_status'):
-                    query = query.eq('fee_status', filters['fee_status'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"name.ilike.%{search}%,student_id.ilike.%{search}%,email.ilike.%{search}%")
-
-            # Order by name column (matches actual database schema)
-            response = query.order('name').execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching students: {e}")
-            return []
+    table_name = 'transport_students'
+    entity_name = 'students'
+    filter_columns = ('student_id', 'route_id', 'status', 'fee_status')
+    search_columns = ('name', 'student_id', 'email')
+    # Order by name column (matches actual database schema)
+    default_sort = 'name'
+    sortable_columns = ('name', 'student_id', 'route_id', 'status', 'fee_status', 'created_at')
 
     def get_by_id(self, student_id: str) -> Optional[Dict]:
         """Get student by ID"""
@@ -122,29 +271,14 @@ class SupabaseTransportStudent(SupabaseTransportAdapter):
 class SupabaseTransportFaculty(SupabaseTransportAdapter):
     """Transport Faculty Model for Supabase"""
     
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all transport faculty"""
-        try:
-            query = self.supabase.table('transport_faculty').select('*')
-
-            if filters:
-                if filters.get('route_id'):
-                    query = query.eq('route_id', filters['route_id'])
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('department'):
-                    query = query.eq('department', filters['department'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"name.ilike.%{search}%,faculty_id.ilike.%{search}%,email.ilike.%{search}%")
-
-            # Order by name column to match expected sequence
-            response = query.order('name').execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching faculty: {e}")
-            return []
-    
+    table_name = 'transport_faculty'
+    entity_name = 'faculty'
+    filter_columns = ('route_id', 'status', 'department')
+    search_columns = ('name', 'faculty_id', 'email')
+    # Order by name column to match expected sequence
+    default_sort = 'name'
+    sortable_columns = ('name', 'faculty_id', 'department', 'route_id', 'status', 'created_at')
+
     def get_by_id(self, faculty_id: str) -> Optional[Dict]:
         """Get faculty by ID"""
         try:
@@ -201,28 +335,13 @@ class SupabaseTransportFaculty(SupabaseTransportAdapter):
 class SupabaseBus(SupabaseTransportAdapter):
     """Bus Model for Supabase"""
 
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all buses"""
-        try:
-            query = self.supabase.table('transport_buses').select('*')
-            
-            if filters:
-                if filters.get('route_id'):
-                    query = query.eq('route_id', filters['route_id'])
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('driver_id'):
-                    query = query.eq('driver_id', filters['driver_id'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"bus_number.ilike.%{search}%,route_name.ilike.%{search}%,driver_name.ilike.%{search}%")
-            
-            response = query.order('bus_number').execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching buses: {e}")
-            return []
-    
+    table_name = 'transport_buses'
+    entity_name = 'buses'
+    filter_columns = ('route_id', 'status', 'driver_id')
+    search_columns = ('bus_number', 'route_name', 'driver_name')
+    default_sort = 'bus_number'
+    sortable_columns = ('bus_number', 'route_id', 'capacity', 'status', 'next_service', 'created_at')
+
     def get_by_id(self, bus_id: Any) -> Optional[Dict]:
         """Get bus by ID or bus_number"""
         try:
@@ -297,27 +416,12 @@ class SupabaseBus(SupabaseTransportAdapter):
 class SupabaseDriver(SupabaseTransportAdapter):
     """Driver Model for Supabase"""
 
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all drivers"""
-        try:
-            query = self.supabase.table('transport_drivers').select('*')
-
-            if filters:
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('shift'):
-                    query = query.eq('shift', filters['shift'])
-                if filters.get('assigned_bus'):
-                    query = query.eq('assigned_bus', filters['assigned_bus'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"name.ilike.%{search}%,driver_id.ilike.%{search}%,phone.ilike.%{search}%")
-
-            response = query.order('name').execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching drivers: {e}")
-            return []
+    table_name = 'transport_drivers'
+    entity_name = 'drivers'
+    filter_columns = ('status', 'shift', 'assigned_bus')
+    search_columns = ('name', 'driver_id', 'phone')
+    default_sort = 'name'
+    sortable_columns = ('name', 'driver_id', 'shift', 'status', 'license_expiry', 'created_at')
 
     def get_by_id(self, driver_id: str) -> Optional[Dict]:
         """Get driver by ID"""
@@ -382,36 +486,23 @@ class SupabaseDriver(SupabaseTransportAdapter):
 class SupabaseRoute(SupabaseTransportAdapter):
     """Route Model for Supabase - matches transport_routes table schema"""
 
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all routes from transport_routes table"""
-        try:
-            query = self.supabase.table('transport_routes').select('*')
-
-            if filters:
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('assigned_bus'):
-                    query = query.eq('assigned_bus', filters['assigned_bus'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"route_id.ilike.%{search}%,route_name.ilike.%{search}%")
-
-            response = query.order('route_id').execute()
-            routes = response.data if response.data else []
-            
-            # Parse JSON stops for each route
-            for route in routes:
-                if route.get('stops'):
-                    if isinstance(route['stops'], str):
-                        try:
-                            route['stops'] = json.loads(route['stops'])
-                        except:
-                            route['stops'] = []
-            
-            return routes
-        except Exception as e:
-            print(f"Error fetching routes: {e}")
-            return []
+    table_name = 'transport_routes'
+    entity_name = 'routes'
+    filter_columns = ('status', 'assigned_bus')
+    search_columns = ('route_id', 'route_name')
+    default_sort = 'route_id'
+    sortable_columns = ('route_id', 'route_name', 'status', 'created_at')
+
+    def _process_rows(self, routes: List[Dict]) -> List[Dict]:
+        # Parse JSON stops for each route
+        for route in routes:
+            if route.get('stops'):
+                if isinstance(route['stops'], str):
+                    try:
+                        route['stops'] = json.loads(route['stops'])
+                    except:
+                        route['stops'] = []
+        return routes
 
     def get_by_id(self, route_id: str) -> Optional[Dict]:
         """Get route by ID from transport_routes table"""
@@ -490,31 +581,13 @@ class SupabaseRoute(SupabaseTransportAdapter):
 class SupabaseTransportAttendance(SupabaseTransportAdapter):
     """Attendance Model for Supabase"""
 
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all transport attendance records"""
-        try:
-            query = self.supabase.table('transport_attendance').select('*')
-
-            if filters:
-                if filters.get('date'):
-                    query = query.eq('date', filters['date'])
-                if filters.get('entity_type'):
-                    query = query.eq('entity_type', filters['entity_type'])
-                if filters.get('entity_id'):
-                    query = query.eq('entity_id', filters['entity_id'])
-                if filters.get('route_id'):
-                    query = query.eq('route_id', filters['route_id'])
-                if filters.get('status'):
-                    query = query.eq('status', filters['status'])
-                if filters.get('search'):
-                    search = filters['search']
-                    query = query.or_(f"entity_name.ilike.%{search}%,entity_id.ilike.%{search}%")
-
-            response = query.order('date', desc=True).execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching attendance: {e}")
-            return []
+    table_name = 'transport_attendance'
+    entity_name = 'attendance'
+    filter_columns = ('date', 'entity_type', 'entity_id', 'route_id', 'status')
+    search_columns = ('entity_name', 'entity_id')
+    default_sort = 'date'
+    default_desc = True
+    sortable_columns = ('date', 'entity_type', 'entity_name', 'route_id', 'status', 'created_at')
 
     def create(self, data: Dict) -> Dict:
         """Create attendance record"""
@@ -8,52 +8,25 @@ import json
 from datetime import datetime, date
 from typing import List, Dict, Optional, Any
 from supabase import create_client
+from models.supabase_transport_adapter import SupabaseTransportAdapter
 
-class SupabaseTransportFee:
+class SupabaseTransportFee(SupabaseTransportAdapter):
     """Transport Fee Model for Supabase"""
 
-    def __init__(self, supabase_or_url, supabase_key=None):
-        if supabase_key is None and hasattr(supabase_or_url, 'table'):
-            # It's a supabase client
-            self.supabase = supabase_or_url
-        else:
-            # It's URL and key
-            self.supabase = create_client(supabase_or_url, supabase_key)
-        self.table_name = 'transport_fee'
-    
-    def get_all(self, filters: Dict = None) -> List[Dict]:
-        """Get all transport fees"""
-        try:
-            query = self.supabase.table(self.table_name).select('*')
-            
-            if filters:
-                if filters.get('payment_status'):
-                    query = query.eq('payment_status', filters['payment_status'])
-                if filters.get('student_id'):
-                    query = query.eq('student_id', filters['student_id'])
-                if filters.get('academic_year'):
-                    query = query.eq('academic_year', filters['academic_year'])
-                if filters.get('search'):
-                    search = filters['search']
-                    # We don't have student_name in the fee table, but we might have it in processed records
-                    # or we can search by student_id or bus_no/route_name
-                    query = query.or_(f"student_id.ilike.%{search}%,bus_no.ilike.%{search}%,route_name.ilike.%{search}%")
-            
-            response = query.execute()
-            
-            if response.data:
-                # Convert datetime strings to proper format and calculate due_amount
-                processed_data = []
-                for record in response.data:
-                    processed_record = self._process_record(record)
-                    processed_data.append(processed_record)
-                return processed_data
-            else:
-                return []
-                
-        except Exception as e:
-            print(f"Error fetching transport fees: {e}")
-            return []
+    table_name = 'transport_fee'
+    entity_name = 'transport fees'
+    filter_columns = ('payment_status', 'student_id', 'academic_year')
+    # We don't have student_name in the fee table, but we might have it in processed records
+    # or we can search by student_id or bus_no/route_name
+    search_columns = ('student_id', 'bus_no', 'route_name')
+    default_sort = 'created_at'
+    default_desc = True
+    sortable_columns = ('created_at', 'student_id', 'payment_status', 'payment_date',
+                        'academic_year', 'fee_amount', 'paid_amount', 'due_amount')
+
+    def _process_rows(self, rows: List[Dict]) -> List[Dict]:
+        # Convert datetime strings to proper format and calculate due_amount
+        return [self._process_record(record) for record in rows]
     
     def get_by_id(self, fee_id: str) -> Optional[Dict]:
         """Get fee by ID"""
@@ -168,6 +141,22 @@ class SupabaseTransportFee:
     
     def get_payment_statistics(self) -> Dict:
         """Get payment statistics"""
+        try:
+            # One aggregate row from migrations/20261017_add_transport_fee_statistics_function.sql
+            response = self.supabase.rpc('get_transport_fee_statistics', {}).execute()
+            row = response.data[0] if isinstance(response.data, list) else response.data
+            if row:
+                stats = {key: int(row.get(key) or 0)
+                         for key in ('total_records', 'paid_count', 'pending_count', 'overdue_count')}
+                stats['total_amount'] = float(row.get('total_amount') or 0)
+                stats['collected_amount'] = float(row.get('collected_amount') or 0)
+                stats['pending_amount'] = stats['total_amount'] - stats['collected_amount']
+                stats['collection_rate'] = (stats['collected_amount'] / stats['total_amount'] * 100) if stats['total_amount'] > 0 else 0.0
+                return stats
+        except Exception as e:
+            # Function not deployed yet: fall back to summing the rows here
+            print(f"Transport fee statistics RPC unavailable, scanning fees: {e}")
+
         try:
             # Get counts by payment status
             response = self.supabase.table(self.table_name).select('payment_status, fee_amount, paid_amount').execute()
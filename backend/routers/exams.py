@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, g
 from supabase_client import get_supabase
+from utils.hall_tickets import hall_ticket_store
 from datetime import datetime, time
 from functools import wraps
 from typing import Dict, List, Optional, Any
@@ -247,6 +248,7 @@ def update_exam(exam_id):
         }
         
         response = supabase.table('exams').update(update_data).eq('id', str(exam_id)).execute()
+        hall_ticket_store.invalidate_exam(exam_id)
         
         return jsonify({
             'success': True,
@@ -282,6 +284,7 @@ def delete_exam(exam_id):
         
         # Delete exam from database
         supabase.table('exams').delete().eq('id', str(exam_id)).execute()
+        hall_ticket_store.invalidate_exam(exam_id)
         
         return jsonify({
             'success': True,
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from supabase_client import get_supabase
+from utils.reference_cache import reference_cache, invalidates_reference
 from datetime import datetime
 import uuid
 from functools import wraps
@@ -66,6 +67,7 @@ def get_course(course_id):
 
 @academics_bp.route('/courses', methods=['POST'])
 @handle_errors
+@invalidates_reference('courses')
 def create_course():
     """Create a new course"""
     data = request.get_json()
@@ -79,8 +81,7 @@ def create_course():
             return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
 
     # Check if department exists
-    dept_result = supabase.table('departments').select('id').eq('id', data['department_id']).execute()
-    if not dept_result.data:
+    if not reference_cache.exists('departments', data['department_id']):
         return jsonify({"success": False, "error": "Invalid department_id"}), 400
 
     # Check if course code already exists
@@ -125,14 +126,14 @@ def create_course():
 
 @academics_bp.route('/courses/<course_id>', methods=['PUT'])
 @handle_errors
+@invalidates_reference('courses')
 def update_course(course_id):
     """Update an existing course"""
     data = request.get_json()
 
     # Validate department_id if provided
     if 'department_id' in data:
-        dept_result = supabase.table('departments').select('id').eq('id', data['department_id']).execute()
-        if not dept_result.data:
+        if not reference_cache.exists('departments', data['department_id']):
             return jsonify({"success": False, "error": "Invalid department_id"}), 400
 
     # Check if course code already exists (excluding current course)
@@ -151,6 +152,7 @@ def update_course(course_id):
 
 @academics_bp.route('/courses/<course_id>', methods=['DELETE'])
 @handle_errors
+@invalidates_reference('courses')
 def delete_course(course_id):
     """Delete a course"""
     # First check if there are any subjects associated with this course
@@ -236,6 +238,7 @@ def get_subject(subject_id):
 
 @academics_bp.route('/subjects', methods=['POST'])
 @handle_errors
+@invalidates_reference('subjects')
 def create_subject():
     """Create a new subject"""
     data = request.get_json()
@@ -246,8 +249,7 @@ def create_subject():
             return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
 
     # Check if course exists
-    course = supabase.table('courses').select('id').eq('id', data['course_id']).execute()
-    if not course.data:
+    if not reference_cache.exists('courses', data['course_id']):
         return jsonify({"success": False, "error": "Invalid course_id"}), 400
 
     # Check if subject code already exists
@@ -271,14 +273,14 @@ def create_subject():
 
 @academics_bp.route('/subjects/<int:subject_id>', methods=['PUT'])
 @handle_errors
+@invalidates_reference('subjects')
 def update_subject(subject_id):
     """Update an existing subject"""
     data = request.get_json()
 
     if 'course_id' in data:
         # Check if course exists
-        course = supabase.table('courses').select('id').eq('id', data['course_id']).execute()
-        if not course.data:
+        if not reference_cache.exists('courses', data['course_id']):
             return jsonify({"success": False, "error": "Invalid course_id"}), 400
 
     # Check if subject code already exists (excluding current subject)
@@ -295,6 +297,7 @@ def update_subject(subject_id):
 
 @academics_bp.route('/subjects/<int:subject_id>', methods=['DELETE'])
 @handle_errors
+@invalidates_reference('subjects')
 def delete_subject(subject_id):
     """Delete a subject"""
     # Check if there are any exams for this subject
@@ -376,8 +379,7 @@ def create_faculty():
             return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
 
     # Check if department exists
-    dept_result = supabase.table('departments').select('id').eq('id', data['department_id']).execute()
-    if not dept_result.data:
+    if not reference_cache.exists('departments', data['department_id']):
         return jsonify({"success": False, "error": "Invalid department_id"}), 400
 
     # Check if employee_id already exists
@@ -417,8 +419,7 @@ def update_faculty(faculty_id):
 
     # Validate department_id if provided
     if 'department_id' in data:
-        dept_result = supabase.table('departments').select('id').eq('id', data['department_id']).execute()
-        if not dept_result.data:
+        if not reference_cache.exists('departments', data['department_id']):
             return jsonify({"success": False, "error": "Invalid department_id"}), 400
 
     # Check if employee_id already exists (excluding current faculty)
@@ -473,6 +474,7 @@ def get_departments():
 
 @academics_bp.route('/departments', methods=['POST'])
 @handle_errors
+@invalidates_reference('departments')
 def create_department():
     """Create a new department"""
     data = request.get_json()
@@ -500,6 +502,7 @@ def create_department():
 
 @academics_bp.route('/departments/<int:dept_id>', methods=['PUT'])
 @handle_errors
+@invalidates_reference('departments')
 def update_department(dept_id):
     """Update an existing department"""
     data = request.get_json()
@@ -519,6 +522,7 @@ def update_department(dept_id):
 
 @academics_bp.route('/departments/<int:dept_id>', methods=['DELETE'])
 @handle_errors
+@invalidates_reference('departments')
 def delete_department(dept_id):
     """Delete a department"""
     # Check if there are any courses associated with this department
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from supabase_client import get_supabase
+from utils.student_stats import student_stats
+from utils.hall_tickets import hall_ticket_store
+from utils.id_allocator import next_student_user_id
 import os
 from datetime import datetime, timedelta
 import uuid
@@ -14,24 +17,9 @@ supabase = get_supabase()
 def generate_user_id():
     """Generate unique user ID in format STU202510001"""
     try:
-        current_year = datetime.now().year
-
-        # Get the maximum number for current year
-        response = supabase.table('students').select('user_id').like('user_id', f'STU{current_year}%').order('user_id', desc=True).limit(1).execute()
-
-        if response.data and len(response.data) > 0:
-            last_user_id = response.data[0]['user_id']
-            # Extract the number part (last 5 digits)
-            last_number = int(last_user_id[-5:])
-            next_number = last_number + 1
-        else:
-            next_number = 1
-
-        # Generate new user_id
-        new_user_id = f'STU{current_year}{str(next_number).zfill(5)}'
-        return new_user_id
+        return next_student_user_id()
     except Exception as e:
-        # Fallback to random generation if query fails
+        # Fallback to random generation if the allocator is unreachable
         return f'STU{datetime.now().year}{str(random.randint(10000, 99999))}'
 
 def generate_random_password(length=8):
@@ -44,41 +32,13 @@ def generate_random_password(length=8):
 def get_dashboard_stats():
     """Get admin dashboard statistics"""
     try:
-        # Student statistics
-        total_students = supabase.table('students').select('id', count='exact').execute().count
-
-        # Gender statistics
-        male_count = 0
-        female_count = 0
-        try:
-            # Get gender counts efficiently with pagination to avoid long-running queries
-            limit = 1000
-            offset = 0
-            while True:
-                gender_response = supabase.table('students').select('gender').limit(limit).offset(offset).execute()
-                if not gender_response.data:
-                    break
-
-                for student in gender_response.data:
-                    gender = str(student.get('gender', '')).lower()
-                    if 'male' in gender or gender == 'm':
-                        male_count += 1
-                    elif 'female' in gender or gender == 'f':
-                        female_count += 1
-
-                if len(gender_response.data) < limit:
-                    break
-                offset += limit
-        except Exception as e:
-            print(f"Warning: Could not fetch gender statistics: {str(e)}")
-            male_count = 0
-            female_count = 0
-
-        # Faculty statistics
-        total_faculty = supabase.table('faculty').select('id', count='exact').execute().count
-
-        # Department statistics
-        total_departments = supabase.table('departments').select('id', count='exact').execute().count
+        # Student, gender, faculty and department totals from the shared stats snapshot
+        snapshot = student_stats.get()
+        total_students = snapshot['total']
+        male_count = snapshot['gender']['male']
+        female_count = snapshot['gender']['female']
+        total_faculty = snapshot['faculty']
+        total_departments = snapshot['departments']
 
         # Admission statistics (handle case where admissions table doesn't exist)
         try:
@@ -338,6 +298,7 @@ def manage_student(student_id):
             data.pop('email', None)
 
             response = supabase.table('students').update(data).eq('id', student_id).execute()
+            hall_ticket_store.invalidate_student(student_id)
 
             if response.data:
                 return jsonify({
@@ -629,52 +590,131 @@ def manage_departments():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+DEFAULTERS_PAGE_SIZE = 100
+DEFAULTERS_MAX_PAGE_SIZE = 200  # student ids per `in` filter
+
+def _fetch_defaulter_rows(threshold, course_id, semester, cursor, limit):
+    """
+    Per-student attendance totals below ``threshold``, ordered by student id.
+
+    Uses the get_attendance_defaulters RPC (one grouped aggregate). Until that
+    migration is deployed, falls back to paging through attendance and
+    grouping in Python.
+    """
+    try:
+        response = supabase.rpc('get_attendance_defaulters', {
+            'p_threshold': threshold,
+            'p_course_id': course_id,
+            'p_semester': semester,
+            'p_after_student_id': cursor,
+            'p_limit': limit
+        }).execute()
+        return response.data or []
+    except Exception as e:
+        print(f"get_attendance_defaulters RPC unavailable, grouping in Python: {str(e)}")
+
+    def select_all(table, columns, filters):
+        rows, start = [], 0
+        while True:
+            query = supabase.table(table).select(columns)
+            for column, value in filters:
+                query = query.eq(column, value)
+            page = query.range(start, start + 999).execute().data or []
+            rows.extend(page)
+            if len(page) < 1000:
+                return rows
+            start += 1000
+
+    # Like the RPC's join: attendance of unknown students is ignored
+    filters = [('course_id', course_id)] if course_id else []
+    if semester is not None:
+        filters.append(('current_semester', semester))
+    eligible = {str(row['id']) for row in select_all('students', 'id', filters)}
+
+    totals = {}
+    for row in select_all('attendance', 'student_id, status', []):
+        student_id = str(row['student_id'])
+        if student_id not in eligible:
+            continue
+        total, present = totals.get(student_id, (0, 0))
+        totals[student_id] = (total + 1, present + (1 if row['status'] == 'present' else 0))
+
+    rows = []
+    for student_id in sorted(totals):
+        if cursor is not None and student_id <= cursor:
+            continue
+        total, present = totals[student_id]
+        # Compare before rounding, as the RPC does
+        percentage = present * 100.0 / total
+        if percentage < threshold:
+            rows.append({
+                'student_id': student_id,
+                'total_classes': total,
+                'present_classes': present,
+                'attendance_percentage': round(percentage, 2)
+            })
+            if len(rows) >= limit:
+                break
+    return rows
+
 @admin_bp.route('/attendance/defaulters', methods=['GET'])
 def get_attendance_defaulters():
-    """Get students with attendance below 75%"""
+    """
+    Get students with attendance below the threshold (default 75%).
+
+    Query params: threshold, course_id, semester, limit, cursor. Pass the
+    returned next_cursor as cursor to fetch the next page.
+    """
     try:
         threshold = float(request.args.get('threshold', 75))
+        course_id = request.args.get('course_id') or None
+        semester = request.args.get('semester', type=int)
+        cursor = request.args.get('cursor') or None
+        try:
+            limit = int(request.args.get('limit', DEFAULTERS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, DEFAULTERS_MAX_PAGE_SIZE))
         
-        # Get all students with their attendance
-        students_response = supabase.table('students').select("""
-            id,
-            register_number,
-            profiles (
-                full_name,
-                email,
-                phone
-            ),
-            courses (
-                name,
-                code
-            )
-        """).execute()
+        rows = _fetch_defaulter_rows(threshold, course_id, semester, cursor, limit)
         
-        defaulters = []
+        # Student details for this page only
+        students_by_id = {}
+        if rows:
+            students_response = supabase.table('students').select("""
+                id,
+                register_number,
+                current_semester,
+                profiles (
+                    full_name,
+                    email,
+                    phone
+                ),
+                courses (
+                    name,
+                    code
+                )
+            """).in_('id', [row['student_id'] for row in rows]).execute()
+            students_by_id = {str(student['id']): student for student in students_response.data or []}
         
-        for student in students_response.data:
-            # Calculate attendance percentage
-            attendance_response = supabase.table('attendance').select('status').eq('student_id', student['id']).execute()
-            
-            total_classes = len(attendance_response.data)
-            if total_classes > 0:
-                present_classes = len([r for r in attendance_response.data if r['status'] == 'present'])
-                attendance_percentage = (present_classes / total_classes) * 100
-                
-                if attendance_percentage < threshold:
-                    defaulters.append({
-                        **student,
-                        'attendance_percentage': round(attendance_percentage, 2),
-                        'total_classes': total_classes,
-                        'present_classes': present_classes,
-                        'absent_classes': total_classes - present_classes
-                    })
+        defaulters = []
+        for row in rows:
+            total_classes = row['total_classes']
+            present_classes = row['present_classes']
+            defaulters.append({
+                **students_by_id.get(row['student_id'], {'id': row['student_id']}),
+                'attendance_percentage': float(row['attendance_percentage']),
+                'total_classes': total_classes,
+                'present_classes': present_classes,
+                'absent_classes': total_classes - present_classes
+            })
         
         return jsonify({
             'success': True,
             'data': defaulters,
             'threshold': threshold,
-            'total_defaulters': len(defaulters)
+            'count': len(defaulters),
+            'next_cursor': rows[-1]['student_id'] if len(rows) == limit else None
         }), 200
         
     except Exception as e:
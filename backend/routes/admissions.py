@@ -1,16 +1,50 @@
 from flask import Blueprint, request, jsonify, current_app
 from supabase_client import get_supabase
+from utils.swr_cache import StaleWhileRevalidateCache
+from utils.reference_cache import reference_cache
+from utils.student_stats import student_stats
+from utils.id_allocator import next_application_number
+from utils.resume_files import store_upload, extract_resume_text
+from utils.analysis_queue import analysis_queue
+from collections import OrderedDict
 import os
+import threading
 from datetime import datetime, timedelta
 import uuid
 from functools import wraps
 from werkzeug.utils import secure_filename
 
+try:
+    import google.generativeai as genai
+    if os.getenv('GEMINI_API_KEY'):
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+except ImportError:
+    genai = None
+
 admissions_bp = Blueprint('admissions', __name__)
 
 # Initialize Supabase client
 supabase = get_supabase()
 
+# Admission statistics are cached briefly and dropped whenever an application
+# is submitted or changes status, so the dashboard never shows stale counts
+# after its own actions
+ADMISSION_STATS_TTL = int(os.getenv('ADMISSION_STATS_TTL', '30'))
+admission_stats_cache = StaleWhileRevalidateCache(ADMISSION_STATS_TTL)
+STATS_PAGE_SIZE = 1000  # PostgREST default row cap
+
+# Bulk approvals run in a background thread. The worker running a job keeps
+# it in memory and saves a snapshot to BULK_JOBS_TABLE after every step, so
+# a poll served by another worker (or after a restart) still finds it; a
+# running snapshot not saved for BULK_JOB_STALE_AFTER seconds lost its worker
+BULK_CHUNK_SIZE = 500  # ids per in_() filter
+STUDENT_INSERT_CHUNK_SIZE = 200
+MAX_BULK_JOBS = 50
+BULK_JOBS_TABLE = 'admission_bulk_jobs'
+BULK_JOB_STALE_AFTER = int(os.getenv('BULK_JOB_STALE_AFTER', '300'))
+bulk_jobs = OrderedDict()
+_bulk_jobs_lock = threading.Lock()
+
 def handle_errors(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
@@ -28,30 +62,13 @@ def allowed_file(filename):
 
 def extract_text_from_resume(file_path):
     """Extract text from resume file"""
-    _, file_extension = os.path.splitext(file_path)
-    file_extension = file_extension.lower()
-    
-    try:
-        if file_extension == '.pdf':
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
-        elif file_extension in ['.doc', '.docx']:
-            import docx2txt
-            return docx2txt.process(file_path)
-        elif file_extension == '.txt':
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                return file.read()
-    except Exception as e:
-        current_app.logger.error(f"Error extracting text from resume: {str(e)}")
-        return None
+    return extract_resume_text(file_path) or None
 
 def analyze_resume_with_gemini(resume_text):
     """Analyze resume text using Gemini API"""
+    if genai is None:
+        print("Error analyzing resume with Gemini: google.generativeai is not installed")
+        return None
     try:
         model = genai.GenerativeModel('gemini-pro')
         
@@ -73,14 +90,26 @@ def analyze_resume_with_gemini(resume_text):
         response = model.generate_content(prompt)
         return response.text
     except Exception as e:
-        current_app.logger.error(f"Error analyzing resume with Gemini: {str(e)}")
+        # Runs on an analysis worker thread, outside the app context
+        print(f"Error analyzing resume with Gemini: {str(e)}")
         return None
 
+def _gemini_resume_analysis(resume_text):
+    """Analyzer for the resume analysis queue; raises so failures are not cached"""
+    response_text = analyze_resume_with_gemini(resume_text)
+    if response_text is None:
+        raise RuntimeError("Gemini resume analysis failed")
+    return {'extraction': response_text}
+
+# Resumes attached to applications are analysed on the shared background
+# workers (utils/analysis_queue.py); bump the version when the prompt changes
+RESUME_EXTRACTOR = 'gemini'
+RESUME_EXTRACTOR_VERSION = 'gemini-pro-1'
+analysis_queue.register(RESUME_EXTRACTOR, RESUME_EXTRACTOR_VERSION, _gemini_resume_analysis)
+
 def generate_application_number():
     """Generate unique application number"""
-    year = datetime.now().year
-    random_num = str(uuid.uuid4().int)[:4]
-    return f"ADM{year}{random_num}"
+    return next_application_number()
 
 @admissions_bp.route('/submit', methods=['POST'])
 def submit_application():
@@ -138,6 +167,7 @@ def submit_application():
         response = supabase.table('admissions').insert(admission_data).execute()
         
         if response.data:
+            admission_stats_cache.invalidate()
             return jsonify({
                 'success': True,
                 'application_number': application_number,
@@ -281,6 +311,8 @@ def update_application_status(application_id):
     response = supabase.table('admissions').update(update_data).eq('id', application_id).execute()
 
     if response.data:
+        admission_stats_cache.invalidate()
+
         # If approved, create student record
         if new_status == 'approved':
             student_creation_result = create_student_from_admission(response.data[0])
@@ -298,6 +330,51 @@ def update_application_status(application_id):
     else:
         return jsonify({'success': False, 'error': 'Failed to update application'}), 400
 
+def student_record_from_admission(admission_data, register_number):
+    """The students row created for an approved admission"""
+    return {
+        'register_number': register_number,
+        'full_name': admission_data['full_name'],
+        'email': admission_data['email'],
+        'phone': admission_data['phone'],
+        'course_id': admission_data['course_id'],
+        'admission_year': datetime.now().year,
+        'current_semester': 1,
+        'quota_type': admission_data['quota_type'],
+        'date_of_birth': admission_data['date_of_birth'],
+        'gender': admission_data['gender'],
+        'blood_group': admission_data.get('blood_group'),
+        'aadhar_number': admission_data.get('aadhar_number'),
+        'religion': admission_data.get('religion'),
+        'caste': admission_data.get('caste'),
+        'community': admission_data.get('community'),
+        'father_name': admission_data.get('father_name'),
+        'father_phone': admission_data.get('father_phone'),
+        'mother_name': admission_data.get('mother_name'),
+        'mother_phone': admission_data.get('mother_phone'),
+        'guardian_name': admission_data.get('guardian_name'),
+        'annual_income': admission_data.get('annual_income'),
+        'permanent_address': admission_data.get('permanent_address'),
+        'communication_address': admission_data.get('communication_address'),
+        'city': admission_data.get('city'),
+        'state': admission_data.get('state'),
+        'pincode': admission_data.get('pincode'),
+        'tenth_board': admission_data.get('tenth_board'),
+        'tenth_year': admission_data.get('tenth_year'),
+        'tenth_marks': admission_data.get('tenth_marks'),
+        'twelfth_board': admission_data.get('twelfth_board'),
+        'twelfth_year': admission_data.get('twelfth_year'),
+        'twelfth_marks': admission_data.get('twelfth_marks'),
+        'group_studied': admission_data.get('group_studied'),
+        'medium_of_instruction': admission_data.get('medium_of_instruction'),
+        'first_graduate': admission_data.get('first_graduate', False),
+        'hostel_required': admission_data.get('hostel_required', False),
+        'transport_required': admission_data.get('transport_required', False),
+        'status': 'active',
+        'created_at': datetime.now().isoformat(),
+        'updated_at': datetime.now().isoformat()
+    }
+
 def create_student_from_admission(admission_data):
     """Create student record from approved admission with enhanced error handling"""
     try:
@@ -327,48 +404,7 @@ def create_student_from_admission(admission_data):
             register_number = f"{year}{course_code}{random_num}"
 
         # Create student record with all required fields
-        student_data = {
-            'register_number': register_number,
-            'full_name': admission_data['full_name'],
-            'email': admission_data['email'],
-            'phone': admission_data['phone'],
-            'course_id': admission_data['course_id'],
-            'admission_year': datetime.now().year,
-            'current_semester': 1,
-            'quota_type': admission_data['quota_type'],
-            'date_of_birth': admission_data['date_of_birth'],
-            'gender': admission_data['gender'],
-            'blood_group': admission_data.get('blood_group'),
-            'aadhar_number': admission_data.get('aadhar_number'),
-            'religion': admission_data.get('religion'),
-            'caste': admission_data.get('caste'),
-            'community': admission_data.get('community'),
-            'father_name': admission_data.get('father_name'),
-            'father_phone': admission_data.get('father_phone'),
-            'mother_name': admission_data.get('mother_name'),
-            'mother_phone': admission_data.get('mother_phone'),
-            'guardian_name': admission_data.get('guardian_name'),
-            'annual_income': admission_data.get('annual_income'),
-            'permanent_address': admission_data.get('permanent_address'),
-            'communication_address': admission_data.get('communication_address'),
-            'city': admission_data.get('city'),
-            'state': admission_data.get('state'),
-            'pincode': admission_data.get('pincode'),
-            'tenth_board': admission_data.get('tenth_board'),
-            'tenth_year': admission_data.get('tenth_year'),
-            'tenth_marks': admission_data.get('tenth_marks'),
-            'twelfth_board': admission_data.get('twelfth_board'),
-            'twelfth_year': admission_data.get('twelfth_year'),
-            'twelfth_marks': admission_data.get('twelfth_marks'),
-            'group_studied': admission_data.get('group_studied'),
-            'medium_of_instruction': admission_data.get('medium_of_instruction'),
-            'first_graduate': admission_data.get('first_graduate', False),
-            'hostel_required': admission_data.get('hostel_required', False),
-            'transport_required': admission_data.get('transport_required', False),
-            'status': 'active',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+        student_data = student_record_from_admission(admission_data, register_number)
 
         # Insert student record
         student_response = supabase.table('students').insert(student_data).execute()
@@ -406,78 +442,262 @@ def get_courses():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@admissions_bp.route('/stats', methods=['GET'])
-@handle_errors
-def get_admission_stats():
-    """Get comprehensive admission statistics"""
-    # Get total applications
-    total_response = supabase.table('admissions').select('id', count='exact').execute()
-    total_applications = total_response.count or 0
-
-    # Get applications by status
-    pending_response = supabase.table('admissions').select('id', count='exact').eq('status', 'pending').execute()
-    pending_applications = pending_response.count or 0
-
-    approved_response = supabase.table('admissions').select('id', count='exact').eq('status', 'approved').execute()
-    approved_applications = approved_response.count or 0
-
-    rejected_response = supabase.table('admissions').select('id', count='exact').eq('status', 'rejected').execute()
-    rejected_applications = rejected_response.count or 0
-
-    waitlisted_response = supabase.table('admissions').select('id', count='exact').eq('status', 'waitlisted').execute()
-    waitlisted_applications = waitlisted_response.count or 0
-
-    # Get course-wise applications
-    course_wise_response = supabase.table('admissions').select('''
-        course_id,
-        courses (
-            name,
-            code
-        )
-    ''').execute()
+def _admission_stats_rows():
+    """``(dimension, value, applications)`` rows: the RPC, or one paged read of admissions"""
+    try:
+        result = supabase.rpc('get_admission_stats', {}).execute()
+        return [(row['dimension'], row['value'], row['applications']) for row in result.data or []]
+    except Exception as e:
+        print(f"get_admission_stats RPC unavailable, scanning admissions: {str(e)}")
 
+    counts = {}
+    seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
+    offset = 0
+    while True:
+        page = supabase.table('admissions').select('''
+            id,
+            status,
+            quota_type,
+            created_at,
+            courses (
+                name
+            )
+        ''').order('id').range(offset, offset + STATS_PAGE_SIZE - 1).execute().data or []
+        for app in page:
+            keys = [
+                ('total', 'applications'),
+                ('status', app.get('status')),
+                ('course', app['courses']['name'] if app.get('courses') else 'Unknown'),
+                ('quota', app.get('quota_type') or 'Not specified'),
+            ]
+            if str(app.get('created_at') or '') >= seven_days_ago:
+                keys.append(('total', 'recent'))
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        if len(page) < STATS_PAGE_SIZE:
+            break
+        offset += STATS_PAGE_SIZE
+    return [(dimension, value, count) for (dimension, value), count in counts.items()]
+
+def _load_admission_stats():
+    by_status = {}
     course_wise_stats = {}
-    for app in course_wise_response.data:
-        course_name = app['courses']['name'] if app['courses'] else 'Unknown'
-        course_wise_stats[course_name] = course_wise_stats.get(course_name, 0) + 1
-
-    # Get quota-wise applications
-    quota_wise_response = supabase.table('admissions').select('quota_type').execute()
     quota_wise_stats = {}
-    for app in quota_wise_response.data:
-        quota = app['quota_type'] or 'Not specified'
-        quota_wise_stats[quota] = quota_wise_stats.get(quota, 0) + 1
+    totals = {}
+    buckets = {'status': by_status, 'course': course_wise_stats, 'quota': quota_wise_stats, 'total': totals}
+    for dimension, value, count in _admission_stats_rows():
+        if dimension in buckets:
+            buckets[dimension][value] = int(count or 0)
 
-    # Get recent applications (last 7 days)
-    seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-    recent_response = supabase.table('admissions').select('id', count='exact').gte('created_at', seven_days_ago).execute()
-    recent_applications = recent_response.count or 0
+    total_applications = totals.get('applications', 0)
+    approved_applications = by_status.get('approved', 0)
+    rejected_applications = by_status.get('rejected', 0)
 
     # Calculate rates
     approval_rate = (approved_applications / total_applications * 100) if total_applications > 0 else 0
     rejection_rate = (rejected_applications / total_applications * 100) if total_applications > 0 else 0
 
+    return {
+        'total_applications': total_applications,
+        'pending_applications': by_status.get('pending', 0),
+        'approved_applications': approved_applications,
+        'rejected_applications': rejected_applications,
+        'waitlisted_applications': by_status.get('waitlisted', 0),
+        'recent_applications': totals.get('recent', 0),
+        'approval_rate': round(approval_rate, 2),
+        'rejection_rate': round(rejection_rate, 2),
+        'course_wise_applications': course_wise_stats,
+        'quota_wise_applications': quota_wise_stats
+    }
+
+@admissions_bp.route('/stats', methods=['GET'])
+@handle_errors
+def get_admission_stats():
+    """Get comprehensive admission statistics"""
     return jsonify({
         'success': True,
-        'data': {
-            'total_applications': total_applications,
-            'pending_applications': pending_applications,
-            'approved_applications': approved_applications,
-            'rejected_applications': rejected_applications,
-            'waitlisted_applications': waitlisted_applications,
-            'recent_applications': recent_applications,
-            'approval_rate': round(approval_rate, 2),
-            'rejection_rate': round(rejection_rate, 2),
-            'course_wise_applications': course_wise_stats,
-            'quota_wise_applications': quota_wise_stats
-        }
+        'data': admission_stats_cache.get('stats', _load_admission_stats)
     })
 
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _register_number_allocator(course_ids, course_codes):
+    """Next free register number per course, reserved with two reads per course
+
+    Numbering matches create_student_from_admission ({year}{code}{n:03d},
+    continuing from the course's student count), skipping numbers already
+    taken.
+    """
+    year = datetime.now().year
+    state = {}
+    taken_by_prefix = {}  # courses sharing a code share one set of taken numbers
+    for course_id in course_ids:
+        code = course_codes.get(str(course_id))
+        if not code:
+            continue
+        prefix = f"{year}{code}"
+        count = supabase.table('students').select('id', count='exact').eq('course_id', course_id).limit(1).execute().count or 0
+        if prefix not in taken_by_prefix:
+            taken = taken_by_prefix[prefix] = set()
+            offset = 0
+            while True:
+                page = supabase.table('students').select('register_number').like('register_number', f'{prefix}%') \
+                    .order('register_number').range(offset, offset + STATS_PAGE_SIZE - 1).execute().data or []
+                taken.update(row['register_number'] for row in page)
+                if len(page) < STATS_PAGE_SIZE:
+                    break
+                offset += STATS_PAGE_SIZE
+        state[str(course_id)] = {'prefix': prefix, 'next': count + 1, 'taken': taken_by_prefix[prefix]}
+
+    def allocate(course_id):
+        course = state[str(course_id)]
+        while True:
+            register_number = f"{course['prefix']}{course['next']:03d}"
+            course['next'] += 1
+            if register_number not in course['taken']:
+                course['taken'].add(register_number)
+                return register_number
+
+    return allocate
+
+def _save_bulk_job(job):
+    """Persist a snapshot of ``job`` for polls served by other workers"""
+    job['updated_at'] = datetime.now().isoformat()
+    try:
+        supabase.table(BULK_JOBS_TABLE).upsert({**job, 'results': list(job['results'])},
+                                               on_conflict='job_id').execute()
+    except Exception as e:
+        print(f"Could not save bulk job {job['job_id']}: {str(e)}")
+
+def _load_bulk_job(job_id):
+    """A job run by another worker (or before a restart), from its last snapshot"""
+    try:
+        uuid.UUID(str(job_id))
+    except ValueError:
+        return None
+    try:
+        rows = supabase.table(BULK_JOBS_TABLE).select('*').eq('job_id', job_id).limit(1).execute().data
+    except Exception as e:
+        print(f"Could not load bulk job {job_id}: {str(e)}")
+        return None
+    if not rows:
+        return None
+    job = rows[0]
+    if job.get('status') == 'running' and job.get('updated_at') and \
+            datetime.fromisoformat(job['updated_at']) < datetime.now() - timedelta(seconds=BULK_JOB_STALE_AFTER):
+        # Its worker stopped mid-way; approving the same ids again finishes the job
+        job['status'] = 'interrupted'
+        job['error'] = 'The job stopped before finishing; submit the remaining applications again'
+    return job
+
+def _run_bulk_approval(job, application_ids, reviewed_by, remarks):
+    """Approve ``application_ids`` and create their students with a handful of bulk requests"""
+    results = job['results']
+
+    def fail(app_id, error):
+        results.append({'id': app_id, 'error': error})
+        job['failure_count'] += 1
+        job['processed'] += 1
+
+    try:
+        # 1. Prefetch every application
+        applications = {}
+        for chunk in _chunks(application_ids):
+            for row in supabase.table('admissions').select('*').in_('id', chunk).execute().data or []:
+                applications[str(row['id'])] = row
+        for app_id in application_ids:
+            if str(app_id) not in applications:
+                fail(app_id, 'Application not found')
+        found = [app_id for app_id in application_ids if str(app_id) in applications]
+        _save_bulk_job(job)
+
+        # 2. Approve them: one update per chunk of ids
+        update_data = {
+            'status': 'approved',
+            'reviewed_by': reviewed_by,
+            'remarks': remarks,
+            'reviewed_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+        approved = []
+        for chunk in _chunks(found):
+            try:
+                updated = supabase.table('admissions').update(update_data).in_('id', chunk).execute().data or []
+            except Exception as e:
+                for app_id in chunk:
+                    fail(app_id, f'Failed to update application: {str(e)}')
+                continue
+            updated_ids = {str(row['id']) for row in updated}
+            for app_id in chunk:
+                if str(app_id) in updated_ids:
+                    applications[str(app_id)].update(update_data)
+                    approved.append(app_id)
+                else:
+                    fail(app_id, 'Failed to update application')
+        admission_stats_cache.invalidate()
+        _save_bulk_job(job)
+
+        # 3. Students that already exist, course codes and register number blocks
+        emails = [applications[str(app_id)]['email'] for app_id in approved if applications[str(app_id)].get('email')]
+        existing_emails = set()
+        for chunk in _chunks(emails):
+            existing_emails.update(row['email'] for row in
+                                   supabase.table('students').select('email').in_('email', chunk).execute().data or [])
+        course_codes = {course_id: course.get('code') for course_id, course in reference_cache.rows('courses').items()}
+        allocate = _register_number_allocator(
+            {applications[str(app_id)].get('course_id') for app_id in approved}, course_codes)
+
+        pending = []
+        for app_id in approved:
+            admission = applications[str(app_id)]
+            if admission.get('email') in existing_emails:
+                fail(app_id, 'Approved but failed to create student: Student record already exists for this email')
+            elif not course_codes.get(str(admission.get('course_id'))):
+                fail(app_id, 'Approved but failed to create student: Course not found')
+            else:
+                # Two applications with one email still produce one student
+                existing_emails.add(admission.get('email'))
+                pending.append((app_id, student_record_from_admission(admission, allocate(admission['course_id']))))
+
+        # 4. Insert students in chunks; a failed chunk is retried row by row to isolate bad rows
+        for chunk in _chunks(pending, STUDENT_INSERT_CHUNK_SIZE):
+            try:
+                supabase.table('students').insert([student for _, student in chunk]).execute()
+                inserted = [(app_id, student, None) for app_id, student in chunk]
+            except Exception:
+                inserted = []
+                for app_id, student in chunk:
+                    try:
+                        supabase.table('students').insert(student).execute()
+                        inserted.append((app_id, student, None))
+                    except Exception as e:
+                        inserted.append((app_id, student, str(e)))
+            for app_id, student, error in inserted:
+                if error:
+                    fail(app_id, f'Approved but failed to create student: {error}')
+                else:
+                    results.append({'id': app_id, 'register_number': student['register_number']})
+                    job['success_count'] += 1
+                    job['processed'] += 1
+            _save_bulk_job(job)
+
+        student_stats.invalidate()
+        job['status'] = 'completed'
+    except Exception as e:
+        print(f"Error in bulk approval job {job['job_id']}: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+        _save_bulk_job(job)
+
 # Bulk Operations
 @admissions_bp.route('/applications/bulk-approve', methods=['POST'])
 @handle_errors
 def bulk_approve_applications():
-    """Bulk approve multiple applications"""
+    """Start a background job approving multiple applications; poll /applications/jobs/<job_id>"""
     data = request.get_json()
     application_ids = data.get('application_ids', [])
     reviewed_by = data.get('reviewed_by')
@@ -489,54 +709,54 @@ def bulk_approve_applications():
     if not isinstance(application_ids, list):
         return jsonify({'success': False, 'error': 'application_ids must be a list'}), 400
 
-    successful_approvals = []
-    failed_approvals = []
-
-    for app_id in application_ids:
-        try:
-            # Get the application
-            app_response = supabase.table('admissions').select('*').eq('id', app_id).execute()
-            if not app_response.data:
-                failed_approvals.append({'id': app_id, 'error': 'Application not found'})
-                continue
-
-            # Update status
-            update_data = {
-                'status': 'approved',
-                'reviewed_by': reviewed_by,
-                'remarks': remarks,
-                'reviewed_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
+    application_ids = list(dict.fromkeys(application_ids))
+    job_id = str(uuid.uuid4())
+    job = {
+        'job_id': job_id,
+        'type': 'bulk_approve',
+        'status': 'running',
+        'total': len(application_ids),
+        'processed': 0,
+        'success_count': 0,
+        'failure_count': 0,
+        'results': [],
+        'error': None,
+        'started_at': datetime.now().isoformat(),
+        'finished_at': None
+    }
+    with _bulk_jobs_lock:
+        bulk_jobs[job_id] = job
+        while len(bulk_jobs) > MAX_BULK_JOBS:
+            bulk_jobs.popitem(last=False)
+    _save_bulk_job(job)
 
-            update_response = supabase.table('admissions').update(update_data).eq('id', app_id).execute()
+    threading.Thread(target=_run_bulk_approval, args=(job, application_ids, reviewed_by, remarks),
+                     name=f'admissions-bulk-approve-{job_id}', daemon=True).start()
 
-            if update_response.data:
-                # Create student record
-                student_result = create_student_from_admission(update_response.data[0])
-                if student_result['success']:
-                    successful_approvals.append({
-                        'id': app_id,
-                        'register_number': student_result['register_number']
-                    })
-                else:
-                    failed_approvals.append({
-                        'id': app_id,
-                        'error': f'Approved but failed to create student: {student_result["error"]}'
-                    })
-            else:
-                failed_approvals.append({'id': app_id, 'error': 'Failed to update application'})
+    return jsonify({
+        'success': True,
+        'message': f'Approving {len(application_ids)} applications in the background',
+        'job_id': job_id,
+        'status_url': f'/api/admissions/applications/jobs/{job_id}',
+        'data': {key: value for key, value in job.items() if key != 'results'}
+    }), 202
 
-        except Exception as e:
-            failed_approvals.append({'id': app_id, 'error': str(e)})
+@admissions_bp.route('/applications/jobs/<job_id>', methods=['GET'])
+@handle_errors
+def get_bulk_job(job_id):
+    """Progress and per-application results of a bulk approval job"""
+    job = bulk_jobs.get(job_id) or _load_bulk_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
 
+    results = list(job['results'])
     return jsonify({
         'success': True,
-        'message': f'Processed {len(application_ids)} applications',
-        'successful_approvals': successful_approvals,
-        'failed_approvals': failed_approvals,
-        'success_count': len(successful_approvals),
-        'failure_count': len(failed_approvals)
+        'data': {
+            **{key: value for key, value in job.items() if key != 'results'},
+            'successful_approvals': [r for r in results if 'error' not in r],
+            'failed_approvals': [r for r in results if 'error' in r]
+        }
     })
 
 @admissions_bp.route('/applications/bulk-reject', methods=['POST'])
@@ -577,6 +797,8 @@ def bulk_reject_applications():
         except Exception as e:
             failed_rejections.append({'id': app_id, 'error': str(e)})
 
+    admission_stats_cache.invalidate()
+
     return jsonify({
         'success': True,
         'message': f'Processed {len(application_ids)} applications',
@@ -647,6 +869,33 @@ def upload_document():
         upload_folder = os.path.join(os.getcwd(), 'uploads', 'admissions')
         os.makedirs(upload_folder, exist_ok=True)
 
+        if document_type == 'resume':
+            # Stored by content hash; the AI extraction runs in the background
+            try:
+                stored = store_upload(file.stream, os.path.splitext(filename)[1], upload_dir=upload_folder)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            resume_path = stored['path']
+            job = analysis_queue.submit(RESUME_EXTRACTOR, stored['sha256'],
+                                        lambda: extract_resume_text(resume_path))
+            return jsonify({
+                "success": True,
+                "message": "Resume uploaded; analysis in progress" if not job.done else "Resume uploaded and analysed",
+                "data": {
+                    "filename": stored['stored_name'],
+                    "original_filename": filename,
+                    "document_type": document_type,
+                    "application_id": application_id,
+                    "upload_date": datetime.now().isoformat(),
+                    "analysis_job": {
+                        "job_id": job.id,
+                        "status": job.status,
+                        "status_url": f"/api/resume/analysis/jobs/{job.id}",
+                        "events_url": f"/api/resume/analysis/jobs/{job.id}/events"
+                    }
+                }
+            }), 200 if job.done else 202
+
         # Generate unique filename
         unique_filename = f"{application_id}_{document_type}_{uuid.uuid4().hex[:8]}_{filename}"
         file_path = os.path.join(upload_folder, unique_filename)
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
+from postgrest.exceptions import APIError
 from supabase_client import get_supabase
+from utils.reference_cache import reference_cache
 from datetime import datetime, timedelta
 from functools import wraps
 
@@ -18,6 +20,57 @@ def handle_errors(f):
             return jsonify({"success": False, "error": str(e)}), 500
     return wrapper
 
+# IDs per `in` filter; keeps request URLs well under gateway limits
+IN_FILTER_CHUNK_SIZE = 200
+# Rows per insert request when marking attendance in bulk
+ATTENDANCE_INSERT_CHUNK_SIZE = 1000
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def _attendance_key(record):
+    return (str(record['student_id']), str(record['subject_id']), str(record['date']))
+
+def _existing_ids(table, ids):
+    """Return the subset of ``ids`` present in ``table`` as strings"""
+    found = set()
+    for chunk in _chunks(ids, IN_FILTER_CHUNK_SIZE):
+        result = supabase.table(table).select('id').in_('id', chunk).execute()
+        found.update(str(row['id']) for row in result.data or [])
+    return found
+
+def _find_existing_attendance(records):
+    """Return already-stored rows matching any (student, subject, date) in ``records``"""
+    wanted = {_attendance_key(record) for record in records}
+    subject_ids = list({record['subject_id'] for record in records})
+    dates = list({record['date'] for record in records})
+    matches = []
+    for chunk in _chunks({record['student_id'] for record in records}, IN_FILTER_CHUNK_SIZE):
+        result = supabase.table('attendance') \
+            .select('student_id, subject_id, date') \
+            .in_('student_id', chunk) \
+            .in_('subject_id', subject_ids) \
+            .in_('date', dates) \
+            .execute()
+        matches.extend(row for row in result.data or [] if _attendance_key(row) in wanted)
+    return matches
+
+def _insert_attendance_rows(rows):
+    """Insert attendance rows in batches, relying on the (student_id, subject_id, date) unique index"""
+    for chunk in _chunks(rows, ATTENDANCE_INSERT_CHUNK_SIZE):
+        try:
+            supabase.table('attendance') \
+                .upsert(chunk, on_conflict='student_id,subject_id,date', ignore_duplicates=True) \
+                .execute()
+        except APIError as e:
+            # 42P10: the unique index from migrations/20261017_add_attendance_unique_index.sql
+            # is not deployed yet, so there is nothing to arbitrate the upsert on
+            if e.code != '42P10':
+                raise
+            supabase.table('attendance').insert(chunk).execute()
+
 # Attendance Management
 @attendance_bp.route('/attendance', methods=['GET'])
 @handle_errors
@@ -80,46 +133,50 @@ def mark_attendance():
                 if field not in record:
                     return jsonify({"success": False, "error": f"Missing required field: {field} in attendance record"}), 400
         
-        # Validate all records first
+        # Validate statuses and in-batch duplicates before touching the database
+        valid_statuses = ['present', 'absent', 'late']
+        batch_keys = set()
         for record in attendance_records:
-            # Check if student exists
-            student_result = supabase.table('students').select('id').eq('id', record['student_id']).execute()
-            if not student_result.data:
-                return jsonify({"success": False, "error": f"Invalid student_id: {record['student_id']}"}), 400
-            
-            # Check if subject exists
-            subject_result = supabase.table('subjects').select('id').eq('id', record['subject_id']).execute()
-            if not subject_result.data:
-                return jsonify({"success": False, "error": f"Invalid subject_id: {record['subject_id']}"}), 400
-            
-            # Check if faculty exists
-            faculty_result = supabase.table('faculty').select('id').eq('id', record['faculty_id']).execute()
-            if not faculty_result.data:
-                return jsonify({"success": False, "error": f"Invalid faculty_id: {record['faculty_id']}"}), 400
-            
-            # Validate status
-            valid_statuses = ['present', 'absent', 'late']
             if record['status'] not in valid_statuses:
                 return jsonify({"success": False, "error": f"Invalid status: {record['status']}. Must be one of: {valid_statuses}"}), 400
+            key = _attendance_key(record)
+            if key in batch_keys:
+                return jsonify({"success": False, "error": f"Duplicate attendance record for student {record['student_id']} on {record['date']}"}), 400
+            batch_keys.add(key)
         
-        # Check for existing attendance records
+        # Validate referenced IDs with one `in` query per table
+        student_ids = {record['student_id'] for record in attendance_records}
+        known_students = _existing_ids('students', student_ids)
         for record in attendance_records:
-            existing = supabase.table('attendance').select('id').eq('student_id', record['student_id']).eq('subject_id', record['subject_id']).eq('date', record['date']).execute()
-            if existing.data:
-                return jsonify({"success": False, "error": f"Attendance already marked for student {record['student_id']} on {record['date']}"}), 400
+            if str(record['student_id']) not in known_students:
+                return jsonify({"success": False, "error": f"Invalid student_id: {record['student_id']}"}), 400
         
-        # Insert all records
+        for subject_id in {record['subject_id'] for record in attendance_records}:
+            if not reference_cache.exists('subjects', subject_id):
+                return jsonify({"success": False, "error": f"Invalid subject_id: {subject_id}"}), 400
+        
+        faculty_ids = {record['faculty_id'] for record in attendance_records}
+        known_faculty = _existing_ids('faculty', faculty_ids)
         for record in attendance_records:
-            attendance_data = {
-                'student_id': record['student_id'],
-                'subject_id': record['subject_id'],
-                'faculty_id': record['faculty_id'],
-                'date': record['date'],
-                'status': record['status'],
-                'remarks': record.get('remarks'),
-                'created_at': datetime.now().isoformat()
-            }
-            supabase.table('attendance').insert(attendance_data).execute()
+            if str(record['faculty_id']) not in known_faculty:
+                return jsonify({"success": False, "error": f"Invalid faculty_id: {record['faculty_id']}"}), 400
+        
+        # Check for existing attendance records with one composite query
+        existing = _find_existing_attendance(attendance_records)
+        if existing:
+            return jsonify({"success": False, "error": f"Attendance already marked for student {existing[0]['student_id']} on {existing[0]['date']}"}), 400
+        
+        # Insert all records in one batched upsert
+        now = datetime.now().isoformat()
+        _insert_attendance_rows([{
+            'student_id': record['student_id'],
+            'subject_id': record['subject_id'],
+            'faculty_id': record['faculty_id'],
+            'date': record['date'],
+            'status': record['status'],
+            'remarks': record.get('remarks'),
+            'created_at': now
+        } for record in attendance_records])
         
         return jsonify({"success": True, "message": f"Attendance marked for {len(attendance_records)} students"}), 201
     
@@ -136,8 +193,7 @@ def mark_attendance():
         if not student_result.data:
             return jsonify({"success": False, "error": "Invalid student_id"}), 400
         
-        subject_result = supabase.table('subjects').select('id').eq('id', data['subject_id']).execute()
-        if not subject_result.data:
+        if not reference_cache.exists('subjects', data['subject_id']):
             return jsonify({"success": False, "error": "Invalid subject_id"}), 400
         
         faculty_result = supabase.table('faculty').select('id').eq('id', data['faculty_id']).execute()
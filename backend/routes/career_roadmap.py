@@ -2,13 +2,19 @@
 Career Roadmap Routes
 Handles career assistant functionality including roadmap generation and AI mentor chat
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_cors import cross_origin
 from supabase_client import get_supabase
+from utils.roadmap_templates import RoadmapTemplateCache, personalize_roadmap
+from utils.swr_cache import StaleWhileRevalidateCache
+from utils.realtime_hub import sse_message
 import logging
+import threading
 from datetime import datetime
 import json
 import os
+import re
+import uuid
 
 # Try to import Gemini AI
 try:
@@ -45,9 +51,175 @@ else:
     logger.warning("Gemini AI not available - google.generativeai not installed")
 
 
-def generate_roadmap_with_ai(career_interest: str, weeks: int = 10) -> list:
+# The frontend sends the Supabase auth user_id or the students.id; the
+# mapping never changes, so it is cached
+STUDENT_LOOKUP_TTL = int(os.getenv('STUDENT_LOOKUP_TTL', '3600'))
+student_lookup_cache = StaleWhileRevalidateCache(STUDENT_LOOKUP_TTL, max_entries=10000)
+_STUDENT_IDENTIFIER = re.compile(r'^[A-Za-z0-9-]+$')
+
+
+def _load_student(identifier: str):
+    if not _STUDENT_IDENTIFIER.match(identifier):
+        return None  # never reaches the or_() filter string
+    # students.id is a uuid column: comparing it with anything else is a
+    # Postgres error (22P02), so only user_id is matched then
+    conditions = [f'user_id.eq.{identifier}']
+    try:
+        uuid.UUID(identifier)
+        conditions.append(f'id.eq.{identifier}')
+    except ValueError:
+        pass
+    result = supabase.table('students')\
+        .select('id, user_id, full_name')\
+        .or_(','.join(conditions))\
+        .limit(2)\
+        .execute()
+    rows = result.data or []
+    # A user_id match wins, as in the old two-step lookup
+    rows.sort(key=lambda row: str(row.get('user_id')) != str(identifier))
+    return rows[0] if rows else None
+
+
+def resolve_student(identifier) -> dict:
+    """Student row (id, user_id, full_name) for a user_id or student id, or None"""
+    identifier = str(identifier).strip()
+    student = student_lookup_cache.get(identifier, lambda: _load_student(identifier))
+    if student is None:
+        # Not cached: the student may be created a moment later
+        student_lookup_cache.invalidate(identifier)
+    return student
+
+
+# Mentor chat: the roadmap context and the recent conversation are cached
+# between turns, the history sent to the model is trimmed to a token budget
+# and each turn is written to mentor_sessions off the request thread
+MENTOR_CONTEXT_TTL = int(os.getenv('MENTOR_CONTEXT_TTL', '300'))
+MENTOR_HISTORY_TOKEN_BUDGET = int(os.getenv('MENTOR_HISTORY_TOKEN_BUDGET', '1500'))
+MENTOR_HISTORY_TURNS = 20
+MENTOR_UNAVAILABLE_REPLY = "I'm currently unavailable. Please try again later or contact your career counselor for guidance."
+MENTOR_ERROR_REPLY = "I encountered an error processing your question. Please try rephrasing or ask something else."
+mentor_context_cache = StaleWhileRevalidateCache(MENTOR_CONTEXT_TTL, max_entries=2000)
+mentor_history_cache = StaleWhileRevalidateCache(MENTOR_CONTEXT_TTL, max_entries=2000)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text or '') // 4 + 1
+
+
+def trim_history(turns: list, budget: int = None) -> list:
+    """The most recent turns that fit in ``budget`` tokens, oldest first"""
+    budget = MENTOR_HISTORY_TOKEN_BUDGET if budget is None else budget
+    kept = []
+    used = 0
+    for turn in reversed(turns):
+        cost = estimate_tokens(turn.get('message')) + estimate_tokens(turn.get('reply'))
+        if used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    return kept[::-1]
+
+
+def _load_roadmap_context(roadmap_id) -> str:
+    result = supabase.table('career_roadmaps')\
+        .select('roadmap_title, career_interests(interest_title), '
+                'roadmap_steps(week_no, topic, description, milestone, status)')\
+        .eq('id', roadmap_id)\
+        .limit(1)\
+        .execute()
+    if not result.data:
+        return ""
+    roadmap = result.data[0]
+    steps = sorted(roadmap.get('roadmap_steps') or [], key=lambda step: step.get('week_no') or 0)
+    if not steps:
+        return ""
+    career_title = (roadmap.get('career_interests') or {}).get('interest_title', 'your career')
+    context = f"\n\nStudent's Career Goal: {career_title}\n"
+    context += f"Roadmap Title: {roadmap['roadmap_title']}\n"
+    context += "\nRoadmap Steps:\n"
+    for step in steps:
+        context += f"Week {step['week_no']}: {step['topic']} (Status: {step['status']})\n"
+        context += f"  - {step['description']}\n"
+        context += f"  - Milestone: {step['milestone']}\n"
+    return context
+
+
+def roadmap_context(roadmap_id) -> str:
+    """Prompt context for a roadmap; dropped by update_step_status"""
+    if not roadmap_id:
+        return ""
+    return mentor_context_cache.get(str(roadmap_id), lambda: _load_roadmap_context(roadmap_id))
+
+
+def _load_recent_turns(student_id, roadmap_id) -> list:
+    query = supabase.table('mentor_sessions')\
+        .select('message, reply')\
+        .eq('student_id', student_id)\
+        .order('created_at', desc=True)
+    if roadmap_id:
+        query = query.eq('roadmap_id', roadmap_id)
+    return (query.limit(MENTOR_HISTORY_TURNS).execute().data or [])[::-1]
+
+
+def recent_turns(student_id, roadmap_id) -> list:
+    """Cached recent conversation, oldest first; new turns are appended in place"""
+    key = (str(student_id), str(roadmap_id or ''))
+    return mentor_history_cache.get(key, lambda: _load_recent_turns(student_id, roadmap_id))
+
+
+def mentor_prompt(context: str, history: list, message: str) -> str:
+    conversation = ""
+    if history:
+        conversation = "\nEarlier in this conversation:\n"
+        for turn in history:
+            conversation += f"Student: {turn.get('message')}\nMentor: {turn.get('reply')}\n"
+    return f"""
+You are a friendly and knowledgeable career mentor helping a student with their career journey.
+
+{context}
+{conversation}
+Student's Question: {message}
+
+Provide a helpful, encouraging, and practical response. If the student asks about a specific topic from their roadmap:
+1. Explain the concept in simple, step-by-step terms
+2. Provide practical examples
+3. Suggest exercises or mini-projects they can try
+4. Encourage them and acknowledge their progress
+
+Keep your response concise (3-5 paragraphs), actionable, and motivating.
+Use plain text format (no markdown).
+"""
+
+
+def record_mentor_turn(student_id, roadmap_id, message: str, reply: str):
+    """Add the turn to the cached history and store it in mentor_sessions in the background"""
+    history = recent_turns(student_id, roadmap_id)
+    history.append({'message': message, 'reply': reply})
+    del history[:-MENTOR_HISTORY_TURNS]
+
+    def persist():
+        try:
+            result = supabase.table('mentor_sessions').insert({
+                'student_id': student_id,
+                'roadmap_id': roadmap_id,
+                'message': message,
+                'reply': reply
+            }).execute()
+            if not result.data:
+                logger.warning("Failed to store chat message in database")
+        except Exception as e:
+            logger.error(f"Error storing mentor session: {e}")
+
+    thread = threading.Thread(target=persist, name='mentor-session-insert', daemon=True)
+    thread.start()
+    return thread
+
+
+def request_roadmap_from_ai(career_interest: str, weeks: int = 10) -> list:
     """
-    Generate a career roadmap using Gemini AI
+    Ask Gemini AI for a career roadmap; raises if the model is unavailable or
+    its answer cannot be used
     
     Args:
         career_interest: The career field (e.g., "AI Engineer")
@@ -57,11 +229,9 @@ def generate_roadmap_with_ai(career_interest: str, weeks: int = 10) -> list:
         List of roadmap steps with week_no, topic, description, milestone
     """
     if not genai_available or not model:
-        logger.warning("Gemini AI not available, returning fallback roadmap")
-        return generate_fallback_roadmap(career_interest, weeks)
-    
-    try:
-        prompt = f"""
+        raise RuntimeError("Gemini AI not available")
+
+    prompt = f"""
 You are a career guidance expert. Generate a detailed {weeks}-week learning roadmap for someone who wants to become a {career_interest}.
 
 For each week, provide:
@@ -84,40 +254,66 @@ Make it practical, beginner-friendly, and progressive. Focus on hands-on learnin
 Return ONLY the JSON array, no additional text or markdown formatting.
 """
 
-        logger.info(f"Generating roadmap with Gemini AI for: {career_interest}, {weeks} weeks")
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+    logger.info(f"Generating roadmap with Gemini AI for: {career_interest}, {weeks} weeks")
+    response = model.generate_content(prompt)
+    response_text = response.text.strip()
 
-        logger.info(f"Gemini AI raw response: {response_text[:200]}...")
+    logger.info(f"Gemini AI raw response: {response_text[:200]}...")
 
-        # Try to extract JSON from response
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
+    # Try to extract JSON from response
+    if response_text.startswith('```json'):
+        response_text = response_text[7:]
+    if response_text.startswith('```'):
+        response_text = response_text[3:]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3]
 
-        response_text = response_text.strip()
+    response_text = response_text.strip()
 
-        # Parse JSON
-        roadmap_steps = json.loads(response_text)
+    # Parse JSON
+    roadmap_steps = json.loads(response_text)
 
-        # Validate structure
-        if not isinstance(roadmap_steps, list):
-            raise ValueError("Response is not a list")
+    # Validate structure
+    if not isinstance(roadmap_steps, list):
+        raise ValueError("Response is not a list")
 
-        # Ensure all required fields are present
-        for step in roadmap_steps:
-            if not all(key in step for key in ['week_no', 'topic', 'description', 'milestone']):
-                raise ValueError("Missing required fields in roadmap step")
+    # Ensure all required fields are present
+    for step in roadmap_steps:
+        if not all(key in step for key in ['week_no', 'topic', 'description', 'milestone']):
+            raise ValueError("Missing required fields in roadmap step")
 
-        logger.info(f"Successfully generated {len(roadmap_steps)} roadmap steps with Gemini AI")
-        return roadmap_steps
-        
+    logger.info(f"Successfully generated {len(roadmap_steps)} roadmap steps with Gemini AI")
+    return roadmap_steps
+
+
+def _generate_roadmap_template(career_interest: str, weeks: int):
+    """Template generator for ``roadmap_templates``: ``(steps, ai_generated)``"""
+    try:
+        return request_roadmap_from_ai(career_interest, weeks), True
     except Exception as e:
         logger.error(f"Error generating roadmap with AI: {e}")
-        return generate_fallback_roadmap(career_interest, weeks)
+        return generate_fallback_roadmap(career_interest, weeks), False
+
+
+# AI roadmaps are shared templates keyed by normalised interest and week
+# count; see utils/roadmap_templates.py
+roadmap_templates = RoadmapTemplateCache(_generate_roadmap_template, client=supabase)
+
+
+def generate_roadmap_with_ai(career_interest: str, weeks: int = 10) -> list:
+    """
+    Generate a career roadmap using Gemini AI, reusing a cached template for
+    the same interest and week count
+
+    Args:
+        career_interest: The career field (e.g., "AI Engineer")
+        weeks: Number of weeks for the roadmap (default: 10)
+
+    Returns:
+        List of roadmap steps with week_no, topic, description, milestone
+    """
+    steps, _ = roadmap_templates.get(career_interest, weeks)
+    return steps
 
 
 def generate_fallback_roadmap(career_interest: str, weeks: int = 10) -> list:
@@ -221,14 +417,9 @@ def generate_roadmap():
         # Validate student exists and get actual student ID
         # The frontend sends user_id from Supabase auth, we need to get the student's id
         try:
-            # First try to find by user_id (from Supabase auth)
-            student_result = supabase.table('students').select('id, user_id, full_name').eq('user_id', student_id).execute()
+            student = resolve_student(student_id)
 
-            # If not found by user_id, try by id directly
-            if not student_result.data:
-                student_result = supabase.table('students').select('id, user_id, full_name').eq('id', student_id).execute()
-
-            if not student_result.data:
+            if not student:
                 logger.error(f"Student not found with ID: {student_id}")
                 return jsonify({
                     'success': False,
@@ -237,8 +428,8 @@ def generate_roadmap():
                 }), 404
 
             # Use the actual student.id for database operations
-            actual_student_id = student_result.data[0]['id']
-            logger.info(f"Found student: {student_result.data[0].get('full_name', 'Unknown')} (ID: {actual_student_id})")
+            actual_student_id = student['id']
+            logger.info(f"Found student: {student.get('full_name', 'Unknown')} (ID: {actual_student_id})")
 
         except Exception as e:
             logger.error(f"Error verifying student: {str(e)}")
@@ -256,8 +447,9 @@ def generate_roadmap():
 
         # Generate roadmap using AI first (before any DB operations)
         try:
-            logger.info(f"Calling generate_roadmap_with_ai for {career_interest}, {weeks} weeks")
-            roadmap_steps = generate_roadmap_with_ai(career_interest, weeks)
+            logger.info(f"Fetching roadmap template for {career_interest}, {weeks} weeks")
+            template_steps, ai_generated = roadmap_templates.get(career_interest, weeks)
+            roadmap_steps = personalize_roadmap(template_steps, career_interest, description)
             logger.info(f"Generated {len(roadmap_steps)} steps")
             logger.info(f"Sample step: {roadmap_steps[0] if roadmap_steps else 'No steps'}")
         except Exception as e:
@@ -301,7 +493,7 @@ def generate_roadmap():
                 'interest_id': interest_id,
                 'roadmap_title': f"{career_interest} Learning Path",
                 'total_weeks': len(roadmap_steps),
-                'ai_generated': genai_available
+                'ai_generated': ai_generated
             }
             logger.info(f"Creating roadmap: {roadmap_data}")
 
@@ -389,46 +581,31 @@ def get_student_roadmaps(student_id):
     Fetch all roadmaps for a student with progress calculation
     """
     try:
-        # Get actual student ID (handle both user_id and student id)
-        student_result = supabase.table('students').select('id').eq('user_id', student_id).execute()
-        if not student_result.data:
-            student_result = supabase.table('students').select('id').eq('id', student_id).execute()
-
-        if not student_result.data:
+        student = resolve_student(student_id)
+        if not student:
             return jsonify({'roadmaps': []}), 200
 
-        actual_student_id = student_result.data[0]['id']
-
-        # Fetch all roadmaps for the student
+        # Roadmaps, their interest and every step's status in one request
         roadmaps_result = supabase.table('career_roadmaps')\
-            .select('*, career_interests(interest_title, description)')\
-            .eq('student_id', actual_student_id)\
+            .select('*, career_interests(interest_title, description), roadmap_steps(status)')\
+            .eq('student_id', student['id'])\
             .order('created_at', desc=True)\
             .execute()
 
-        if not roadmaps_result.data:
-            return jsonify({'roadmaps': []}), 200
-        
         roadmaps = []
-        for roadmap in roadmaps_result.data:
-            # Fetch steps for this roadmap
-            steps_result = supabase.table('roadmap_steps')\
-                .select('*')\
-                .eq('roadmap_id', roadmap['id'])\
-                .order('week_no')\
-                .execute()
-            
-            total_steps = len(steps_result.data) if steps_result.data else 0
-            completed_steps = sum(1 for step in steps_result.data if step['status'] == 'completed') if steps_result.data else 0
+        for roadmap in roadmaps_result.data or []:
+            steps = roadmap.pop('roadmap_steps', None) or []
+            total_steps = len(steps)
+            completed_steps = sum(1 for step in steps if step.get('status') == 'completed')
             progress_percentage = (completed_steps / total_steps * 100) if total_steps > 0 else 0
-            
+
             roadmaps.append({
                 **roadmap,
                 'total_steps': total_steps,
                 'completed_steps': completed_steps,
                 'progress_percentage': round(progress_percentage, 1)
             })
-        
+
         return jsonify({'roadmaps': roadmaps}), 200
 
     except Exception as e:
@@ -515,6 +692,10 @@ def update_step_status():
 
         logger.info(f"Successfully updated step {step_id} to status: {status}")
 
+        # The mentor's roadmap context shows step statuses
+        if result.data[0].get('roadmap_id'):
+            mentor_context_cache.invalidate(str(result.data[0]['roadmap_id']))
+
         return jsonify({
             'success': True,
             'step': result.data[0],
@@ -550,85 +731,28 @@ def mentor_chat():
         if not student_id or not message:
             return jsonify({'error': 'student_id and message are required'}), 400
 
-        # Get actual student ID (handle both user_id and student id)
-        student_result = supabase.table('students').select('id').eq('user_id', student_id).execute()
-        if not student_result.data:
-            student_result = supabase.table('students').select('id').eq('id', student_id).execute()
-
-        if not student_result.data:
+        student = resolve_student(student_id)
+        if not student:
             return jsonify({'error': 'Student not found'}), 404
 
-        actual_student_id = student_result.data[0]['id']
-
-        # Get roadmap context if roadmap_id is provided
-        context = ""
-        if roadmap_id:
-            # Fetch roadmap details
-            roadmap_result = supabase.table('career_roadmaps')\
-                .select('*, career_interests(interest_title)')\
-                .eq('id', roadmap_id)\
-                .single()\
-                .execute()
+        actual_student_id = student['id']
 
-            if roadmap_result.data:
-                roadmap = roadmap_result.data
-                career_title = roadmap.get('career_interests', {}).get('interest_title', 'your career')
-
-                # Fetch roadmap steps
-                steps_result = supabase.table('roadmap_steps')\
-                    .select('week_no, topic, description, milestone, status')\
-                    .eq('roadmap_id', roadmap_id)\
-                    .order('week_no')\
-                    .execute()
-
-                if steps_result.data:
-                    context = f"\n\nStudent's Career Goal: {career_title}\n"
-                    context += f"Roadmap Title: {roadmap['roadmap_title']}\n"
-                    context += "\nRoadmap Steps:\n"
-                    for step in steps_result.data:
-                        context += f"Week {step['week_no']}: {step['topic']} (Status: {step['status']})\n"
-                        context += f"  - {step['description']}\n"
-                        context += f"  - Milestone: {step['milestone']}\n"
+        context = roadmap_context(roadmap_id)
+        history = trim_history(recent_turns(actual_student_id, roadmap_id))
 
         # Generate AI response
         if not genai_available or not model:
-            reply = "I'm currently unavailable. Please try again later or contact your career counselor for guidance."
+            reply = MENTOR_UNAVAILABLE_REPLY
         else:
             try:
-                prompt = f"""
-You are a friendly and knowledgeable career mentor helping a student with their career journey.
-
-{context}
-
-Student's Question: {message}
-
-Provide a helpful, encouraging, and practical response. If the student asks about a specific topic from their roadmap:
-1. Explain the concept in simple, step-by-step terms
-2. Provide practical examples
-3. Suggest exercises or mini-projects they can try
-4. Encourage them and acknowledge their progress
-
-Keep your response concise (3-5 paragraphs), actionable, and motivating.
-Use plain text format (no markdown).
-"""
-
-                response = model.generate_content(prompt)
+                response = model.generate_content(mentor_prompt(context, history, message))
                 reply = response.text.strip()
 
             except Exception as e:
                 logger.error(f"Error generating AI response: {e}")
-                reply = "I encountered an error processing your question. Please try rephrasing or ask something else."
-
-        # Store the chat message in database
-        chat_result = supabase.table('mentor_sessions').insert({
-            'student_id': actual_student_id,
-            'roadmap_id': roadmap_id,
-            'message': message,
-            'reply': reply
-        }).execute()
+                reply = MENTOR_ERROR_REPLY
 
-        if not chat_result.data:
-            logger.warning("Failed to store chat message in database")
+        record_mentor_turn(actual_student_id, roadmap_id, message, reply)
 
         return jsonify({
             'success': True,
@@ -641,6 +765,82 @@ Use plain text format (no markdown).
         return jsonify({'error': str(e)}), 500
 
 
+@career_roadmap_bp.route('/mentor/chat/stream', methods=['POST'])
+def mentor_chat_stream():
+    """
+    POST /api/roadmap/mentor/chat/stream
+    Same request body as /mentor/chat; the reply is streamed as server-sent
+    events while the model generates it:
+
+        {"type": "start"}
+        {"type": "token", "text": "..."}   (repeated)
+        {"type": "done", "reply": "full reply", "timestamp": "..."}
+    """
+    try:
+        data = request.get_json() or {}
+        student_id = data.get('student_id')
+        roadmap_id = data.get('roadmap_id')
+        message = data.get('message')
+
+        if not student_id or not message:
+            return jsonify({'error': 'student_id and message are required'}), 400
+
+        student = resolve_student(student_id)
+        if not student:
+            return jsonify({'error': 'Student not found'}), 404
+    except Exception as e:
+        logger.error(f"Error in mentor chat stream: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    actual_student_id = student['id']
+
+    def events():
+        # Sent before any database or model work, so the first byte is immediate
+        yield sse_message({'type': 'start'})
+        parts = []
+        completed = False
+        try:
+            if not genai_available or not model:
+                parts.append(MENTOR_UNAVAILABLE_REPLY)
+                yield sse_message({'type': 'token', 'text': MENTOR_UNAVAILABLE_REPLY})
+            else:
+                try:
+                    context = roadmap_context(roadmap_id)
+                    history = trim_history(recent_turns(actual_student_id, roadmap_id))
+                    for chunk in model.generate_content(mentor_prompt(context, history, message), stream=True):
+                        text = getattr(chunk, 'text', '')
+                        if text:
+                            parts.append(text)
+                            yield sse_message({'type': 'token', 'text': text})
+                except Exception as e:
+                    logger.error(f"Error streaming AI response: {e}")
+                    if not parts:
+                        parts.append(MENTOR_ERROR_REPLY)
+                        yield sse_message({'type': 'token', 'text': MENTOR_ERROR_REPLY})
+            completed = True
+            yield sse_message({
+                'type': 'done',
+                'reply': ''.join(parts).strip(),
+                'timestamp': datetime.now().isoformat()
+            })
+        finally:
+            # Also runs when the client disconnects; keep whatever was generated
+            if parts:
+                reply = ''.join(parts).strip()
+                if not completed:
+                    logger.info("Mentor chat client disconnected before the reply finished")
+                record_mentor_turn(actual_student_id, roadmap_id, message, reply)
+
+    return Response(
+        events(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable buffering for nginx
+        }
+    )
+
+
 @career_roadmap_bp.route('/mentor/history/<student_id>', methods=['GET'])
 def get_mentor_history(student_id):
     """
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from supabase_client import get_supabase
+from utils.reference_cache import invalidates_reference
+from utils.hall_tickets import hall_ticket_store
 from datetime import datetime
 
 crud_bp = Blueprint('crud', __name__)
@@ -11,6 +13,7 @@ supabase = get_supabase()
 # COURSES CRUD
 # =====================================================
 @crud_bp.route('/courses', methods=['GET', 'POST'])
+@invalidates_reference('courses')
 def manage_courses():
     """Get all courses or create new course"""
     try:
@@ -30,6 +33,7 @@ def manage_courses():
         return jsonify({'error': str(e)}), 500
 
 @crud_bp.route('/courses/<int:course_id>', methods=['GET', 'PUT', 'DELETE'])
+@invalidates_reference('courses')
 def manage_course(course_id):
     """Get, update, or delete a specific course"""
     try:
@@ -58,6 +62,7 @@ def manage_course(course_id):
 # SUBJECTS CRUD
 # =====================================================
 @crud_bp.route('/subjects', methods=['GET', 'POST'])
+@invalidates_reference('subjects')
 def manage_subjects():
     """Get all subjects or create new subject"""
     try:
@@ -81,6 +86,7 @@ def manage_subjects():
         return jsonify({'error': str(e)}), 500
 
 @crud_bp.route('/subjects/<int:subject_id>', methods=['GET', 'PUT', 'DELETE'])
+@invalidates_reference('subjects')
 def manage_subject(subject_id):
     """Get, update, or delete a specific subject"""
     try:
@@ -146,11 +152,13 @@ def manage_exam(exam_id):
             data['updated_at'] = datetime.now().isoformat()
             response = supabase.table('exams').update(data).eq('id', exam_id).execute()
             if response.data:
+                hall_ticket_store.invalidate_exam(exam_id)
                 return jsonify({'success': True, 'message': 'Exam updated', 'data': response.data[0]}), 200
             return jsonify({'error': 'Exam not found'}), 404
         
         elif request.method == 'DELETE':
             response = supabase.table('exams').delete().eq('id', exam_id).execute()
+            hall_ticket_store.invalidate_exam(exam_id)
             return jsonify({'success': True, 'message': 'Exam deleted'}), 200
             
     except Exception as e:
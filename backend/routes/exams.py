@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, send_file
 from supabase_client import get_supabase
+from utils.reference_cache import reference_cache
+from utils.hall_tickets import hall_ticket_store, batch_jobs, start_batch
+from middleware.auth_middleware import auth_required
 from datetime import datetime, time
 from functools import wraps
 from typing import Dict, List, Optional, Any
 import uuid
+import os
 
 # Import models
 from models.exam import ExamCreate, ExamUpdate, ExamInDB
@@ -153,8 +157,7 @@ def create_exam():
         return jsonify({"success": False, "error": f"Invalid exam_type. Must be one of: {valid_exam_types}"}), 400
 
     # Check if subject exists
-    subject_result = supabase.table('subjects').select('id').eq('id', data['subject_id']).execute()
-    if not subject_result.data:
+    if not reference_cache.exists('subjects', data['subject_id']):
         return jsonify({"success": False, "error": "Invalid subject_id"}), 400
 
     exam_data = {
@@ -187,13 +190,13 @@ def update_exam(exam_id):
 
     # Check if subject exists if provided
     if 'subject_id' in data:
-        subject_result = supabase.table('subjects').select('id').eq('id', data['subject_id']).execute()
-        if not subject_result.data:
+        if not reference_cache.exists('subjects', data['subject_id']):
             return jsonify({"success": False, "error": "Invalid subject_id"}), 400
 
     result = supabase.table('exams').update(data).eq('id', exam_id).execute()
     if not result.data:
         return jsonify({"success": False, "error": "Exam not found"}), 404
+    hall_ticket_store.invalidate_exam(exam_id)
 
     return jsonify({"success": True, "data": result.data[0]})
 
@@ -212,9 +215,119 @@ def delete_exam(exam_id):
     result = supabase.table('exams').delete().eq('id', exam_id).execute()
     if not result.data:
         return jsonify({"success": False, "error": "Exam not found"}), 404
+    hall_ticket_store.invalidate_exam(exam_id)
 
     return jsonify({"success": True, "message": "Exam deleted successfully"})
 
+# Hall tickets
+def _exam_students(exam):
+    """Students sitting ``exam``: its course (via the exam or its subject) and semester, with course details"""
+    course_id = exam.get('course_id')
+    if not course_id and exam.get('subject_id'):
+        subject = reference_cache.get('subjects', exam['subject_id']) or {}
+        course_id = subject.get('course_id')
+    if not course_id:
+        return []
+
+    students = []
+    start = 0
+    while True:
+        query = supabase.table('students').select('*').eq('course_id', course_id)
+        if exam.get('semester'):
+            query = query.eq('current_semester', exam['semester'])
+        rows = query.order('id').range(start, start + 999).execute().data or []
+        students.extend(rows)
+        if len(rows) < 1000:
+            break
+        start += 1000
+
+    course = reference_cache.get('courses', course_id) or {}
+    department = reference_cache.get('departments', course.get('department_id')) or {}
+    for student in students:
+        if not student.get('name'):
+            student['name'] = student.get('full_name') or student.get('register_number') or 'Student'
+        student['course_name'] = course.get('name', 'N/A')
+        student['course_code'] = course.get('code', 'N/A')
+        student['department_name'] = department.get('name', 'N/A')
+        student['department_code'] = department.get('code', 'N/A')
+    return students
+
+@exams_bp.route('/exams/<int:exam_id>/hall-tickets', methods=['POST'])
+@auth_required(roles=['admin'])
+@handle_errors
+def generate_exam_hall_tickets(exam_id):
+    """Pre-render hall tickets for every student of an exam in the background"""
+    result = supabase.table('exams').select('*').eq('id', exam_id).execute()
+    if not result.data:
+        return jsonify({"success": False, "error": "Exam not found"}), 404
+    exam = result.data[0]
+
+    if exam.get('subject_id'):
+        subject = reference_cache.get('subjects', exam['subject_id']) or {}
+        exam.setdefault('subject_name', subject.get('name', 'N/A'))
+        exam.setdefault('subject_code', subject.get('code', 'N/A'))
+    if not exam.get('venue'):
+        exam['venue'] = "Cube Arts & Engineering College, 123 Education Street, Chennai, Tamil Nadu 600001"
+
+    students = _exam_students(exam)
+    if not students:
+        return jsonify({"success": False, "error": "No students found for this exam"}), 404
+
+    job = start_batch(exam_id, exam, students)
+    return jsonify({"success": True, "data": job}), 202
+
+@exams_bp.route('/exams/<int:exam_id>/hall-tickets', methods=['GET'])
+@auth_required(roles=['admin'])
+@handle_errors
+def get_exam_hall_tickets(exam_id):
+    """Batch status and the rendered tickets of an exam, grouped by section"""
+    sections = {}
+    for entry in hall_ticket_store.entries(exam_id):
+        sections.setdefault(entry.get('section') or 'A', []).append({
+            'student_id': entry.get('student_id'),
+            'register_number': entry.get('register_number'),
+            'name': entry.get('name'),
+            'url': f"/api/hall-tickets/{entry['digest']}.pdf",
+        })
+    return jsonify({
+        "success": True,
+        "data": {
+            "job": batch_jobs.get(exam_id),
+            "sections": {
+                section: {"count": len(tickets), "zip_url": f"/api/exams/{exam_id}/hall-tickets/{section}.zip",
+                          "tickets": tickets}
+                for section, tickets in sorted(sections.items())
+            }
+        }
+    })
+
+@exams_bp.route('/exams/<int:exam_id>/hall-tickets/<section>.zip', methods=['GET'])
+@auth_required(roles=['admin'])
+@handle_errors
+def download_class_hall_tickets(exam_id, section):
+    """Every rendered hall ticket of one section as a ZIP"""
+    path = hall_ticket_store.class_zip(exam_id, section)
+    if not path:
+        return jsonify({"success": False, "error": "No hall tickets rendered for this section"}), 404
+    return send_file(path, mimetype='application/zip', as_attachment=True,
+                     download_name=f'hall_tickets_{exam_id}_{section}.zip')
+
+@exams_bp.route('/hall-tickets/<digest>.pdf', methods=['GET'])
+def get_hall_ticket_file(digest):
+    """Serve a rendered hall ticket; the name is its content hash, so it never changes
+
+    Tickets carry personal details: browsers may keep them, shared caches may not.
+    """
+    try:
+        path = hall_ticket_store.object_path(digest)
+    except ValueError:
+        return jsonify({"success": False, "error": "Hall ticket not found"}), 404
+    if not os.path.exists(path):
+        return jsonify({"success": False, "error": "Hall ticket not found"}), 404
+    response = send_file(path, mimetype='application/pdf', max_age=31536000)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
 # Marks Entry System
 @exams_bp.route('/marks', methods=['GET'])
 @handle_errors
@@ -273,8 +386,7 @@ def create_marks():
         return jsonify({"success": False, "error": "Invalid exam_id"}), 400
 
     # Validate subject exists
-    subject_result = supabase.table('subjects').select('id').eq('id', data['subject_id']).execute()
-    if not subject_result.data:
+    if not reference_cache.exists('subjects', data['subject_id']):
         return jsonify({"success": False, "error": "Invalid subject_id"}), 400
 
     # Check if marks already exist for this combination
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from supabase_client import get_supabase
+from middleware.identity_cache import get_verified_user
+from utils.reference_cache import reference_cache, invalidates_reference
+from utils.id_allocator import next_receipt_number
 from datetime import datetime, timedelta
 from functools import wraps
 import uuid
@@ -31,8 +34,8 @@ def auth_required(roles=None):
             token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else auth_header
             
             try:
-                # Verify the token with Supabase
-                user = supabase.auth.get_user(token)
+                # Verify the token with Supabase (cached until the token expires)
+                user = get_verified_user(token, supabase)
                 
                 if not user or not user.user:
                     return jsonify({
@@ -189,6 +192,7 @@ def get_fee_structures():
 @fees_bp.route('/fee-structure', methods=['POST'])
 @auth_required(roles=['admin', 'accountant'])
 @handle_errors
+@invalidates_reference('fee_structures')
 def create_fee_structure():
     """
     Create a new fee structure
@@ -207,12 +211,7 @@ def create_fee_structure():
             }), 400
         
         # Check if course exists
-        course_result = supabase.table('courses') \
-            .select('id') \
-            .eq('id', data['course_id']) \
-            .execute()
-            
-        if not course_result.data:
+        if not reference_cache.exists('courses', data['course_id']):
             return jsonify({"success": False, "error": "Invalid course_id"}), 400
         
         # Validate quota_type
@@ -292,6 +291,7 @@ def create_fee_structure():
 @fees_bp.route('/fee-structure/<uuid:fee_structure_id>', methods=['PUT'])
 @auth_required(roles=['admin', 'accountant'])
 @handle_errors
+@invalidates_reference('fee_structures')
 def update_fee_structure(fee_structure_id):
     """
     Update an existing fee structure
@@ -312,12 +312,7 @@ def update_fee_structure(fee_structure_id):
             
         # Validate course_id if provided
         if 'course_id' in data:
-            course_result = supabase.table('courses') \
-                .select('id') \
-                .eq('id', data['course_id']) \
-                .execute()
-                
-            if not course_result.data:
+            if not reference_cache.exists('courses', data['course_id']):
                 return jsonify({"success": False, "error": "Invalid course_id"}), 400
         
         # Validate quota_type if provided
@@ -377,6 +372,7 @@ def update_fee_structure(fee_structure_id):
 @fees_bp.route('/fee-structure/<uuid:fee_structure_id>', methods=['DELETE'])
 @auth_required(roles=['admin', 'accountant'])
 @handle_errors
+@invalidates_reference('fee_structures')
 def delete_fee_structure(fee_structure_id):
     """
     Delete a fee structure
@@ -432,24 +428,8 @@ def delete_fee_structure(fee_structure_id):
 # ===========================================
 
 def generate_receipt_number():
-    """Generate a unique receipt number"""
-    import random
-    import string
-    
-    while True:
-        # Format: REC-YYYYMMDD-XXXXX (where X are random alphanumeric chars)
-        date_part = datetime.utcnow().strftime("%Y%m%d")
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        receipt_number = f"REC-{date_part}-{random_part}"
-        
-        # Check if receipt number already exists
-        existing = supabase.table('fee_payments') \
-            .select('id') \
-            .eq('receipt_number', receipt_number) \
-            .execute()
-            
-        if not existing.data:
-            return receipt_number
+    """Generate a unique receipt number (REC-YYYYMMDD-NNNNN)"""
+    return next_receipt_number()
 
 @fees_bp.route('/payments', methods=['POST'])
 @auth_required(roles=['admin', 'accountant'])
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from supabase_client import get_supabase
+from middleware.identity_cache import get_verified_user
+from utils.finance_summary import finance_summaries
 from datetime import datetime, timedelta
 from functools import wraps
 import uuid
@@ -17,6 +19,10 @@ supabase = get_supabase()
 DEFAULT_PAGE_SIZE = 100  # Increased for better performance with large datasets
 MAX_PAGE_SIZE = 500   # Maximum records per request
 
+def _verify_summary_requested():
+    """?verify_summary=true checks the maintained summary against a full recompute"""
+    return request.args.get('verify_summary', '').lower() in ('1', 'true', 'yes')
+
 def auth_required(roles=None):
     """Custom auth_required decorator that uses Supabase authentication"""
     def decorator(f):
@@ -35,8 +41,8 @@ def auth_required(roles=None):
             token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else auth_header
             
             try:
-                # Verify token with Supabase
-                user = supabase.auth.get_user(token)
+                # Verify token with Supabase (cached until the token expires)
+                user = get_verified_user(token, supabase)
                 
                 if not user or not user.user:
                     return jsonify({
@@ -97,28 +103,16 @@ def handle_database_error(func):
 def get_dashboard_metrics():
     """Get dashboard KPI metrics"""
     try:
-        # Get total revenue from finance_studentfees table
-        fees_response = supabase.table('finance_studentfees').select('total_fee, paid_amount').execute()
-        
-        total_revenue = 0
-        total_pending = 0
-        if fees_response.data:
-            for fee in fees_response.data:
-                total_revenue += fee.get('total_fee', 0)
-                total_pending += fee.get('pending_amount', 0)
-        
-        # Get total expenses from finance_expense table
-        expenses_response = supabase.table('finance_expense').select('amount').execute()
-        total_expenses = sum(exp.get('amount', 0) for exp in expenses_response.data) if expenses_response.data else 0
-        
-        # Get budget data from finance_budgetallocation table
-        budget_response = supabase.table('finance_budgetallocation').select('allocated_amount, used_amount').execute()
-        total_allocated = 0
-        total_used = 0
-        if budget_response.data:
-            for budget in budget_response.data:
-                total_allocated += budget.get('allocated_amount', 0)
-                total_used += budget.get('used_amount', 0)
+        # Table-wide totals come from the maintained finance summaries
+        fees_summary = finance_summaries.get('student_fees')
+        total_revenue = fees_summary['totalFees']
+        total_pending = fees_summary['totalPending']
+        
+        total_expenses = finance_summaries.get('expenses')['totalExpenses']
+        
+        budget_summary = finance_summaries.get('budget')
+        total_allocated = budget_summary['totalAllocatedBudget']
+        total_used = budget_summary['totalUsedBudget']
         
         net_balance = total_revenue - total_expenses
         
@@ -172,28 +166,13 @@ def get_student_fees():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data with optimized query for large datasets
-        summary_response = supabase.table('finance_studentfees').select('total_fee, paid_amount, pending_amount').execute()
-        
-        # Optimized summary calculation for 2000+ records
-        total_fees = 0
-        total_paid = 0
-        total_pending = 0
-        
-        if summary_response.data:
-            # Use generator expression for memory efficiency
-            total_fees = sum(fee.get('total_fee', 0) for fee in summary_response.data)
-            total_paid = sum(fee.get('paid_amount', 0) for fee in summary_response.data)
-            total_pending = sum(fee.get('pending_amount', 0) for fee in summary_response.data)
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('student_fees', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalFees': total_fees,
-                'totalPaid': total_paid,
-                'totalPending': total_pending
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -243,6 +222,7 @@ def create_student_fee():
         }
         
         response = supabase.table('finance_studentfees').insert(fee_data).execute()
+        finance_summaries.record_insert('student_fees', response.data)
         
         if response.data:
             return jsonify({
@@ -287,6 +267,7 @@ def update_student_fee(fee_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_studentfees').update(data).eq('id', fee_id).execute()
+        finance_summaries.invalidate('student_fees')
         
         if response.data:
             return jsonify({
@@ -315,6 +296,7 @@ def delete_student_fee(fee_id):
     """Delete a student fee record"""
     try:
         response = supabase.table('finance_studentfees').delete().eq('id', fee_id).execute()
+        finance_summaries.record_delete('student_fees', response.data)
         
         if response.data:
             return jsonify({
@@ -361,24 +343,13 @@ def get_staff_payroll():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data
-        summary_response = supabase.table('finance_staffpayroll').select('net_salary').execute()
-        
-        total_payroll = 0
-        staff_count = 0
-        
-        if summary_response.data:
-            total_payroll = sum(payroll.get('net_salary', 0) for payroll in summary_response.data)
-            staff_count = len(summary_response.data)
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('staff_payroll', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalMonthlyPayroll': total_payroll,
-                'totalStaffCount': staff_count,
-                'averageSalary': total_payroll / staff_count if staff_count > 0 else 0
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -430,6 +401,7 @@ def create_staff_payroll():
         }
         
         response = supabase.table('finance_staffpayroll').insert(payroll_data).execute()
+        finance_summaries.record_insert('staff_payroll', response.data)
         
         if response.data:
             return jsonify({
@@ -475,6 +447,7 @@ def update_staff_payroll(payroll_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_staffpayroll').update(data).eq('id', payroll_id).execute()
+        finance_summaries.invalidate('staff_payroll')
         
         if response.data:
             return jsonify({
@@ -503,6 +476,7 @@ def delete_staff_payroll(payroll_id):
     """Delete a staff payroll record"""
     try:
         response = supabase.table('finance_staffpayroll').delete().eq('id', payroll_id).execute()
+        finance_summaries.record_delete('staff_payroll', response.data)
         
         if response.data:
             return jsonify({
@@ -552,30 +526,13 @@ def get_expenses():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data
-        summary_response = supabase.table('finance_expense').select('amount, payment_status').execute()
-        
-        total_expenses = 0
-        paid_expenses = 0
-        pending_expenses = 0
-        
-        if summary_response.data:
-            for expense in summary_response.data:
-                amount = expense.get('amount', 0)
-                total_expenses += amount
-                if expense.get('payment_status') == 'paid':
-                    paid_expenses += amount
-                else:
-                    pending_expenses += amount
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('expenses', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalExpenses': total_expenses,
-                'paidExpenses': paid_expenses,
-                'pendingExpenses': pending_expenses
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -619,6 +576,7 @@ def create_expense():
         }
         
         response = supabase.table('finance_expense').insert(expense_data).execute()
+        finance_summaries.record_insert('expenses', response.data)
         
         if response.data:
             return jsonify({
@@ -653,6 +611,7 @@ def update_expense(expense_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_expense').update(data).eq('id', expense_id).execute()
+        finance_summaries.invalidate('expenses')
         
         if response.data:
             return jsonify({
@@ -681,6 +640,7 @@ def delete_expense(expense_id):
     """Delete an expense record"""
     try:
         response = supabase.table('finance_expense').delete().eq('id', expense_id).execute()
+        finance_summaries.record_delete('expenses', response.data)
         
         if response.data:
             return jsonify({
@@ -727,27 +687,13 @@ def get_budget():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data
-        summary_response = supabase.table('finance_budgetallocation').select('allocated_amount, used_amount, remaining_amount').execute()
-        
-        total_allocated = 0
-        total_used = 0
-        total_remaining = 0
-        
-        if summary_response.data:
-            for budget in summary_response.data:
-                total_allocated += budget.get('allocated_amount', 0)
-                total_used += budget.get('used_amount', 0)
-                total_remaining += budget.get('remaining_amount', 0)
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('budget', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalAllocatedBudget': total_allocated,
-                'totalUsedBudget': total_used,
-                'totalRemainingBudget': total_remaining
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -795,6 +741,7 @@ def create_budget():
         }
         
         response = supabase.table('finance_budgetallocation').insert(budget_data).execute()
+        finance_summaries.record_insert('budget', response.data)
         
         if response.data:
             return jsonify({
@@ -848,6 +795,7 @@ def update_budget(budget_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_budgetallocation').update(data).eq('budget_id', budget_id).execute()
+        finance_summaries.invalidate('budget')
         
         if response.data:
             return jsonify({
@@ -876,6 +824,7 @@ def delete_budget(budget_id):
     """Delete a budget allocation"""
     try:
         response = supabase.table('finance_budgetallocation').delete().eq('budget_id', budget_id).execute()
+        finance_summaries.record_delete('budget', response.data)
         
         if response.data:
             return jsonify({
@@ -925,37 +874,13 @@ def get_maintenance():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data
-        summary_response = supabase.table('finance_operationmaintenance').select('status, cost').execute()
-        
-        total_requests = 0
-        pending_requests = 0
-        in_progress_requests = 0
-        resolved_requests = 0
-        total_cost = 0
-        
-        if summary_response.data:
-            for maintenance in summary_response.data:
-                total_requests += 1
-                total_cost += maintenance.get('cost', 0)
-                status = maintenance.get('status', '').lower()
-                if status == 'pending':
-                    pending_requests += 1
-                elif status == 'in progress':
-                    in_progress_requests += 1
-                elif status == 'resolved':
-                    resolved_requests += 1
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('maintenance', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalRequests': total_requests,
-                'pendingRequests': pending_requests,
-                'inProgressRequests': in_progress_requests,
-                'resolvedRequests': resolved_requests,
-                'totalCost': total_cost
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -999,6 +924,7 @@ def create_maintenance():
         }
         
         response = supabase.table('finance_operationmaintenance').insert(maintenance_data).execute()
+        finance_summaries.record_insert('maintenance', response.data)
         
         if response.data:
             return jsonify({
@@ -1037,6 +963,7 @@ def update_maintenance(maintenance_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_operationmaintenance').update(data).eq('id', maintenance_id).execute()
+        finance_summaries.invalidate('maintenance')
         
         if response.data:
             return jsonify({
@@ -1065,6 +992,7 @@ def delete_maintenance(maintenance_id):
     """Delete a maintenance request"""
     try:
         response = supabase.table('finance_operationmaintenance').delete().eq('id', maintenance_id).execute()
+        finance_summaries.record_delete('maintenance', response.data)
         
         if response.data:
             return jsonify({
@@ -1111,27 +1039,13 @@ def get_vendors():
         # Execute query with pagination
         response = query.range((page - 1) * limit, page * limit - 1).execute()
         
-        # Get summary data
-        summary_response = supabase.table('finance_vendors').select('amount_paid, amount_due, total_transactions').execute()
-        
-        total_paid = 0
-        total_due = 0
-        total_transactions = 0
-        
-        if summary_response.data:
-            for vendor in summary_response.data:
-                total_paid += vendor.get('amount_paid', 0)
-                total_due += vendor.get('amount_due', 0)
-                total_transactions += vendor.get('total_transactions', 0)
+        # Summary over the whole table, maintained incrementally (see utils/finance_summary.py)
+        summary = finance_summaries.get('vendors', verify=_verify_summary_requested())
         
         return jsonify({
             'success': True,
             'data': response.data if response.data else [],
-            'summary': {
-                'totalAmountPaid': total_paid,
-                'totalAmountDue': total_due,
-                'totalTransactions': total_transactions
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -1201,6 +1115,7 @@ def create_vendor():
         }
         
         response = supabase.table('finance_vendors').insert(vendor_data).execute()
+        finance_summaries.record_insert('vendors', response.data)
         
         if response.data:
             return jsonify({
@@ -1235,6 +1150,7 @@ def update_vendor(vendor_id):
         data['updated_by'] = g.user['id']
         
         response = supabase.table('finance_vendors').update(data).eq('vendor_id', vendor_id).execute()
+        finance_summaries.invalidate('vendors')
         
         if response.data:
             return jsonify({
@@ -1263,6 +1179,7 @@ def delete_vendor(vendor_id):
     """Delete a vendor"""
     try:
         response = supabase.table('finance_vendors').delete().eq('vendor_id', vendor_id).execute()
+        finance_summaries.record_delete('vendors', response.data)
         
         if response.data:
             return jsonify({
@@ -2,8 +2,9 @@
 import os
 import time
 import re
+import threading
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from flask import Blueprint, jsonify, request, make_response
 from bs4 import BeautifulSoup  # type: ignore[reportMissingImports]
@@ -14,6 +15,8 @@ import sys
 # Add the root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from supabase_client import get_supabase
+from utils.internship_ingest import sync_listings, dedupe_listings, listing_key
+from utils.internship_index import InternshipIndex
 
 # Initialize Flask Blueprint and Supabase client
 bp = Blueprint('internships', __name__)
@@ -22,6 +25,27 @@ supabase = get_supabase()
 # Table names
 INTERNSHIPS_TABLE = 'internships'
 
+# Listing sources; all pages are fetched concurrently (fetch_listings_concurrently)
+INTERNSHALA_URL = "https://internshala.com/internships/"
+THE_MUSE_URL = "https://api-v2.themuse.com/jobs"
+REMOTIVE_URL = "https://remotive.com/api/remote-jobs"
+THE_MUSE_MAX_PAGES = 5  # limit to avoid rate limiting
+SOURCE_TIMEOUT = 30
+INTERNSHIP_FETCH_WORKERS = int(os.getenv('INTERNSHIP_FETCH_WORKERS', '8'))
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# GET /api/internships answers from an in-process index of the table
+# (internship_index); rows changed by other workers are picked up after
+# INTERNSHIP_INDEX_TTL seconds
+INTERNSHIP_INDEX_TTL = int(os.getenv('INTERNSHIP_INDEX_TTL', '300'))
+INDEX_LOAD_PAGE_SIZE = 1000  # PostgREST default row cap
+INTERNSHIP_PAGE_SIZE = 100
+MAX_INTERNSHIP_PAGE_SIZE = 500
+# (upper bound, band) on a listing's maximum stipend
+STIPEND_BANDS = ((5000, 'under_5k'), (10000, '5k_10k'), (25000, '10k_25k'))
+
 # Error messages
 INTERNAL_SERVER_ERROR = "An error occurred while processing your request"
 
@@ -40,8 +64,8 @@ def _parse_stipend(stipend_str: str) -> Dict[str, Any]:
         return {'min': 0, 'max': 0, 'is_unpaid': True}
         
     try:
-        # Remove any non-numeric characters except comma and period
-        clean_str = re.sub(r'[^\d.,]', '', stipend_str)
+        # Remove any non-numeric characters except comma, period and range dashes
+        clean_str = re.sub(r'[^\d.,-]', '', stipend_str.replace('–', '-')).strip('-')
         
         # Handle ranges like "1000-2000"
         if '-' in clean_str:
@@ -121,6 +145,97 @@ def _parse_posted_date(posted_str: str) -> Optional[datetime]:
         
     return None
 
+def _stipend_band(listing: dict) -> str:
+    """Stipend facet value of a listing"""
+    if isinstance(listing.get('stipend'), str):
+        stipend = _parse_stipend(listing['stipend'])
+    else:
+        stipend = {'max': listing.get('max_stipend') or 0, 'is_unpaid': listing.get('is_unpaid')}
+    top = float(stipend['max'] or 0)
+    if stipend['is_unpaid'] or top <= 0:
+        return 'unpaid'
+    for limit, band in STIPEND_BANDS:
+        if top < limit:
+            return band
+    return '25k_plus'
+
+def _listing_posted_at(listing: dict) -> Optional[datetime]:
+    """Posting time of a listing as naive UTC"""
+    value = listing.get('posted_date')
+    if isinstance(value, datetime):
+        posted = value
+    else:
+        try:
+            posted = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            posted = _parse_posted_date(value or '')
+    if posted is not None and posted.tzinfo is not None:
+        posted = posted.astimezone(timezone.utc).replace(tzinfo=None)
+    return posted
+
+def _listing_facets(listing: dict):
+    """Facets and posting time of a listing for internship_index"""
+    facets = {
+        'is_remote': bool(listing.get('is_remote')),
+        'stipend': _stipend_band(listing),
+        'duration': _parse_duration(listing.get('duration') or ''),
+        'source': listing.get('source') or 'Unknown',
+    }
+    return facets, _listing_posted_at(listing)
+
+internship_index = InternshipIndex(_listing_facets)
+_index_lock = threading.Lock()
+_index_state = {'loaded_at': None, 'updated_at': None}
+
+def _load_listing_rows(since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Active listings, or every row updated since ``since``"""
+    rows = []
+    offset = 0
+    while True:
+        query = supabase.table(INTERNSHIPS_TABLE).select('*')
+        query = query.gte('updated_at', since) if since else query.eq('is_active', True)
+        page = query.order('id').range(offset, offset + INDEX_LOAD_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < INDEX_LOAD_PAGE_SIZE:
+            return rows
+        offset += INDEX_LOAD_PAGE_SIZE
+
+def refresh_internship_index(force: bool = False) -> None:
+    """Load the index from the table, then apply rows changed since
+
+    Only the first load makes requests wait; while a later refresh runs,
+    other requests keep answering from the current index.
+    """
+    loaded_at = _index_state['loaded_at']
+    if not force and loaded_at is not None and time.monotonic() - loaded_at < INTERNSHIP_INDEX_TTL:
+        return
+    if not _index_lock.acquire(blocking=loaded_at is None):
+        return
+    try:
+        if not force and _index_state['loaded_at'] not in (None, loaded_at):
+            return  # loaded by another request meanwhile
+        since = _index_state['updated_at']
+        rows = _load_listing_rows(since)
+        internship_index.upsert([row for row in rows if row.get('is_active', True)])
+        internship_index.remove([row.get('dedup_key') or listing_key(row)
+                                 for row in rows if not row.get('is_active', True)])
+        stamps = [row['updated_at'] for row in rows if row.get('updated_at')]
+        if stamps:
+            _index_state['updated_at'] = max(stamps + ([since] if since else []))
+        _index_state['loaded_at'] = time.monotonic()
+        print(f"Internship index: {len(rows)} rows loaded, {len(internship_index)} listings indexed")
+    finally:
+        _index_lock.release()
+
+def ensure_internship_index() -> None:
+    """Fresh index; fetches from the sources when nothing is stored yet"""
+    try:
+        refresh_internship_index()
+    except Exception as e:
+        print(f"Error loading internships from database: {str(e)}")
+    if not len(internship_index):
+        fetch_all_internships(force_refresh=True)
+
 def _save_internship_opportunity(internship_data: dict) -> Optional[dict]:
     """Save an internship opportunity to the database"""
     try:
@@ -144,283 +259,319 @@ def _save_internship_opportunity(internship_data: dict) -> Optional[dict]:
         print(f"Error saving internship: {str(e)}")
         return None
 
-def fetch_internships_from_internshala() -> List[Dict[str, Any]]:
+def _internshala_detail(listing, heading: str) -> str:
+    """Text of a card's "other details" item (Duration, Apply By, ...)"""
+    for item in listing.select('.other_detail_item'):
+        heading_elem = item.select_one('.item_heading')
+        body_elem = item.select_one('.item_body')
+        if heading_elem and body_elem and heading_elem.text.strip().lower() == heading.lower():
+            return body_elem.text.strip()
+    return ''
+
+def _names(items) -> List[str]:
+    """``name`` of each object in an API list such as The Muse categories"""
+    return [item['name'] for item in items or [] if isinstance(item, dict) and item.get('name')]
+
+def parse_internshala_listings(html: str) -> List[Dict[str, Any]]:
+    """Internship objects from an Internshala listing page"""
+    internships = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Find all internship listings
+    listings = soup.select('.internship_meta')
+
+    for listing in listings:
+        try:
+            # Extract basic info
+            title_elem = listing.select_one('.heading_4_5')
+            company_elem = listing.select_one('.heading_6')
+            location_elem = listing.select_one('.location_link')
+            stipend_elem = listing.select_one('.stipend')
+            apply_elem = listing.select_one('.view_detail_button')
+            posted_elem = listing.select_one('.posted_by_container')
+
+            if not all([title_elem, company_elem, location_elem, apply_elem]):
+                continue
+
+            title = title_elem.text.strip()
+            company = company_elem.text.strip()
+            location = location_elem.text.strip()
+            apply_url = f"https://internshala.com{apply_elem['href']}" if apply_elem.has_attr('href') else ""
+
+            # Parse stipend
+            stipend = {'min': 0, 'max': 0, 'is_unpaid': True}
+            if stipend_elem:
+                stipend_text = stipend_elem.text.strip().lower()
+                if 'unpaid' not in stipend_text and 'performance' not in stipend_text:
+                    stipend = _parse_stipend(stipend_text)
+
+            # Parse posted date
+            posted_date = None
+            if posted_elem:
+                posted_text = posted_elem.text.strip()
+                posted_date = _parse_posted_date(posted_text)
+
+            # Create internship object
+            internship = {
+                'title': title,
+                'company': company,
+                'location': location,
+                'type': 'internship',
+                'duration': _internshala_detail(listing, 'Duration') or None,
+                'skills': [],
+                'min_stipend': stipend['min'],
+                'max_stipend': stipend['max'],
+                'is_unpaid': stipend['is_unpaid'],
+                'apply_url': apply_url,
+                'posted_date': posted_date.isoformat() if posted_date else datetime.utcnow().isoformat(),
+                'source': 'Internshala',
+                'is_remote': 'remote' in location.lower(),
+                'is_active': True
+            }
+
+            internships.append(internship)
+
+        except Exception as e:
+            print(f"Error processing Internshala listing: {str(e)}")
+            continue
+
+    return internships
+
+def parse_themuse_jobs(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Internship objects from one page of The Muse jobs API"""
+    internships = []
+    for job in data.get('results', []):
+        try:
+            # Parse location
+            locations = job.get('locations', [])
+            location = locations[0].get('name', 'Remote') if locations else 'Remote'
+
+            # Parse salary
+            salary = job.get('remuneration', {})
+            min_salary = salary.get('min_amount', 0) if salary else 0
+            max_salary = salary.get('max_amount', 0) if salary else 0
+
+            # Create internship object
+            internship = {
+                'title': job.get('name', 'Internship Position'),
+                'company': job.get('company', {}).get('name', 'Company'),
+                'location': location,
+                'type': 'internship',
+                'duration': None,
+                'skills': _names(job.get('categories')),
+                'min_stipend': min_salary,
+                'max_stipend': max_salary,
+                'is_unpaid': min_salary == 0 and max_salary == 0,
+                'apply_url': job.get('refs', {}).get('landing_page', ''),
+                'posted_date': job.get('publication_date', datetime.utcnow().isoformat()),
+                'description': job.get('contents', ''),
+                'source': 'The Muse',
+                'is_remote': any('remote' in loc.get('name', '').lower() for loc in locations),
+                'is_active': True
+            }
+
+            internships.append(internship)
+
+        except Exception as e:
+            print(f"Error processing The Muse job: {str(e)}")
+            continue
+
+    return internships
+
+def parse_remotive_jobs(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Internship objects from the Remotive remote-jobs API"""
+    internships = []
+    for job in data.get('jobs', []):
+        try:
+            # Parse salary
+            salary = job.get('salary', '')
+            min_salary = 0
+            max_salary = 0
+            is_unpaid = True
+
+            if salary and salary.lower() != 'no salary data':
+                try:
+                    # Try to parse salary range like "$50k - $70k"
+                    numbers = [int(s.replace('$', '').replace('k', '000').replace(',', ''))
+                             for s in re.findall(r'\$[\d,]+[kK]?', salary)]
+                    if numbers:
+                        min_salary = min(numbers)
+                        max_salary = max(numbers)
+                        is_unpaid = False
+                except (ValueError, AttributeError):
+                    pass
+
+            # Create internship object
+            internship = {
+                'title': job.get('title', 'Internship Position'),
+                'company': job.get('company_name', 'Company'),
+                'location': job.get('candidate_required_location', 'Remote'),
+                'type': 'internship',
+                'duration': None,
+                'skills': [str(tag) for tag in job.get('tags') or []],
+                'min_stipend': min_salary,
+                'max_stipend': max_salary,
+                'is_unpaid': is_unpaid,
+                'apply_url': job.get('url', ''),
+                'posted_date': job.get('publication_date', datetime.utcnow().isoformat()),
+                'description': job.get('description', ''),
+                'source': 'Remotive',
+                'is_remote': True,  # All Remotive jobs are remote
+                'is_active': True
+            }
+
+            internships.append(internship)
+
+        except Exception as e:
+            print(f"Error processing Remotive job: {str(e)}")
+            continue
+
+    return internships
+
+# Source requests take ``http``: the requests module in production, or any
+# object with a compatible get() (e.g. recorded fixture responses in tests)
+def _fetch_internshala(http=requests) -> List[Dict[str, Any]]:
+    response = http.get(INTERNSHALA_URL, headers=BROWSER_HEADERS, timeout=SOURCE_TIMEOUT)
+    response.raise_for_status()
+    return parse_internshala_listings(response.text)
+
+def _fetch_themuse_page(api_key: str, page: int, http=requests):
+    """Listings and page count of one The Muse page"""
+    params = {
+        'api_key': api_key,
+        'category': 'Internship',
+        'page': page,
+        'descending': True
+    }
+    response = http.get(THE_MUSE_URL, params=params, timeout=SOURCE_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    return parse_themuse_jobs(data), data.get('page_count', 1)
+
+def _fetch_remotive(http=requests) -> List[Dict[str, Any]]:
+    response = http.get(REMOTIVE_URL, params={'category': 'internship', 'limit': 50}, timeout=SOURCE_TIMEOUT)
+    response.raise_for_status()
+    return parse_remotive_jobs(response.json())
+
+def fetch_internships_from_internshala(http=requests) -> List[Dict[str, Any]]:
     """Scrape internships from Internshala"""
     print("Fetching internships from Internshala...")
-    internships = []
-    
     try:
-        url = "https://internshala.com/internships/"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all internship listings
-        listings = soup.select('.internship_meta')
-        
-        for listing in listings:
-            try:
-                # Extract basic info
-                title_elem = listing.select_one('.heading_4_5')
-                company_elem = listing.select_one('.heading_6')
-                location_elem = listing.select_one('.location_link')
-                stipend_elem = listing.select_one('.stipend')
-                apply_elem = listing.select_one('.view_detail_button')
-                posted_elem = listing.select_one('.posted_by_container')
-                
-                if not all([title_elem, company_elem, location_elem, apply_elem]):
-                    continue
-                    
-                title = title_elem.text.strip()
-                company = company_elem.text.strip()
-                location = location_elem.text.strip()
-                apply_url = f"https://internshala.com{apply_elem['href']}" if apply_elem.has_attr('href') else ""
-                
-                # Parse stipend
-                stipend = {'min': 0, 'max': 0, 'is_unpaid': True}
-                if stipend_elem:
-                    stipend_text = stipend_elem.text.strip().lower()
-                    if 'unpaid' not in stipend_text and 'performance' not in stipend_text:
-                        stipend = _parse_stipend(stipend_text)
-                
-                # Parse posted date
-                posted_date = None
-                if posted_elem:
-                    posted_text = posted_elem.text.strip()
-                    posted_date = _parse_posted_date(posted_text)
-                
-                # Create internship object
-                internship = {
-                    'title': title,
-                    'company': company,
-                    'location': location,
-                    'type': 'internship',
-                    'min_stipend': stipend['min'],
-                    'max_stipend': stipend['max'],
-                    'is_unpaid': stipend['is_unpaid'],
-                    'apply_url': apply_url,
-                    'posted_date': posted_date.isoformat() if posted_date else datetime.utcnow().isoformat(),
-                    'source': 'Internshala',
-                    'is_remote': 'remote' in location.lower(),
-                    'is_active': True
-                }
-                
-                internships.append(internship)
-                
-            except Exception as e:
-                print(f"Error processing Internshala listing: {str(e)}")
-                continue
-                
+        return _fetch_internshala(http)
     except Exception as e:
         print(f"Error fetching from Internshala: {str(e)}")
-        
-    return internships
+        return []
 
-def fetch_internships_from_themuse() -> List[Dict[str, Any]]:
+def fetch_internships_from_themuse(http=requests) -> List[Dict[str, Any]]:
     """Fetch internships from The Muse API"""
     print("Fetching internships from The Muse...")
-    internships = []
-    
+    api_key = os.getenv('THE_MUSE_API_KEY')
+    if not api_key:
+        print("THE_MUSE_API_KEY not found in environment variables")
+        return []
     try:
-        api_key = os.getenv('THE_MUSE_API_KEY')
-        if not api_key:
-            print("THE_MUSE_API_KEY not found in environment variables")
-            return []
-            
-        url = "https://api-v2.themuse.com/jobs"
-        params = {
-            'api_key': api_key,
-            'category': 'Internship',
-            'page': 0,
-            'descending': True
-        }
-        
-        # Get first page to know total pages
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        total_pages = data.get('page_count', 1)
-        
-        # Fetch all pages (limit to 5 pages to avoid rate limiting)
-        for page in range(min(5, total_pages)):
-            params['page'] = page
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            for job in data.get('results', []):
-                try:
-                    # Parse location
-                    locations = job.get('locations', [])
-                    location = locations[0].get('name', 'Remote') if locations else 'Remote'
-                    
-                    # Parse salary
-                    salary = job.get('remuneration', {})
-                    min_salary = salary.get('min_amount', 0) if salary else 0
-                    max_salary = salary.get('max_amount', 0) if salary else 0
-                    
-                    # Create internship object
-                    internship = {
-                        'title': job.get('name', 'Internship Position'),
-                        'company': job.get('company', {}).get('name', 'Company'),
-                        'location': location,
-                        'type': 'internship',
-                        'min_stipend': min_salary,
-                        'max_stipend': max_salary,
-                        'is_unpaid': min_salary == 0 and max_salary == 0,
-                        'apply_url': job.get('refs', {}).get('landing_page', ''),
-                        'posted_date': job.get('publication_date', datetime.utcnow().isoformat()),
-                        'description': job.get('contents', ''),
-                        'source': 'The Muse',
-                        'is_remote': any('remote' in loc.get('name', '').lower() for loc in locations),
-                        'is_active': True
-                    }
-                    
-                    internships.append(internship)
-                    
-                except Exception as e:
-                    print(f"Error processing The Muse job: {str(e)}")
-                    continue
-                    
+        internships, total_pages = _fetch_themuse_page(api_key, 0, http)
+        # Remaining pages (limited to avoid rate limiting) are fetched together
+        pages = range(1, min(THE_MUSE_MAX_PAGES, total_pages))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=INTERNSHIP_FETCH_WORKERS) as executor:
+            for page_internships, _ in executor.map(lambda page: _fetch_themuse_page(api_key, page, http), pages):
+                internships.extend(page_internships)
+        return internships
     except Exception as e:
         print(f"Error fetching from The Muse: {str(e)}")
-        
-    return internships
+        return []
 
-def fetch_internships_from_remotive() -> List[Dict[str, Any]]:
+def fetch_internships_from_remotive(http=requests) -> List[Dict[str, Any]]:
     """Fetch internships from Remotive API"""
     print("Fetching internships from Remotive...")
-    internships = []
-    
     try:
-        url = "https://remotive.com/api/remote-jobs"
-        params = {
-            'category': 'internship',
-            'limit': 50
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        for job in data.get('jobs', []):
-            try:
-                # Parse salary
-                salary = job.get('salary', '')
-                min_salary = 0
-                max_salary = 0
-                is_unpaid = True
-                
-                if salary and salary.lower() != 'no salary data':
-                    try:
-                        # Try to parse salary range like "$50k - $70k"
-                        numbers = [int(s.replace('$', '').replace('k', '000').replace(',', '')) 
-                                 for s in re.findall(r'\$[\d,]+[kK]?', salary)]
-                        if numbers:
-                            min_salary = min(numbers)
-                            max_salary = max(numbers)
-                            is_unpaid = False
-                    except (ValueError, AttributeError):
-                        pass
-                
-                # Create internship object
-                internship = {
-                    'title': job.get('title', 'Internship Position'),
-                    'company': job.get('company_name', 'Company'),
-                    'location': job.get('candidate_required_location', 'Remote'),
-                    'type': 'internship',
-                    'min_stipend': min_salary,
-                    'max_stipend': max_salary,
-                    'is_unpaid': is_unpaid,
-                    'apply_url': job.get('url', ''),
-                    'posted_date': job.get('publication_date', datetime.utcnow().isoformat()),
-                    'description': job.get('description', ''),
-                    'source': 'Remotive',
-                    'is_remote': True,  # All Remotive jobs are remote
-                    'is_active': True
-                }
-                
-                internships.append(internship)
-                
-            except Exception as e:
-                print(f"Error processing Remotive job: {str(e)}")
-                continue
-                
+        return _fetch_remotive(http)
     except Exception as e:
         print(f"Error fetching from Remotive: {str(e)}")
-        
-    return internships
+        return []
+
+def fetch_listings_concurrently(http=requests):
+    """Fetch every source page in parallel
+
+    Returns ``(listings, fetched_sources)``; a source is in
+    ``fetched_sources`` only if all of its pages were fetched.
+    """
+    listings = []
+    attempted = {'Internshala', 'Remotive'}
+    failed = set()
+    api_key = os.getenv('THE_MUSE_API_KEY')
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=INTERNSHIP_FETCH_WORKERS) as executor:
+        pending = {
+            executor.submit(_fetch_internshala, http): ('Internshala', None),
+            executor.submit(_fetch_remotive, http): ('Remotive', None),
+        }
+        if api_key:
+            attempted.add('The Muse')
+            pending[executor.submit(_fetch_themuse_page, api_key, 0, http)] = ('The Muse', 0)
+        else:
+            print("THE_MUSE_API_KEY not found in environment variables")
+
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                source, page = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error fetching from {source}{f' (page {page})' if page else ''}: {str(e)}")
+                    failed.add(source)
+                    continue
+                if source == 'The Muse':
+                    page_listings, total_pages = result
+                    listings.extend(page_listings)
+                    if page == 0:
+                        # The page count is only known after the first page
+                        for next_page in range(1, min(THE_MUSE_MAX_PAGES, total_pages)):
+                            future = executor.submit(_fetch_themuse_page, api_key, next_page, http)
+                            pending[future] = ('The Muse', next_page)
+                else:
+                    listings.extend(result)
+
+    fetched_sources = attempted - failed
+    print(f"Fetched {len(listings)} internships from {sorted(fetched_sources)}")
+    return listings, fetched_sources
+
+def ingest_internships(http=requests, client=None):
+    """Fetch all sources and sync them into the internships table
+
+    Returns ``(summary, listings)`` with the de-duplicated listings. Writing
+    to the app's own table (no ``client``) also updates internship_index.
+    """
+    listings, fetched_sources = fetch_listings_concurrently(http)
+    summary, listings = sync_listings(client or supabase, INTERNSHIPS_TABLE, listings, fetched_sources)
+    if client is None:
+        # Keep this worker's index in step with the table it just wrote
+        summary['index'] = internship_index.sync(listings, set(fetched_sources) - set(summary['expiry_skipped']))
+    return summary, listings
 
 def fetch_all_internships(force_refresh: bool = False) -> List[Dict[str, Any]]:
     """Fetch internships from all sources with fallback logic"""
-    all_internships = []
-    
     # Try to get internships from the database first (unless force_refresh is True)
     if not force_refresh:
-        try:
-            result = supabase.table(INTERNSHIPS_TABLE) \
-                .select('*') \
-                .eq('is_active', True) \
-                .order('posted_date', desc=True) \
-                .limit(100) \
-                .execute()
-                
-            if result.data:
-                print(f"Found {len(result.data)} internships in database")
-                return result.data
-                
-        except Exception as e:
-            print(f"Error fetching from database: {str(e)}")
-    
+        ensure_internship_index()
+        listings = internship_index.search(limit=None)['results']
+        print(f"Found {len(listings)} internships in database")
+        return listings
+
     # If no internships in database or force_refresh is True, fetch from external sources
     print("Fetching internships from external sources...")
-    
-    # Fetch from multiple sources in parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_internshala = executor.submit(fetch_internships_from_internshala)
-        future_themuse = executor.submit(fetch_internships_from_themuse)
-        future_remotive = executor.submit(fetch_internships_from_remotive)
-        
-        try:
-            all_internships.extend(future_internshala.result())
-        except Exception as e:
-            print(f"Error getting Internshala results: {str(e)}")
-            
-        try:
-            all_internships.extend(future_themuse.result())
-        except Exception as e:
-            print(f"Error getting The Muse results: {str(e)}")
-            
-        try:
-            all_internships.extend(future_remotive.result())
-        except Exception as e:
-            print(f"Error getting Remotive results: {str(e)}")
-    
-    # Save to database for future use
-    if all_internships:
-        try:
-            # Clear existing internships
-            supabase.table(INTERNSHIPS_TABLE).delete().neq('id', 0).execute()
-            
-            # Insert new internships (in batches to avoid timeouts)
-            batch_size = 20
-            for i in range(0, len(all_internships), batch_size):
-                batch = all_internships[i:i + batch_size]
-                for internship in batch:
-                    _save_internship_opportunity(internship)
-                print(f"Saved batch {i//batch_size + 1}/{(len(all_internships)-1)//batch_size + 1}")
-                
-            print(f"Saved {len(all_internships)} internships to database")
-            
-        except Exception as e:
-            print(f"Error saving internships to database: {str(e)}")
-    
-    return all_internships
+    try:
+        summary, listings = ingest_internships()
+        print(f"Synced internships to database: {summary}")
+        return listings
+    except Exception as e:
+        print(f"Error saving internships to database: {str(e)}")
+        listings, fetched_sources = fetch_listings_concurrently()
+        listings = list(dedupe_listings(listings).values())
+        # A source that parsed to nothing keeps its indexed listings
+        internship_index.sync(listings, fetched_sources & {listing.get('source') for listing in listings})
+        return listings
 
 @bp.route('', methods=['GET', 'OPTIONS'])
 @bp.route('/internships', methods=['GET', 'OPTIONS'])
@@ -436,59 +587,35 @@ def get_internships():
         is_remote = request.args.get('remote', '').lower() == 'true'
         min_stipend = float(request.args.get('min_stipend', 0))
         max_stipend = float(request.args.get('max_stipend', float('inf')))
-        search = request.args.get('search', '').lower()
+        search = request.args.get('search', '')
+        limit = min(int(request.args.get('limit', INTERNSHIP_PAGE_SIZE)), MAX_INTERNSHIP_PAGE_SIZE)
+        offset = max(int(request.args.get('offset', 0)), 0)
         
-        # Fetch from all sources directly (bypass database)
-        print("Fetching internships directly from external sources...")
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_internshala = executor.submit(fetch_internships_from_internshala)
-            future_themuse = executor.submit(fetch_internships_from_themuse)
-            future_remotive = executor.submit(fetch_internships_from_remotive)
-            
-            all_internships = []
-            try:
-                all_internships.extend(future_internshala.result())
-            except Exception as e:
-                print(f"Error getting Internshala results: {str(e)}")
-                
-            try:
-                all_internships.extend(future_themuse.result())
-            except Exception as e:
-                print(f"Error getting The Muse results: {str(e)}")
-                
-            try:
-                all_internships.extend(future_remotive.result())
-            except Exception as e:
-                print(f"Error getting Remotive results: {str(e)}")
+        # Facet filters; several values of one facet may be comma-separated
+        filters = {'is_remote': True} if is_remote else {}
+        for facet in ('stipend', 'duration', 'posted', 'source'):
+            values = [value.strip() for value in request.args.get(facet, '').split(',') if value.strip()]
+            if values:
+                filters[facet] = values
         
-        print(f"Fetched {len(all_internships)} internships from external sources")
+        predicate = None
+        if min_stipend > 0 or max_stipend != float('inf'):
+            predicate = lambda internship: ((internship.get('min_stipend') or 0) >= min_stipend and
+                                            (internship.get('max_stipend') or 0) <= max_stipend)
         
-        # Apply filters
-        filtered_internships = []
-        for internship in all_internships:
-            # Skip if doesn't match remote filter
-            if is_remote and not internship.get('is_remote', False):
-                continue
-                
-            # Skip if doesn't match stipend range
-            if (internship.get('min_stipend', 0) < min_stipend or 
-                internship.get('max_stipend', 0) > max_stipend):
-                continue
-                
-            # Skip if doesn't match search query
-            if search and (search not in internship.get('title', '').lower() and 
-                          search not in internship.get('company', '').lower() and 
-                          search not in internship.get('description', '').lower()):
-                continue
-                
-            filtered_internships.append(internship)
+        ensure_internship_index()
+        result = internship_index.search(search, filters, predicate, offset=offset, limit=limit)
         
         # Add CORS headers to the response
         response = jsonify({
             'success': True,
-            'data': filtered_internships,
-            'count': len(filtered_internships),
-            'total': len(all_internships)
+            'data': result['results'],
+            'count': len(result['results']),
+            'matched': result['total'],
+            'total': len(internship_index),
+            'facets': result['facets'],
+            'offset': offset,
+            'limit': limit
         })
         
         return add_cors_headers(response)
@@ -508,12 +635,13 @@ def sync_internships():
     """Force sync internships from external sources"""
     try:
         # Force refresh from external sources
-        all_internships = fetch_all_internships(force_refresh=True)
+        summary, all_internships = ingest_internships()
         
         return jsonify({
             'success': True,
             'message': f'Successfully synced {len(all_internships)} internships',
-            'count': len(all_internships)
+            'count': len(all_internships),
+            'summary': summary
         })
         
     except Exception as e:
@@ -531,12 +659,13 @@ def refresh_internships():
     """Manually trigger a refresh of internships data"""
     try:
         # Force refresh from external sources
-        all_internships = fetch_all_internships(force_refresh=True)
+        summary, all_internships = ingest_internships()
         
         return jsonify({
             'success': True,
             'message': f'Successfully refreshed {len(all_internships)} internships',
             'count': len(all_internships),
+            'summary': summary,
             'internships': all_internships[:10]  # Return first 10 for preview
         })
         
@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, Response, request, jsonify, make_response
 from supabase_client import get_supabase
 from datetime import datetime
 from functools import wraps
 import os
 import uuid
 from werkzeug.utils import secure_filename
-import hashlib
 import traceback
+from utils.resume_files import store_upload, extract_resume_text, ResumeTooLargeError
+from utils.analysis_queue import analysis_queue
+from utils.realtime_hub import sse_message, REALTIME_HEARTBEAT_INTERVAL
 
 # CORS headers
 def add_cors_headers(response):
@@ -97,6 +99,42 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+def resume_metadata_for_job(metadata, job):
+    """``metadata`` of a resume row updated with the outcome of its analysis job"""
+    metadata = dict(metadata)
+    if job.status == 'completed':
+        metadata['analysis'] = {**job.result, 'file_metadata': metadata.get('file_metadata')}
+        metadata['status'] = 'processed'
+    else:
+        metadata['error'] = job.error
+        metadata['status'] = 'error'
+    return metadata
+
+def store_resume_analysis(resume_id, metadata, job):
+    """Write a finished analysis into its resume row (runs on an analysis worker)"""
+    supabase.from_('resumes')\
+        .update({'metadata': resume_metadata_for_job(metadata, job),
+                 'last_updated': datetime.utcnow().isoformat() + 'Z'})\
+        .eq('id', resume_id)\
+        .execute()
+
+def find_resume_by_hash(content_hash, student_id=None):
+    """Most relevant resume row with this content hash, preferring the student's own"""
+    try:
+        result = supabase.from_('resumes')\
+            .select('id, student_id, is_active, version, file_name, file_url, file_size, file_type, upload_date, metadata')\
+            .eq('metadata->>content_hash', content_hash)\
+            .order('upload_date', desc=True)\
+            .limit(20)\
+            .execute()
+    except Exception as e:
+        print(f"[WARNING] Could not look up resume by content hash: {str(e)}")
+        return None
+    rows = result.data or []
+    own = [row for row in rows if str(row.get('student_id')) == str(student_id)]
+    active = [row for row in own if row.get('is_active')]
+    return (active or own or rows or [None])[0]
+
 def analyze_resume_content(text_content):
     """
     Analyze resume content and provide insights
@@ -172,12 +210,20 @@ def analyze_resume_content(text_content):
     
     return analysis
 
+# Uploads are analysed on the background workers of utils/analysis_queue.py.
+# Bump the version whenever analyze_resume_content changes so cached results
+# from the old scorer are not reused.
+RESUME_ANALYZER = 'keyword'
+RESUME_ANALYZER_VERSION = '1'
+analysis_queue.register(RESUME_ANALYZER, RESUME_ANALYZER_VERSION, lambda text: analyze_resume_content(text))
+
 @resume_analytics_bp.route('/upload', methods=['POST', 'OPTIONS'])
 @handle_errors
 def upload_resume():
     """Upload and analyze student resume with enhanced error handling and logging"""
     # Initialize file_path in the outer scope for cleanup in case of errors
     file_path = None
+    created_file = False
     
     try:
         import sys, traceback
@@ -310,90 +356,25 @@ def upload_resume():
         
         print(f"[DEBUG] Sanitized filename: {filename}")
         
-        # Set up upload directory
+        # Stream the upload to disk, hashing it on the way (utils/resume_files.py)
+        extension = os.path.splitext(filename)[1].lower()
         try:
-            backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            upload_dir = os.path.join(backend_dir, 'uploads', 'resumes')
-            
-            # Ensure upload directory exists and is writable
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Test write permissions
-            test_file = os.path.join(upload_dir, f'.test_{os.getpid()}')
-            try:
-                with open(test_file, 'w') as f:
-                    f.write('test')
-                os.remove(test_file)
-            except Exception as e:
-                raise Exception(f"Cannot write to upload directory '{upload_dir}': {str(e)}")
-            
-        except Exception as e:
-            error_msg = f"Error setting up upload directory: {str(e)}"
-            print(f"[ERROR] {error_msg}")
-            print(traceback.format_exc())
+            stored = store_upload(file.stream, extension)
+        except ResumeTooLargeError as e:
+            print(f"[ERROR] {str(e)}")
             return jsonify({
                 "success": False,
-                "error": "Server configuration error",
-                "details": error_msg
-            }), 500
-        
-        # Generate unique filename with timestamp for better traceability
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{student_id}_{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        print(f"[DEBUG] Saving file to: {file_path}")
-        
-        try:
-            # Ensure we're at the start of the file
-            if hasattr(file, 'seek'):
-                file.seek(0)
-            
-            # Save the file in chunks to handle large files
-            chunk_size = 4096  # 4KB chunks
-            
-            try:
-                with open(file_path, 'wb') as f:
-                    while True:
-                        chunk = file.stream.read(chunk_size)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                
-                # Verify the file was saved
-                if not os.path.exists(file_path):
-                    raise Exception("File was not saved correctly")
-                
-                # Check file size
-                file_size = os.path.getsize(file_path)
-                if file_size == 0:
-                    raise Exception("Uploaded file is empty")
-                
-                # Set reasonable file size limit (e.g., 10MB)
-                max_file_size = 10 * 1024 * 1024  # 10MB
-                if file_size > max_file_size:
-                    raise Exception(f"File size ({file_size} bytes) exceeds maximum allowed size ({max_file_size} bytes)")
-                
-                print(f"[DEBUG] File saved successfully: {file_path} ({file_size} bytes)")
-                
-            except IOError as e:
-                raise Exception(f"I/O error while saving file: {str(e)}")
-            except Exception as e:
-                raise Exception(f"Unexpected error saving file: {str(e)}")
-                
+                "error": "File is too large",
+                "details": str(e),
+                "max_file_size": "10MB"
+            }), 413
+        except ValueError as e:
+            print(f"[ERROR] {str(e)}")
+            return jsonify({"success": False, "error": str(e)}), 400
         except Exception as e:
             error_msg = f"Error saving file: {str(e)}"
             print(f"[ERROR] {error_msg}")
             print(traceback.format_exc())
-
-            # Clean up if file was partially saved
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"[DEBUG] Cleaned up partially uploaded file: {file_path}")
-                except Exception as cleanup_error:
-                    print(f"[ERROR] Failed to clean up file {file_path}: {str(cleanup_error)}")
-
             return jsonify({
                 "success": False,
                 "error": "Failed to save uploaded file",
@@ -402,185 +383,195 @@ def upload_resume():
                 "allowed_formats": ["pdf", "doc", "docx", "txt"]
             }), 500
 
-        # For demo purposes, create mock analysis
-        try:
-            # Read the actual file content for analysis
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                file_content = f.read()
-
-            # If the file is empty or we couldn't read text content, use a fallback
-            if not file_content.strip():
-                print("[WARNING] File appears to be empty or could not be read as text")
-                file_content = f"""
+        file_path = stored['path']
+        created_file = stored['created']
+        unique_filename = stored['stored_name']
+        content_hash = stored['sha256']
+        file_size = stored['size']
+        print(f"[DEBUG] Stored {file_path} ({file_size} bytes, new file: {created_file})")
+
+        def load_text():
+            text = extract_resume_text(file_path)
+            if not text:
+                print(f"[WARNING] No text could be extracted from {unique_filename}")
+                text = f"""
                 {student.get('full_name', 'Student')}
                 Student ID: {student.get('register_number', 'N/A')}
                 Email: {student.get('email', 'N/A')}
 
-                [Resume content could not be extracted or file is in binary format]
+                [Resume content could not be extracted]
                 """
-
-            # Analyze the resume content
-            analysis = analyze_resume_content(file_content)
-
-            # Add file metadata to analysis
-            analysis['file_metadata'] = {
-                'original_name': filename,
-                'stored_name': unique_filename,
-                'size_bytes': os.path.getsize(file_path),
-                'content_type': file.content_type,
-                'upload_timestamp': datetime.utcnow().isoformat() + 'Z',  # ISO 8601 with UTC
-                'checksum': hashlib.md5(open(file_path, 'rb').read()).hexdigest()
-            }
-
-            # Prepare resume data for database
-            resume_data = {
-                'student_id': student_id,
-                'file_name': unique_filename,
-                'file_path': file_path,  # Store full server path
-                'file_url': f"/api/resumes/{unique_filename}",  # URL path for client access
-                'file_size': os.path.getsize(file_path),
-                'file_type': file.content_type,
-                'upload_date': datetime.utcnow().isoformat() + 'Z',
-                'last_updated': datetime.utcnow().isoformat() + 'Z',
-                'is_active': True,
-                'version': 1,
-                'metadata': {
-                    'original_name': filename,
-                    'analysis': analysis,
-                    'status': 'processed'
-                }
-            }
-
-        except Exception as e:
-            error_msg = f"Error processing file content: {str(e)}"
-            print(f"[ERROR] {error_msg}")
-            print(traceback.format_exc())
-
-            # Prepare error response with partial data
-            resume_data = {
-                'student_id': student_id,
-                'file_name': unique_filename,
-                'file_path': file_path,
-                'file_url': f"/api/resumes/{unique_filename}",
-                'file_size': os.path.getsize(file_path) if os.path.exists(file_path) else 0,
-                'file_type': file.content_type,
-                'upload_date': datetime.utcnow().isoformat() + 'Z',
-                'last_updated': datetime.utcnow().isoformat() + 'Z',
-                'is_active': False,
-                'version': 1,
-                'metadata': {
-                    'original_name': filename,
-                    'error': error_msg,
-                    'status': 'error'
-                }
-            }
-
-            # Don't fail the entire upload, just record the error
-            analysis = {
-                'error': 'File was uploaded but could not be processed',
-                'details': error_msg,
-                'file_metadata': {
-                    'original_name': filename,
-                    'stored_name': unique_filename,
-                    'size_bytes': os.path.getsize(file_path) if os.path.exists(file_path) else 0,
-                    'content_type': file.content_type,
-                    'upload_timestamp': datetime.utcnow().isoformat() + 'Z'
+            return text
+
+        # A resume with the same content was analysed before: reuse that analysis
+        previous = find_resume_by_hash(content_hash, student_id)
+        if previous and str(previous.get('student_id')) == str(student_id) and previous.get('is_active'):
+            print(f"[DEBUG] Student {student_id} re-uploaded their current resume; nothing to do")
+            metadata = previous.get('metadata') or {}
+            if metadata.get('status') == 'pending' and analysis_queue.job(metadata.get('analysis_job_id')) is None:
+                # Its job is gone (jobs live in the process that accepted the
+                # upload, and a restart drops them): analyse it again
+                job = analysis_queue.submit(RESUME_ANALYZER, content_hash, load_text)
+                metadata = {**metadata, 'analysis_job_id': job.id, 'analyzer_version': job.version}
+                if job.done:
+                    store_resume_analysis(previous['id'], metadata, job)
+                    metadata = resume_metadata_for_job(metadata, job)
+                else:
+                    supabase.from_('resumes').update({'metadata': metadata}).eq('id', previous['id']).execute()
+                    job.add_done_callback(
+                        lambda finished, row_metadata=metadata: store_resume_analysis(previous['id'], row_metadata, finished))
+            return jsonify({
+                "success": True,
+                "message": "Resume already uploaded; existing analysis returned",
+                "data": {
+                    "resume_id": previous.get('id'),
+                    "student_id": student_id,
+                    "file_url": previous.get('file_url'),
+                    "resume_url": previous.get('file_url'),
+                    "download_url": f"{previous.get('file_url')}/download",
+                    "analysis": metadata.get('analysis'),
+                    "deduplicated": True,
+                    "analysis_job": {
+                        "job_id": metadata.get('analysis_job_id'),
+                        "status": metadata.get('status'),
+                        "status_url": f"/api/resume/analysis/jobs/{metadata.get('analysis_job_id')}"
+                    } if metadata.get('status') == 'pending' else None,
+                    "metadata": {
+                        "filename": previous.get('file_name'),
+                        "original_name": metadata.get('original_name'),
+                        "file_size": previous.get('file_size'),
+                        "content_type": previous.get('file_type'),
+                        "upload_timestamp": previous.get('upload_date'),
+                        "version": previous.get('version', 1)
+                    },
+                    "student_info": {
+                        "full_name": student.get('full_name'),
+                        "register_number": student.get('register_number'),
+                        "email": student.get('email')
+                    }
                 }
-            }
-
-        # Database operation with transaction support and retry logic
-        max_retries = 3
-        retry_delay = 1  # seconds
-
-        for attempt in range(max_retries):
-            try:
-                # Begin transaction (if supported by your database)
-                # This depends on your Supabase/PostgreSQL configuration
-
-                # Verify student exists (double-check)
-                verify_student = supabase.from_('students')\
-                    .select('id, full_name, email')\
-                    .eq('id', student_id)\
-                    .execute()
+            })
+
+        # Analysis runs on the background workers (utils/analysis_queue.py);
+        # an analysis stored with an earlier upload of this file seeds the cache
+        previous_metadata = (previous or {}).get('metadata') or {}
+        if previous_metadata.get('analyzer_version') == analysis_queue.version(RESUME_ANALYZER) \
+                and previous_metadata.get('analysis') and analysis_queue.cached(RESUME_ANALYZER, content_hash) is None:
+            analysis_queue.remember(RESUME_ANALYZER, content_hash, {
+                k: v for k, v in previous_metadata['analysis'].items() if k != 'file_metadata'
+            })
+
+        job = analysis_queue.submit(RESUME_ANALYZER, content_hash, load_text)
+
+        now = datetime.utcnow().isoformat() + 'Z'
+        file_metadata = {
+            'original_name': filename,
+            'stored_name': unique_filename,
+            'size_bytes': file_size,
+            'content_type': file.content_type,
+            'upload_timestamp': now,
+            'checksum': stored['md5']
+        }
+        metadata = {
+            'original_name': filename,
+            'content_hash': content_hash,
+            'analyzer_version': job.version,
+            'analysis_job_id': job.id,
+            'file_metadata': file_metadata,
+            'status': 'pending'
+        }
+        analysis = None
+        if job.done:
+            metadata = resume_metadata_for_job(metadata, job)
+            analysis = metadata.get('analysis')
+
+        resume_data = {
+            'student_id': student_id,
+            'file_name': unique_filename,
+            'file_path': file_path,  # Store full server path
+            'file_url': f"/api/resumes/{unique_filename}",  # URL path for client access
+            'file_size': file_size,
+            'file_type': file.content_type,
+            'upload_date': now,
+            'last_updated': now,
+            'is_active': True,
+            'version': 1,
+            'metadata': metadata
+        }
 
-                if not verify_student.data:
-                    raise Exception(f"Student with ID {student_id} not found during final verification")
+        # Replace the student's active resume; the student was verified above
+        try:
+            existing_resume = supabase.from_('resumes')\
+                .select('id, version')\
+                .eq('student_id', student_id)\
+                .eq('is_active', True)\
+                .execute()
 
-                # Check if a resume already exists for this student
-                existing_resume = supabase.from_('resumes')\
-                    .select('id, version')\
+            if existing_resume.data:
+                resume_data['version'] = existing_resume.data[0].get('version', 1) + 1
+                supabase.from_('resumes')\
+                    .update({'is_active': False, 'last_updated': now})\
                     .eq('student_id', student_id)\
                     .eq('is_active', True)\
                     .execute()
 
-                # If an active resume exists, mark it as inactive
-                if existing_resume.data:
-                    old_version = existing_resume.data[0].get('version', 1)
-                    resume_data['version'] = old_version + 1
-
-                    # Update existing record to inactive
-                    supabase.from_('resumes')\
-                        .update({'is_active': False, 'last_updated': datetime.utcnow().isoformat() + 'Z'})\
-                        .eq('student_id', student_id)\
-                        .eq('is_active', True)\
-                        .execute()
-
-                # Insert new resume record
-                result = supabase.from_('resumes')\
-                    .insert(resume_data)\
-                    .execute()
+            result = supabase.from_('resumes')\
+                .insert(resume_data)\
+                .execute()
+
+            if hasattr(result, 'error') and result.error:
+                error_msg = str(result.error)
+                if "violates foreign key constraint" in error_msg.lower():
+                    raise Exception("Invalid student reference - student does not exist")
+                raise Exception(f"Database error: {error_msg}")
+        except Exception as e:
+            error_msg = str(e)
+            print(f"[EXCEPTION] Database operation failed: {error_msg}")
+            print(traceback.format_exc())
+            # Only remove the file if this upload created it; others may share it
+            if created_file and os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                    print(f"[DEBUG] Cleaned up uploaded file after database error: {file_path}")
+                except Exception as cleanup_error:
+                    print(f"[ERROR] Failed to clean up file after database error: {str(cleanup_error)}")
+
+            return jsonify({
+                "success": False,
+                "error": "Failed to save resume information to database",
+                "details": error_msg
+            }), 500
 
-                if hasattr(result, 'error') and result.error:
-                    error_msg = str(result.error)
-                    if "violates foreign key constraint" in error_msg.lower():
-                        raise Exception("Invalid student reference - student does not exist")
-                    raise Exception(f"Database error: {error_msg}")
-
-                # If we get here, the transaction was successful
-                break
-
-            except Exception as e:
-                error_msg = str(e)
-                print(f"[EXCEPTION] Attempt {attempt + 1}/{max_retries} - Database operation failed: {error_msg}")
-                print(traceback.format_exc())
-
-                if attempt == max_retries - 1:  # Last attempt failed
-                    # Try to clean up the uploaded file since we couldn't save to DB
-                    if file_path and os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                            print(f"[DEBUG] Cleaned up uploaded file after database error: {file_path}")
-                        except Exception as cleanup_error:
-                            print(f"[ERROR] Failed to clean up file after database error: {str(cleanup_error)}")
-
-                    return jsonify({
-                        "success": False,
-                        "error": "Failed to save resume information to database",
-                        "details": error_msg,
-                        "attempts": attempt + 1
-                    }), 500
-
-                # Wait before retrying
-                import time
-                time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
+        inserted = (result.data or [{}])[0]
+        if not job.done and inserted.get('id'):
+            # Runs immediately if the job finished while the row was being written
+            job.add_done_callback(lambda finished: store_resume_analysis(inserted['id'], metadata, finished))
 
         # Prepare success response with all relevant information
         response_data = {
             "success": True,
-            "message": "Resume uploaded and analyzed successfully",
+            "message": "Resume uploaded and analyzed successfully" if analysis
+                       else "Resume uploaded; analysis in progress",
             "data": {
-                "resume_id": str(uuid.uuid4()),  # This should ideally come from the database
+                "resume_id": inserted.get('id') or str(uuid.uuid4()),
                 "student_id": student_id,
                 "file_url": f"/api/resumes/{unique_filename}",
                 "resume_url": f"/api/resumes/{unique_filename}",
                 "download_url": f"/api/resumes/{unique_filename}/download",
                 "analysis": analysis,
+                "deduplicated": job.cached,
+                "analysis_job": {
+                    "job_id": job.id,
+                    "status": job.status,
+                    "status_url": f"/api/resume/analysis/jobs/{job.id}",
+                    "events_url": f"/api/resume/analysis/jobs/{job.id}/events"
+                },
                 "metadata": {
                     "filename": unique_filename,
                     "original_name": filename,
-                    "file_size": os.path.getsize(file_path),
+                    "file_size": file_size,
                     "content_type": file.content_type,
-                    "upload_timestamp": datetime.utcnow().isoformat() + 'Z',
+                    "upload_timestamp": now,
                     "version": resume_data.get('version', 1)
                 },
                 "student_info": {
@@ -598,7 +589,7 @@ def upload_resume():
         print(f"[SUCCESS] Resume uploaded successfully for student {student_id}")
         print(f"[DEBUG] Response data: {response_data}")
 
-        return jsonify(response_data)
+        return jsonify(response_data), (200 if analysis else 202)
     except Exception as e:
         import traceback
         error_msg = f"Unexpected error in upload_resume: {str(e)}"
@@ -619,8 +610,8 @@ def upload_resume():
         except Exception as log_error:
             print(f"[ERROR] Failed to write to error log: {str(log_error)}")
         
-        # Clean up any partially uploaded files
-        if 'file_path' in locals() and file_path and os.path.exists(file_path):
+        # Clean up the stored file unless an earlier upload shares it
+        if created_file and file_path and os.path.exists(file_path):
             try:
                 os.remove(file_path)
                 print(f"[DEBUG] Cleaned up file after error: {file_path}")
@@ -639,6 +630,49 @@ def upload_resume():
             "support_contact": "support@example.com"
         }), 500
 
+@resume_analytics_bp.route('/analysis/jobs/<job_id>', methods=['GET', 'OPTIONS'])
+@handle_errors
+def get_analysis_job(job_id):
+    """Status and result of an analysis job; ``?wait=<seconds>`` (max 30) long-polls
+
+    Jobs are tracked per process (utils/analysis_queue.py): deploy with one
+    worker or sticky sessions, or polls may land on a worker that answers 404.
+    """
+    job = analysis_queue.job(job_id)
+    if job is None:
+        return {"success": False, "error": "Analysis job not found"}, 404
+    wait = min(float(request.args.get('wait', 0) or 0), 30)
+    if wait > 0:
+        job.wait(wait)
+    return {"success": True, "data": job.to_dict()}
+
+@resume_analytics_bp.route('/analysis/jobs/<job_id>/events', methods=['GET'])
+def stream_analysis_job(job_id):
+    """Server-sent events for one analysis job: heartbeats, then the result"""
+    job = analysis_queue.job(job_id)
+    if job is None:
+        return add_cors_headers(make_response(jsonify({"success": False, "error": "Analysis job not found"}), 404))
+
+    def events():
+        yield sse_message({'type': 'status', **job.to_dict()})
+        while not job.wait(REALTIME_HEARTBEAT_INTERVAL):
+            yield sse_message({'type': 'heartbeat', 'timestamp': datetime.utcnow().isoformat()})
+        yield sse_message({'type': 'result', **job.to_dict()})
+
+    return add_cors_headers(Response(
+        events(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable buffering for nginx
+        }
+    ))
+
+@resume_analytics_bp.route('/analysis/stats', methods=['GET'])
+def get_analysis_queue_stats():
+    """Worker, queue and cache counters of the resume analysis queue"""
+    return add_cors_headers(make_response(jsonify(analysis_queue.stats())))
+
 @resume_analytics_bp.route('/<student_id>', methods=['GET', 'OPTIONS'])
 def get_resume(student_id):
     """Get student's resume by ID (accepts both UUID and integer)"""
@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Any, Union, Callable, TypeVar, cast
 from jinja2 import TemplateNotFound
 from middleware.auth_middleware import auth_required as original_auth_required, try_authenticate, get_current_user_id
 from supabase_client import get_supabase
+from middleware.identity_cache import get_verified_user
+from utils.hall_tickets import hall_ticket_store, prepare_hall_ticket_context, render_hall_ticket_html
 
 # Initialize the blueprint
 student_dashboard_bp = Blueprint('student_dashboard', __name__)
@@ -71,9 +73,8 @@ def auth_required(roles=None):
             token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else auth_header
             
             try:
-                # Verify the token with Supabase
-                supabase = get_supabase()
-                user = supabase.auth.get_user(token)
+                # Verify the token with Supabase (cached until the token expires)
+                user = get_verified_user(token, get_supabase())
                 
                 if not user or not user.user:
                     return jsonify({
@@ -311,6 +312,9 @@ def get_hall_ticket():
                 'error': error_msg
             }), 400
             
+        # Get the output format (default to 'pdf')
+        output_format = request.args.get('format', 'pdf').lower()
+
         logger.info(f"Fetching hall ticket for student {user_id}, exam {exam_id}")
         
         # Get student and exam data
@@ -375,63 +379,11 @@ def get_hall_ticket():
             
         logger.debug(f"Found exam: {exam.get('id')} - {exam.get('name')}")
 
-        # Add student photo URL if available
-        student['photo_url'] = f"https://ui-avatars.com/api/?name={student.get('full_name', 'Student')}&size=200&background=random"
-
-        # Format dates and times
-        if 'date' in exam and exam['date']:
-            try:
-                exam['date'] = datetime.strptime(exam['date'], '%Y-%m-%d').strftime('%d-%m-%Y')
-            except (ValueError, TypeError):
-                exam['date'] = 'N/A'
-
-        # Handle exam_date field as well (fallback)
-        if ('date' not in exam or exam['date'] == 'N/A') and 'exam_date' in exam and exam['exam_date']:
-            try:
-                exam['date'] = datetime.strptime(str(exam['exam_date']), '%Y-%m-%d').strftime('%d-%m-%Y')
-            except (ValueError, TypeError):
-                exam['date'] = 'N/A'
-
-        if 'start_time' in exam and exam['start_time']:
-            try:
-                exam['start_time'] = (datetime.strptime(exam['start_time'], '%H:%M:%S')).strftime('%I:%M %p')
-            except (ValueError, TypeError):
-                exam['start_time'] = 'N/A'
-
-        if 'end_time' in exam and exam['end_time']:
-            try:
-                exam['end_time'] = (datetime.strptime(exam['end_time'], '%H:%M:%S')).strftime('%I:%M %p')
-            except (ValueError, TypeError):
-                exam['end_time'] = 'N/A'
-
-        # Add additional fields for the hall ticket template
-        if 'venue_code' not in exam or not exam['venue_code']:
-            exam['venue_code'] = 'CUBE-01'
-
-        if 'reporting_time' not in exam or not exam['reporting_time']:
-            # Calculate reporting time as 30 minutes before start time
-            if exam.get('start_time') and exam['start_time'] != 'N/A':
-                exam['reporting_time'] = '30 minutes before exam time'
-            else:
-                exam['reporting_time'] = '1:30 PM'
+        prepare_hall_ticket_context(student, exam)
 
-        # Format date of birth if available
-        if 'date_of_birth' in student and student['date_of_birth']:
-            try:
-                student['date_of_birth'] = datetime.strptime(str(student['date_of_birth']), '%Y-%m-%d').strftime('%d-%m-%Y')
-            except (ValueError, TypeError):
-                pass
-        
-        # Get the output format (default to 'pdf')
-        output_format = request.args.get('format', 'pdf').lower()
-        
-        # Ensure the template directory exists
-        template_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
-        os.makedirs(template_dir, exist_ok=True)
-        
-                # Render the HTML template. If the template is missing, fall back to a simple inline template
+        # Render the HTML template. If the template is missing, fall back to a simple inline template
         try:
-            html = render_template('hall_ticket.html', student=student, exam=exam)
+            html = render_hall_ticket_html(student, exam)
         except TemplateNotFound:
             logger.warning('hall_ticket.html template not found; using inline fallback template')
             # Build a minimal HTML hall ticket as a fallback
@@ -459,25 +411,20 @@ def get_hall_ticket():
         if output_format == 'html':
             return html
             
-        # Generate PDF
-        pdf_data = io.BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=pdf_data)
-        
-        if pisa_status.err:
+        # The digest covers the current student and exam data, so a ticket
+        # pre-rendered by the exam batch is reused only if nothing changed
+        try:
+            digest = hall_ticket_store.save_pdf(html)
+        except RuntimeError as e:
             return jsonify({
                 'success': False,
                 'error': 'Error generating PDF',
-                'details': str(pisa_status.err)
+                'details': str(e)
             }), 500
-            
-        pdf_data.seek(0)
-        
-        # Create response
-        response = make_response(pdf_data.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=hall_ticket_{exam_id}.pdf'
-        
-        return response
+        hall_ticket_store.record(exam_id, student, digest)
+
+        return send_file(hall_ticket_store.object_path(digest), mimetype='application/pdf',
+                         as_attachment=True, download_name=f'hall_ticket_{exam_id}.pdf')
         
     except Exception as e:
         logger.error(f"Error generating hall ticket: {str(e)}\n{traceback.format_exc()}")
@@ -13,6 +13,9 @@ import json
 import traceback
 import requests
 from middleware.auth_middleware import auth_required
+from utils.reference_cache import reference_cache
+from utils.student_stats import student_stats
+from utils.hall_tickets import hall_ticket_store
 from typing import Dict, Optional, Tuple
 
 students_bp = Blueprint('students', __name__)
@@ -455,6 +458,7 @@ def update_student(student_id):
         data['updated_at'] = datetime.now().isoformat()
         
         response = supabase.table('students').update(data).eq('id', student_id).execute()
+        hall_ticket_store.invalidate_student(student_id)
         
         if response.data:
             return jsonify({
@@ -667,98 +671,37 @@ def get_student_timetable(student_id):
 @students_bp.route('/stats', methods=['GET'])
 def get_student_stats():
     """Get student statistics"""
-    print("\n=== GET /api/students/stats called ===")
-    print(f"Request headers: {request.headers}")
-    print(f"Request method: {request.method}")
-    print(f"Request URL: {request.url}")
-    
     try:
-        print("\n1. Starting to fetch students data...")
-        # Get all students once and count from data (more reliable than count='exact')
-        # Only select minimal fields needed for statistics
-        try:
-            print("2. Executing Supabase query for students...")
-            all_students = supabase.table('students').select('gender, current_semester, course_id').limit(10000).execute()
-            print(f"3. Supabase query completed. Response: {hasattr(all_students, 'data') and len(all_students.data) if hasattr(all_students, 'data') else 'No data'}")
-            
-            students_data = all_students.data if hasattr(all_students, 'data') and all_students.data else []
-            total_students = len(students_data)
-            print(f"4. Found {total_students} students")
-            
-        except Exception as e:
-            print(f"Error fetching students: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            total_students = 0
-            students_data = []
-        
-        print("5. Calculating gender statistics...")
-        # Count by gender from the data
-        male_count = sum(1 for s in students_data if s and s.get('gender', '').lower() in ['male', 'm'])
-        female_count = sum(1 for s in students_data if s and s.get('gender', '').lower() in ['female', 'f'])
-        other_count = max(0, total_students - male_count - female_count)
-        
-        print(f"6. Gender stats - Male: {male_count}, Female: {female_count}, Other: {other_count}")
+        snapshot = student_stats.get()
         
-        print("7. Calculating semester statistics...")
         # Count by semester
-        semester_stats = {}
-        for sem in ['1', '2', '3', '4', '5', '6', '7', '8']:
-            count = sum(1 for s in students_data if s and str(s.get('current_semester', '')).strip() == str(sem).strip())
-            semester_stats[f'semester_{sem}'] = count
-        
-        print(f"8. Semester stats: {semester_stats}")
-        
-        print("9. Calculating course statistics...")
-        # Count by course
-        course_wise_data = {}
-        for student in students_data:
-            if not student:
-                continue
-            course_id = student.get('course_id')
-            if course_id:
-                if course_id not in course_wise_data:
-                    course_wise_data[course_id] = {'course_id': course_id, 'count': 0}
-                course_wise_data[course_id]['count'] += 1
-        
-        print(f"10. Found {len(course_wise_data)} unique courses")
+        semester_stats = {f'semester_{sem}': snapshot['by_semester'].get(str(sem), 0) for sem in range(1, 9)}
         
-        # Get course names for the course_wise data
+        # Count by course, with course names from the reference cache
+        courses = reference_cache.rows('courses')
         course_wise_list = []
-        try:
-            if course_wise_data:
-                course_ids = list(course_wise_data.keys())
-                print(f"11. Fetching course details for {len(course_ids)} courses...")
-                courses_response = supabase.table('courses').select('id, name, code').in_('id', course_ids).execute()
-                courses_dict = {c['id']: c for c in (courses_response.data if hasattr(courses_response, 'data') and courses_response.data else [])}
-                
-                for course_id, data in course_wise_data.items():
-                    course_info = courses_dict.get(course_id, {})
-                    course_wise_list.append({
-                        'course_id': course_id,
-                        'count': data['count'],
-                        'name': course_info.get('name', 'Unknown'),
-                        'code': course_info.get('code', '')
-                    })
-                print(f"12. Processed {len(course_wise_list)} course entries")
-        except Exception as e:
-            print(f"Error fetching course details: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
+        for course_id, count in snapshot['by_course'].items():
+            course_info = courses.get(course_id, {})
+            course_wise_list.append({
+                'course_id': course_info.get('id', course_id),
+                'count': count,
+                'name': course_info.get('name', 'Unknown'),
+                'code': course_info.get('code', '')
+            })
         
-        print("13. Preparing final response...")
         # Return format expected by frontend
         response_data = {
             'success': True,
-            'total': total_students,
-            'male': male_count,
-            'female': female_count,
-            'other': other_count,
-            'total_students': total_students,
+            'total': snapshot['total'],
+            'male': snapshot['gender']['male'],
+            'female': snapshot['gender']['female'],
+            'other': snapshot['gender']['other'],
+            'total_students': snapshot['total'],
             'semester_wise': semester_stats,
             'course_wise': course_wise_list
         }
-        print(f"14. Sending response with {total_students} total students")
+        if snapshot.get('partial'):
+            response_data['partial'] = True
         return jsonify(response_data), 200
         
     except Exception as e:
@@ -5,6 +5,8 @@ Handles auto-generated student credentials, Supabase authentication, and persona
 
 from flask import Blueprint, request, jsonify
 from supabase_client import get_supabase
+from utils.id_allocator import next_student_user_id
+from utils.hall_tickets import hall_ticket_store
 from datetime import datetime
 import random
 import string
@@ -33,28 +35,12 @@ def generate_random_password(length=8):
 def generate_user_id():
     """Generate unique user_id in format STU202510001"""
     try:
-        # Get current year
-        current_year = datetime.now().year
-        
-        # Get the maximum number for current year
-        result = supabase.table('students').select('user_id').like('user_id', f'STU{current_year}%').order('user_id', desc=True).limit(1).execute()
-        
-        if result.data and len(result.data) > 0:
-            last_user_id = result.data[0]['user_id']
-            # Extract the number part (last 5 digits)
-            last_number = int(last_user_id[-5:])
-            next_number = last_number + 1
-        else:
-            next_number = 1
-        
-        # Format: STU + YEAR + 5-digit number
-        new_user_id = f"STU{current_year}{str(next_number).zfill(5)}"
-        return new_user_id
+        return next_student_user_id()
     except Exception as e:
         print(f"Error generating user_id: {e}")
         # Fallback to timestamp-based ID
         timestamp = int(datetime.now().timestamp())
-        return f"STU{current_year}{str(timestamp)[-5:]}"
+        return f"STU{datetime.now().year}{str(timestamp)[-5:]}"
 
 # =====================================================
 # ADMIN ROUTES - ADD STUDENT
@@ -312,6 +298,7 @@ def update_student(student_id):
 
         # Update student
         response = supabase.table('students').update(data).eq('id', student_id).execute()
+        hall_ticket_store.invalidate_student(student_id)
 
         if response.data:
             return jsonify({
@@ -17,6 +17,12 @@ def patched_init(self, *args, **kwargs):
 httpx.Client.__init__ = patched_init
 
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest import SyncPostgrestClient, SyncRequestBuilder
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
+from postgrest.utils import SyncClient
+import importlib.util
+import threading
 import os
 from dotenv import load_dotenv
 
@@ -42,6 +48,138 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 # Admin client for auth operations (uses service role key)
 supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
+# Connection pool shared by every per-user client (see get_supabase(token=...))
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv('SUPABASE_POOL_MAX_CONNECTIONS', '100'))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.getenv('SUPABASE_POOL_MAX_KEEPALIVE', '20'))
+SUPABASE_POOL_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_POOL_KEEPALIVE_EXPIRY', '30'))
+# HTTP/2 is only enabled when the optional ``h2`` package is installed
+SUPABASE_HTTP2 = os.getenv('SUPABASE_HTTP2', 'true').lower() in ('1', 'true', 'yes')
+
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose httpx session uses explicit pool limits and HTTP/2."""
+
+    def __init__(self, base_url, *, limits, http2, **kwargs):
+        self._limits = limits
+        self._http2 = http2
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout):
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._limits,
+            http2=self._http2,
+        )
+
+
+class _AuthorizedSession:
+    """
+    View of the shared httpx session that sends a user's JWT.
+
+    Only the Authorization header differs between users, so it is set on each
+    request instead of building a new connection pool per token.
+    """
+
+    def __init__(self, session, token):
+        self._session = session
+        self._authorization = f'Bearer {token}'
+
+    def request(self, method, url, **kwargs):
+        headers = httpx.Headers(kwargs.pop('headers', None) or {})
+        headers['Authorization'] = self._authorization
+        return self._session.request(method, url, headers=headers, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class UserScopedClient:
+    """
+    Lightweight stand-in for a Supabase ``Client`` bound to one user's token.
+
+    ``table``/``from_``/``rpc`` run over the shared pool. Anything else
+    (storage, functions, ...) falls back to a full client built on first use.
+    """
+
+    def __init__(self, factory, token):
+        self._factory = factory
+        self._token = token
+        self._session = _AuthorizedSession(factory.postgrest.session, token)
+        self._full_client = None
+
+    def table(self, table_name: str) -> SyncRequestBuilder:
+        return SyncRequestBuilder(self._session, f'/{table_name}')
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict):
+        builder = self._factory.postgrest.rpc(fn, params)
+        builder.session = self._session
+        return builder
+
+    @property
+    def auth(self):
+        return self._factory.auth_client or self._client().auth
+
+    def _client(self) -> Client:
+        if self._full_client is None:
+            options = ClientOptions(headers={'Authorization': f'Bearer {self._token}'})
+            self._full_client = create_client(self._factory.url, self._factory.key, options)
+        return self._full_client
+
+    def __getattr__(self, name):
+        return getattr(self._client(), name)
+
+
+class UserClientFactory:
+    """Hands out per-user clients that all share one keep-alive connection pool."""
+
+    def __init__(self, url, key, auth_client=None,
+                 max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+                 max_keepalive_connections=SUPABASE_POOL_MAX_KEEPALIVE,
+                 keepalive_expiry=SUPABASE_POOL_KEEPALIVE_EXPIRY,
+                 http2=SUPABASE_HTTP2,
+                 timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT):
+        self.url = url
+        self.key = key
+        self.auth_client = auth_client
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = bool(http2) and importlib.util.find_spec('h2') is not None
+        self.timeout = timeout
+        self._postgrest = None
+        self._lock = threading.Lock()
+
+    @property
+    def postgrest(self) -> SyncPostgrestClient:
+        if self._postgrest is None:
+            with self._lock:
+                if self._postgrest is None:
+                    self._postgrest = _PooledPostgrestClient(
+                        f'{self.url}/rest/v1',
+                        headers={'apiKey': self.key, 'Authorization': f'Bearer {self.key}'},
+                        timeout=self.timeout,
+                        limits=self.limits,
+                        http2=self.http2,
+                    )
+        return self._postgrest
+
+    def for_token(self, token: str) -> UserScopedClient:
+        return UserScopedClient(self, token)
+
+    def close(self):
+        if self._postgrest is not None:
+            self._postgrest.aclose()
+            self._postgrest = None
+
+
+user_clients = UserClientFactory(SUPABASE_URL, SUPABASE_ANON_KEY, auth_client=supabase.auth)
+
 def get_supabase(admin: bool = False, token: str = None) -> Client:
     """
     Get the appropriate Supabase client instance.
@@ -49,20 +187,15 @@ def get_supabase(admin: bool = False, token: str = None) -> Client:
     Args:
         admin (bool): If True, returns the admin client with service role.
                      If False, returns the regular client with anon key.
-        token (str): Optional JWT token for authenticated requests.
+        token (str): Optional JWT token for authenticated requests. The
+                     returned client shares one connection pool with every
+                     other user and only differs in its Authorization header.
     Returns:
         Client: The appropriate Supabase client instance
     """
     if admin:
         return supabase_admin
     elif token:
-        # Create a new client instance with the user's JWT token
-        return create_client(SUPABASE_URL, SUPABASE_ANON_KEY, {
-            'global': {
-                'headers': {
-                    'Authorization': f'Bearer {token}'
-                }
-            }
-        })
+        return user_clients.for_token(token)
     else:
         return supabase
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk attendance marking (POST /api/attendance).
+
+Marks 500 records against an in-memory stand-in for PostgREST that adds a fixed
+latency to every request, and reports round trips and wall time for the old
+per-record algorithm and for routes.attendance.mark_attendance.
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from routes import attendance
+from utils.reference_cache import reference_cache
+
+RECORDS = 500
+LATENCY = 0.005  # seconds per simulated HTTP round trip
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.payload = None
+        self.op = 'select'
+        self.bounds = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, {str(value)}))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, {str(v) for v in values}))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def insert(self, rows):
+        self.op, self.payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, **kwargs):
+        return self.insert(rows)
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(LATENCY)
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.op == 'insert':
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            rows.extend(new_rows)
+            return FakeResponse(new_rows)
+        matched = [r for r in rows if all(str(r.get(c)) in vals for c, vals in self.filters)]
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1] + 1]
+        return FakeResponse(matched)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.round_trips = 0
+        self.tables = {
+            'students': [{'id': i} for i in range(RECORDS)],
+            'subjects': [{'id': 1}],
+            'faculty': [{'id': 7}],
+            'attendance': [],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def make_records(date):
+    return [{'student_id': i, 'subject_id': 1, 'faculty_id': 7, 'date': date, 'status': 'present'}
+            for i in range(RECORDS)]
+
+
+def mark_attendance_per_record(supabase, records):
+    """The previous implementation: ~5 round trips per record."""
+    for record in records:
+        supabase.table('students').select('id').eq('id', record['student_id']).execute()
+        supabase.table('subjects').select('id').eq('id', record['subject_id']).execute()
+        supabase.table('faculty').select('id').eq('id', record['faculty_id']).execute()
+    for record in records:
+        supabase.table('attendance').select('id').eq('student_id', record['student_id']) \
+            .eq('subject_id', record['subject_id']).eq('date', record['date']).execute()
+    for record in records:
+        supabase.table('attendance').insert(dict(record)).execute()
+
+
+def main():
+    app = Flask(__name__)
+    app.register_blueprint(attendance.attendance_bp, url_prefix='/api')
+
+    print(f"🚀 BULK ATTENDANCE BENCHMARK ({RECORDS} records, {LATENCY * 1000:.0f}ms per round trip)")
+    print("=" * 60)
+
+    before_db = FakeSupabase()
+    start = time.perf_counter()
+    mark_attendance_per_record(before_db, make_records('2024-01-15'))
+    before = time.perf_counter() - start
+    print("   Before: per-record validation and inserts")
+    print(f"      {before_db.round_trips} round trips in {before:.2f}s")
+
+    after_db = FakeSupabase()
+    attendance.supabase = after_db
+    reference_cache._client = after_db
+    reference_cache.invalidate()
+    with app.test_client() as client:
+        start = time.perf_counter()
+        response = client.post('/api/attendance', json={'attendance_records': make_records('2024-01-15')})
+        after = time.perf_counter() - start
+    assert response.status_code == 201, response.get_json()
+    assert len(after_db.tables['attendance']) == RECORDS
+    print("   After: set-based validation and batched upsert")
+    print(f"      {after_db.round_trips} round trips in {after:.2f}s")
+    print(f"\n   Speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
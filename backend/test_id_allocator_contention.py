@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for utils/id_allocator.py.
+
+Several workers (separate IdAllocator instances, as in separate gunicorn
+processes), each with several threads, mint register numbers at the same
+time against an in-memory stand-in for PostgREST that adds a fixed latency
+to every request. Compares the previous random-number-and-check loop with
+block reservation via reserve_id_block and checks that no ID is issued twice.
+Also checks that only a missing reserve_id_block falls back to allocating in
+process, and that a transient RPC error is raised instead.
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.id_allocator import IdAllocator
+
+WORKERS = 4
+THREADS = 4
+IDS_PER_THREAD = 100
+LATENCY = 0.002  # seconds per simulated HTTP round trip
+LEGACY = ['REG2600017', 'REG2604211', 'REG2699990']
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.bounds = None
+        self.limit_to = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def like(self, column, pattern):
+        prefix = pattern.rstrip('%')
+        self.filters.append(lambda row: str(row.get(column) or '').startswith(prefix))
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        self.limit_to = n
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.db.round_trip()
+        with self.db.lock:
+            rows = [row for row in self.db.tables.get(self.table, [])
+                    if all(f(row) for f in self.filters)]
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        if self.limit_to is not None:
+            rows = rows[:self.limit_to]
+        return FakeResponse(rows)
+
+
+class FakeRpc:
+    def __init__(self, db, params):
+        self.db = db
+        self.params = params
+
+    def execute(self):
+        self.db.round_trip()
+        name, count, floor = self.params['p_name'], self.params['p_count'], self.params['p_floor']
+        with self.db.lock:  # the row lock taken by the upsert
+            current = self.db.sequences.get(name)
+            value = (max(floor, 0) if current is None else max(current, floor)) + count
+            self.db.sequences[name] = value
+            rows = self.db.tables.setdefault('id_sequences', [])
+            if not any(row['name'] == name for row in rows):
+                rows.append({'name': name})
+        return FakeResponse(value - count + 1)
+
+
+class RpcError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FailingRpc:
+    def __init__(self, db, error):
+        self.db = db
+        self.error = error
+
+    def execute(self):
+        self.db.round_trip()
+        raise self.error
+
+
+class FakeSupabase:
+    def __init__(self, rpc_error=None):
+        self.rpc_error = rpc_error
+        self.lock = threading.Lock()
+        self.tables = {'students': [{'register_number': number} for number in LEGACY]}
+        self.sequences = {}
+        self.round_trips = 0
+
+    def round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        time.sleep(LATENCY)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        if self.rpc_error:
+            return FailingRpc(self, self.rpc_error)
+        return FakeRpc(self, params)
+
+
+def random_register_number(db):
+    """The previous generator: random suffix, check it is free, retry"""
+    while True:
+        candidate = f"REG26{random.randint(10000, 99999)}"
+        if not FakeQuery(db, 'students').eq('register_number', candidate).limit(1).execute().data:
+            return candidate
+
+
+def run(label, mint):
+    minted = []
+    minted_lock = threading.Lock()
+
+    def thread_body(worker):
+        local = [mint(worker) for _ in range(IDS_PER_THREAD)]
+        with minted_lock:
+            minted.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=thread_body, args=(w,))
+               for w in range(WORKERS) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    duplicates = len(minted) - len(set(minted))
+    print(f"{label:<22} {len(minted):>6} ids  {elapsed:6.2f}s  {len(minted) / elapsed:8.0f} ids/s  "
+          f"{duplicates} duplicates")
+    return minted, duplicates
+
+
+def main():
+    print(f"{WORKERS} workers x {THREADS} threads x {IDS_PER_THREAD} register numbers, "
+          f"{LATENCY * 1000:.0f}ms per round trip\n")
+
+    db = FakeSupabase()
+    _, random_duplicates = run('random + check', lambda worker: random_register_number(db))
+    random_trips = db.round_trips
+
+    db = FakeSupabase()
+    allocators = [IdAllocator(client=db) for _ in range(WORKERS)]
+
+    def mint(worker):
+        allocator = allocators[worker]
+        prefix = 'REG26'
+        value = allocator.next(f'register_number:{prefix}',
+                               lambda: allocator.legacy_max('students', 'register_number', prefix))
+        return f'{prefix}{value:05d}'
+
+    minted, duplicates = run('reserve_id_block', mint)
+    reservations = sum(a.reservations for a in allocators)
+
+    print(f"\nround trips: random {random_trips}, blocks {db.round_trips} ({reservations} reservations)")
+    print(f"random + check can still collide between check and insert "
+          f"({random_duplicates} duplicates this run)")
+
+    assert duplicates == 0, 'block allocator issued a duplicate ID'
+    lowest = min(int(number[5:]) for number in minted)
+    assert lowest > 99990, f'allocator reissued a legacy range value ({lowest})'
+
+    # A transient failure must not silently allocate outside id_sequences
+    allocator = IdAllocator(client=FakeSupabase(rpc_error=RpcError('upstream timed out', '504')))
+    try:
+        allocator.next('register_number:REG26', lambda: 0)
+        raise AssertionError('a transient RPC error fell back to in-process allocation')
+    except RpcError:
+        pass
+
+    # Not deployed: in-process blocks, seeded by one legacy scan
+    scans = []
+    allocator = IdAllocator(client=FakeSupabase(rpc_error=RpcError('Could not find the function', 'PGRST202')),
+                            block_size=5)
+    values = [allocator.next('register_number:REG26', lambda: scans.append(1) or 99990) for _ in range(12)]
+    assert values == list(range(99991, 100003)) and len(scans) == 1, (values, scans)
+    print("✅ no duplicates; all IDs above the highest legacy register number; "
+          "only a missing RPC allocates in process")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Offline test and benchmark for internship ingestion
+(routes/internships.ingest_internships, utils/internship_ingest.py).
+
+Source responses are replayed from test_fixtures/internships with a fixed
+latency per HTTP request, and the internships table is an in-memory
+stand-in for PostgREST that also adds latency per round trip. Checks that
+durations and skills are parsed from every source, that repeated syncs write
+nothing, that changed listings are updated and vanished ones expired, and
+that a failed or unparsable source keeps its listings. Also compares
+concurrent with sequential fetching and bulk upserts with the old
+delete-and-insert-per-row refresh.
+"""
+
+import sys
+import os
+import json
+import time
+import copy
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('THE_MUSE_API_KEY', 'fixture-key')
+
+import routes.internships as internships
+from utils import internship_ingest
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_fixtures', 'internships')
+HTTP_LATENCY = 0.05  # seconds per source request
+DB_LATENCY = 0.005  # seconds per PostgREST round trip
+TABLE = internships.INTERNSHIPS_TABLE
+
+
+class FixtureResponse:
+    def __init__(self, body):
+        self.text = body
+        self.status_code = 200
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureHttp:
+    """requests.get stand-in that replays recorded responses"""
+
+    def __init__(self, overrides=None, failing=()):
+        self.overrides = overrides or {}
+        self.failing = set(failing)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _fixture(self, url, params):
+        if url == internships.INTERNSHALA_URL:
+            return 'internshala.html'
+        if url == internships.THE_MUSE_URL:
+            return f"themuse_page{params['page']}.json"
+        if url == internships.REMOTIVE_URL:
+            return 'remotive.json'
+        raise AssertionError(f'unexpected request {url}')
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        with self._lock:
+            self.requests += 1
+        time.sleep(HTTP_LATENCY)
+        name = self._fixture(url, params or {})
+        if name in self.failing:
+            raise ConnectionError(f'{name} unavailable')
+        if name in self.overrides:
+            return FixtureResponse(self.overrides[name])
+        with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+            return FixtureResponse(f.read())
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = 'select'
+        self.payload = None
+        self.bounds = None
+
+    def select(self, columns='*', **kwargs):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def is_(self, column, value):
+        assert value == 'null'
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def upsert(self, rows, on_conflict=None, **kwargs):
+        assert on_conflict == 'dedup_key'
+        self.action, self.payload = 'upsert', rows
+        return self
+
+    def update(self, values):
+        self.action, self.payload = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def insert(self, row):
+        self.action, self.payload = 'insert', row
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(DB_LATENCY)
+        rows = self.db.rows
+        if self.action == 'upsert':
+            assert len({frozenset(row) for row in self.payload}) == 1, 'bulk rows need uniform columns'
+            by_key = {row.get('dedup_key'): row for row in rows if row.get('dedup_key')}
+            for row in self.payload:
+                if row['dedup_key'] in by_key:
+                    by_key[row['dedup_key']].update(row)
+                else:
+                    rows.append(dict(row))
+            self.db.rows_written += len(self.payload)
+            return FakeResponse([])
+        if self.action == 'insert':
+            rows.append(dict(self.payload))
+            self.db.rows_written += 1
+            return FakeResponse([self.payload])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == 'update':
+            for row in matched:
+                row.update(self.payload)
+            self.db.rows_written += len(matched)
+            return FakeResponse(matched)
+        if self.action == 'delete':
+            self.db.rows = [row for row in rows if row not in matched]
+            return FakeResponse(matched)
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1] + 1]
+        return FakeResponse([dict(row) for row in matched])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rows = []
+        self.round_trips = 0
+        self.rows_written = 0
+
+    def table(self, name):
+        assert name == TABLE
+        return FakeQuery(self, name)
+
+    def reset_counters(self):
+        self.round_trips = 0
+        self.rows_written = 0
+
+    def active(self):
+        return {row['dedup_key']: row for row in self.rows if row.get('is_active')}
+
+
+def sequential_fetch(http):
+    """Fetching as it was: one source and one The Muse page after another"""
+    internships.INTERNSHIP_FETCH_WORKERS = 1
+    try:
+        return (internships.fetch_internships_from_internshala(http)
+                + internships.fetch_internships_from_themuse(http)
+                + internships.fetch_internships_from_remotive(http))
+    finally:
+        internships.INTERNSHIP_FETCH_WORKERS = 8
+
+
+def previous_refresh(db, listings):
+    """The old refresh: clear the table, then insert listing by listing"""
+    db.table(TABLE).delete().neq('id', 0).execute()
+    for listing in listings:
+        db.table(TABLE).insert(listing).execute()
+
+
+def run_sync(db, http):
+    db.reset_counters()
+    started = time.perf_counter()
+    summary, listings = internships.ingest_internships(http, client=db)
+    return summary, listings, time.perf_counter() - started
+
+
+def main():
+    # Fetching: sequential vs concurrent, same listings
+    http = FixtureHttp()
+    started = time.perf_counter()
+    sequential = sequential_fetch(http)
+    sequential_time = time.perf_counter() - started
+
+    http = FixtureHttp()
+    started = time.perf_counter()
+    concurrent, fetched_sources = internships.fetch_listings_concurrently(http)
+    concurrent_time = time.perf_counter() - started
+    assert fetched_sources == {'Internshala', 'The Muse', 'Remotive'}
+    assert sorted(l['apply_url'] for l in concurrent) == sorted(l['apply_url'] for l in sequential)
+    muse_titles = {l['title'] for l in concurrent if l['source'] == 'The Muse'}
+    assert muse_titles == {'Software Engineering Intern', 'Marketing Intern',
+                           'Product Design Intern', 'Data Analyst Intern'}, muse_titles
+    by_title = {l['title']: l for l in concurrent}
+    assert by_title['Web Development']['duration'] == '3 Months'
+    assert internships._listing_facets(by_title['Data Science'])[0]['duration'] == '6 months'
+    assert by_title['Backend Engineering Intern']['skills'] == ['python', 'postgresql', 'django']
+    assert by_title['Product Design Intern']['skills'] == ['Design & UX']
+    print(f"fetch, sequential: {sequential_time * 1000:6.1f} ms for {len(sequential)} listings")
+    print(f"fetch, concurrent: {concurrent_time * 1000:6.1f} ms ({http.requests} requests)")
+
+    # The old refresh, for comparison
+    legacy = FakeSupabase()
+    started = time.perf_counter()
+    previous_refresh(legacy, sequential)
+    print(f"\nprevious refresh:  {legacy.round_trips:3d} round trips, {legacy.rows_written:3d} rows written, "
+          f"{(time.perf_counter() - started) * 1000:6.1f} ms (table empty meanwhile)")
+
+    db = FakeSupabase()
+    summary, listings, elapsed = run_sync(db, FixtureHttp())
+    print(f"first sync:        {db.round_trips:3d} round trips, {db.rows_written:3d} rows written, "
+          f"{elapsed * 1000:6.1f} ms  {summary}")
+    assert summary['inserted'] == summary['unique'] == len(listings) == len(db.active())
+    assert summary['fetched'] == summary['unique'] + 1  # Internshala lists one card twice
+
+    summary, _, elapsed = run_sync(db, FixtureHttp())
+    print(f"repeat sync:       {db.round_trips:3d} round trips, {db.rows_written:3d} rows written, "
+          f"{elapsed * 1000:6.1f} ms  {summary}")
+    assert summary['unchanged'] == summary['unique'] and db.rows_written == 0
+
+    # Remotive changes one listing and drops another
+    with open(os.path.join(FIXTURE_DIR, 'remotive.json'), encoding='utf-8') as f:
+        remotive = json.load(f)
+    changed = copy.deepcopy(remotive)
+    changed['jobs'][0]['title'] = 'Backend Engineering Intern (Python)'
+    dropped_url = changed['jobs'].pop()['url']
+    summary, _, elapsed = run_sync(db, FixtureHttp(overrides={'remotive.json': json.dumps(changed)}))
+    print(f"changed source:    {db.round_trips:3d} round trips, {db.rows_written:3d} rows written, "
+          f"{elapsed * 1000:6.1f} ms  {summary}")
+    assert (summary['updated'], summary['expired'], summary['inserted']) == (1, 1, 0)
+    active = db.active()
+    assert not any(row['apply_url'] == dropped_url for row in active.values())
+    expired = [row for row in db.rows if row['apply_url'] == dropped_url]
+    assert len(expired) == 1 and expired[0]['expired_at'] and not expired[0]['is_active']
+
+    # Internshala is down: its listings stay active
+    before = len(db.active())
+    summary, _, elapsed = run_sync(db, FixtureHttp(overrides={'remotive.json': json.dumps(changed)},
+                                                    failing={'internshala.html'}))
+    print(f"source outage:     {db.round_trips:3d} round trips, {db.rows_written:3d} rows written, "
+          f"{elapsed * 1000:6.1f} ms  {summary}")
+    assert summary['expired'] == 0 and len(db.active()) == before
+
+    # Internshala answers but its markup no longer parses: nothing is expired
+    summary, _, _ = run_sync(db, FixtureHttp(overrides={'remotive.json': json.dumps(changed),
+                                                        'internshala.html': '<html><body></body></html>'}))
+    print(f"unparsable page:   {summary}")
+    assert summary['expired'] == 0 and summary['expiry_skipped'] == ['Internshala'], summary
+    assert len(db.active()) == before
+
+    # The dropped listing comes back and is reactivated under the same key
+    summary, _, _ = run_sync(db, FixtureHttp())
+    assert (summary['updated'], summary['inserted']) == (2, 0), summary
+    assert len(db.rows) == len(db.active()) == summary['unique']
+
+    # Large batches go out in chunks
+    many = [{'title': f'Intern {i}', 'company': 'Bulk Co', 'location': 'Remote', 'source': 'Bulk',
+             'apply_url': f'https://example.com/jobs/{i}'} for i in range(1000)]
+    bulk = FakeSupabase()
+    summary, _ = internship_ingest.sync_listings(bulk, TABLE, many, {'Bulk'})
+    print(f"\n1000 new listings: {bulk.round_trips:3d} round trips "
+          f"(upsert chunks of {internship_ingest.UPSERT_CHUNK_SIZE}) vs {1000 + 1} before")
+    assert summary['inserted'] == 1000 and bulk.round_trips <= 1 + 1000 // internship_ingest.UPSERT_CHUNK_SIZE + 1
+
+    print("\n✅ Unchanged listings cost no writes; vanished listings expire only for sources that were fetched and parsed")
+
+
+if __name__ == '__main__':
+    main()
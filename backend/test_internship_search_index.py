@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Search and facet benchmark for GET /api/internships
+(routes/internships.internship_index, utils/internship_index.py).
+
+Indexes LISTINGS synthetic listings and times search + facet queries
+against a brute-force scan that checks the same results and counts. Then
+runs the endpoint against an in-memory stand-in for PostgREST: the first
+request loads the table into the index, later ones make no round trips, and
+an ingestion run updates only the listings that changed.
+"""
+
+import sys
+import os
+import time
+import random
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+import routes.internships as internships
+from utils.internship_index import InternshipIndex, tokenize, age_bucket
+
+LISTINGS = 30000
+QUERY_RUNS = 20
+LATENCY = 0.005  # seconds per simulated HTTP round trip
+NOW = datetime(2026, 10, 17, 12, 0, 0)
+
+TITLES = ['Software Engineering', 'Data Science', 'Machine Learning', 'Web Development', 'Marketing',
+          'Content Writing', 'Product Design', 'Business Analyst', 'DevOps', 'Mobile App Development',
+          'Cyber Security', 'Human Resources', 'Finance', 'Graphic Design', 'Sales']
+COMPANIES = [f'{prefix} {suffix}' for prefix in ('Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark',
+                                                 'Wayne', 'Wonka', 'Tyrell', 'Cyberdyne')
+             for suffix in ('Labs', 'Systems', 'Analytics', 'Media', 'Works')]
+CITIES = ['Bangalore', 'Mumbai', 'Delhi', 'Pune', 'Hyderabad', 'Chennai', 'Kolkata', 'New York', 'London', 'Remote']
+SKILLS = ['python', 'react', 'sql', 'excel', 'figma', 'java', 'node.js', 'c++', 'aws', 'seo', 'tableau', 'docker']
+DURATIONS = ['1 month', '2 months', '3 months', '6 months', 'flexible', '']
+SOURCES = ['Internshala', 'The Muse', 'Remotive']
+
+
+def make_listing(i, rng):
+    location = rng.choice(CITIES)
+    stipend = rng.choice([0, 0, 3000, 7500, 12000, 18000, 30000])
+    source = SOURCES[i % len(SOURCES)]
+    return {
+        'dedup_key': f'key-{i}',
+        'content_hash': f'hash-{i}',
+        'title': f'{rng.choice(TITLES)} Intern',
+        'company': rng.choice(COMPANIES),
+        'location': location,
+        'skills': rng.sample(SKILLS, 3),
+        'duration': rng.choice(DURATIONS),
+        'min_stipend': stipend,
+        'max_stipend': stipend,
+        'is_unpaid': stipend == 0,
+        'is_remote': location == 'Remote' or rng.random() < 0.2,
+        'source': source,
+        'apply_url': f'https://example.com/{source}/{i}',
+        'posted_date': (NOW - timedelta(hours=rng.randint(0, 24 * 60))).isoformat(),
+        'is_active': True,
+    }
+
+
+def brute_force(listings, query, filters, now):
+    """Same search by scanning every listing"""
+    words = tokenize(query)
+    matches = []
+    for listing in listings:
+        tokens = set()
+        for field in ('title', 'company', 'skills', 'location'):
+            value = listing.get(field)
+            tokens.update(tokenize(' '.join(value) if isinstance(value, list) else value))
+        if not all(any(token.startswith(word) for token in tokens) for word in words):
+            continue
+        facets, posted_at = internships._listing_facets(listing)
+        facets['posted'] = age_bucket(posted_at, now)
+        if all(facets[facet] in (wanted if isinstance(wanted, list) else [wanted])
+               for facet, wanted in filters.items()):
+            matches.append((listing, facets))
+    counts = {}
+    for _, facets in matches:
+        for facet, value in facets.items():
+            counts.setdefault(facet, {}).setdefault(value, 0)
+            counts[facet][value] += 1
+    matches.sort(key=lambda match: internships._listing_posted_at(match[0]), reverse=True)
+    return [listing for listing, _ in matches], counts
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.bounds = None
+
+    def select(self, columns='*', **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: (row.get(column) or '') >= value)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(LATENCY)
+        rows = [row for row in self.db.rows if all(f(row) for f in self.filters)]
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return FakeResponse([dict(row) for row in rows])
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.round_trips = 0
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+def timed(fn, runs=QUERY_RUNS):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples), max(samples)
+
+
+def main():
+    assert internships._parse_stipend('₹ 10,000 - 15,000 /month') == {'min': 10000.0, 'max': 15000.0, 'is_unpaid': False}
+    assert internships._parse_stipend('₹ 8,000 /month') == {'min': 8000.0, 'max': 8000.0, 'is_unpaid': False}
+
+    rng = random.Random(7)
+    listings = [make_listing(i, rng) for i in range(LISTINGS)]
+
+    index = InternshipIndex(internships._listing_facets)
+    started = time.perf_counter()
+    index.upsert(listings)
+    print(f"indexed {LISTINGS} listings in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    queries = [
+        ('', {}),
+        ('intern', {}),
+        ('data', {'is_remote': True}),
+        ('software eng', {'stipend': ['10k_25k', '25k_plus']}),
+        ('python', {'posted': 'last_7_days', 'source': 'Internshala'}),
+        ('acme lab', {'duration': ['3 months', '6 months']}),
+        ('c++', {}),
+        ('zzz', {}),
+    ]
+    print(f"{'query':<36} {'matches':>7} {'median ms':>9} {'max ms':>7} {'scan ms':>8}")
+    worst = 0
+    for query, filters in queries:
+        result, median, slowest = timed(lambda: index.search(query, filters, limit=20, now=NOW))
+        started = time.perf_counter()
+        expected, counts = brute_force(listings, query, filters, NOW)
+        scan_ms = (time.perf_counter() - started) * 1000
+        assert result['total'] == len(expected), (query, result['total'], len(expected))
+        assert result['facets'] == {facet: counts.get(facet, {}) for facet in result['facets']}, query
+        expected_dates = [listing['posted_date'] for listing in expected[:20]]
+        assert [listing['posted_date'] for listing in result['results']] == expected_dates, query
+        label = f"{query!r} {filters}" if filters else repr(query)
+        print(f"{label[:36]:<36} {result['total']:>7} {median:>9.2f} {slowest:>7.2f} {scan_ms:>8.0f}")
+        worst = max(worst, median)
+    assert worst < 10, f'median query time {worst:.1f} ms'
+
+    # Incremental update: 100 changed listings and 50 gone from one source
+    changed = [dict(listing, title='Platform Engineering Intern', content_hash='changed')
+               for listing in listings[:100]]
+    current = changed + listings[100:]
+    gone = {listing['dedup_key'] for listing in listings[-150:] if listing['source'] == 'Remotive'}
+    current = [listing for listing in current if listing['dedup_key'] not in gone]
+    started = time.perf_counter()
+    counts = index.sync(current, {'Remotive'})
+    print(f"\nincremental sync: {counts} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    assert counts == {'indexed': 100, 'removed': len(gone), 'size': LISTINGS - len(gone)}
+    assert index.search('platform', limit=None, now=NOW)['total'] == 100
+
+    # Endpoint: one load, then answers from memory
+    fake = FakeSupabase([dict(listing, updated_at='2026-10-17T00:00:00') for listing in listings])
+    internships.supabase = fake
+    internships.internship_index = InternshipIndex(internships._listing_facets)
+    app = Flask(__name__)
+    app.register_blueprint(internships.bp, url_prefix='/api/internships')
+    client = app.test_client()
+
+    for label in ('first request', 'second request'):
+        fake.round_trips = 0
+        started = time.perf_counter()
+        response = client.get('/api/internships?search=data&remote=true&stipend=unpaid,under_5k&limit=10')
+        elapsed = (time.perf_counter() - started) * 1000
+        body = response.get_json()
+        assert response.status_code == 200 and body['success'], body
+        print(f"{label + ':':<16} {fake.round_trips:3d} round trips, {elapsed:7.1f} ms, "
+              f"{body['matched']} of {body['total']} match")
+    assert fake.round_trips == 0 and body['count'] == 10
+    assert set(body['facets']['stipend']) <= {'unpaid', 'under_5k'}
+
+    # Another worker expires a listing; the next refresh applies only that row
+    fake.rows[0].update(is_active=False, updated_at='2026-10-17T06:00:00')
+    internships.refresh_internship_index(force=True)
+    assert len(internships.internship_index) == LISTINGS - 1
+
+    print(f"\n✅ Search + facets over {LISTINGS} listings: worst median {worst:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
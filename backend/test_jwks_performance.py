@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Supabase JWT verification.
+
+Compares the old behaviour (fetch the JWKS document for every token) with the
+cached JWKSKeyStore used by middleware.auth_middleware. A local HTTP server
+stands in for the Supabase JWKS endpoint, so no network access is needed.
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import jwt
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from middleware import auth_middleware
+from middleware.auth_middleware import JWKSKeyStore, verify_supabase_token
+
+ITERATIONS = 2000
+KID = "bench-key"
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+public_jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+public_jwk.update({"kid": KID, "alg": "RS256", "use": "sig"})
+JWKS_BODY = json.dumps({"keys": [public_jwk]}).encode()
+jwks_requests = 0
+
+
+class JWKSHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        global jwks_requests
+        jwks_requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(JWKS_BODY)))
+        self.end_headers()
+        self.wfile.write(JWKS_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_token():
+    now = int(time.time())
+    return jwt.encode({
+        "sub": "00000000-0000-0000-0000-000000000001",
+        "email": "student@example.com",
+        "aud": auth_middleware.SUPABASE_AUDIENCE,
+        "iss": auth_middleware.SUPABASE_ISSUER,
+        "iat": now,
+        "exp": now + 3600,
+        "user_metadata": {"role": "student"},
+    }, private_key, algorithm="RS256", headers={"kid": KID})
+
+
+def verify_uncached(token, jwks_url):
+    """The previous implementation: one JWKS round trip per verification."""
+    jwks = requests.get(jwks_url, timeout=5).json()
+    public_key = RSAAlgorithm.from_jwk(json.dumps(jwks["keys"][0]))
+    return jwt.decode(token, public_key, algorithms=["RS256"],
+                      audience=auth_middleware.SUPABASE_AUDIENCE,
+                      issuer=auth_middleware.SUPABASE_ISSUER)
+
+
+def run(description, func, iterations=ITERATIONS):
+    global jwks_requests
+    jwks_requests = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"   {description}")
+    print(f"      {iterations / elapsed:,.0f} verifications/sec "
+          f"({elapsed / iterations * 1e6:.1f} µs each, {jwks_requests} JWKS requests)")
+    return iterations / elapsed
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JWKSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    jwks_url = f"http://127.0.0.1:{server.server_port}/auth/v1/jwks"
+
+    auth_middleware.jwks_store = JWKSKeyStore(jwks_url)
+    token = make_token()
+
+    print("🚀 JWT VERIFICATION BENCHMARK")
+    print("=" * 60)
+    before = run("Before: JWKS fetched per request", lambda: verify_uncached(token, jwks_url))
+    after = run("After: cached JWKSKeyStore", lambda: verify_supabase_token(token))
+
+    user, error = verify_supabase_token(token)
+    assert error is None and user["email"] == "student@example.com", error
+    print(f"\n   Speed-up: {after / before:.1f}x")
+
+    auth_middleware.jwks_store.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the AI mentor chat (routes/career_roadmap.py).
+
+A stubbed Gemini model produces CHUNKS pieces of text, CHUNK_DELAY seconds
+apart, and the database stand-in adds LATENCY per request. Compares time to
+first byte of POST /mentor/chat (full completion) with
+POST /mentor/chat/stream (SSE tokens), and checks that the roadmap context
+is loaded once across turns, that history is trimmed to the token budget
+and that each turn is still stored in mentor_sessions.
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+import routes.career_roadmap as career_roadmap
+
+CHUNKS = 12
+CHUNK_DELAY = 0.05  # seconds between streamed chunks
+LATENCY = 0.01  # seconds per simulated HTTP round trip
+TURNS = 6
+STUDENT_ID = '5c1e2d3f-7a8b-4c9d-8e0f-1a2b3c4d5e6f'
+ROADMAP_ID = 'roadmap-1'
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self):
+        self.prompts = []
+
+    def _chunks(self):
+        for i in range(CHUNKS):
+            time.sleep(CHUNK_DELAY)
+            yield Chunk(f'part{i} ')
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        if stream:
+            return self._chunks()
+        return Chunk(''.join(chunk.text for chunk in self._chunks()))
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.row = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def or_(self, expression):
+        values = [clause.split('.eq.')[1] for clause in expression.split(',')]
+        self.filters.append(lambda row: row['id'] in values or row.get('user_id') in values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def insert(self, row):
+        self.row = row
+        return self
+
+    def execute(self):
+        time.sleep(LATENCY)
+        with self.db.lock:
+            self.db.queries[self.table] = self.db.queries.get(self.table, 0) + 1
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.row is not None:
+                rows.append(self.row)
+                return FakeResponse([self.row])
+            return FakeResponse([dict(r) for r in rows if all(f(r) for f in self.filters)][::-1])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+        self.tables = {
+            'students': [{'id': STUDENT_ID, 'user_id': 'u-1', 'full_name': 'Asha Rao'}],
+            'career_roadmaps': [{'id': ROADMAP_ID, 'roadmap_title': 'Data Scientist Learning Path',
+                                 'career_interests': {'interest_title': 'Data Scientist'},
+                                 'roadmap_steps': [{'week_no': w, 'topic': f'Topic {w}', 'description': 'Study.',
+                                                    'milestone': 'Quiz', 'status': 'pending'}
+                                                   for w in range(10, 0, -1)]}],
+            'mentor_sessions': [],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def main():
+    fake = FakeSupabase()
+    stub = StubModel()
+    career_roadmap.supabase = fake
+    career_roadmap.model = stub
+    career_roadmap.genai_available = True
+    career_roadmap.MENTOR_HISTORY_TOKEN_BUDGET = 60
+
+    app = Flask(__name__)
+    app.register_blueprint(career_roadmap.career_roadmap_bp, url_prefix='/api/roadmap')
+    client = app.test_client()
+    body = {'student_id': STUDENT_ID, 'roadmap_id': ROADMAP_ID}
+
+    started = time.perf_counter()
+    response = client.post('/api/roadmap/mentor/chat', json={**body, 'message': 'What is pandas?'})
+    blocking = time.perf_counter() - started
+    assert response.status_code == 200
+    print(f"/mentor/chat         first byte after {blocking * 1000:6.0f} ms (whole completion)")
+
+    for turn in range(TURNS):
+        started = time.perf_counter()
+        response = client.post('/api/roadmap/mentor/chat/stream', json={**body, 'message': f'Question {turn}'},
+                               buffered=False)
+        first_byte = None
+        first_token = None
+        events = []
+        for chunk in response.response:
+            now = time.perf_counter() - started
+            first_byte = first_byte if first_byte is not None else now
+            for line in chunk.decode().splitlines():
+                if line.startswith('data: '):
+                    event = json.loads(line[6:])
+                    events.append(event)
+                    if event['type'] == 'token' and first_token is None:
+                        first_token = now
+        response.close()
+        total = time.perf_counter() - started
+        assert events[0]['type'] == 'start' and events[-1]['type'] == 'done'
+        assert events[-1]['reply'] == ''.join(e['text'] for e in events if e['type'] == 'token').strip()
+        if turn == 0:
+            print(f"/mentor/chat/stream  first byte after {first_byte * 1000:6.1f} ms, first token "
+                  f"{first_token * 1000:5.0f} ms, done {total * 1000:5.0f} ms")
+
+    for _ in range(50):
+        if len(fake.tables['mentor_sessions']) == TURNS + 1:
+            break
+        time.sleep(0.02)
+    assert len(fake.tables['mentor_sessions']) == TURNS + 1, 'not every turn was stored'
+    assert fake.queries['career_roadmaps'] == 1, 'roadmap context was rebuilt between turns'
+    assert fake.queries['mentor_sessions'] - (TURNS + 1) == 1, 'history was reloaded between turns'
+    assert 'roadmap_steps' not in fake.queries
+
+    last_prompt = stub.prompts[-1]
+    kept = last_prompt.count('Student: Question')
+    assert 0 < kept < TURNS - 1 and f'Question {TURNS - 2}' in last_prompt, 'history not trimmed to budget'
+    assert last_prompt.index('Week 1:') < last_prompt.index('Week 10:')
+    print(f"\n{TURNS + 1} turns: 1 roadmap query, 1 history query, {len(fake.tables['mentor_sessions'])} "
+          f"sessions stored; last prompt kept {kept} of {TURNS} earlier streamed turns")
+    print(f"✅ first byte {blocking / first_byte:.0f}x sooner when streaming; context cached; history bounded")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark for a month-end payroll run (POST /api/payroll/calculate/bulk and
+POST /api/payroll/bulk-approve).
+
+Runs against an in-memory stand-in for PostgREST that adds a fixed latency to
+every request and reports round trips and wall time for the previous
+one-request-per-faculty flow (create_payroll_record per faculty member,
+approve_payroll per id) and for run_monthly_payroll + bulk_approve_payroll.
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models.supabase_payroll as payroll
+
+FACULTY = 1000
+PAY_MONTH = '2026-09-01'
+LATENCY = 0.005  # seconds per simulated HTTP round trip
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.bounds = None
+        self.write = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: str(r.get(column)) == str(value))
+        return self
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        self.filters.append(lambda r: str(r.get(column)) in values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def insert(self, row):
+        self.write = ('insert', row)
+        return self
+
+    def upsert(self, rows, ignore_duplicates=False, **kwargs):
+        self.write = ('upsert', rows)
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values):
+        self.write = ('update', values)
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(LATENCY)
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.write and self.write[0] in ('insert', 'upsert'):
+            new = self.write[1] if isinstance(self.write[1], list) else [self.write[1]]
+            by_key = {(r['faculty_id'], r['pay_month']): r for r in rows}
+            for row in new:
+                key = (row['faculty_id'], row['pay_month'])
+                if key in by_key:
+                    if not getattr(self, 'ignore_duplicates', False):
+                        by_key[key].update(row)
+                else:
+                    row = dict(row, id=len(rows) + 1)
+                    rows.append(row)
+                    by_key[key] = row
+            return FakeResponse(new)
+        matched = [r for r in rows if all(f(r) for f in self.filters)]
+        if self.write:
+            for row in matched:
+                row.update(self.write[1])
+        elif self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1] + 1]
+        return FakeResponse(matched)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.round_trips = 0
+        self.tables = {
+            'faculty': [{'id': f'f-{i:04d}', 'employee_id': f'EMP{i:04d}', 'designation': 'Professor',
+                         'salary': 50000, 'status': 'active'} for i in range(FACULTY)],
+            'salary_setups': [{'id': i, 'employee_id': f'EMP{i:04d}', 'basic_salary': 60000 + i,
+                               'effective_from': '2026-01-01'} for i in range(0, FACULTY, 2)],
+            'payroll': [],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def per_faculty_run(model, db):
+    """The previous flow: one insert per faculty member, then one approval per id."""
+    for member in db.tables['faculty']:
+        row = model.calculate_monthly_payroll(member['id'], PAY_MONTH, 50000, 22, 21, 'Professor')
+        model.create_payroll_record(row)
+    for row in list(db.tables['payroll']):
+        model.approve_payroll(row['id'])
+
+
+def main():
+    print(f"🚀 PAYROLL RUN BENCHMARK ({FACULTY} faculty, {LATENCY * 1000:.0f}ms per round trip)")
+    print("=" * 60)
+
+    db = FakeSupabase()
+    model = payroll.SupabasePayroll.__new__(payroll.SupabasePayroll)
+    model.supabase = model.supabase_admin = db
+    model.table_name = 'payroll'
+
+    start = time.perf_counter()
+    per_faculty_run(model, db)
+    before = time.perf_counter() - start
+    before_trips = db.round_trips
+
+    db = FakeSupabase()
+    model.supabase = model.supabase_admin = db
+    start = time.perf_counter()
+    result = model.run_monthly_payroll(PAY_MONTH, attendance={'f-0001': 20})
+    approved = model.bulk_approve_payroll([row['id'] for row in db.tables['payroll']])
+    after = time.perf_counter() - start
+    after_trips = db.round_trips
+    assert result['calculated'] == FACULTY and approved['success_count'] == FACULTY, (result, approved)
+    assert db.tables['payroll'][1]['present_days'] == 20
+
+    # A re-run leaves approved rows alone
+    rerun = model.run_monthly_payroll(PAY_MONTH)
+    assert rerun['locked'] == FACULTY and rerun['calculated'] == 0, rerun
+
+    # A row approved between the scan and the write keeps its status and amounts
+    for row in db.tables['payroll']:
+        row['status'] = 'Pending'
+    raced = db.tables['payroll'][2]
+    calculate = model._calculate_payroll_fields
+
+    def approve_midway(row):
+        if raced['status'] == 'Pending':
+            raced.update(status='Approved', net_salary=1)
+        return calculate(row)
+
+    model._calculate_payroll_fields = approve_midway
+    rerun = model.run_monthly_payroll(PAY_MONTH, total_days=20)
+    del model._calculate_payroll_fields
+    assert rerun['locked'] == 1 and rerun['calculated'] == FACULTY - 1, rerun
+    assert (raced['status'], raced['net_salary'], raced['total_days']) == ('Approved', 1, 22), raced
+    assert all(row['status'] == 'Pending' for row in db.tables['payroll'] if row is not raced)
+
+    print(f"   Before: {before_trips} round trips in {before:.2f}s")
+    print(f"   After:  {after_trips} round trips in {after:.2f}s "
+          f"(total net salary {result['total_net_salary']:,.2f})")
+
+
+if __name__ == "__main__":
+    main()
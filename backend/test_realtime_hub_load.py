@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Load test for the realtime SSE fan-out hub (utils/realtime_hub.py).
+
+Starts a local threaded HTTP server whose /events endpoint streams from a
+BroadcastHub, a local event source that publishes row changes at a fixed
+rate, and a few hundred concurrent SSE clients (some deliberately slow).
+Reports delivery latency, coalesced/dropped events for slow clients,
+upstream subscriptions, and a Last-Event-ID resume.
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import socket
+import statistics
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, Response, request
+from werkzeug.serving import make_server
+
+from utils.realtime_hub import BroadcastHub
+
+CLIENTS = 300
+SLOW_CLIENTS = 20
+EVENTS_PER_SECOND = 200
+DURATION = 5  # seconds of publishing
+ROWS = 50  # distinct row ids, so slow clients see coalescing
+BUFFER = 32
+
+
+class LocalEventSource:
+    """Stands in for Supabase Realtime: counts subscriptions, emits row changes."""
+
+    def __init__(self):
+        self.subscriptions = 0
+        self.callbacks = []
+
+    def subscribe(self, callback):
+        self.subscriptions += 1
+        self.callbacks.append(callback)
+
+    def run(self, stop_at):
+        seq = 0
+        interval = 1.0 / EVENTS_PER_SECOND
+        while time.perf_counter() < stop_at:
+            seq += 1
+            change = {'seq': seq, 'row': seq % ROWS, 'sent': time.perf_counter()}
+            for callback in self.callbacks:
+                callback(change)
+            time.sleep(interval)
+        return seq
+
+
+class SSEClient(threading.Thread):
+    def __init__(self, port, slow=False, last_event_id=None, limit=None):
+        super().__init__(daemon=True)
+        self.port = port
+        self.slow = slow
+        self.last_event_id = last_event_id
+        self.limit = limit
+        self.latencies = []
+        self.events = 0
+        self.heartbeats = 0
+        self.resyncs = 0
+        self.ids = []
+        self.connected = threading.Event()
+        self.stop = threading.Event()
+
+    def run(self):
+        sock = socket.create_connection(('127.0.0.1', self.port))
+        headers = 'GET /events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n'
+        if self.last_event_id is not None:
+            headers += f'Last-Event-ID: {self.last_event_id}\r\n'
+        sock.sendall((headers + '\r\n').encode())
+        stream = sock.makefile('rb')
+        try:
+            while not self.stop.is_set():
+                line = stream.readline()
+                if not line:
+                    break
+                if line.startswith(b'id: '):
+                    self.ids.append(int(line[4:]))
+                if not line.startswith(b'data: '):
+                    continue
+                message = json.loads(line[6:])
+                kind = message.get('type')
+                if kind == 'connection_established':
+                    self.connected.set()
+                elif kind == 'heartbeat':
+                    self.heartbeats += 1
+                elif kind == 'resync':
+                    self.resyncs += 1
+                elif kind == 'row_update':
+                    self.events += 1
+                    self.latencies.append((time.perf_counter() - message['sent']) * 1000)
+                    if self.slow:
+                        time.sleep(0.05)
+                    if self.limit and self.events >= self.limit:
+                        break
+        finally:
+            sock.close()
+
+
+def main():
+    hub = BroadcastHub(buffer_size=BUFFER, history_size=1000, heartbeat_interval=1)
+    source = LocalEventSource()
+
+    def start_upstream():
+        source.subscribe(lambda change: hub.publish('row_update', {'type': 'row_update', **change},
+                                                     row_id=change['row']))
+
+    hub._on_first_subscriber = start_upstream
+
+    app = Flask(__name__)
+
+    @app.route('/events')
+    def events():
+        last = request.headers.get('Last-Event-ID')
+        subscriber = hub.subscribe(last_event_id=int(last) if last else None)
+        return Response(hub.stream(subscriber, greeting={'type': 'connection_established'}),
+                        mimetype='text/event-stream')
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    print(f"🚀 REALTIME HUB LOAD TEST ({CLIENTS} clients, {SLOW_CLIENTS} slow, "
+          f"{EVENTS_PER_SECOND} events/s for {DURATION}s)")
+    print("=" * 60)
+
+    clients = [SSEClient(port, slow=i < SLOW_CLIENTS) for i in range(CLIENTS)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.connected.wait(10)
+
+    published = source.run(time.perf_counter() + DURATION)
+    time.sleep(1.5)  # let buffers drain and one heartbeat through
+
+    fast = [c for c in clients if not c.slow]
+    slow = [c for c in clients if c.slow]
+    latencies = sorted(l for c in fast for l in c.latencies)
+    print(f"   Upstream subscriptions: {source.subscriptions} (before: one per client = {CLIENTS})")
+    print(f"   Events published: {published}")
+    print(f"   Fast clients: avg {statistics.mean(c.events for c in fast):.0f} events received, "
+          f"latency p50 {latencies[len(latencies) // 2]:.1f}ms, p99 {latencies[int(len(latencies) * 0.99)]:.1f}ms")
+    print(f"   Slow clients: avg {statistics.mean(c.events for c in slow):.0f} events received "
+          f"(coalesced/dropped the rest), {sum(c.resyncs for c in slow)} resync notices")
+    print(f"   Heartbeats seen by fast clients: {sum(c.heartbeats for c in fast)}")
+
+    # Reconnect with Last-Event-ID and check the missed events are replayed
+    resume_from = hub.stats()['last_event_id']
+    hub.publish('row_update', {'type': 'row_update', 'sent': time.perf_counter()}, row_id='a')
+    hub.publish('row_update', {'type': 'row_update', 'sent': time.perf_counter()}, row_id='b')
+    resumed = SSEClient(port, last_event_id=resume_from, limit=2)
+    resumed.start()
+    resumed.join(5)
+    assert resumed.ids == [resume_from + 1, resume_from + 2], resumed.ids
+    print(f"   Resume from Last-Event-ID {resume_from}: replayed ids {resumed.ids}")
+
+    for client in clients:
+        client.stop.set()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
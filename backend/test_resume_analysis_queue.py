@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the resume analysis queue (utils/analysis_queue.py).
+
+A stubbed model that takes MODEL_LATENCY seconds per call stands in for the
+Gemini analyzer. Compares the request-thread time of analysing inline (the
+previous behaviour) with submitting to the queue, and checks that repeated
+documents hit the cache, that concurrent submissions of one document share
+a job, that results survive a restart through the on-disk cache, and that a
+new analyzer version re-analyses.
+"""
+
+import sys
+import os
+import time
+import hashlib
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.analysis_queue import AnalysisQueue
+
+MODEL_LATENCY = 0.2  # seconds per stubbed model call
+WORKERS = 4
+DOCUMENTS = 8
+UPLOADS = 24  # every document is uploaded three times
+
+
+class StubModel:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            self.calls += 1
+        time.sleep(MODEL_LATENCY)
+        return {'summary': text[:20], 'skills': ['Python']}
+
+
+def document(i):
+    text = f'Resume {i % DOCUMENTS}: Python developer'
+    return text, hashlib.sha256(text.encode()).hexdigest()
+
+
+def main():
+    cache_dir = tempfile.mkdtemp(prefix='resume-analysis-')
+
+    model = StubModel()
+    started = time.perf_counter()
+    for i in range(UPLOADS):
+        text, _ = document(i)
+        model(text)
+    inline = time.perf_counter() - started
+    print(f"inline:  {UPLOADS} uploads block request threads for {inline:.2f}s "
+          f"({inline / UPLOADS * 1000:.0f} ms each), {model.calls} model calls")
+
+    model = StubModel()
+    analysis_queue = AnalysisQueue(workers=WORKERS, cache_dir=cache_dir)
+    analysis_queue.register('stub', '1', model)
+    submit_times = []
+    jobs = []
+    started = time.perf_counter()
+    for i in range(UPLOADS):
+        text, digest = document(i)
+        t0 = time.perf_counter()
+        jobs.append(analysis_queue.submit('stub', digest, lambda text=text: text))
+        submit_times.append(time.perf_counter() - t0)
+    for job in jobs:
+        assert job.wait(10) and job.status == 'completed', job.to_dict()
+    drained = time.perf_counter() - started
+    print(f"queued:  submit takes {max(submit_times) * 1000:.2f} ms at most; all results ready after "
+          f"{drained:.2f}s, {model.calls} model calls")
+    print(f"         stats: {analysis_queue.stats()}")
+    assert model.calls == DOCUMENTS, 'a document was analysed more than once'
+
+    job = analysis_queue.submit('stub', document(0)[1], lambda: 'unused')
+    assert job.done and job.cached and model.calls == DOCUMENTS
+
+    restarted = AnalysisQueue(workers=1, cache_dir=cache_dir)
+    restarted.register('stub', '1', model)
+    job = restarted.submit('stub', document(1)[1], lambda: 'unused')
+    assert job.done and job.cached, 'disk cache was not used after restart'
+
+    restarted.register('stub', '2', model)
+    job = restarted.submit('stub', document(1)[1], lambda: document(1)[0])
+    assert not job.cached and job.wait(10) and model.calls == DOCUMENTS + 1
+
+    failing = AnalysisQueue(workers=1, cache_dir=cache_dir)
+    failing.register('broken', '1', lambda text: 1 / 0)
+    job = failing.submit('broken', document(2)[1], lambda: 'text')
+    assert job.wait(10) and job.status == 'failed' and failing.cached('broken', document(2)[1]) is None
+
+    print(f"\n✅ request threads never wait for the model; {UPLOADS} uploads -> {DOCUMENTS} analyses; "
+          f"cache survives restart; new analyzer version re-analyses; failures are not cached")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Checks for POST /api/resume/upload (routes/resume_analytics.py).
+
+Uploads a PDF and a DOCX resume through the Flask test client against an
+in-memory stand-in for the resumes and students tables and verifies that
+the background analysis job really extracts text (skills found) and writes
+its result back to the resume row, that the upload is stored under its
+SHA-256, that uploading the same bytes again skips extraction and
+analysis, and that a row left pending by a lost job is analysed again.
+"""
+
+import sys
+import os
+import io
+import time
+import shutil
+import zipfile
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from reportlab.pdfgen import canvas
+
+import utils.resume_files as resume_files
+import routes.resume_analytics as resume_analytics
+from utils.analysis_queue import analysis_queue
+
+STUDENT_ID = '7d8f0c1e-0d3a-4c39-9a0f-3f1f6f3c2a11'
+RESUME_TEXT = ['Jane Student', 'Python developer with Docker and AWS experience',
+               'Led a team project on machine learning', 'github.com/jane linkedin.com/in/jane']
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = ('select', None)
+        self.limit_to = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        if column.startswith('metadata->>'):
+            key = column[len('metadata->>'):]
+            self.filters.append(lambda row: str((row.get('metadata') or {}).get(key)) == str(value))
+        else:
+            self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        self.limit_to = n
+        return self
+
+    def update(self, values):
+        self.action = ('update', values)
+        return self
+
+    def insert(self, row):
+        self.action = ('insert', row)
+        return self
+
+    def execute(self):
+        rows = self.db.setdefault(self.table, [])
+        kind, payload = self.action
+        if kind == 'insert':
+            row = {**payload, 'id': f'resume-{len(rows) + 1}'}
+            rows.append(row)
+            return FakeResponse([row])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if kind == 'update':
+            for row in matched:
+                row.update(payload)
+        return FakeResponse(matched[:self.limit_to] if self.limit_to else matched)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.db = {'students': [{'id': STUDENT_ID, 'full_name': 'Jane Student',
+                                 'register_number': 'REG2600001', 'email': 'jane@example.com'}]}
+
+    def from_(self, table):
+        return FakeQuery(self.db, table)
+
+    table = from_
+
+
+def make_pdf():
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for i, line in enumerate(RESUME_TEXT):
+        pdf.drawString(72, 760 - 20 * i, line)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def make_docx():
+    body = ''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in RESUME_TEXT)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml',
+                         '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                         f'<w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def upload(client, name, content):
+    started = time.perf_counter()
+    response = client.post('/api/resume/upload', content_type='multipart/form-data',
+                           data={'student_id': STUDENT_ID, 'file': (io.BytesIO(content), name)})
+    return response.status_code, response.get_json(), time.perf_counter() - started
+
+
+def main():
+    upload_dir = tempfile.mkdtemp(prefix='resumes-')
+    resume_files.RESUME_UPLOAD_DIR = upload_dir
+    analysis_queue.cache_dir = tempfile.mkdtemp(prefix='resume-analysis-')
+    fake = FakeSupabase()
+    resume_analytics.supabase = fake
+
+    analyses = []
+    original_analyze = resume_analytics.analyze_resume_content
+
+    def counting_analyze(text):
+        analyses.append(text)
+        return original_analyze(text)
+
+    resume_analytics.analyze_resume_content = counting_analyze
+
+    app = Flask(__name__)
+    app.register_blueprint(resume_analytics.resume_analytics_bp, url_prefix='/api/resume')
+    client = app.test_client()
+
+    for name, content in (('resume.pdf', make_pdf()), ('resume.docx', make_docx())):
+        before = len(analyses)
+        status, body, elapsed = upload(client, name, content)
+        assert status in (200, 202), body  # 200 only if the worker already finished
+        job_id = body['data']['analysis_job']['job_id']
+        job = client.get(f'/api/resume/analysis/jobs/{job_id}?wait=10').get_json()['data']
+        assert job['status'] == 'completed', job
+        skills = job['result']['skills_identified']
+        print(f"{name:<12} first upload   {elapsed * 1000:7.1f} ms  skills={skills}")
+        assert {'Python', 'Docker', 'Aws'} <= set(skills), 'resume text was not extracted'
+        assert len(analyses) == before + 1
+        row = fake.db['resumes'][-1]
+        assert row['metadata']['status'] == 'processed', 'analysis was not written back to the resume row'
+        stored = body['data']['metadata']['filename']
+        assert os.path.exists(os.path.join(upload_dir, stored)) and stored.endswith(os.path.splitext(name)[1])
+
+        status, body, elapsed = upload(client, name, content)
+        assert status == 200 and body['data']['deduplicated'] and body['data']['analysis'], body
+        print(f"{name:<12} re-upload      {elapsed * 1000:7.1f} ms  deduplicated, no analysis")
+        assert len(analyses) == before + 1, 're-upload ran the analysis again'
+
+    # A restart lost the job of a pending row: uploading it again re-runs the analysis
+    row = fake.db['resumes'][-1]
+    row['metadata'] = {**row['metadata'], 'status': 'pending', 'analysis_job_id': 'lost-job'}
+    row['metadata'].pop('analysis')
+    analysis_queue._memory.clear()
+    for name in os.listdir(analysis_queue.cache_dir):
+        shutil.rmtree(os.path.join(analysis_queue.cache_dir, name))
+    status, body, _ = upload(client, 'resume.docx', make_docx())
+    job_id = body['data']['analysis_job']['job_id']
+    assert status == 200 and job_id != 'lost-job', body
+    client.get(f'/api/resume/analysis/jobs/{job_id}?wait=10')
+    deadline = time.time() + 5
+    while row['metadata']['status'] == 'pending' and time.time() < deadline:
+        time.sleep(0.01)
+    assert row['metadata']['status'] == 'processed' and row['metadata']['analysis_job_id'] == job_id, row['metadata']
+    print("pending row   re-upload after a lost job: analysed again")
+
+    files = [f for f in os.listdir(upload_dir) if not f.startswith('.')]
+    assert len(files) == 2, files
+    print(f"\nstored files: {len(files)} (one per distinct content), analyses run: {len(analyses)}")
+
+    status, body, _ = upload(client, 'empty.txt', b'')
+    assert status == 400, body
+    resume_files.RESUME_MAX_BYTES = 1024
+    status, body, _ = upload(client, 'big.txt', b'x' * 4096)
+    assert status == 413, body
+    assert not [f for f in os.listdir(upload_dir) if f.startswith('.upload-')]
+    print("✅ text extracted from PDF and DOCX; re-uploads deduplicated; empty/oversized files rejected")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Round-trip benchmark for GET /api/roadmap/<student_id>
+(routes/career_roadmap.get_student_roadmaps).
+
+Runs the endpoint against an in-memory stand-in for PostgREST that adds a
+fixed latency to every request. A student with ROADMAPS roadmaps used to
+cost up to two student lookups, one roadmap query and one roadmap_steps
+query per roadmap; now it is one embedded select plus a cached student
+lookup.
+"""
+
+import sys
+import os
+import re
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+import routes.career_roadmap as career_roadmap
+
+ROADMAPS = 20
+STEPS = 10
+LATENCY = 0.01  # seconds per simulated HTTP round trip
+USER_ID = '0b5a4f6e-8d61-4a8e-9a2a-4f3c9d7e1b20'
+STUDENT_ID = '5c1e2d3f-7a8b-4c9d-8e0f-1a2b3c4d5e6f'
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = '*'
+        self.filters = []
+
+    def select(self, columns='*', **kwargs):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def or_(self, expression):
+        clauses = [clause.split('.eq.') for clause in expression.split(',')]
+        for column, value in clauses:
+            if column == 'id':
+                uuid.UUID(value)  # students.id is a uuid column; Postgres rejects anything else (22P02)
+        self.filters.append(lambda row: any(str(row.get(c)) == v for c, v in clauses))
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(LATENCY)
+        rows = [dict(row) for row in self.db.tables[self.table] if all(f(row) for f in self.filters)]
+        if self.table == 'career_roadmaps' and re.search(r'roadmap_steps\(', self.columns):
+            for row in rows:
+                row['roadmap_steps'] = [{'status': step['status']} for step in self.db.tables['roadmap_steps']
+                                        if step['roadmap_id'] == row['id']]
+        return FakeResponse(rows)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.round_trips = 0
+        self.tables = {
+            'students': [{'id': STUDENT_ID, 'user_id': USER_ID, 'full_name': 'Asha Rao'}],
+            'career_roadmaps': [{'id': f'roadmap-{r}', 'student_id': STUDENT_ID, 'roadmap_title': f'Path {r}',
+                                 'career_interests': {'interest_title': f'Interest {r}', 'description': ''}}
+                                for r in range(ROADMAPS)],
+            'roadmap_steps': [{'id': f'step-{r}-{w}', 'roadmap_id': f'roadmap-{r}', 'week_no': w + 1,
+                               'status': 'completed' if w < r % STEPS else 'pending'}
+                              for r in range(ROADMAPS) for w in range(STEPS)],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def previous_listing(supabase, student_id):
+    """The listing as it was: two-step student lookup and one steps query per roadmap"""
+    student_result = supabase.table('students').select('id').eq('user_id', student_id).execute()
+    if not student_result.data:
+        student_result = supabase.table('students').select('id').eq('id', student_id).execute()
+    roadmaps = supabase.table('career_roadmaps').select('*, career_interests(interest_title, description)') \
+        .eq('student_id', student_result.data[0]['id']).order('created_at', desc=True).execute().data
+    result = []
+    for roadmap in roadmaps:
+        steps = supabase.table('roadmap_steps').select('*').eq('roadmap_id', roadmap['id']).order('week_no').execute().data
+        completed = sum(1 for step in steps if step['status'] == 'completed')
+        result.append({**roadmap, 'total_steps': len(steps), 'completed_steps': completed,
+                       'progress_percentage': round(completed / len(steps) * 100, 1)})
+    return result
+
+
+def main():
+    fake = FakeSupabase()
+    started = time.perf_counter()
+    expected = previous_listing(fake, STUDENT_ID)
+    print(f"previous:       {fake.round_trips:3d} round trips, {(time.perf_counter() - started) * 1000:6.1f} ms")
+
+    career_roadmap.supabase = fake
+    app = Flask(__name__)
+    app.register_blueprint(career_roadmap.career_roadmap_bp, url_prefix='/api/roadmap')
+    client = app.test_client()
+
+    for label, identifier in (('first request', USER_ID), ('cached student', USER_ID), ('by student id', STUDENT_ID)):
+        fake.round_trips = 0
+        started = time.perf_counter()
+        response = client.get(f'/api/roadmap/{identifier}')
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.get_json()
+        roadmaps = response.get_json()['roadmaps']
+        print(f"{label + ':':<15} {fake.round_trips:3d} round trips, {elapsed * 1000:6.1f} ms")
+        assert fake.round_trips <= 2
+        assert [(r['total_steps'], r['completed_steps'], r['progress_percentage']) for r in roadmaps] == \
+               [(r['total_steps'], r['completed_steps'], r['progress_percentage']) for r in expected]
+        assert all('roadmap_steps' not in r for r in roadmaps)
+
+    # A registration-style user_id is not a uuid and must not be compared with students.id
+    response = client.get('/api/roadmap/STU2026001')
+    assert response.status_code == 200 and response.get_json() == {'roadmaps': []}, response.get_json()
+
+    fake.round_trips = 0
+    response = client.get('/api/roadmap/x,id.neq.0')
+    assert response.get_json() == {'roadmaps': []} and fake.round_trips == 0
+    print(f"\n✅ {ROADMAPS} roadmaps in at most 2 round trips with the same progress figures")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the career roadmap template cache (utils/roadmap_templates.py).
+
+A stubbed Gemini model that takes MODEL_LATENCY seconds per call answers
+POST /api/roadmap/generate's prompt. Many concurrent students ask for a few
+interests written in different ways; the benchmark reports model calls and
+wall time with and without the cache, then checks that templates survive a
+restart through the stored table, that fallback roadmaps are not cached and
+that the in-memory cache stays bounded without breaking single-flight loads.
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import routes.career_roadmap as career_roadmap
+from utils.roadmap_templates import RoadmapTemplateCache, personalize_roadmap
+from utils.swr_cache import StaleWhileRevalidateCache
+
+MODEL_LATENCY = 0.3  # seconds per stubbed Gemini call
+REQUESTS = 120
+CONCURRENCY = 24
+INTERESTS = ['Data Scientist', 'data scientist ', 'DATA  SCIENTIST', 'Full Stack Developer',
+             'full stack developer', 'AI Engineer', 'ai engineer']
+
+
+class StubModel:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(MODEL_LATENCY)
+        weeks = int(prompt.split('detailed ')[1].split('-week')[0])
+        steps = [{'week_no': i + 1, 'topic': f'Topic {i + 1}', 'description': 'Practice daily.',
+                  'milestone': 'Ship a mini project'} for i in range(weeks)]
+        return type('Response', (), {'text': json.dumps(steps)})()
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, store):
+        self.store = store
+        self.key = None
+        self.row = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.key = value
+        return self
+
+    def gte(self, column, value):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def upsert(self, row, **kwargs):
+        self.row = row
+        return self
+
+    def execute(self):
+        if self.row is not None:
+            self.store[self.row['template_key']] = self.row
+            return FakeResponse([])
+        row = self.store.get(self.key)
+        return FakeResponse([row] if row else [])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.store = {}
+
+    def table(self, name):
+        return FakeQuery(self.store)
+
+
+def run_requests(generate):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(lambda i: generate(INTERESTS[i % len(INTERESTS)], 10), range(REQUESTS)))
+    return results, time.perf_counter() - started
+
+
+def main():
+    stub = StubModel()
+    career_roadmap.model = stub
+    career_roadmap.genai_available = True
+
+    _, uncached = run_requests(lambda interest, weeks: career_roadmap.request_roadmap_from_ai(interest, weeks))
+    print(f"uncached: {REQUESTS} requests, {stub.calls} model calls, {uncached:.2f}s")
+
+    stub.calls = 0
+    supabase = FakeSupabase()
+    templates = RoadmapTemplateCache(career_roadmap._generate_roadmap_template, client=supabase)
+    results, cached = run_requests(templates.get)
+    print(f"cached:   {REQUESTS} requests, {stub.calls} model calls, {cached:.2f}s  {templates.stats()}")
+    assert stub.calls == 3, 'each normalised interest should be generated exactly once'
+    assert all(ai for _, ai in results) and len(supabase.store) == 3
+
+    steps, _ = templates.get('Data Scientist', 10)
+    steps[0]['topic'] = 'changed by one student'
+    assert templates.get('data scientist', 10)[0][0]['topic'] == 'Topic 1', 'cached template was mutated'
+    personalised = personalize_roadmap(templates.get('data scientist', 10)[0], 'Data Scientist', 'NLP research')
+    assert personalised[0]['description'].endswith('NLP research')
+
+    restarted = RoadmapTemplateCache(career_roadmap._generate_roadmap_template, client=supabase)
+    restarted.get('Full Stack Developer', 10)
+    assert stub.calls == 3 and restarted.stats()['stored_hits'] == 1, 'stored template was not reused'
+
+    stub.calls = 0
+    templates.get('Data Scientist', 12)
+    assert stub.calls == 1, 'a different week count needs its own template'
+
+    career_roadmap.genai_available = False
+    offline = RoadmapTemplateCache(career_roadmap._generate_roadmap_template, client=FakeSupabase())
+    steps, ai = offline.get('Cloud Architect', 10)
+    assert not ai and steps and offline.stats()['keys'] == 0, 'fallback roadmap was cached'
+    career_roadmap.genai_available = True
+
+    small = RoadmapTemplateCache(lambda interest, weeks: ([{'week_no': 1}], True),
+                                 client=FakeSupabase(), max_entries=5)
+    for i in range(20):
+        small.get(f'Interest {i}', 10)
+    assert small.stats()['keys'] == 5 and small.stats()['evictions'] == 15
+
+    # Evicting a key while it reloads must not let a second load start alongside
+    swr = StaleWhileRevalidateCache(ttl=0, max_entries=1)
+    loading = {'now': 0, 'most': 0}
+    counter = threading.Lock()
+
+    def slow_load():
+        with counter:
+            loading['now'] += 1
+            loading['most'] = max(loading['most'], loading['now'])
+        time.sleep(0.2)
+        with counter:
+            loading['now'] -= 1
+        return 'x'
+
+    swr.get('x', lambda: 'x')
+    first = threading.Thread(target=swr.get, args=('x', slow_load))
+    first.start()
+    time.sleep(0.05)
+    swr.get('y', lambda: 'y')  # evicts x while it is being reloaded
+    second = threading.Thread(target=swr.get, args=('x', slow_load))
+    second.start()
+    first.join()
+    second.join()
+    assert loading['most'] == 1, 'eviction broke single-flight loading'
+    assert not swr._locks, 'locks outlived their callers'
+
+    print(f"\n✅ {REQUESTS} requests -> 3 model calls ({uncached / cached:.0f}x faster); "
+          f"templates persist across restarts; fallbacks not cached; memory bounded")
+
+
+if __name__ == '__main__':
+    main()
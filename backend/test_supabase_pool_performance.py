@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for per-user Supabase clients under concurrent requests.
+
+Compares the old get_supabase(token=...) behaviour (a new client, and with it a
+new httpx pool, for every call) with UserClientFactory, which shares one
+keep-alive pool across users. A local HTTP server stands in for PostgREST and
+counts how many TCP connections each approach opens.
+"""
+
+import sys
+import os
+import time
+import statistics
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from supabase import create_client
+from supabase.lib.client_options import ClientOptions
+
+from supabase_client import UserClientFactory
+
+REQUESTS = 400
+WORKERS = 16
+API_KEY = "bench.anon.key"
+BODY = b'[{"id": 1, "name": "Student"}]'
+connections = 0
+connections_lock = threading.Lock()
+
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        global connections
+        super().setup()
+        with connections_lock:
+            connections += 1
+
+    def do_GET(self):
+        # postgrest-py sends an empty JSON body with GETs; drain it so the
+        # next request on this keep-alive connection parses cleanly.
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Range", "0-0/1")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def token_for(i):
+    return f"user{i % 50}.payload.signature"
+
+
+def run(description, query):
+    global connections
+    connections = 0
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        result = query(token_for(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert result.data[0]["id"] == 1
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        list(pool.map(one, range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    print(f"   {description}")
+    print(f"      Throughput: {REQUESTS / elapsed:,.0f} req/s")
+    print(f"      Latency: avg {statistics.mean(latencies):.2f}ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f}ms")
+    print(f"      Peak traced memory: {peak / 1024:,.0f} KiB")
+    print(f"      TCP connections opened: {connections}")
+    return elapsed
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PostgrestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    def per_request_client(token):
+        options = ClientOptions(headers={"Authorization": f"Bearer {token}"})
+        client = create_client(url, API_KEY, options)
+        return client.table("students").select("*").execute()
+
+    factory = UserClientFactory(url, API_KEY, max_connections=WORKERS,
+                                max_keepalive_connections=WORKERS)
+
+    def pooled_client(token):
+        return factory.for_token(token).table("students").select("*").execute()
+
+    print(f"🚀 SUPABASE CLIENT POOL BENCHMARK ({REQUESTS} requests, {WORKERS} threads)")
+    print("=" * 60)
+    before = run("Before: create_client per request", per_request_client)
+    after = run("After: shared UserClientFactory pool", pooled_client)
+    print(f"\n   Speed-up: {before / after:.1f}x")
+
+    factory.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the transport route efficiency report (GET /api/transport/reports/routes).
+
+Runs the report against an in-memory stand-in for PostgREST that adds a fixed
+latency to every request, for a growing number of routes, and reports round
+trips and wall time for the old one-bus-query-per-route loop and for
+ReportController.generate_report.
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+import controllers.transportController as transport
+
+ROUTE_COUNTS = (10, 100, 500)
+BUSES_PER_ROUTE = 2
+LATENCY = 0.005  # seconds per simulated HTTP round trip
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.bounds = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, str(value)))
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        time.sleep(LATENCY)
+        rows = [r for r in self.db.tables.get(self.table, [])
+                if all(str(r.get(c)) == v for c, v in self.filters)]
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return FakeResponse(rows)
+
+
+class FakeSupabase:
+    def __init__(self, routes):
+        self.round_trips = 0
+        self.tables = {
+            'transport_routes': [{'id': i, 'route_id': f'RT-{i:03d}', 'status': 'Active', 'total_students': 30}
+                                 for i in range(routes)],
+            'transport_buses': [{'id': i, 'route_id': f'RT-{i % routes:03d}', 'capacity': 40}
+                                for i in range(routes * BUSES_PER_ROUTE)],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def route_report_per_route(controller):
+    """The previous implementation: one bus query per route."""
+    for route in controller.route_model.get_all():
+        buses = controller.bus_model.get_all({'route_id': route['route_id']})
+        sum(b['capacity'] for b in buses)
+
+
+def main():
+    app = Flask(__name__)
+
+    print(f"🚀 TRANSPORT ROUTE REPORT BENCHMARK ({LATENCY * 1000:.0f}ms per round trip)")
+    print("=" * 60)
+    for routes in ROUTE_COUNTS:
+        db = FakeSupabase(routes)
+        transport.get_supabase = lambda: db
+        controller = transport.ReportController()
+
+        start = time.perf_counter()
+        route_report_per_route(controller)
+        before = time.perf_counter() - start
+        before_trips = db.round_trips
+
+        db.round_trips = 0
+        with app.test_request_context('/api/transport/reports/routes'):
+            start = time.perf_counter()
+            response = controller.generate_report('routes')
+            after = time.perf_counter() - start
+        report = response.get_json()['data']['data']
+        assert report['totalRoutes'] == routes and len(report['byRoute']) == routes
+
+        print(f"   {routes} routes")
+        print(f"      Before: {before_trips} round trips in {before:.2f}s")
+        print(f"      After:  {db.round_trips} round trips in {after:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Background workers for resume analysis, with a result cache.
+
+Analyzers (the keyword scorer in routes/resume_analytics.py, the Gemini
+extractor in routes/admissions.py) are registered by name and version.
+``analysis_queue.submit`` returns an ``AnalysisJob`` straight away; the
+request thread never waits for the analyzer. Clients poll the job or follow
+it over SSE (see the ``/analysis/jobs`` routes in routes/resume_analytics.py).
+
+Results are cached by (analyzer, version, document SHA-256), in memory and
+as JSON under ``ANALYSIS_CACHE_DIR``, so the same resume is analysed once
+per analyzer version. Submitting a document that is already being analysed
+joins the running job instead of starting another.
+
+Jobs themselves live only in the memory of the process that accepted the
+upload. Polling or streaming a job on another worker answers 404, so these
+routes need a single worker or sticky sessions. A restart drops jobs that
+were still running; routes/resume_analytics.py re-submits a resume left
+``pending`` when it is uploaded again, and the result cache on disk is
+shared by every worker on the host.
+"""
+import os
+import json
+import uuid
+import queue
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYSIS_CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR', os.path.join(BACKEND_DIR, 'generated', 'resume_analysis'))
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '4'))
+ANALYSIS_MEMORY_CACHE = int(os.getenv('ANALYSIS_MEMORY_CACHE', '512'))
+MAX_ANALYSIS_JOBS = 1000
+
+
+class AnalysisJob:
+    """One analysis request; completes once, then runs its callbacks"""
+
+    def __init__(self, analyzer, version, content_hash):
+        self.id = uuid.uuid4().hex
+        self.analyzer = analyzer
+        self.version = version
+        self.content_hash = content_hash
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback):
+        """Call ``callback(job)`` on completion, or now if the job already finished"""
+        with self._lock:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        _run_callback(callback, self)
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = datetime.utcnow().isoformat()
+            callbacks, self._callbacks = self._callbacks, []
+            self._done.set()
+        for callback in callbacks:
+            _run_callback(callback, self)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'analyzer': self.analyzer,
+            'analyzer_version': self.version,
+            'content_hash': self.content_hash,
+            'status': self.status,
+            'cached': self.cached,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+def _run_callback(callback, job):
+    try:
+        callback(job)
+    except Exception as e:
+        logger.error(f"Analysis job {job.id} callback failed: {str(e)}")
+        traceback.print_exc()
+
+
+class AnalysisQueue:
+    """Thread pool that runs registered analyzers behind a content-hash cache"""
+
+    def __init__(self, workers=ANALYSIS_WORKERS, cache_dir=ANALYSIS_CACHE_DIR,
+                 memory_size=ANALYSIS_MEMORY_CACHE, max_jobs=MAX_ANALYSIS_JOBS):
+        self.workers = max(1, workers)
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self.max_jobs = max_jobs
+        self._analyzers = {}
+        self._tasks = queue.Queue()
+        self._jobs = OrderedDict()
+        self._inflight = {}  # cache key -> running AnalysisJob
+        self._memory = OrderedDict()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.failures = 0
+
+    def register(self, name, version, analyze):
+        """``analyze(text)`` must return JSON-serialisable data and raise on failure"""
+        self._analyzers[name] = (str(version), analyze)
+
+    def version(self, name):
+        return self._analyzers[name][0]
+
+    def _cache_path(self, key):
+        name, version, content_hash = key
+        return os.path.join(self.cache_dir, name, version, f'{content_hash}.json')
+
+    def cached(self, name, content_hash):
+        """Cached result for this document and the analyzer's current version, or None"""
+        key = (name, self.version(name), content_hash)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(self._cache_path(key)) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember_in_memory(key, result)
+        return result
+
+    def _remember_in_memory(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def remember(self, name, content_hash, result):
+        """Store ``result`` as the current version's analysis of this document"""
+        key = (name, self.version(name), content_hash)
+        self._remember_in_memory(key, result)
+        path = self._cache_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist analysis {path}: {str(e)}")
+
+    def _track(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'resume-analysis-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, name, content_hash, load_text):
+        """Queue ``name`` on a document; ``load_text()`` runs on the worker
+
+        Returns a finished job on a cache hit and the running job when the
+        same document is already being analysed.
+        """
+        version = self.version(name)
+        key = (name, version, content_hash)
+        result = self.cached(name, content_hash)
+        if result is not None:
+            job = AnalysisJob(name, version, content_hash)
+            job.cached = True
+            self.hits += 1
+            self._track(job)
+            job._finish('completed', result)
+            return job
+
+        with self._lock:
+            running = self._inflight.get(key)
+            if running is not None:
+                self.joined += 1
+                return running
+            job = AnalysisJob(name, version, content_hash)
+            self._inflight[key] = job
+            self.misses += 1
+        self._track(job)
+        self._start_workers()
+        self._tasks.put((key, job, load_text))
+        return job
+
+    def _work(self):
+        while True:
+            key, job, load_text = self._tasks.get()
+            job.status = 'running'
+            try:
+                analyze = self._analyzers[job.analyzer][1]
+                result = analyze(load_text())
+                self.remember(job.analyzer, job.content_hash, result)
+                status, error = 'completed', None
+            except Exception as e:
+                logger.error(f"{job.analyzer} analysis of {job.content_hash[:12]} failed: {str(e)}")
+                self.failures += 1
+                result, status, error = None, 'failed', str(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+            job._finish(status, result, error)
+            self._tasks.task_done()
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._tasks.qsize(),
+                'in_flight': len(self._inflight),
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'joined_in_flight': self.joined,
+                'failures': self.failures,
+                'memory_entries': len(self._memory),
+                'analyzers': {name: version for name, (version, _) in self._analyzers.items()},
+            }
+
+
+analysis_queue = AnalysisQueue()
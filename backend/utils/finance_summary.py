@@ -0,0 +1,245 @@
+"""
+Maintained summary blocks for the finance list endpoints.
+
+Every list endpoint in routes/finance.py returns a ``summary`` with totals over
+the whole table. Summaries are kept in memory and returned without touching
+the table:
+
+* on first use (or after ``FINANCE_SUMMARY_TTL`` seconds, so writes made by
+  other workers show up) they are loaded with one grouped-aggregate RPC from
+  migrations/20261017_add_finance_summary_functions.sql;
+* inserts and deletes apply the row's contribution as a delta;
+* updates drop the cached summary so the next read reloads it.
+
+If the RPC has not been deployed yet (PostgREST PGRST202 / Postgres 42883)
+the summary is computed by paging through the table from then on; any other
+RPC error falls back for ``RPC_RETRY_BACKOFF`` seconds and then tries the RPC
+again. The paged scan is also what ``verify=True`` uses to check the
+maintained value against a full recompute.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FINANCE_SUMMARY_TTL = int(os.getenv('FINANCE_SUMMARY_TTL', '60'))
+RPC_RETRY_BACKOFF = int(os.getenv('FINANCE_SUMMARY_RPC_BACKOFF', '30'))
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+PAGE_SIZE = 1000  # PostgREST default row cap
+
+
+def _num(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _is_missing_function(error):
+    code = getattr(error, 'code', None) or ''
+    return code in MISSING_FUNCTION_CODES or any(c in str(error) for c in MISSING_FUNCTION_CODES)
+
+
+def _student_fees(row):
+    return {
+        'totalFees': _num(row.get('total_fee')),
+        'totalPaid': _num(row.get('paid_amount')),
+        'totalPending': _num(row.get('pending_amount')),
+    }
+
+
+def _staff_payroll(row):
+    return {
+        'totalMonthlyPayroll': _num(row.get('net_salary')),
+        'totalStaffCount': 1,
+    }
+
+
+def _with_average_salary(summary):
+    count = summary.get('totalStaffCount', 0)
+    summary['averageSalary'] = summary.get('totalMonthlyPayroll', 0) / count if count > 0 else 0
+    return summary
+
+
+def _expenses(row):
+    amount = _num(row.get('amount'))
+    paid = row.get('payment_status') == 'paid'
+    return {
+        'totalExpenses': amount,
+        'paidExpenses': amount if paid else 0,
+        'pendingExpenses': 0 if paid else amount,
+    }
+
+
+def _budget(row):
+    return {
+        'totalAllocatedBudget': _num(row.get('allocated_amount')),
+        'totalUsedBudget': _num(row.get('used_amount')),
+        'totalRemainingBudget': _num(row.get('remaining_amount')),
+    }
+
+
+def _maintenance(row):
+    status = (row.get('status') or '').lower()
+    return {
+        'totalRequests': 1,
+        'pendingRequests': 1 if status == 'pending' else 0,
+        'inProgressRequests': 1 if status == 'in progress' else 0,
+        'resolvedRequests': 1 if status == 'resolved' else 0,
+        'totalCost': _num(row.get('cost')),
+    }
+
+
+def _vendors(row):
+    return {
+        'totalAmountPaid': _num(row.get('amount_paid')),
+        'totalAmountDue': _num(row.get('amount_due')),
+        'totalTransactions': _num(row.get('total_transactions')),
+    }
+
+
+# name -> (table, columns needed for a recompute, RPC, per-row contribution)
+# Every summary field is a plain sum of per-row contributions, which is what
+# makes insert/delete deltas exact.
+SUMMARY_SPECS = {
+    'student_fees': ('finance_studentfees', 'total_fee, paid_amount, pending_amount',
+                     'get_finance_studentfees_summary', _student_fees),
+    'staff_payroll': ('finance_staffpayroll', 'net_salary',
+                      'get_finance_staffpayroll_summary', _staff_payroll),
+    'expenses': ('finance_expense', 'amount, payment_status',
+                 'get_finance_expense_summary', _expenses),
+    'budget': ('finance_budgetallocation', 'allocated_amount, used_amount, remaining_amount',
+               'get_finance_budgetallocation_summary', _budget),
+    'maintenance': ('finance_operationmaintenance', 'status, cost',
+                    'get_finance_operationmaintenance_summary', _maintenance),
+    'vendors': ('finance_vendors', 'amount_paid, amount_due, total_transactions',
+                'get_finance_vendors_summary', _vendors),
+}
+
+# Fields computed from the additive ones at read time
+DERIVED_FIELDS = {
+    'staff_payroll': _with_average_salary,
+}
+
+
+class FinanceSummaryStore:
+    """Per-process summary values, updated incrementally by the write handlers."""
+
+    def __init__(self, client=None, ttl=FINANCE_SUMMARY_TTL):
+        self._client = client
+        self.ttl = ttl
+        self._summaries = {}  # name -> (loaded_at, summary)
+        self._lock = threading.Lock()
+        self._rpc_retry_at = {}  # name -> monotonic time the RPC may be tried again
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_client import get_supabase
+            self._client = get_supabase()
+        return self._client
+
+    # ---- reads ----
+    def get(self, name, verify=False):
+        """
+        Return the summary for ``name``.
+
+        With ``verify`` the maintained value is compared with a full recompute;
+        a mismatch is logged and the recomputed value replaces it. The result
+        then carries a ``verified`` flag.
+        """
+        entry = self._summaries.get(name)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            entry = self._reload(name)
+        summary = dict(entry[1])
+
+        if verify:
+            recomputed = self.recompute(name)
+            matches = all(abs(_num(summary.get(k)) - v) < 0.005 for k, v in recomputed.items())
+            if not matches:
+                logger.warning(f"Finance summary '{name}' drifted: maintained={summary} recomputed={recomputed}")
+                with self._lock:
+                    self._summaries[name] = (time.monotonic(), recomputed)
+                summary = dict(recomputed)
+            summary['verified'] = matches
+
+        if name in DERIVED_FIELDS:
+            summary = DERIVED_FIELDS[name](summary)
+        return summary
+
+    def _reload(self, name):
+        summary = self._aggregate(name)
+        entry = (time.monotonic(), summary)
+        with self._lock:
+            self._summaries[name] = entry
+        return entry
+
+    def _aggregate(self, name):
+        _, _, rpc, contribution = SUMMARY_SPECS[name]
+        if time.monotonic() >= self._rpc_retry_at.get(name, 0):
+            try:
+                result = self.client.rpc(rpc, {}).execute()
+                row = result.data[0] if isinstance(result.data, list) else result.data
+                if row:
+                    keys = contribution({}).keys()
+                    return {k: _num(row.get(k)) for k in keys}
+            except Exception as e:
+                if _is_missing_function(e):
+                    # Function not deployed yet: use the paged scan from now on
+                    logger.warning(f"Finance summary RPC {rpc} not deployed, recomputing in Python: {str(e)}")
+                    self._rpc_retry_at[name] = float('inf')
+                else:
+                    logger.warning(f"Finance summary RPC {rpc} failed, recomputing in Python "
+                                   f"for {RPC_RETRY_BACKOFF}s: {str(e)}")
+                    self._rpc_retry_at[name] = time.monotonic() + RPC_RETRY_BACKOFF
+        return self.recompute(name)
+
+    def recompute(self, name):
+        """Sum every row of the table, paging past the PostgREST row cap."""
+        table, columns, _, contribution = SUMMARY_SPECS[name]
+        summary = dict.fromkeys(contribution({}), 0)
+        start = 0
+        while True:
+            result = self.client.table(table).select(columns).range(start, start + PAGE_SIZE - 1).execute()
+            rows = result.data or []
+            for row in rows:
+                for key, value in contribution(row).items():
+                    summary[key] += value
+            if len(rows) < PAGE_SIZE:
+                return summary
+            start += PAGE_SIZE
+
+    # ---- writes ----
+    def _apply(self, name, rows, sign):
+        contribution = SUMMARY_SPECS[name][3]
+        with self._lock:
+            entry = self._summaries.get(name)
+            if entry is None:
+                return  # nothing cached yet; next read loads a fresh value
+            summary = dict(entry[1])
+            for row in rows or []:
+                for key, value in contribution(row).items():
+                    summary[key] = summary.get(key, 0) + sign * value
+            self._summaries[name] = (entry[0], summary)
+
+    def record_insert(self, name, rows):
+        self._apply(name, rows, 1)
+
+    def record_delete(self, name, rows):
+        self._apply(name, rows, -1)
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._summaries.clear()
+            else:
+                self._summaries.pop(name, None)
+
+
+finance_summaries = FinanceSummaryStore()
@@ -0,0 +1,319 @@
+"""
+Hall ticket rendering, batch pre-rendering and content-addressed storage.
+
+PDFs are stored under ``HALL_TICKET_DIR/objects`` named by the SHA-256 of the
+HTML they were rendered from, so identical input is never rendered twice and
+a changed student or exam record simply produces a new object. The on-demand
+endpoint always renders the HTML from current data and reuses the PDF only if
+that digest already exists, so a rescheduled exam or renamed student never
+gets an old ticket.
+
+For each exam, ``HALL_TICKET_DIR/exams/<exam_id>/<student>.json`` points at
+the student's latest PDF; these pointers list an exam's tickets and build
+the per-section ZIPs. Exam and student updates drop the affected pointers
+(``invalidate_exam``, ``invalidate_student``).
+
+``start_batch`` renders every student of an exam on a process pool. Each
+worker parses the template once and shares a download cache for remote
+assets (photos), so a batch costs one xhtml2pdf run per student and nothing
+more.
+"""
+import os
+import io
+import re
+import json
+import glob
+import shutil
+import zipfile
+import hashlib
+import logging
+import threading
+import traceback
+import urllib.request
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(BACKEND_DIR, 'templates')
+HALL_TICKET_DIR = os.getenv('HALL_TICKET_DIR', os.path.join(BACKEND_DIR, 'generated', 'hall_tickets'))
+HALL_TICKET_WORKERS = int(os.getenv('HALL_TICKET_WORKERS', str(os.cpu_count() or 2)))
+ASSET_FETCH_TIMEOUT = 10
+_SAFE_KEY = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+_environment = None
+
+
+def _template():
+    """The parsed hall ticket template; compiled once per process"""
+    global _environment
+    if _environment is None:
+        _environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                                   autoescape=select_autoescape(['html']))
+    return _environment.get_template('hall_ticket.html')
+
+
+def _format(value, source, target):
+    try:
+        return datetime.strptime(str(value), source).strftime(target)
+    except (ValueError, TypeError):
+        return 'N/A'
+
+
+def prepare_hall_ticket_context(student, exam):
+    """Fill in the display fields the hall ticket template expects (in place)"""
+    # Add student photo URL if available
+    student['photo_url'] = f"https://ui-avatars.com/api/?name={student.get('full_name', 'Student')}&size=200&background=random"
+
+    # Format dates and times
+    if 'date' in exam and exam['date']:
+        exam['date'] = _format(exam['date'], '%Y-%m-%d', '%d-%m-%Y')
+
+    # Handle exam_date field as well (fallback)
+    if ('date' not in exam or exam['date'] == 'N/A') and 'exam_date' in exam and exam['exam_date']:
+        exam['date'] = _format(exam['exam_date'], '%Y-%m-%d', '%d-%m-%Y')
+
+    for field in ('start_time', 'end_time'):
+        if field in exam and exam[field]:
+            exam[field] = _format(exam[field], '%H:%M:%S', '%I:%M %p')
+
+    # Add additional fields for the hall ticket template
+    if 'venue_code' not in exam or not exam['venue_code']:
+        exam['venue_code'] = 'CUBE-01'
+
+    if 'reporting_time' not in exam or not exam['reporting_time']:
+        # Calculate reporting time as 30 minutes before start time
+        if exam.get('start_time') and exam['start_time'] != 'N/A':
+            exam['reporting_time'] = '30 minutes before exam time'
+        else:
+            exam['reporting_time'] = '1:30 PM'
+
+    # Format date of birth if available
+    if 'date_of_birth' in student and student['date_of_birth']:
+        try:
+            student['date_of_birth'] = datetime.strptime(str(student['date_of_birth']), '%Y-%m-%d').strftime('%d-%m-%Y')
+        except (ValueError, TypeError):
+            pass
+    return student, exam
+
+
+def render_hall_ticket_html(student, exam):
+    return _template().render(student=student, exam=exam)
+
+
+class HallTicketStore:
+    """Content-addressed PDF objects plus per-exam pointers and per-class ZIPs"""
+
+    def __init__(self, root=HALL_TICKET_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.assets_dir = os.path.join(root, 'assets')
+        self.exams_dir = os.path.join(root, 'exams')
+        self.zips_dir = os.path.join(root, 'zips')
+        self._unreachable_assets = set()
+
+    @staticmethod
+    def digest(html):
+        return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+    def object_path(self, digest):
+        if not re.fullmatch(r'[0-9a-f]{64}', digest):
+            raise ValueError(f'Invalid hall ticket digest: {digest!r}')
+        return os.path.join(self.objects_dir, digest[:2], f'{digest}.pdf')
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _link_callback(self, uri, rel):
+        """Resolve remote images through a shared on-disk cache"""
+        if not uri.startswith(('http://', 'https://')):
+            return uri
+        if uri in self._unreachable_assets:
+            return ''
+        path = os.path.join(self.assets_dir, hashlib.sha256(uri.encode('utf-8')).hexdigest())
+        if not os.path.exists(path):
+            try:
+                with urllib.request.urlopen(uri, timeout=ASSET_FETCH_TIMEOUT) as response:
+                    self._write_atomic(path, response.read())
+            except Exception as e:
+                logger.warning(f"Could not fetch hall ticket asset {uri}: {str(e)}")
+                # Render without it rather than letting xhtml2pdf retry the fetch
+                self._unreachable_assets.add(uri)
+                return ''
+        return path
+
+    def save_pdf(self, html):
+        """Render ``html`` to PDF unless an identical ticket exists; return its digest"""
+        digest = self.digest(html)
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            from xhtml2pdf import pisa
+            pdf_data = io.BytesIO()
+            status = pisa.CreatePDF(html, dest=pdf_data, link_callback=self._link_callback)
+            if status.err:
+                raise RuntimeError(f'Error generating PDF: {status.err}')
+            self._write_atomic(path, pdf_data.getvalue())
+        return digest
+
+    def _pointer_path(self, exam_id, student_key):
+        # Both parts come from query strings; never let them leave exams_dir
+        for part in (str(exam_id), str(student_key)):
+            if not _SAFE_KEY.match(part) or part.startswith('.'):
+                raise ValueError(f'Invalid hall ticket key: {part!r}')
+        return os.path.join(self.exams_dir, str(exam_id), f'{student_key}.json')
+
+    def record(self, exam_id, student, digest):
+        """Point the student's ticket for ``exam_id`` at ``digest`` (by id and by auth user_id)"""
+        entry = json.dumps({
+            'digest': digest,
+            'student_id': student.get('id'),
+            'user_id': student.get('user_id'),
+            'section': student.get('section') or 'A',
+            'register_number': student.get('register_number'),
+            'name': student.get('name') or student.get('full_name'),
+        }).encode('utf-8')
+        for key in {student.get('id'), student.get('user_id')} - {None}:
+            try:
+                self._write_atomic(self._pointer_path(exam_id, key), entry)
+            except ValueError as e:
+                logger.warning(f"Not caching hall ticket pointer: {str(e)}")
+
+    def invalidate_exam(self, exam_id):
+        """Forget every rendered ticket of an exam (it was changed or deleted)"""
+        exam_dir = os.path.dirname(self._pointer_path(exam_id, 'index'))
+        shutil.rmtree(exam_dir, ignore_errors=True)
+
+    def invalidate_student(self, student_id):
+        """Forget a student's rendered tickets in every exam (their record changed)"""
+        try:
+            self._pointer_path('index', student_id)
+        except ValueError:
+            return
+        for path in glob.glob(os.path.join(self.exams_dir, '*', f'{student_id}.json')):
+            try:
+                with open(path) as f:
+                    user_id = json.load(f).get('user_id')
+            except (OSError, ValueError):
+                user_id = None
+            for key in {student_id, user_id} - {None}:
+                try:
+                    os.remove(os.path.join(os.path.dirname(path), f'{key}.json'))
+                except (OSError, ValueError):
+                    pass
+
+    def entries(self, exam_id):
+        """Rendered tickets of an exam, one per student"""
+        exam_dir = os.path.dirname(self._pointer_path(exam_id, 'index'))
+        if not os.path.isdir(exam_dir):
+            return []
+        seen = {}
+        for name in os.listdir(exam_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(exam_dir, name)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            seen[entry.get('student_id') or name] = entry
+        return list(seen.values())
+
+    def class_zip(self, exam_id, section):
+        """Path of a ZIP with every rendered ticket of one section, or None if there are none"""
+        entries = sorted((e for e in self.entries(exam_id) if str(e.get('section')) == str(section)),
+                         key=lambda e: str(e.get('register_number') or e.get('student_id')))
+        if not entries:
+            return None
+        # The ZIP is content-addressed too: same tickets, same file
+        key = hashlib.sha256('\n'.join(e['digest'] for e in entries).encode('utf-8')).hexdigest()
+        path = os.path.join(self.zips_dir, f'{exam_id}-{section}-{key[:16]}.zip')
+        if not os.path.exists(path):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+                for entry in entries:
+                    name = entry.get('register_number') or entry.get('student_id')
+                    archive.write(self.object_path(entry['digest']), f'hall_ticket_{exam_id}_{name}.pdf')
+            self._write_atomic(path, buffer.getvalue())
+        return path
+
+
+hall_ticket_store = HallTicketStore()
+
+
+# ---- batch rendering ----
+
+def _init_worker():
+    # Parse the template and load xhtml2pdf once per worker process
+    _template()
+    from xhtml2pdf import pisa  # noqa: F401
+
+
+def _render_one(root, exam_id, student, exam):
+    store = HallTicketStore(root)
+    student, exam = prepare_hall_ticket_context(dict(student), dict(exam))
+    digest = store.save_pdf(render_hall_ticket_html(student, exam))
+    store.record(exam_id, student, digest)
+    return digest
+
+
+batch_jobs = {}  # exam_id -> status dict for the most recent batch
+_batch_lock = threading.Lock()
+
+
+def start_batch(exam_id, exam, students, workers=HALL_TICKET_WORKERS, store=None):
+    """Render tickets for ``students`` in the background; returns the job status dict
+
+    At most one batch per exam runs at a time.
+    """
+    store = store or hall_ticket_store
+    with _batch_lock:
+        job = batch_jobs.get(exam_id)
+        if job and job['status'] == 'running':
+            return job
+        job = {
+            'exam_id': exam_id,
+            'status': 'running',
+            'total': len(students),
+            'rendered': 0,
+            'failed': 0,
+            'errors': [],
+            'started_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+        }
+        batch_jobs[exam_id] = job
+
+    def run():
+        try:
+            # spawn: the web process has threads, which fork would copy mid-flight
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context,
+                                     initializer=_init_worker) as pool:
+                futures = {pool.submit(_render_one, store.root, exam_id, student, exam): student
+                           for student in students}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        job['rendered'] += 1
+                    except Exception as e:
+                        job['failed'] += 1
+                        if len(job['errors']) < 20:
+                            job['errors'].append({'student_id': futures[future].get('id'), 'error': str(e)})
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"Hall ticket batch for exam {exam_id} failed: {str(e)}\n{traceback.format_exc()}")
+            job['status'] = 'failed'
+            job['errors'].append({'error': str(e)})
+        finally:
+            job['finished_at'] = datetime.utcnow().isoformat()
+
+    threading.Thread(target=run, name=f'hall-tickets-{exam_id}', daemon=True).start()
+    return job
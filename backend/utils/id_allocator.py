@@ -0,0 +1,179 @@
+"""
+Collision-free sequential IDs: register, receipt, application and user IDs.
+
+Each ID family is a named sequence in ``id_sequences``
+(migrations/20261017_add_id_sequences.sql). A worker reserves
+``ID_BLOCK_SIZE`` values with one ``reserve_id_block`` call and hands them
+out from memory, so most IDs cost no round trip at all and two workers can
+never mint the same value. Values reserved by a worker that exits unused are
+skipped, which leaves gaps but never duplicates.
+
+The first time a worker uses a sequence that does not exist yet, it seeds it
+above the highest ID already in the table, so IDs minted by the old random
+generators are never reissued.
+
+If the RPC has not been deployed (PostgREST PGRST202/PGRST205, Postgres
+42883/42P01), blocks are allocated in process memory and a warning is
+logged; that is only safe with a single worker. Any other error (timeout,
+dropped connection, 5xx) is raised: allocating locally then could reissue
+values other workers have reserved but not used yet.
+"""
+import os
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ID_BLOCK_SIZE = int(os.getenv('ID_BLOCK_SIZE', '20'))
+PAGE_SIZE = 1000  # PostgREST default row cap
+# Function or table not deployed: reserve_id_block, id_sequences
+NOT_DEPLOYED_CODES = ('PGRST202', '42883', 'PGRST205', '42P01')
+
+
+def _is_not_deployed(error):
+    code = getattr(error, 'code', None) or ''
+    return code in NOT_DEPLOYED_CODES or any(c in str(error) for c in NOT_DEPLOYED_CODES)
+
+
+class IdAllocator:
+    """Hands out sequence values from blocks reserved atomically in Supabase"""
+
+    def __init__(self, client=None, block_size=ID_BLOCK_SIZE):
+        self._client = client
+        self.block_size = block_size
+        self._blocks = {}  # name -> [next, end]
+        self._seeded = set()
+        self._floors = {}  # name -> highest legacy value, scanned once
+        self._locks = {}
+        self._guard = threading.Lock()
+        self._local_fallback = False
+        self.reservations = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_client import get_supabase
+            self._client = get_supabase(admin=True)
+        return self._client
+
+    def _lock_for(self, name):
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def legacy_max(self, table, column, prefix, width=None):
+        """Highest numeric suffix among ``table.column`` values starting with ``prefix``
+
+        With ``width``, only suffixes of exactly that many digits count, so
+        longer IDs of another format that share the prefix cannot push the
+        sequence up.
+        """
+        highest = 0
+        offset = 0
+        while True:
+            page = self.client.table(table).select(column).like(column, f'{prefix}%') \
+                .order(column).range(offset, offset + PAGE_SIZE - 1).execute().data or []
+            for row in page:
+                suffix = str(row.get(column) or '')[len(prefix):]
+                if suffix.isdigit() and (width is None or len(suffix) == width):
+                    highest = max(highest, int(suffix))
+            if len(page) < PAGE_SIZE:
+                return highest
+            offset += PAGE_SIZE
+
+    def _floor(self, name, floor_loader):
+        if name not in self._floors:
+            self._floors[name] = floor_loader()
+        return self._floors[name]
+
+    def _sequence_exists(self, name):
+        result = self.client.table('id_sequences').select('name').eq('name', name).limit(1).execute()
+        return bool(result.data)
+
+    def _reserve(self, name, floor_loader):
+        """Reserve the next block for ``name``; returns its first value"""
+        self.reservations += 1
+        try:
+            floor = 0
+            if name not in self._seeded and floor_loader and not self._sequence_exists(name):
+                floor = self._floor(name, floor_loader)
+            result = self.client.rpc('reserve_id_block', {
+                'p_name': name, 'p_count': self.block_size, 'p_floor': floor
+            }).execute()
+            self._seeded.add(name)
+            self._local_fallback = False
+            data = result.data
+            return int(data[0] if isinstance(data, list) else data)
+        except Exception as e:
+            if not _is_not_deployed(e):
+                raise
+            if not self._local_fallback:
+                logger.warning(f"reserve_id_block not deployed, allocating IDs in process (single worker only): {str(e)}")
+            self._local_fallback = True
+
+        # Local block: seeded from the table once, then continues from the last block
+        block = self._blocks.get(name)
+        if block:
+            return block[1] + 1
+        return (self._floor(name, floor_loader) if floor_loader else 0) + 1
+
+    def next(self, name, floor_loader=None):
+        """Next value of sequence ``name``
+
+        ``floor_loader`` returns the highest value already in use; it is only
+        called when the sequence is created.
+        """
+        with self._lock_for(name):
+            block = self._blocks.get(name)
+            if block is None or block[0] > block[1]:
+                start = self._reserve(name, floor_loader)
+                block = self._blocks[name] = [start, start + self.block_size - 1]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def stats(self):
+        return {
+            'reservations': self.reservations,
+            'sequences': len(self._blocks),
+            'local_fallback': self._local_fallback,
+        }
+
+
+id_allocator = IdAllocator()
+
+
+def _next_id(prefix, width, table, column, exact_width=False):
+    value = id_allocator.next(f'{column}:{prefix}',
+                              lambda: id_allocator.legacy_max(table, column, prefix,
+                                                              width if exact_width else None))
+    return f'{prefix}{value:0{width}d}'
+
+
+def next_register_number():
+    """REG + two-digit year + five digits, e.g. REG2600042"""
+    return _next_id(f'REG{datetime.now().year % 100}', 5, 'students', 'register_number', exact_width=True)
+
+
+def next_admission_register_number():
+    """REG + year + at least three digits, e.g. REG2026042
+
+    The format admission submissions have always issued; a sequence of its
+    own, so it never interleaves with ``next_register_number``.
+    """
+    return _next_id(f'REG{datetime.now().year}', 3, 'students', 'register_number')
+
+
+def next_receipt_number():
+    """REC-YYYYMMDD-NNNNN, numbered per day"""
+    return _next_id(f"REC-{datetime.utcnow().strftime('%Y%m%d')}-", 5, 'fee_payments', 'receipt_number')
+
+
+def next_application_number():
+    """ADM + year + four digits, e.g. ADM20260042"""
+    return _next_id(f'ADM{datetime.now().year}', 4, 'admissions', 'application_number')
+
+
+def next_student_user_id():
+    """STU + year + five digits, e.g. STU202600042"""
+    return _next_id(f'STU{datetime.now().year}', 5, 'students', 'user_id')
@@ -0,0 +1,299 @@
+"""
+In-process search index over internship listings.
+
+``InternshipIndex`` keeps every active listing in memory. Each listing gets
+a small integer id, and every token, facet value and posting day maps to a
+bitmap (a Python int) of the ids that have it:
+
+* the title, company, skills and location are tokenised into an inverted
+  index; each query word matches as a prefix ("dev" finds "developer") and
+  a listing must match every word;
+* facet values (remote or not, stipend band, duration, source, ...) make
+  filtering a bitwise AND and facet counts ``(bitmap & matches).bit_count()``;
+* posting days give newest-first pages without sorting every match, and the
+  ``posted`` facet (age buckets) is rebuilt from posting times at most every
+  ``AGE_BUCKET_REFRESH`` seconds because ages move as time passes.
+
+Listings are keyed by ``dedup_key`` (utils/internship_ingest.py), and
+``upsert``/``sync`` reindex only listings whose ``content_hash`` or posting
+date changed, updating each affected bitmap once per batch, so an ingestion
+run costs in proportion to what changed rather than the index size.
+"""
+import re
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from utils.internship_ingest import listing_key, listing_hash
+
+SEARCH_FIELDS = ('title', 'company', 'skills', 'location')
+AGE_BUCKETS = (('last_24_hours', 1), ('last_7_days', 7), ('last_30_days', 30))
+AGE_BUCKET_REFRESH = 3600
+PREFIX_CACHE_SIZE = 1024
+
+_TOKEN = re.compile(r'[a-z0-9+#]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or '').casefold())
+
+
+def _field_text(value):
+    if isinstance(value, (list, tuple, set)):
+        return ' '.join(str(item) for item in value)
+    return value
+
+
+def age_bucket(posted_at, now):
+    """Posting-age facet value of a listing posted at ``posted_at``"""
+    if posted_at is None:
+        return 'unknown'
+    for name, days in AGE_BUCKETS:
+        if now - posted_at <= timedelta(days=days):
+            return name
+    return 'older'
+
+
+def _bitmap(ids, size):
+    bits = bytearray(size // 8 + 1)
+    for doc_id in ids:
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _bit_ids(bitmap):
+    """Ids set in ``bitmap``, ascending"""
+    bits = bin(bitmap)
+    top = len(bits) - 1
+    ids = []
+    position = bits.find('1', 2)
+    while position != -1:
+        ids.append(top - position)
+        position = bits.find('1', position + 1)
+    ids.reverse()
+    return ids
+
+
+class InternshipIndex:
+    """Searchable, facetable set of listings
+
+    ``describe(listing)`` returns ``(facets, posted_at)``: a dict of facet
+    name to value for the listing and its posting time (naive UTC datetime
+    or None), which feeds the ``posted`` facet and newest-first ordering.
+    """
+
+    def __init__(self, describe):
+        self.describe = describe
+        self._lock = threading.RLock()
+        self._ids = {}  # key -> id
+        self._docs = []  # id -> listing, None once removed
+        self._posted = []  # id -> posted_at
+        self._terms = []  # id -> (tokens, facets, posting date)
+        self._free = []  # ids to reuse, keeps bitmaps short
+        self._versions = {}  # key -> (content_hash, posted_date)
+        self._all = 0
+        self._postings = {}  # token -> bitmap
+        self._facets = {}  # facet -> value -> bitmap
+        self._days = {}  # posting date (or None) -> bitmap
+        self._vocabulary = None  # sorted tokens, rebuilt after changes
+        self._day_order = None  # posting dates newest first, rebuilt after changes
+        self._prefixes = OrderedDict()  # prefix -> bitmap, cleared after changes
+        self._ages = None  # age bucket -> bitmap
+        self._ages_at = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _targets(self, terms):
+        """(bitmap table, key) pairs a listing with these terms is in"""
+        tokens, facets, day = terms
+        targets = [(self._postings, token) for token in tokens]
+        for facet, value in facets.items():
+            targets.append((self._facets.setdefault(facet, {}), value))
+        targets.append((self._days, day))
+        return targets
+
+    def _collect(self, changes, doc_id):
+        for table, key in self._targets(self._terms[doc_id]):
+            changes.setdefault((id(table), key), (table, key, []))[2].append(doc_id)
+
+    def _unlink(self, key, removed):
+        doc_id = self._ids.pop(key)
+        del self._versions[key]
+        self._collect(removed, doc_id)
+        self._docs[doc_id] = self._posted[doc_id] = self._terms[doc_id] = None
+        self._free.append(doc_id)
+
+    def _update(self, listings, removed_keys):
+        """Reindex ``(key, listing, version)`` triples and drop ``removed_keys``
+
+        Each affected bitmap is rewritten once, however many listings changed.
+        """
+        added, removed = {}, {}
+        for key in removed_keys:
+            self._unlink(key, removed)
+        for key, listing, version in listings:
+            if key in self._ids:
+                self._unlink(key, removed)
+            facets, posted_at = self.describe(listing)
+            tokens = set()
+            for field in SEARCH_FIELDS:
+                tokens.update(tokenize(_field_text(listing.get(field))))
+            if self._free:
+                doc_id = self._free.pop()
+            else:
+                doc_id = len(self._docs)
+                self._docs.append(None)
+                self._posted.append(None)
+                self._terms.append(None)
+            self._ids[key] = doc_id
+            self._versions[key] = version
+            self._docs[doc_id] = listing
+            self._posted[doc_id] = posted_at
+            self._terms[doc_id] = (tokens, facets, posted_at.date() if posted_at else None)
+            self._collect(added, doc_id)
+        if not (added or removed):
+            return
+
+        size = len(self._docs)
+        for target in set(added) | set(removed):
+            table, key, _ = added.get(target) or removed[target]
+            bitmap = table.get(key, 0)
+            if target in removed:
+                bitmap &= ~_bitmap(removed[target][2], size)
+            if target in added:
+                bitmap |= _bitmap(added[target][2], size)
+            if bitmap:
+                table[key] = bitmap
+            else:
+                table.pop(key, None)
+        self._all = _bitmap(self._ids.values(), size)
+        self._vocabulary = None
+        self._day_order = None
+        self._prefixes.clear()
+        self._ages = None
+
+    def upsert(self, listings):
+        """Index new and changed listings; returns how many were (re)indexed"""
+        with self._lock:
+            pending = {}
+            for listing in listings:
+                key = listing.get('dedup_key') or listing_key(listing)
+                version = (listing.get('content_hash') or listing_hash(listing), listing.get('posted_date'))
+                if self._versions.get(key) != version:
+                    pending[key] = (key, listing, version)
+            self._update(pending.values(), ())
+        return len(pending)
+
+    def remove(self, keys):
+        with self._lock:
+            keys = [key for key in set(keys) if key in self._ids]
+            self._update((), keys)
+        return len(keys)
+
+    def sync(self, listings, fetched_sources):
+        """Mirror an ingestion run (``sync_listings``) in the index
+
+        Listings of ``fetched_sources`` that were not fetched again are
+        dropped, like the rows ``sync_listings`` expires.
+        """
+        fetched_sources = set(fetched_sources)
+        with self._lock:
+            indexed = self.upsert(listings)
+            current = {listing.get('dedup_key') or listing_key(listing) for listing in listings}
+            vanished = [key for key, doc_id in self._ids.items()
+                        if key not in current and self._docs[doc_id].get('source') in fetched_sources]
+            removed = self.remove(vanished)
+        return {'indexed': indexed, 'removed': removed, 'size': len(self._ids)}
+
+    def _prefix_bitmap(self, prefix):
+        bitmap = self._prefixes.get(prefix)
+        if bitmap is not None:
+            self._prefixes.move_to_end(prefix)
+            return bitmap
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        bitmap = 0
+        position = bisect.bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            bitmap |= self._postings[vocabulary[position]]
+            position += 1
+        self._prefixes[prefix] = bitmap
+        while len(self._prefixes) > PREFIX_CACHE_SIZE:
+            self._prefixes.popitem(last=False)
+        return bitmap
+
+    def _age_bitmaps(self, now):
+        if self._ages is None or abs((now - self._ages_at).total_seconds()) > AGE_BUCKET_REFRESH:
+            ages = {}
+            for doc_id in self._ids.values():
+                ages.setdefault(age_bucket(self._posted[doc_id], now), []).append(doc_id)
+            self._ages = {bucket: _bitmap(ids, len(self._docs)) for bucket, ids in ages.items()}
+            self._ages_at = now
+        return self._ages
+
+    def _facet_bitmaps(self, facet, now):
+        if facet == 'posted':
+            return self._age_bitmaps(now)
+        return self._facets.get(facet, {})
+
+    def _newest_days(self):
+        if self._day_order is None:
+            self._day_order = sorted(self._days, key=lambda day: day or datetime.min.date(), reverse=True)
+        return self._day_order
+
+    def search(self, query='', filters=None, predicate=None, offset=0, limit=50, now=None):
+        """Listings matching ``query`` and ``filters``, newest first
+
+        ``filters`` maps a facet name (or ``posted``) to a value or a list of
+        accepted values; ``predicate(listing)`` can narrow the matches
+        further. Returns ``results`` (one page), ``total`` matches and
+        ``facets``: counts per value of every facet among the matches.
+        ``limit=None`` returns every match.
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            matches = self._all
+            for word in tokenize(query):
+                matches &= self._prefix_bitmap(word)
+            for facet, wanted in (filters or {}).items():
+                if wanted is None:
+                    continue
+                values = self._facet_bitmaps(facet, now)
+                accepted = 0
+                for value in (wanted if isinstance(wanted, (list, tuple, set)) else [wanted]):
+                    accepted |= values.get(value, 0)
+                matches &= accepted
+            if predicate is not None:
+                kept = [doc_id for doc_id in _bit_ids(matches) if predicate(self._docs[doc_id])]
+                matches = _bitmap(kept, len(self._docs))
+
+            facets = {}
+            for facet in list(self._facets) + ['posted']:
+                counts = {}
+                for value, bitmap in self._facet_bitmaps(facet, now).items():
+                    count = (bitmap & matches).bit_count()
+                    if count:
+                        counts[value] = count
+                facets[facet] = counts
+
+            # Newest first: whole posting days in order, sorted within a day
+            end = None if limit is None else offset + limit
+            page = []
+            for day in self._newest_days():
+                day_matches = self._days[day] & matches
+                if day_matches:
+                    page.extend(sorted(_bit_ids(day_matches), reverse=True,
+                                       key=lambda doc_id: self._posted[doc_id] or datetime.min))
+                    if end is not None and len(page) >= end:
+                        break
+            results = [self._docs[doc_id] for doc_id in page[offset:end]]
+
+        return {'results': results, 'total': matches.bit_count(), 'facets': facets}
+
+    def stats(self):
+        with self._lock:
+            return {'listings': len(self._ids), 'tokens': len(self._postings),
+                    'facets': {facet: len(values) for facet, values in self._facets.items()}}
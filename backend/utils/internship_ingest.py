@@ -0,0 +1,171 @@
+"""
+Incremental sync of scraped internship listings into the ``internships`` table.
+
+Every listing gets a stable ``dedup_key`` (its source plus apply URL, or
+source, title, company and location when there is no URL) and a
+``content_hash`` of the fields shown to students. ``sync_listings`` compares
+both with what is stored and then:
+
+* upserts only new, changed or reappearing listings, ``UPSERT_CHUNK_SIZE``
+  rows per request, on ``dedup_key``;
+* soft-expires active listings that a source no longer returns
+  (``is_active = false``, ``expired_at`` set), but only for sources that were
+  fetched successfully and returned at least ``MIN_FETCHED_FRACTION`` of
+  their active listings, so neither an outage nor a page the parser no
+  longer understands empties the board.
+
+The table is never cleared, so readers always see a full listing set.
+Columns and index: migrations/20261017_add_internship_dedup_key.sql.
+"""
+import json
+import hashlib
+import logging
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    from postgrest.types import ReturnMethod
+except ImportError:
+    ReturnMethod = None
+
+logger = logging.getLogger(__name__)
+
+UPSERT_CHUNK_SIZE = 200
+IN_FILTER_CHUNK_SIZE = 200  # keys per in_() filter, keeps the URL short
+PAGE_SIZE = 1000  # PostgREST default row cap
+# A fetched source returning fewer listings than this share of its active
+# ones (or none at all) is more likely broken than emptied; keep its listings
+MIN_FETCHED_FRACTION = 0.5
+
+# Fields that make a listing "changed"; posted_date is left out because
+# relative dates ("2 days ago") move every day
+CONTENT_FIELDS = ('title', 'company', 'location', 'type', 'min_stipend', 'max_stipend',
+                  'is_unpaid', 'apply_url', 'description', 'is_remote', 'duration', 'skills')
+# Every upserted row carries the same columns, as PostgREST bulk writes require
+LISTING_COLUMNS = CONTENT_FIELDS + ('source', 'posted_date')
+
+
+def _normalize_text(value):
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def _normalize_url(url):
+    parts = urlsplit(str(url or '').strip())
+    if not parts.netloc:
+        return ''
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+
+
+def listing_key(listing):
+    """Stable identity of a listing across fetches"""
+    url = _normalize_url(listing.get('apply_url'))
+    if url:
+        identity = f"{_normalize_text(listing.get('source'))}|{url}"
+    else:
+        identity = '|'.join(_normalize_text(listing.get(field))
+                            for field in ('source', 'title', 'company', 'location'))
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def listing_hash(listing):
+    content = {field: listing.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def dedupe_listings(listings):
+    """Listings keyed by ``dedup_key``; a later duplicate replaces an earlier one"""
+    unique = {}
+    for listing in listings:
+        key = listing_key(listing)
+        unique[key] = {**listing, 'dedup_key': key, 'content_hash': listing_hash(listing)}
+    return unique
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _stored_listings(client, table):
+    """dedup_key -> (content_hash, is_active, source) for every stored listing"""
+    stored = {}
+    offset = 0
+    while True:
+        page = client.table(table).select('dedup_key, content_hash, is_active, source') \
+            .order('dedup_key').range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        for row in page:
+            if row.get('dedup_key'):
+                stored[row['dedup_key']] = (row.get('content_hash'), row.get('is_active'), row.get('source'))
+        if len(page) < PAGE_SIZE:
+            return stored
+        offset += PAGE_SIZE
+
+
+def sync_listings(client, table, listings, fetched_sources, now=None):
+    """Bring ``table`` in line with ``listings`` and return what changed
+
+    ``fetched_sources`` names the sources whose fetch succeeded; only their
+    vanished listings are expired, and not for a source that returned
+    nothing or fewer than ``MIN_FETCHED_FRACTION`` of its active listings.
+    Such sources are listed under ``expiry_skipped`` in the summary.
+    """
+    now = (now or datetime.utcnow()).isoformat()
+    unique = dedupe_listings(listings)
+    stored = _stored_listings(client, table)
+
+    inserted = updated = unchanged = 0
+    to_write = []
+    for key, listing in unique.items():
+        previous = stored.get(key)
+        if previous is None:
+            inserted += 1
+        elif previous[0] != listing['content_hash'] or not previous[1]:
+            updated += 1
+        else:
+            unchanged += 1
+            continue
+        row = {column: listing.get(column) for column in LISTING_COLUMNS}
+        row.update(dedup_key=key, content_hash=listing['content_hash'], is_active=True,
+                   expired_at=None, updated_at=now)
+        to_write.append(row)
+
+    upsert_kwargs = {'on_conflict': 'dedup_key'}
+    if ReturnMethod is not None:
+        upsert_kwargs['returning'] = ReturnMethod.minimal
+    for chunk in _chunks(to_write, UPSERT_CHUNK_SIZE):
+        client.table(table).upsert(chunk, **upsert_kwargs).execute()
+
+    returned, active = {}, {}
+    for listing in unique.values():
+        returned[listing.get('source')] = returned.get(listing.get('source'), 0) + 1
+    for _, is_active, source in stored.values():
+        if is_active:
+            active[source] = active.get(source, 0) + 1
+    skipped = {source for source in fetched_sources
+               if not returned.get(source) or returned[source] < MIN_FETCHED_FRACTION * active.get(source, 0)}
+    for source in sorted(skipped):
+        logger.warning(f"Internship sync: {source} returned {returned.get(source, 0)} listings "
+                       f"for {active.get(source, 0)} active, not expiring its listings")
+    fetched_sources = set(fetched_sources) - skipped
+    vanished = [key for key, (_, is_active, source) in stored.items()
+                if is_active and key not in unique and source in fetched_sources]
+    for chunk in _chunks(vanished, IN_FILTER_CHUNK_SIZE):
+        client.table(table).update({'is_active': False, 'expired_at': now, 'updated_at': now}) \
+            .in_('dedup_key', chunk).execute()
+    if fetched_sources:
+        # Rows written by the old delete-and-reinsert refresh have no key;
+        # their sources' current listings were just upserted with one
+        client.table(table).update({'is_active': False, 'expired_at': now, 'updated_at': now}) \
+            .is_('dedup_key', 'null').eq('is_active', True).in_('source', sorted(fetched_sources)).execute()
+
+    summary = {
+        'fetched': len(listings),
+        'unique': len(unique),
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': unchanged,
+        'expired': len(vanished),
+        'expiry_skipped': sorted(skipped),
+    }
+    logger.info(f"Internship sync: {summary}")
+    return summary, list(unique.values())
@@ -0,0 +1,341 @@
+"""
+Month-end payslip rendering.
+
+``start_payslip_run(pay_month)`` streams the month's payroll rows from
+``SupabasePayroll`` page by page and renders one PDF per row with reportlab on
+a process pool. Each payslip is keyed by the SHA-256 of its inputs (the
+payroll row plus ``PAYSLIP_LAYOUT_VERSION``), so a re-run only renders rows
+that changed since the last run.
+
+Per month, ``PAYSLIP_DIR/<pay_month>/`` holds:
+
+* ``objects/<digest>.pdf``: the rendered payslips
+* ``manifest.json``: payroll id -> digest, file and amounts for the last run
+* ``payslips-<pay_month>-<key>.zip``: every payslip of the run, named by the
+  digests it contains so an unchanged month reuses the same archive
+"""
+import os
+import io
+import re
+import json
+import zipfile
+import hashlib
+import logging
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAYSLIP_DIR = os.getenv('PAYSLIP_DIR', os.path.join(BACKEND_DIR, 'generated', 'payslips'))
+PAYSLIP_WORKERS = int(os.getenv('PAYSLIP_WORKERS', str(os.cpu_count() or 2)))
+# Payslips per worker task; one payslip takes a few ms, so ship them in chunks
+PAYSLIP_CHUNK_SIZE = 50
+# Bump when the payslip layout changes so every payslip is rendered again
+PAYSLIP_LAYOUT_VERSION = 1
+INSTITUTION_NAME = 'College ERP System'
+_PAY_MONTH = re.compile(r'^\d{4}-\d{2}-01$')
+
+
+def normalize_pay_month(value):
+    """``YYYY-MM`` or ``YYYY-MM-DD`` -> the ``YYYY-MM-01`` stored in ``payroll.pay_month``"""
+    value = str(value or '').strip()
+    for fmt in ('%Y-%m', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-01')
+        except ValueError:
+            continue
+    raise ValueError(f'Invalid pay_month: {value!r} (expected YYYY-MM or YYYY-MM-DD)')
+
+
+def payslip_digest(payroll):
+    """Hash of everything that ends up on the payslip"""
+    source = json.dumps({'layout': PAYSLIP_LAYOUT_VERSION, 'payroll': payroll},
+                        sort_keys=True, default=str)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def _money(value):
+    return f"{float(value or 0):,.2f}"
+
+
+def payslip_deductions(payroll):
+    """Itemised deductions of a payroll row, as ``deduction_breakdown`` computes them"""
+    # Imported here so worker processes never load the models package
+    from models.supabase_payroll import deduction_breakdown
+    total_days = int(payroll.get('total_days') or 0)
+    absent_days = payroll.get('absent_days')
+    if absent_days is None:
+        absent_days = total_days - int(payroll.get('present_days') or 0)
+    return deduction_breakdown(float(payroll.get('basic_salary') or 0), total_days, int(absent_days))
+
+
+def render_payslip_pdf(payroll, deductions, path):
+    """Draw one payslip with reportlab and write it to ``path``"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    basic_salary = float(payroll.get('basic_salary') or 0)
+    total_days = int(payroll.get('total_days') or 0)
+    present_days = int(payroll.get('present_days') or 0)
+    absent_days = total_days - present_days if payroll.get('absent_days') is None else int(payroll['absent_days'])
+    pay_month = datetime.strptime(str(payroll['pay_month'])[:10], '%Y-%m-%d')
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+    width, height = A4
+    pdf.setTitle(f"Payslip {pay_month.strftime('%B %Y')}")
+
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawCentredString(width / 2, height - 60, INSTITUTION_NAME)
+    pdf.setFont('Helvetica', 12)
+    pdf.drawCentredString(width / 2, height - 80, f"Payslip for {pay_month.strftime('%B %Y')}")
+
+    y = height - 130
+    pdf.setFont('Helvetica', 10)
+    for label, value in (
+        ('Payslip ID', f"PSL-{payroll.get('id')}-{pay_month.strftime('%Y%m')}"),
+        ('Faculty ID', payroll.get('faculty_id')),
+        ('Role', payroll.get('role') or 'N/A'),
+        ('Status', payroll.get('status') or 'N/A'),
+        ('Working days', total_days),
+        ('Present days', present_days),
+        ('Absent days', absent_days),
+    ):
+        pdf.drawString(60, y, f"{label}:")
+        pdf.drawString(200, y, str(value))
+        y -= 16
+
+    y -= 20
+    pdf.setFont('Helvetica-Bold', 11)
+    pdf.drawString(60, y, 'Earnings')
+    pdf.drawString(320, y, 'Deductions')
+    pdf.setFont('Helvetica', 10)
+    y -= 18
+    rows = [
+        ('Basic salary', basic_salary, 'Loss of pay', deductions['lop']),
+        ('', None, 'Provident fund', deductions['pf']),
+        ('', None, 'ESI', deductions['esi']),
+        ('', None, 'Income tax', deductions['tax']),
+    ]
+    for earning, earning_amount, deduction, deduction_amount in rows:
+        if earning:
+            pdf.drawString(60, y, earning)
+            pdf.drawRightString(280, y, _money(earning_amount))
+        pdf.drawString(320, y, deduction)
+        pdf.drawRightString(535, y, _money(deduction_amount))
+        y -= 16
+
+    y -= 6
+    pdf.line(60, y + 10, 535, y + 10)
+    pdf.setFont('Helvetica-Bold', 10)
+    pdf.drawString(60, y - 4, 'Gross')
+    pdf.drawRightString(280, y - 4, _money(basic_salary))
+    pdf.drawString(320, y - 4, 'Total deductions')
+    pdf.drawRightString(535, y - 4, _money(payroll.get('deductions', deductions['total'])))
+    y -= 36
+    pdf.setFont('Helvetica-Bold', 12)
+    pdf.drawString(60, y, 'Net salary')
+    pdf.drawRightString(535, y, _money(payroll.get('net_salary')))
+
+    pdf.setFont('Helvetica-Oblique', 8)
+    pdf.drawString(60, 50, 'This is a system generated payslip and does not require a signature.')
+    pdf.showPage()
+    pdf.save()
+    _write_atomic(path, buffer.getvalue())
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class PayslipStore:
+    """Rendered payslips, manifests and archives, one directory per pay month"""
+
+    def __init__(self, root=PAYSLIP_DIR):
+        self.root = root
+
+    def month_dir(self, pay_month):
+        if not _PAY_MONTH.match(pay_month):
+            raise ValueError(f'Invalid pay_month: {pay_month!r}')
+        return os.path.join(self.root, pay_month)
+
+    def object_path(self, pay_month, digest):
+        if not re.fullmatch(r'[0-9a-f]{64}', digest):
+            raise ValueError(f'Invalid payslip digest: {digest!r}')
+        return os.path.join(self.month_dir(pay_month), 'objects', f'{digest}.pdf')
+
+    def manifest_path(self, pay_month):
+        return os.path.join(self.month_dir(pay_month), 'manifest.json')
+
+    def load_manifest(self, pay_month):
+        try:
+            with open(self.manifest_path(pay_month)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_manifest(self, pay_month, manifest):
+        _write_atomic(self.manifest_path(pay_month),
+                      json.dumps(manifest, indent=2, default=str).encode('utf-8'))
+
+    def write_archive(self, pay_month, entries):
+        """ZIP every payslip in ``entries``; returns the archive file name"""
+        key = hashlib.sha256('\n'.join(e['digest'] for e in entries).encode('utf-8')).hexdigest()
+        name = f'payslips-{pay_month[:7]}-{key[:16]}.zip'
+        path = os.path.join(self.month_dir(pay_month), name)
+        if not os.path.exists(path):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+                for entry in entries:
+                    archive.write(self.object_path(pay_month, entry['digest']), entry['file'])
+            _write_atomic(path, buffer.getvalue())
+        return name
+
+    def archive_path(self, pay_month):
+        manifest = self.load_manifest(pay_month)
+        if not manifest or not manifest.get('archive'):
+            return None
+        path = os.path.join(self.month_dir(pay_month), manifest['archive'])
+        return path if os.path.exists(path) else None
+
+
+payslip_store = PayslipStore()
+
+
+# ---- bulk run ----
+
+def _init_worker():
+    # Load reportlab once per worker process
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+
+def _render_chunk(tasks):
+    """Render ``(payroll_id, payroll, deductions, path)`` tasks; returns ``(payroll_id, error)`` for failures"""
+    failures = []
+    for payroll_id, payroll, deductions, path in tasks:
+        try:
+            render_payslip_pdf(payroll, deductions, path)
+        except Exception as e:
+            failures.append((payroll_id, str(e)))
+    return failures
+
+
+payslip_jobs = {}  # pay_month -> status dict for the most recent run
+_jobs_lock = threading.Lock()
+
+
+def start_payslip_run(pay_month, payroll_rows=None, workers=PAYSLIP_WORKERS, store=None):
+    """Render the payslips of ``pay_month`` in the background; returns the job status dict
+
+    ``payroll_rows`` defaults to ``payroll_model.iter_payroll_month(pay_month)``
+    and is consumed lazily, so rendering starts with the first page. At most
+    one run per month is active at a time.
+    """
+    store = store or payslip_store
+    store.month_dir(pay_month)
+    with _jobs_lock:
+        job = payslip_jobs.get(pay_month)
+        if job and job['status'] == 'running':
+            return job
+        job = {
+            'pay_month': pay_month,
+            'status': 'running',
+            'total': 0,
+            'rendered': 0,
+            'skipped': 0,
+            'failed': 0,
+            'errors': [],
+            'archive': None,
+            'started_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+        }
+        payslip_jobs[pay_month] = job
+
+    def run():
+        try:
+            rows = payroll_rows
+            if rows is None:
+                from models.supabase_payroll import payroll_model
+                rows = payroll_model.iter_payroll_month(pay_month)
+            previous = (store.load_manifest(pay_month) or {}).get('payslips', {})
+            entries = {}
+            pending = {}  # future -> the chunk it renders
+            chunk = []
+            # spawn: the web process has threads, which fork would copy mid-flight
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context,
+                                     initializer=_init_worker) as pool:
+
+                def collect(done):
+                    for future in done:
+                        tasks = pending.pop(future)
+                        try:
+                            failures = future.result()
+                        except Exception as e:
+                            failures = [(task[0], str(e)) for task in tasks]
+                        for payroll_id, error in failures:
+                            entries.pop(payroll_id, None)
+                            job['failed'] += 1
+                            if len(job['errors']) < 20:
+                                job['errors'].append({'payroll_id': payroll_id, 'error': error})
+                        job['rendered'] += len(tasks) - len(failures)
+
+                def submit():
+                    pending[pool.submit(_render_chunk, list(chunk))] = list(chunk)
+                    chunk.clear()
+                    # Keep the queue bounded while rows are still being paged in
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+                for payroll in rows:
+                    job['total'] += 1
+                    digest = payslip_digest(payroll)
+                    payroll_id = str(payroll['id'])
+                    path = store.object_path(pay_month, digest)
+                    entries[payroll_id] = {
+                        'digest': digest,
+                        'file': f"payslip_{pay_month[:7]}_{payroll.get('faculty_id')}_{payroll_id}.pdf",
+                        'faculty_id': payroll.get('faculty_id'),
+                        'status': payroll.get('status'),
+                        'net_salary': payroll.get('net_salary'),
+                    }
+                    if previous.get(payroll_id, {}).get('digest') == digest and os.path.exists(path):
+                        job['skipped'] += 1
+                        continue
+                    chunk.append((payroll_id, payroll, payslip_deductions(payroll), path))
+                    if len(chunk) >= PAYSLIP_CHUNK_SIZE:
+                        submit()
+                if chunk:
+                    submit()
+                collect(wait(pending)[0])
+
+            ordered = [entries[key] for key in sorted(entries, key=lambda k: (len(k), k))]
+            job['archive'] = store.write_archive(pay_month, ordered) if ordered else None
+            store.write_manifest(pay_month, {
+                'pay_month': pay_month,
+                'generated_at': datetime.utcnow().isoformat(),
+                'layout_version': PAYSLIP_LAYOUT_VERSION,
+                'count': len(entries),
+                'total_net_salary': sum(float(e['net_salary'] or 0) for e in entries.values()),
+                'archive': job['archive'],
+                'payslips': entries,
+            })
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"Payslip run for {pay_month} failed: {str(e)}\n{traceback.format_exc()}")
+            job['status'] = 'failed'
+            job['errors'].append({'error': str(e)})
+        finally:
+            job['finished_at'] = datetime.utcnow().isoformat()
+
+    threading.Thread(target=run, name=f'payslips-{pay_month}', daemon=True).start()
+    return job
@@ -0,0 +1,275 @@
+"""
+In-process fan-out for server-sent event streams.
+
+One upstream Supabase Realtime subscription per table feeds a ``BroadcastHub``;
+every connected browser is a ``Subscriber`` on that hub instead of opening its
+own realtime channel.
+
+* Each event is serialised once and shared by every subscriber.
+* Subscribers hold a bounded buffer. Pending events for the same row are
+  coalesced (only the latest is delivered) and, when the buffer is still full,
+  the oldest events are dropped and the client is told to resync.
+* The hub keeps a short history so a reconnecting ``EventSource`` can resume
+  from its ``Last-Event-ID``.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from functools import partial
+
+try:
+    from realtime.connection import Socket
+except ImportError:  # optional: ships with supabase, only needed for the upstream feed
+    Socket = None
+
+logger = logging.getLogger(__name__)
+
+REALTIME_CLIENT_BUFFER = int(os.getenv('REALTIME_CLIENT_BUFFER', '256'))
+REALTIME_HISTORY_SIZE = int(os.getenv('REALTIME_HISTORY_SIZE', '1000'))
+REALTIME_HEARTBEAT_INTERVAL = float(os.getenv('REALTIME_HEARTBEAT_INTERVAL', '30'))
+
+
+def sse_message(payload, event_id=None):
+    """Format ``payload`` as one SSE message"""
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}data: {json.dumps(payload, default=str)}\n\n'
+
+
+class HubEvent:
+    __slots__ = ('id', 'key', 'message')
+
+    def __init__(self, event_id, key, message):
+        self.id = event_id
+        self.key = key
+        self.message = message
+
+
+class Subscriber:
+    """One connected client: a bounded, coalescing buffer of pending events"""
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self._pending = OrderedDict()  # coalesce key -> HubEvent
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.coalesced = 0
+        self.delivered = 0
+
+    def offer(self, event):
+        with self._cond:
+            if event.key in self._pending:
+                # A newer change to the same row supersedes the queued one
+                del self._pending[event.key]
+                self.coalesced += 1
+            elif len(self._pending) >= self.buffer_size:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[event.key] = event
+            self._cond.notify()
+
+    def drain(self, timeout):
+        """Wait up to ``timeout`` seconds and return ``(events, dropped_since_last_drain)``"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        self.delivered += len(events)
+        return events, dropped
+
+
+class BroadcastHub:
+    """Fans published events out to every subscriber of this process"""
+
+    def __init__(self, buffer_size=REALTIME_CLIENT_BUFFER, history_size=REALTIME_HISTORY_SIZE,
+                 heartbeat_interval=REALTIME_HEARTBEAT_INTERVAL, on_first_subscriber=None):
+        self.buffer_size = buffer_size
+        self.heartbeat_interval = heartbeat_interval
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._on_first_subscriber = on_first_subscriber
+        self.published = 0
+
+    def publish(self, event_type, payload, row_id=None):
+        """Send ``payload`` to every subscriber; events sharing ``(event_type, row_id)`` coalesce"""
+        with self._lock:
+            self._last_id += 1
+            event_id = self._last_id
+            key = (event_type, row_id) if row_id is not None else event_id
+            event = HubEvent(event_id, key, sse_message(payload, event_id))
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            subscriber.offer(event)
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        """Register a client, replaying events after ``last_event_id`` when it reconnects"""
+        subscriber = Subscriber(self.buffer_size)
+        with self._lock:
+            first = not self._subscribers
+            self._subscribers.add(subscriber)
+            if last_event_id is not None:
+                missed = [e for e in self._history if e.id > last_event_id]
+                oldest = self._history[0].id if self._history else self._last_id + 1
+                # Ids newer than ours mean the process restarted; older than the
+                # history window means events were lost. Either way, resync.
+                if last_event_id > self._last_id or last_event_id + 1 < oldest:
+                    subscriber.dropped += 1
+                for event in missed:
+                    subscriber.offer(event)
+        if first and self._on_first_subscriber:
+            self._on_first_subscriber()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber, greeting=None):
+        """SSE generator for one client; unsubscribes when the client goes away"""
+        try:
+            if greeting:
+                yield sse_message(greeting)
+            while True:
+                events, dropped = subscriber.drain(self.heartbeat_interval)
+                if dropped:
+                    yield sse_message({
+                        'type': 'resync',
+                        'dropped': dropped,
+                        'timestamp': datetime.utcnow().isoformat()
+                    })
+                if not events and not dropped:
+                    yield sse_message({
+                        'type': 'heartbeat',
+                        'timestamp': datetime.utcnow().isoformat()
+                    })
+                for event in events:
+                    yield event.message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'last_event_id': self._last_id,
+                'history': len(self._history),
+            }
+
+
+class SupabaseRealtimeSource:
+    """One Realtime websocket with a postgres_changes channel per table, feeding ``on_change``.
+
+    ``tables`` maps table name to the hub event type. The socket runs on its
+    own thread and event loop and reconnects with backoff.
+    """
+
+    def __init__(self, url, key, tables, on_change, max_backoff=60):
+        self.ws_url = url.replace('https://', 'wss://').replace('http://', 'ws://').rstrip('/') \
+            + f'/realtime/v1/websocket?apikey={key}&vsn=1.0.0'
+        self.tables = tables
+        self.on_change = on_change
+        self.max_backoff = max_backoff
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            if Socket is None:
+                logger.warning("realtime package not installed; realtime analytics stream has no upstream")
+                return
+            self._thread = threading.Thread(target=self._run, name='supabase-realtime', daemon=True)
+            self._thread.start()
+
+    def _handle(self, event_type, payload):
+        data = payload.get('data', payload) if isinstance(payload, dict) else {}
+        change = {'event_type': data.get('type') or data.get('eventType')}
+        if data.get('record'):
+            change['new'] = data['record']
+        change['old'] = data.get('old_record') or {}
+        row = change.get('new') or change['old']
+        self.on_change(event_type, change, row.get('id'))
+
+    def _run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        backoff = 1
+        while True:
+            try:
+                # The client's own reconnect rejoins channels without the
+                # postgres_changes config, so events would stop arriving;
+                # instead listen() returns on close and this loop rejoins
+                socket = Socket(self.ws_url, auto_reconnect=False)
+                socket.connect()
+                loop = asyncio.get_event_loop()
+                for table, event_type in self.tables.items():
+                    topic = f'realtime:{table}'
+                    channel = socket.set_channel(topic)
+                    channel.on('postgres_changes', partial(self._handle, event_type))
+                    loop.run_until_complete(socket.ws_connection.send(json.dumps({
+                        'topic': topic,
+                        'event': 'phx_join',
+                        'payload': {'config': {'postgres_changes': [
+                            {'event': '*', 'schema': 'public', 'table': table}
+                        ]}},
+                        'ref': None
+                    })))
+                backoff = 1
+                socket.listen()
+                logger.warning(f"Realtime connection closed, reconnecting in {backoff}s")
+            except Exception as e:
+                logger.warning(f"Realtime connection failed, retrying in {backoff}s: {str(e)}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+# Tables watched by /api/realtime/analytics and the event type each produces
+ANALYTICS_TABLES = {
+    'admissions': 'admission_update',
+    'grades': 'performance_update',
+    'bookings': 'utilization_update',
+}
+
+
+def create_event_payload(event_type, change):
+    """The message body the analytics dashboard expects for a table change"""
+    return {
+        'type': event_type,
+        'event': change['event_type'],
+        'data': change['new'] if 'new' in change else change['old'],
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def _publish_analytics_change(event_type, change, row_id):
+    analytics_hub.publish(event_type, create_event_payload(event_type, change), row_id=row_id)
+
+
+_analytics_source = None
+_analytics_source_lock = threading.Lock()
+
+
+def _start_analytics_source():
+    """Open the process-wide upstream subscription when the first client connects"""
+    global _analytics_source
+    with _analytics_source_lock:
+        if _analytics_source is None:
+            from supabase_client import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+            _analytics_source = SupabaseRealtimeSource(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY,
+                                                       ANALYTICS_TABLES, _publish_analytics_change)
+    _analytics_source.start()
+
+
+analytics_hub = BroadcastHub(on_first_subscriber=_start_analytics_source)
@@ -0,0 +1,185 @@
+"""
+Read-through cache for small reference tables.
+
+Write handlers validate foreign keys against courses, departments, subjects and
+fee_structures on almost every request. Those tables change rarely, so each
+worker keeps a full copy in memory for ``REFERENCE_CACHE_TTL`` seconds and
+answers existence checks without a round trip.
+
+Handlers that modify a reference table call ``reference_cache.invalidate`` (or
+use the ``invalidates_reference`` decorator). When ``REFERENCE_CACHE_REDIS_URL``
+is set, invalidations bump a version counter in Redis so every worker drops its
+copy on the next lookup; otherwise the version lives in process memory.
+"""
+import os
+import time
+import logging
+import threading
+from functools import wraps
+
+from flask import request
+
+try:
+    import redis
+except ImportError:  # optional: only needed for the shared backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_TABLES = ('courses', 'departments', 'subjects', 'fee_structures')
+REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', '300'))
+REFERENCE_CACHE_REDIS_URL = os.getenv('REFERENCE_CACHE_REDIS_URL')
+PAGE_SIZE = 1000  # PostgREST default row cap
+
+
+class LocalVersionBackend:
+    """Per-process table versions; enough for a single worker."""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_version(self, table):
+        return self._versions.get(table, 0)
+
+    def bump(self, table):
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+
+class RedisVersionBackend:
+    """Table versions kept in Redis so invalidations reach every worker."""
+
+    def __init__(self, url, prefix='refcache:version:'):
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get_version(self, table):
+        value = self._redis.get(self._prefix + table)
+        return int(value) if value else 0
+
+    def bump(self, table):
+        self._redis.incr(self._prefix + table)
+
+
+def _default_backend():
+    if REFERENCE_CACHE_REDIS_URL:
+        if redis is None:
+            logger.warning("REFERENCE_CACHE_REDIS_URL is set but redis is not installed; "
+                           "using per-process reference cache")
+        else:
+            try:
+                return RedisVersionBackend(REFERENCE_CACHE_REDIS_URL)
+            except Exception as e:
+                logger.warning(f"Redis unavailable for reference cache: {str(e)}")
+    return LocalVersionBackend()
+
+
+class ReferenceDataCache:
+    """In-process copy of each reference table, keyed by stringified ``id``."""
+
+    def __init__(self, client=None, ttl=REFERENCE_CACHE_TTL, backend=None):
+        self._client = client
+        self.ttl = ttl
+        self.backend = backend or _default_backend()
+        self._tables = {}  # table -> (version, loaded_at, {id: row})
+        self._locks = {table: threading.Lock() for table in REFERENCE_TABLES}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_client import get_supabase
+            self._client = get_supabase()
+        return self._client
+
+    def _backend_version(self, table):
+        try:
+            return self.backend.get_version(table)
+        except Exception as e:
+            # A broken shared backend must not take the write paths down with it
+            logger.warning(f"Reference cache version check failed for {table}: {str(e)}")
+            return None
+
+    def _load(self, table):
+        rows = {}
+        start = 0
+        while True:
+            result = self.client.table(table).select('*').range(start, start + PAGE_SIZE - 1).execute()
+            for row in result.data or []:
+                rows[str(row.get('id'))] = row
+            if not result.data or len(result.data) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    def rows(self, table):
+        """Return ``{id: row}`` for ``table``, loading it if missing, expired or invalidated."""
+        if table not in self._locks:
+            raise ValueError(f"{table} is not a cached reference table")
+
+        version = self._backend_version(table)
+        entry = self._tables.get(table)
+        if entry and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+            return entry[2]
+
+        with self._locks[table]:
+            entry = self._tables.get(table)
+            if entry and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+                return entry[2]
+            rows = self._load(table)
+            self._tables[table] = (version, time.monotonic(), rows)
+            return rows
+
+    def get(self, table, row_id):
+        """Return the cached row, re-checking the database once when it is not cached."""
+        if row_id is None:
+            return None
+        row = self.rows(table).get(str(row_id))
+        if row is not None:
+            self.hits += 1
+            return row
+
+        # The row may have been created after our copy was loaded (e.g. by a
+        # worker without the shared backend, or directly in Supabase).
+        self.misses += 1
+        result = self.client.table(table).select('*').eq('id', row_id).execute()
+        if result.data:
+            self._tables.pop(table, None)
+            return result.data[0]
+        return None
+
+    def exists(self, table, row_id):
+        return self.get(table, row_id) is not None
+
+    def invalidate(self, *tables):
+        for table in tables or REFERENCE_TABLES:
+            self._tables.pop(table, None)
+            try:
+                self.backend.bump(table)
+            except Exception as e:
+                logger.warning(f"Reference cache invalidation failed for {table}: {str(e)}")
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'tables': {table: len(entry[2]) for table, entry in self._tables.items()},
+        }
+
+
+reference_cache = ReferenceDataCache()
+
+
+def invalidates_reference(*tables):
+    """Invalidate ``tables`` after any non-GET request handled by the view."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                return f(*args, **kwargs)
+            finally:
+                if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+                    reference_cache.invalidate(*tables)
+        return wrapper
+    return decorator
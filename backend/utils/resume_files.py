@@ -0,0 +1,142 @@
+"""
+Resume file storage and text extraction.
+
+``store_upload`` copies an uploaded file to disk in ``UPLOAD_CHUNK_SIZE``
+chunks and hashes it on the way, so the upload is read exactly once and an
+oversized file is rejected as soon as it crosses ``RESUME_MAX_BYTES``.
+Files are stored under ``RESUME_UPLOAD_DIR`` named by their SHA-256; a
+re-upload of the same bytes reuses the existing file.
+
+``extract_resume_text`` reads PDF, DOCX and plain-text resumes. PDF needs
+PyPDF2 or pypdf; DOCX uses docx2txt when installed and otherwise reads the
+document XML directly. Legacy .doc files yield no text.
+"""
+import os
+import re
+import uuid
+import zipfile
+import hashlib
+import logging
+from xml.etree import ElementTree
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        PdfReader = None
+
+try:
+    import docx2txt
+except ImportError:
+    docx2txt = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESUME_UPLOAD_DIR = os.getenv('RESUME_UPLOAD_DIR', os.path.join(BACKEND_DIR, 'uploads', 'resumes'))
+RESUME_MAX_BYTES = int(os.getenv('RESUME_MAX_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class ResumeTooLargeError(ValueError):
+    """Raised by ``store_upload`` once the upload exceeds the size limit"""
+
+
+def store_upload(stream, extension, upload_dir=None, max_bytes=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Stream ``stream`` to ``<upload_dir>/<sha256><extension>``
+
+    Returns ``path``, ``stored_name``, ``size``, ``sha256``, ``md5`` and
+    ``created`` (False when a file with the same content was already stored).
+    Raises ``ResumeTooLargeError`` for oversized uploads and ``ValueError``
+    for empty ones; nothing is left on disk in either case.
+    """
+    upload_dir = upload_dir or RESUME_UPLOAD_DIR
+    max_bytes = RESUME_MAX_BYTES if max_bytes is None else max_bytes
+    os.makedirs(upload_dir, exist_ok=True)
+
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    tmp_path = os.path.join(upload_dir, f'.upload-{uuid.uuid4().hex}')
+    try:
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLargeError(
+                        f"File size exceeds maximum allowed size ({max_bytes} bytes)")
+                sha256.update(chunk)
+                md5.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise ValueError("Uploaded file is empty")
+
+        digest = sha256.hexdigest()
+        stored_name = f'{digest}{extension.lower()}'
+        path = os.path.join(upload_dir, stored_name)
+        created = not os.path.exists(path)
+        if created:
+            os.replace(tmp_path, path)
+        return {
+            'path': path,
+            'stored_name': stored_name,
+            'size': size,
+            'sha256': digest,
+            'md5': md5.hexdigest(),
+            'created': created,
+        }
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _docx_text(path):
+    if docx2txt is not None:
+        return docx2txt.process(path) or ''
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(f'{_WORD_NS}p'):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f'{_WORD_NS}t' and node.text:
+                parts.append(node.text)
+            elif node.tag == f'{_WORD_NS}tab':
+                parts.append('\t')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+
+def _pdf_text(path):
+    if PdfReader is None:
+        logger.warning("No PDF reader installed (PyPDF2 or pypdf); cannot extract resume text")
+        return ''
+    with open(path, 'rb') as f:
+        reader = PdfReader(f)
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def extract_resume_text(path):
+    """Plain text of a PDF, DOCX or TXT resume; '' if it cannot be read"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.pdf':
+            text = _pdf_text(path)
+        elif extension == '.docx':
+            text = _docx_text(path)
+        elif extension == '.txt':
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        else:
+            return ''
+    except Exception as e:
+        logger.warning(f"Could not extract text from {os.path.basename(path)}: {str(e)}")
+        return ''
+    return re.sub(r'[ \t]+\n', '\n', text).strip()
@@ -0,0 +1,139 @@
+"""
+Cache of AI-generated career roadmap templates.
+
+Students mostly ask for the same few career interests, so a roadmap is
+generated once per (normalised interest, week count) and reused: "Data
+Scientist", "data scientist " and "DATA  SCIENTIST" share one template.
+Templates are kept in memory for ``ROADMAP_TEMPLATE_TTL`` seconds (at most
+``ROADMAP_TEMPLATE_CACHE_SIZE`` of them) and in the
+``career_roadmap_templates`` table
+(migrations/20261017_add_career_roadmap_templates.sql), so a restart or
+another worker reuses them instead of calling the model again. Concurrent
+requests for the same template share one generation.
+
+Fallback roadmaps (model unavailable or failed) are returned but neither
+stored nor kept in memory, so the next request tries the model again.
+"""
+import os
+import re
+import copy
+import logging
+from datetime import datetime, timedelta
+
+from utils.swr_cache import StaleWhileRevalidateCache
+
+try:
+    from postgrest.types import ReturnMethod
+except ImportError:
+    ReturnMethod = None
+
+logger = logging.getLogger(__name__)
+
+ROADMAP_TEMPLATE_TTL = int(os.getenv('ROADMAP_TEMPLATE_TTL', str(7 * 24 * 3600)))
+ROADMAP_TEMPLATE_CACHE_SIZE = int(os.getenv('ROADMAP_TEMPLATE_CACHE_SIZE', '256'))
+
+
+def normalize_interest(value):
+    """Case- and whitespace-insensitive form of a career interest"""
+    # Keep characters that carry meaning in tech names (C++, C#, Node.js)
+    return ' '.join(re.sub(r'[^\w+#.]+', ' ', str(value or '')).split()).strip('.').casefold()
+
+
+def template_key(career_interest, weeks):
+    return f'{normalize_interest(career_interest)}|{int(weeks)}'
+
+
+class RoadmapTemplateCache:
+    """Roadmap templates by normalised interest and week count
+
+    ``generate(career_interest, weeks)`` returns ``(steps, ai_generated)``.
+    """
+
+    def __init__(self, generate, client=None, ttl=ROADMAP_TEMPLATE_TTL,
+                 max_entries=ROADMAP_TEMPLATE_CACHE_SIZE):
+        self.generate = generate
+        self.ttl = ttl
+        self._client = client
+        self._cache = StaleWhileRevalidateCache(ttl, max_entries=max_entries)
+        self.generated = 0
+        self.stored_hits = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_client import get_supabase
+            self._client = get_supabase()
+        return self._client
+
+    def _load_stored(self, key):
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.ttl)).isoformat()
+        rows = self.client.table('career_roadmap_templates').select('steps') \
+            .eq('template_key', key).gte('created_at', cutoff).limit(1).execute().data
+        return rows[0]['steps'] if rows else None
+
+    def _store(self, key, career_interest, weeks, steps):
+        row = {
+            'template_key': key,
+            'career_interest': career_interest,
+            'weeks': weeks,
+            'steps': steps,
+            'created_at': datetime.utcnow().isoformat(),
+        }
+        kwargs = {'on_conflict': 'template_key'}
+        if ReturnMethod is not None:
+            kwargs['returning'] = ReturnMethod.minimal
+        self.client.table('career_roadmap_templates').upsert(row, **kwargs).execute()
+
+    def _load(self, key, career_interest, weeks):
+        try:
+            steps = self._load_stored(key)
+            if steps:
+                self.stored_hits += 1
+                return {'steps': steps, 'ai_generated': True}
+        except Exception as e:
+            logger.warning(f"Could not read stored roadmap template {key!r}: {str(e)}")
+
+        self.generated += 1
+        steps, ai_generated = self.generate(career_interest, weeks)
+        if ai_generated:
+            try:
+                self._store(key, career_interest, weeks, steps)
+            except Exception as e:
+                logger.warning(f"Could not store roadmap template {key!r}: {str(e)}")
+        return {'steps': steps, 'ai_generated': ai_generated}
+
+    def get(self, career_interest, weeks):
+        """``(steps, ai_generated)``; ``steps`` is a copy the caller may modify"""
+        career_interest = ' '.join(str(career_interest).split())
+        key = template_key(career_interest, weeks)
+        template = self._cache.get(key, lambda: self._load(key, career_interest, weeks))
+        if not template['ai_generated']:
+            self._cache.invalidate(key)
+        return copy.deepcopy(template['steps']), template['ai_generated']
+
+    def invalidate(self, career_interest=None, weeks=10):
+        """Drop one template from memory, or all of them"""
+        self._cache.invalidate(template_key(career_interest, weeks) if career_interest else None)
+
+    def stats(self):
+        return {**self._cache.stats(), 'generated': self.generated, 'stored_hits': self.stored_hits}
+
+
+def personalize_roadmap(steps, career_interest, description=''):
+    """Fit a cached template to one student's request
+
+    Uses the student's own wording of the interest in topics and adds their
+    description as the focus of the first week.
+    """
+    career_interest = ' '.join(str(career_interest).split())
+    pattern = re.compile(r'\s+'.join(re.escape(word) for word in career_interest.split()), re.IGNORECASE) \
+        if career_interest else None
+    for number, step in enumerate(steps, start=1):
+        step['week_no'] = number
+        for field in ('topic', 'description', 'milestone'):
+            if pattern and isinstance(step.get(field), str):
+                step[field] = pattern.sub(lambda match: career_interest, step[field])
+    description = (description or '').strip()
+    if steps and description:
+        steps[0]['description'] = f"{steps[0]['description']} Keep your goal in mind: {description}"
+    return steps
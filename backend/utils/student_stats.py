@@ -0,0 +1,147 @@
+"""
+Student statistics shared by every dashboard endpoint.
+
+``student_stats.get()`` returns one snapshot with students by gender, status,
+course, year and semester plus the faculty and department totals. The
+snapshot is loaded with the ``get_student_stats`` RPC
+(migrations/20261017_add_student_stats_function.sql), served from memory for
+``STUDENT_STATS_TTL`` seconds and refreshed in the background for
+``STUDENT_STATS_STALE_TTL`` seconds after that. If a load fails, the last good
+snapshot is returned with ``partial: True``.
+
+Until the RPC is deployed the same rows are computed by paging through
+``students`` once.
+"""
+import os
+import logging
+from datetime import datetime, timedelta
+
+from utils.swr_cache import StaleWhileRevalidateCache
+
+logger = logging.getLogger(__name__)
+
+STUDENT_STATS_TTL = int(os.getenv('STUDENT_STATS_TTL', '60'))
+STUDENT_STATS_STALE_TTL = int(os.getenv('STUDENT_STATS_STALE_TTL', '600'))
+PAGE_SIZE = 1000  # PostgREST default row cap
+
+
+def normalize_gender(value):
+    """'male', 'female' or 'other'; matched exactly, so 'female' is never 'male'"""
+    gender = str(value or '').strip().lower()
+    if gender in ('male', 'm'):
+        return 'male'
+    if gender in ('female', 'f'):
+        return 'female'
+    return 'other'
+
+
+def _key(value):
+    return str(value).strip() if value is not None else None
+
+
+class StudentStatsService:
+    """TTL snapshot of the student statistics with a stale fallback"""
+
+    def __init__(self, client=None, ttl=STUDENT_STATS_TTL, stale_ttl=STUDENT_STATS_STALE_TTL):
+        self._client = client
+        self._cache = StaleWhileRevalidateCache(ttl, stale_ttl)
+        self._last = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_client import get_supabase
+            self._client = get_supabase()
+        return self._client
+
+    def _rows_from_rpc(self):
+        result = self.client.rpc('get_student_stats', {}).execute()
+        return [(row['dimension'], row['value'], row['students']) for row in result.data or []]
+
+    def _count(self, table):
+        try:
+            return self.client.table(table).select('id', count='exact').limit(1).execute().count or 0
+        except Exception as e:
+            logger.warning(f"Could not count {table}: {str(e)}")
+            return 0
+
+    def _rows_by_scan(self):
+        """What the RPC returns, computed from one paged read of ``students``"""
+        counts = {}
+        total = recent = 0
+        week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        offset = 0
+        while True:
+            page = self.client.table('students') \
+                .select('id, gender, status, course_id, year, current_semester, created_at') \
+                .order('id').range(offset, offset + PAGE_SIZE - 1).execute().data or []
+            for student in page:
+                total += 1
+                if str(student.get('created_at') or '') >= week_ago:
+                    recent += 1
+                status = student.get('status')
+                for dimension, value in (
+                    ('gender', normalize_gender(student.get('gender'))),
+                    ('status', status.strip().lower() if status else None),
+                    ('course', _key(student.get('course_id'))),
+                    ('year', _key(student.get('year'))),
+                    ('semester', _key(student.get('current_semester'))),
+                ):
+                    counts[(dimension, value)] = counts.get((dimension, value), 0) + 1
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        rows = [(dimension, value, count) for (dimension, value), count in counts.items()]
+        rows += [('total', 'students', total), ('total', 'recent', recent),
+                 ('total', 'faculty', self._count('faculty')),
+                 ('total', 'departments', self._count('departments'))]
+        return rows
+
+    def _load(self):
+        try:
+            rows = self._rows_from_rpc()
+        except Exception as e:
+            logger.warning(f"get_student_stats RPC unavailable, scanning students: {str(e)}")
+            rows = self._rows_by_scan()
+
+        snapshot = {
+            'total': 0,
+            'recent': 0,
+            'faculty': 0,
+            'departments': 0,
+            'gender': {'male': 0, 'female': 0, 'other': 0},
+            'by_status': {},
+            'by_course': {},
+            'by_year': {},
+            'by_semester': {},
+        }
+        buckets = {'gender': 'gender', 'status': 'by_status', 'course': 'by_course',
+                   'year': 'by_year', 'semester': 'by_semester'}
+        for dimension, value, count in rows:
+            count = int(count or 0)
+            if dimension == 'total':
+                snapshot['total' if value == 'students' else value] = count
+            elif dimension in buckets and value is not None:
+                snapshot[buckets[dimension]][value] = count
+        snapshot['generated_at'] = datetime.utcnow().isoformat()
+        self._last = snapshot
+        return snapshot
+
+    def get(self):
+        """The current snapshot; raises only if no snapshot was ever loaded"""
+        try:
+            return self._cache.get('student_stats', self._load)
+        except Exception as e:
+            if self._last is None:
+                raise
+            logger.warning(f"Serving last student stats snapshot after load failure: {str(e)}")
+            return {**self._last, 'partial': True, 'error_details': str(e)}
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+student_stats = StudentStatsService()
@@ -0,0 +1,122 @@
+"""
+Small in-process cache with stale-while-revalidate semantics.
+
+A value is served from memory for ``ttl`` seconds. After that, and for up to
+``stale_ttl`` more seconds, the stale value is still returned immediately while
+one background thread reloads it; only a request that finds no value at all
+(or one older than ``ttl + stale_ttl``) waits for the loader. Concurrent
+callers for the same key share a single load. With ``max_entries`` set, the
+least recently loaded keys are evicted once the cache grows past it.
+Eviction only drops values: a key's lock lives for as long as some caller
+holds or waits for it, so a load in progress is never duplicated.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    """Keyed snapshot cache; ``get(key, loader)`` never runs ``loader`` twice at once."""
+
+    def __init__(self, ttl, stale_ttl=0, max_entries=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (loaded_at, value)
+        self._locks = {}  # key -> [lock, callers holding or waiting for it]
+        self._refreshing = set()
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def _lock_for(self, key):
+        with self._guard:
+            slot = self._locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._guard:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._locks[key]
+
+    def _load(self, key, loader):
+        value = loader()
+        self._entries[key] = (time.monotonic(), value)
+        if self.max_entries and len(self._entries) > self.max_entries:
+            self._evict()
+        return value
+
+    def _evict(self):
+        with self._guard:
+            excess = len(self._entries) - self.max_entries
+            if excess <= 0:
+                return
+            oldest = sorted(self._entries.items(), key=lambda item: item[1][0])[:excess]
+            for key, _ in oldest:
+                self._entries.pop(key, None)
+            self.evictions += len(oldest)
+
+    def _refresh_in_background(self, key, loader):
+        with self._guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with self._lock_for(key):
+                    self._load(key, loader)
+            except Exception as e:
+                # Keep serving the stale value; the next stale read retries
+                logger.warning(f"Background refresh of {key!r} failed: {str(e)}")
+            finally:
+                with self._guard:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"swr-refresh-{key}", daemon=True).start()
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` when needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return entry[1]
+
+        with self._lock_for(key):
+            # Another request may have loaded it while we waited
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return self._load(key, loader)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'keys': len(self._entries),
+        }